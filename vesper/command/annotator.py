@@ -1,8 +1,24 @@
 """Module containing class `Annotator`."""
 
 
+from collections import defaultdict
+
+from django.db import transaction
+
 from vesper.django.app.models import StringAnnotation
 import vesper.django.app.model_utils as model_utils
+import vesper.util.archive_lock as archive_lock
+import vesper.util.time_utils as time_utils
+
+
+# Maximum number of buffered annotations, i.e. annotations added with
+# the `Annotator._buffer_annotation` method. When the buffer is full,
+# its annotations are written to the archive in a single transaction.
+# This bounds both the size of the transaction and the number of clip
+# IDs included in any one query (the maximum number of host parameters
+# in an SQLite query on Windows is somewhere between 900 and 1000, and
+# 900 seems to work).
+_MAX_BUFFERED_ANNOTATION_COUNT = 900
 
 
 class Annotator:
@@ -19,6 +35,10 @@ class Annotator:
         self._creating_job = creating_job
         self._creating_processor = creating_processor
         
+        # Mapping from (clip ID, annotation info) pairs to buffered
+        # annotation values.
+        self._buffered_annotations = {}
+        
         
     def begin_annotations(self):
         pass
@@ -29,7 +49,7 @@ class Annotator:
     
     
     def end_annotations(self):
-        pass
+        self._flush_annotations()
     
     
     def _annotate(self, clip, annotation_value):
@@ -41,6 +61,71 @@ class Annotator:
             creating_processor=self._creating_processor)
 
 
+    def _buffer_annotation(
+            self, clip, annotation_value, annotation_info=None):
+        
+        """
+        Buffers an annotation for later writing to the archive.
+        
+        This method is an alternative to `_annotate` for annotators that
+        annotate many clips. Buffered annotations are written to the
+        archive in batches by `_flush_annotations`, with one archive
+        transaction per batch and one `model_utils.annotate_clips` call
+        per distinct annotation and value in the batch. This is much
+        faster than writing annotations one at a time.
+        
+        Buffered annotations are flushed automatically when the buffer
+        is full and by `end_annotations`. An annotator that buffers
+        annotations in its `annotate_clips` method should also flush
+        them at the end of that method.
+        
+        If `annotation_info` is `None`, the annotation is of this
+        annotator's annotation.
+        """
+        
+        if annotation_info is None:
+            annotation_info = self._annotation_info
+            
+        # If a clip is annotated more than once with the same annotation,
+        # the last value wins, just as it would if we wrote the
+        # annotations immediately.
+        key = (clip.id, annotation_info)
+        self._buffered_annotations.pop(key, None)
+        self._buffered_annotations[key] = annotation_value
+        
+        if len(self._buffered_annotations) >= _MAX_BUFFERED_ANNOTATION_COUNT:
+            self._flush_annotations()
+            
+            
+    def _flush_annotations(self):
+        
+        """Writes buffered annotations to the archive."""
+        
+        if len(self._buffered_annotations) == 0:
+            return
+        
+        # Group clip IDs by annotation info and value.
+        clip_id_lists = defaultdict(list)
+        for (clip_id, info), value in self._buffered_annotations.items():
+            clip_id_lists[(info, value)].append(clip_id)
+            
+        creation_time = time_utils.get_utc_now()
+        
+        with archive_lock.atomic():
+            
+            with transaction.atomic():
+                
+                for (info, value), clip_ids in clip_id_lists.items():
+                    
+                    model_utils.annotate_clips(
+                        clip_ids, info, value, creation_time,
+                        creating_user=self._creating_user,
+                        creating_job=self._creating_job,
+                        creating_processor=self._creating_processor)
+                    
+        self._buffered_annotations = {}
+        
+
     def _tag(self, clip, tag_info):
         
         model_utils.tag_clip(
@@ -58,4 +143,34 @@ class Annotator:
             return None
         else:
             return annotation.value
-    
\ No newline at end of file
+
+
+    def _get_annotation_values(self, clips, annotation_info=None):
+
+        """
+        Gets annotation values for the specified clips in bulk.
+
+        This method gets the values of the annotation described by
+        `annotation_info`, or of this annotator's annotation if
+        `annotation_info` is `None`. It uses far fewer queries than
+        calling `_get_annotation_value` for each clip.
+
+        Returns a mapping from clip IDs to annotation values. Clips that
+        do not have the annotation are omitted from the mapping.
+        """
+
+        if annotation_info is None:
+            annotation_info = self._annotation_info
+
+        return model_utils.get_clip_annotation_values(clips, annotation_info)
+
+
+    def _get_clip_types(self, clips):
+
+        """
+        Gets the types of the specified clips in bulk.
+
+        Returns a mapping from clip IDs to clip types.
+        """
+
+        return model_utils.get_clip_types(clips)
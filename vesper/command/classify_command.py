@@ -5,10 +5,12 @@ import logging
 import time
 
 from vesper.command.command import Command
+from vesper.django.app.clip_iterator import ClipIterator
 from vesper.django.app.models import AnnotationInfo, Job, Processor
 from vesper.singleton.extension_manager import extension_manager
 import vesper.command.command_utils as command_utils
 import vesper.django.app.model_utils as model_utils
+import vesper.django.app.query_utils as query_utils
 import vesper.util.text_utils as text_utils
 
 
@@ -41,44 +43,55 @@ class ClassifyCommand(Command):
         total_visited_count = 0
         total_classified_count = 0
 
+        metrics = job_info.metrics
+        
+        # Creating a classifier can take a while, for example if it
+        # loads a model, so we make it its own phase.
+        metrics.start_phase('Create classifier')
         classifier = self._create_classifier(job_info.job_id)
         
         classifier.begin_annotations()
     
-        value_tuples = self._create_clip_query_values_iterator()
+        # Get clips and clip counts for each station, mic output, and
+        # detector before classifying any clips, so we know the total
+        # number of clips to visit.
+        clip_sets = self._get_clip_sets()
+        clip_count = sum(sum(s[-1].values()) for s in clip_sets)
         
-        tag_name = model_utils.get_clip_query_tag_name(self._tag_name)
+        metrics.start_phase('Classify clips', clip_count, 'clips')
  
-        for station, mic_output, date, detector in value_tuples:
-            
-            clips = _get_clips(station, mic_output, date, detector, tag_name)
+        for station, mic_output, detector, clips, clip_counts in clip_sets:
             
-            count = clips.count()
-            count_text = text_utils.create_count_text(count, 'clip')
+            # Stream clips for all dates a page at a time.
+            for date, date_clips in _get_clips_by_date(clips):
             
-            _logger.info(
-                f'Classifier will visit {count_text} for station '
-                f'"{station.name}", mic output "{mic_output.name}", '
-                f'date {date}, and detector "{detector.name}".')
-            
-            try:
-                visited_count, classified_count = \
-                    _classify_clips(clips, classifier)
-                    
-            except Exception:
-                _logger.error(
-                    'Clip classification failed. See below for exception '
-                    'traceback.')
-                raise
-
-            total_visited_count += visited_count
-            total_classified_count += classified_count
+                count = clip_counts.get(date, 0)
+                count_text = text_utils.create_count_text(count, 'clip')
+                
+                _logger.info(
+                    f'Classifier will visit {count_text} for station '
+                    f'"{station.name}", mic output "{mic_output.name}", '
+                    f'date {date}, and detector "{detector.name}".')
+                
+                try:
+                    visited_count, classified_count = \
+                        _classify_clips(date_clips, classifier, metrics)
+                        
+                except Exception:
+                    _logger.error(
+                        'Clip classification failed. See below for '
+                        'exception traceback.')
+                    raise
+    
+                total_visited_count += visited_count
+                total_classified_count += classified_count
             
+        metrics.start_phase('End annotations')
         classifier.end_annotations()
     
         elapsed_time = time.time() - start_time
         timing_text = command_utils.get_timing_text(
-            elapsed_time, classified_count, 'clips')
+            elapsed_time, total_classified_count, 'clips')
                 
         _logger.info(
             f'Command classified a total of {total_classified_count} '
@@ -101,16 +114,43 @@ class ClassifyCommand(Command):
                 e, 'Classifier construction', 'The archive was not modified.')
         
 
-    def _create_clip_query_values_iterator(self):
+    def _get_clip_set_query_values(self):
         
         try:
-            return model_utils.create_clip_query_values_iterator(
-                self._sm_pair_ui_names, self._start_date, self._end_date,
-                self._detector_names)
+            return model_utils.get_clip_set_query_values(
+                self._sm_pair_ui_names, self._detector_names)
             
         except Exception as e:
             command_utils.log_and_reraise_fatal_exception(
-                e, 'Clip query values iterator construction')
+                e, 'Clip set query values construction')
+    
+    
+    def _get_clip_sets(self):
+        
+        """
+        Gets (station, mic output, detector, clips, clip counts)
+        tuples for this command's clip set, where the clips are a
+        query set for all dates and the clip counts are a mapping from
+        dates to numbers of clips.
+        """
+        
+        tag_name = model_utils.get_clip_query_tag_name(self._tag_name)
+        
+        clip_sets = []
+        
+        for station, mic_output, detector in \
+                self._get_clip_set_query_values():
+            
+            # Get clips for all dates with one query.
+            clips = _get_clips(
+                station, mic_output, self._start_date, self._end_date,
+                detector, tag_name)
+            clip_counts = model_utils.get_clip_counts_by_date(clips)
+            
+            clip_sets.append(
+                (station, mic_output, detector, clips, clip_counts))
+        
+        return clip_sets
             
             
 def _get_annotation_info(name):
@@ -155,16 +195,35 @@ def _create_classifier(name, annotation_info, job, processor):
     return cls(annotation_info, creating_job=job, creating_processor=processor)
     
     
-def _get_clips(station, mic_output, date, detector, tag_name):
+def _get_clips(
+        station, mic_output, start_date, end_date, detector, tag_name):
     
     try:
         
         return model_utils.get_clips(
             station=station,
             mic_output=mic_output,
-            date=date,
+            start_date=start_date,
+            end_date=end_date,
             detector=detector,
-            tag_name=tag_name)
+            tag_name=tag_name,
+            order=False)
+        
+    except Exception as e:
+        command_utils.log_and_reraise_fatal_exception(e, 'Clip query')
+        
+        
+_CLIP_RELATED_FIELDS = (
+    'station', 'mic_output', 'recording_channel__recording',
+    'creating_processor')
+
+
+def _get_clips_by_date(clips):
+    
+    clips = ClipIterator(clips, _CLIP_RELATED_FIELDS)
+    
+    try:
+        yield from model_utils.group_clips_by_date(clips)
         
     except Exception as e:
         command_utils.log_and_reraise_fatal_exception(e, 'Clip query')
@@ -173,7 +232,10 @@ def _get_clips(station, mic_output, date, detector, tag_name):
 _LOGGING_PERIOD = 500    # clips
 
 
-def _classify_clips(clips, classifier):
+_CLASSIFICATION_BATCH_SIZE = 1000    # clips
+
+
+def _classify_clips(clips, classifier, metrics):
     
     start_time = time.time()
 
@@ -182,9 +244,7 @@ def _classify_clips(clips, classifier):
     else:
         classify = _classify_clips_individually
         
-    classified_count = classify(clips, classifier)
-
-    visited_count = len(clips)
+    visited_count, classified_count = classify(clips, classifier, metrics)
 
     elapsed_time = time.time() - start_time
     timing_text = command_utils.get_timing_text(
@@ -197,11 +257,25 @@ def _classify_clips(clips, classifier):
     return visited_count, classified_count
 
 
-def _classify_clip_batches(clips, classifier):
-    return classifier.annotate_clips(clips)
+def _classify_clip_batches(clips, classifier, metrics):
+    
+    # Classify clips in batches of bounded size so that we never hold
+    # more than one batch of clips in memory at a time.
+    
+    visited_count = 0
+    classified_count = 0
+    
+    batches = query_utils.get_chunks(clips, _CLASSIFICATION_BATCH_SIZE)
+    
+    for batch in batches:
+        classified_count += classifier.annotate_clips(batch)
+        visited_count += len(batch)
+        metrics.add_progress(len(batch))
+        
+    return visited_count, classified_count
 
 
-def _classify_clips_individually(clips, classifier):
+def _classify_clips_individually(clips, classifier, metrics):
     
     visited_count = 0
     classified_count = 0
@@ -218,8 +292,9 @@ def _classify_clips_individually(clips, classifier):
                 f'Error message was: {str(e)}')
         
         visited_count += 1
+        metrics.add_progress()
         
         if visited_count % _LOGGING_PERIOD == 0:
             _logger.info(f'Visited {visited_count} clips...')
             
-    return classified_count
+    return visited_count, classified_count
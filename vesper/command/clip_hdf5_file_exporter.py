@@ -1,6 +1,7 @@
 """Module containing class `ClipHdf5FileExporter`."""
 
 
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 
@@ -8,11 +9,13 @@ import h5py
 
 from vesper.command.clip_exporter import ClipExporter
 from vesper.command.command import CommandExecutionError
+from vesper.django.app.models import StringAnnotation
 from vesper.singleton.archive import archive
 from vesper.singleton.clip_manager import clip_manager
 from vesper.singleton.preset_manager import preset_manager
 from vesper.util.bunch import Bunch
 import vesper.util.clip_time_interval_utils as clip_time_interval_utils
+import vesper.util.clips_hdf5_file as clips_hdf5_file
 import vesper.util.os_utils as os_utils
 import vesper.command.command_utils as command_utils
 
@@ -107,6 +110,21 @@ _DEFAULT_TIME_INTERVAL = Bunch(
     right_padding=0,
     offset=0)
 
+_DEFAULT_LAYOUT = clips_hdf5_file.CLIP_DATASETS_LAYOUT
+
+_LAYOUTS = (
+    clips_hdf5_file.CLIP_DATASETS_LAYOUT,
+    clips_hdf5_file.COLUMNAR_LAYOUT)
+
+_DEFAULT_READER_COUNT = 8
+"""
+Default number of threads that read clip samples for the columnar
+layout.
+"""
+
+_BATCH_SIZE = 500
+"""Number of clips written at a time for the columnar layout."""
+
 _START_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
 
 _SINGLE_OUTPUT_MIC_NAME_SUFFIX = ' Output'
@@ -117,7 +135,15 @@ _logger = logging.getLogger()
 
 class ClipHdf5FileExporter(ClipExporter):
     
-    """Exports clips to one or more HDF5 files."""
+    """
+    Exports clips to one or more HDF5 files.
+    
+    The `layout` setting of the exporter's settings preset specifies
+    the layout of the "clips" group of each file (see the
+    `vesper.util.clips_hdf5_file` module). For the columnar layout,
+    the exporter writes clips in batches, and gets the samples of the
+    clips of a batch with a pool of `reader_count` threads.
+    """
         
     
     extension_name = 'Clip HDF5 File Exporter'
@@ -136,11 +162,24 @@ class ClipHdf5FileExporter(ClipExporter):
         self._export_to_multiple_files = get('export_to_multiple_files', args)
         self._output_path = get('output_path', args)
     
-        self._time_interval = \
-            _parse_settings_preset(self._settings_preset_name)
+        settings = _parse_settings_preset(self._settings_preset_name)
+        self._time_interval = settings.time_interval
+        self._columnar = \
+            settings.layout == clips_hdf5_file.COLUMNAR_LAYOUT
+        self._reader_count = settings.reader_count
+        
+        self._executor = None
+        self._writer = None
+        self._pending_clips = []
 
 
     def begin_exports(self):
+        
+        if self._columnar:
+            self._executor = ThreadPoolExecutor(
+                self._reader_count,
+                thread_name_prefix='Vesper Clip Sample Reader')
+            
         if not self._export_to_multiple_files:
             self._create_hdf5_file(self._output_path)
 
@@ -161,7 +200,10 @@ class ClipHdf5FileExporter(ClipExporter):
             raise CommandExecutionError(str(e))
         
         # Always create "clips" group in file, even if it will be empty.
-        self._file.create_group('/clips')
+        group = self._file.create_group('/clips')
+        
+        if self._columnar:
+            self._writer = clips_hdf5_file.ColumnarClipWriter(group)
         
     
     def begin_subset_exports(
@@ -187,15 +229,24 @@ class ClipHdf5FileExporter(ClipExporter):
 
     def export(self, clip):
         
+        if self._columnar:
+            
+            # Defer export to next batch write. Clips for which we
+            # cannot get samples are logged and omitted from the
+            # output then.
+            self._pending_clips.append(clip)
+            if len(self._pending_clips) == _BATCH_SIZE:
+                self._write_pending_clips()
+                
+            return True
+        
         annotations = _get_annotations(clip)
 
-        try:
-            samples, start_index = self._get_samples(clip, annotations)
-        except Exception as e:
-            _logger.warning(
-                f'Could not get samples for clip {clip}, so it will '
-                f'not appear in output. Error message was: {e}')
+        result = self._get_samples_or_none(clip, annotations)
+        if result is None:
             return False
+        
+        samples, start_index = result
 
         # Create dataset from clip samples.
         name = '/clips/{:08d}'.format(clip.id)
@@ -203,19 +254,11 @@ class ClipHdf5FileExporter(ClipExporter):
         
         # Set dataset attributes from clip metadata.
         attrs = self._file[name].attrs
-        attrs['clip_id'] = clip.id
-        attrs['station'] = clip.station.name
-        attrs['mic_output'] = clip.mic_output.name
-        attrs['detector'] = clip.creating_processor.name
-        attrs['date'] = str(clip.date)
-        attrs['sample_rate'] = clip.sample_rate
-        attrs['clip_start_time'] = _format_start_time(clip.start_time)
-        attrs['clip_start_index'] = clip.start_index
-        attrs['clip_length'] = clip.length
-        attrs['export_start_index'] = start_index
+        for name, value in _get_metadata(clip, start_index).items():
+            attrs[name] = value
         
         for name, value in annotations.items():
-            name = name.lower().replace(' ', '_')
+            name = _get_annotation_column_name(name)
             try:
                 attrs[name] = value
             except Exception:
@@ -226,6 +269,54 @@ class ClipHdf5FileExporter(ClipExporter):
 
         return True
         
+        
+    def _get_samples_or_none(self, clip, annotations):
+        
+        try:
+            return self._get_samples(clip, annotations)
+        
+        except Exception as e:
+            _logger.warning(
+                f'Could not get samples for clip {clip}, so it will '
+                f'not appear in output. Error message was: {e}')
+            return None
+        
+        
+    def _write_pending_clips(self):
+        
+        clips = self._pending_clips
+        self._pending_clips = []
+        
+        if len(clips) == 0:
+            return
+        
+        annotations = _get_annotations_of_clips(clips)
+        
+        # Get clip samples in parallel. The clip manager is thread-safe.
+        # `Executor.map` yields results in clip order.
+        results = self._executor.map(
+            self._get_samples_or_none, clips,
+            [annotations[c.id] for c in clips])
+        
+        rows = []
+        
+        for clip, result in zip(clips, results):
+            
+            if result is None:
+                continue
+            
+            samples, start_index = result
+            
+            row = _get_metadata(clip, start_index)
+            row['samples'] = samples
+            
+            for name, value in annotations[clip.id].items():
+                row[_get_annotation_column_name(name)] = value
+                
+            rows.append(row)
+            
+        self._writer.append(rows)
+            
  
     def _get_samples(self, clip, annotations):
         
@@ -253,20 +344,40 @@ class ClipHdf5FileExporter(ClipExporter):
 
     def end_subset_exports(self):
         if self._export_to_multiple_files and self._file is not None:
-            self._file.close()
+            self._close_hdf5_file()
 
 
     def end_exports(self):
+        
         if not self._export_to_multiple_files:
-            self._file.close()
+            self._close_hdf5_file()
+            
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+    def _close_hdf5_file(self):
+        
+        if self._columnar:
+            self._write_pending_clips()
+            self._writer.close()
+            self._writer = None
+            
+        self._file.close()
 
 
 def _parse_settings_preset(preset_name):
     
+    settings = Bunch(
+        time_interval=_DEFAULT_TIME_INTERVAL,
+        layout=_DEFAULT_LAYOUT,
+        reader_count=_DEFAULT_READER_COUNT)
+    
     if preset_name == archive.NULL_CHOICE:
         # no preset specified
 
-        return _DEFAULT_TIME_INTERVAL
+        return settings
     
     preset_type = 'Clip HDF5 File Export Settings'
     preset_path = (preset_type, preset_name)
@@ -279,15 +390,36 @@ def _parse_settings_preset(preset_name):
         # preset specifies clip time interval
 
         try:
-            return clip_time_interval_utils.parse_clip_time_interval_spec(
-                time_interval)
+            settings.time_interval = \
+                clip_time_interval_utils.parse_clip_time_interval_spec(
+                    time_interval)
 
         except Exception as e:
             _logger.warning(
                 f'Error parsing {preset_type} preset "{preset_name}". '
-                f'{e} Preset will be ignored.')
+                f'{e} Preset time interval will be ignored.')
 
-    return _DEFAULT_TIME_INTERVAL
+    layout = data.get('layout', _DEFAULT_LAYOUT)
+    
+    if layout in _LAYOUTS:
+        settings.layout = layout
+    else:
+        _logger.warning(
+            f'Unrecognized layout "{layout}" in {preset_type} preset '
+            f'"{preset_name}". Layout "{_DEFAULT_LAYOUT}" will be used '
+            f'instead.')
+        
+    reader_count = data.get('reader_count', _DEFAULT_READER_COUNT)
+    
+    if isinstance(reader_count, int) and reader_count > 0:
+        settings.reader_count = reader_count
+    else:
+        _logger.warning(
+            f'Bad reader count "{reader_count}" in {preset_type} preset '
+            f'"{preset_name}". Reader count {_DEFAULT_READER_COUNT} will '
+            f'be used instead.')
+        
+    return settings
     
 
 def _create_hdf5_file_name(station, mic_output, date, detector):
@@ -300,9 +432,44 @@ def _create_hdf5_file_name(station, mic_output, date, detector):
     return f'{station.name}_{mic_name}_{detector.name}_{date}.h5'
 
 
+def _get_metadata(clip, start_index):
+    return {
+        'clip_id': clip.id,
+        'station': clip.station.name,
+        'mic_output': clip.mic_output.name,
+        'detector': clip.creating_processor.name,
+        'date': str(clip.date),
+        'sample_rate': clip.sample_rate,
+        'clip_start_time': _format_start_time(clip.start_time),
+        'clip_start_index': clip.start_index,
+        'clip_length': clip.length,
+        'export_start_index': start_index
+    }
+
+
 def _get_annotations(clip):
     annotations = clip.string_annotations.select_related('info')
     return dict((a.info.name, a.value) for a in annotations)
+
+
+def _get_annotations_of_clips(clips):
+    
+    """Gets the string annotations of several clips with one query."""
+    
+    annotations = dict((c.id, {}) for c in clips)
+    
+    rows = StringAnnotation.objects.filter(
+        clip_id__in=list(annotations.keys())
+    ).values_list('clip_id', 'info__name', 'value')
+    
+    for clip_id, name, value in rows:
+        annotations[clip_id][name] = value
+        
+    return annotations
+
+
+def _get_annotation_column_name(annotation_name):
+    return annotation_name.lower().replace(' ', '_')
         
         
 def _format_start_time(dt):
@@ -91,6 +91,16 @@ Some examples of (class name, measurement name) pairs:
     (LengthMeasurement, Length)
     (StartIndexMeasurement, Start Index)
 
+A measurement can also produce values for a batch of clips at once,
+with its `measure_batch` method. The exporter measures clips a page
+at a time with that method, which by default just invokes `measure`
+for each clip of the page. Measurements that would otherwise query
+the archive database for each clip (for example, to get an annotation
+value or a tag status) override `measure_batch` to get the data for
+a whole page with a few queries. Solar and lunar measurements override
+it to compute their values for all of the clips of a page and station
+with a few `SunMoon` calls.
+
 A *formatter* transforms a value computed by a measurement or another
 formatter, for example for inclusion in a clip table. Most formatters
 produce string values, but some do not. Unlike measurements, formatters
@@ -333,8 +343,16 @@ class ClipMetadataCsvFileExporter(ClipExporter):
     
     extension_name = 'Clip Metadata CSV File Exporter'
     
+    clip_query_set_select_related_args = (
+        'station', 'mic_output__device', 'recording_channel__recording',
+        'creating_processor'
+    )
+    
     _OUTPUT_CHUNK_SIZE = 100
     
+    _PAGE_SIZE = 500
+    """Number of clips measured at a time."""
+    
     
     def __init__(self, args):
         
@@ -346,6 +364,7 @@ class ClipMetadataCsvFileExporter(ClipExporter):
         self._columns = _create_table_columns(self._table_format)
         self._delimiter = _get_delimiter(self._table_format)
         self._rows = []
+        self._clips = []
     
     
     def begin_exports(self):
@@ -395,13 +414,34 @@ class ClipMetadataCsvFileExporter(ClipExporter):
     
     
     def export(self, clip):
-        row = [_get_column_value(c, clip) for c in self._columns]
-        self._write_row(row)
+        self._clips.append(clip)
+        if len(self._clips) == self._PAGE_SIZE:
+            self._export_clips()
         return True
     
     
+    def _export_clips(self):
+        
+        clips = self._clips
+        self._clips = []
+        
+        # Measure clips a column at a time, so that each measurement
+        # can measure all of the clips at once.
+        columns = self._columns
+        values = [_get_column_values(c, clips) for c in columns]
+        
+        for i, clip in enumerate(clips):
+            row = [
+                _format_value(v[i], clip, c.formatter)
+                for c, v in zip(columns, values)]
+            self._write_row(row)
+    
+    
     def end_exports(self):
         
+        if len(self._clips) != 0:
+            self._export_clips()
+        
         if len(self._rows) != 0:
             self._write_rows()
             
@@ -606,9 +646,16 @@ def _get_delimiter(table_format):
     return table_format.get('delimiter', _DEFAULT_DELIMITER)
 
 
-def _get_column_value(column, clip):
-    value = column.measurement.measure(clip)
-    return _format_value(value, clip, column.formatter)
+def _get_column_values(column, clips):
+    
+    values = column.measurement.measure_batch(clips)
+    
+    if len(values) != len(clips):
+        raise CommandExecutionError(
+            f'Measurement for column "{column.name}" produced '
+            f'{len(values)} values for {len(clips)} clips.')
+    
+    return values
 
 
 def _format_value(value, clip, formatter):
@@ -647,6 +694,19 @@ class Measurement:
     
     def measure(self, clip):
         raise NotImplementedError()
+    
+    def measure_batch(self, clips):
+        
+        """
+        Measures a batch of clips.
+        
+        Returns a list with one value per clip. This default
+        implementation invokes `measure` for each clip in turn.
+        Subclasses can override it to measure a batch of clips more
+        efficiently.
+        """
+        
+        return [self.measure(c) for c in clips]
 
 
 class AnnotationValueMeasurement(Measurement):
@@ -662,6 +722,11 @@ class AnnotationValueMeasurement(Measurement):
     def measure(self, clip):
         return model_utils.get_clip_annotation_value(
             clip, self._annotation_info)
+    
+    def measure_batch(self, clips):
+        values = model_utils.get_clip_annotation_values(
+            clips, self._annotation_info)
+        return [values.get(c.id) for c in clips]
         
 
 class _SolarEventTimeMeasurement(Measurement):
@@ -671,6 +736,9 @@ class _SolarEventTimeMeasurement(Measurement):
         
     def measure(self, clip):
         return _get_solar_event_time(clip, self.name, self._diurnal)
+    
+    def measure_batch(self, clips):
+        return _get_solar_event_times(clips, self.name, self._diurnal)
 
 
 def _get_solar_event_time(clip, event_name, day):
@@ -679,12 +747,50 @@ def _get_solar_event_time(clip, event_name, day):
     return sun_moon.get_solar_event_time(date, event_name, day)
 
 
+def _get_solar_event_times(clips, event_name, day):
+    
+    def measure(sun_moon, times):
+        dates = sun_moon.get_solar_date(times, day)
+        return [
+            sun_moon.get_solar_event_time(date, event_name, day)
+            for date in dates]
+    
+    return _measure_by_station(clips, measure)
+
+
 def _get_sun_moon(clip):
     station = clip.station
     return _SUN_MOONS.get_sun_moon(
         station.latitude, station.longitude, station.tz)
 
 
+def _measure_by_station(clips, measure):
+    
+    """
+    Measures clips a station at a time.
+    
+    `measure` is a function of a `SunMoon` and a list of clip start
+    times of one station that returns a sequence of values for the
+    times. Since `SunMoon` methods compute values for a list of times
+    with just a few Skyfield calls, this is much faster than measuring
+    the clips one at a time.
+    """
+    
+    station_clip_indices = defaultdict(list)
+    for i, clip in enumerate(clips):
+        station_clip_indices[clip.station_id].append(i)
+    
+    values = [None] * len(clips)
+    
+    for indices in station_clip_indices.values():
+        sun_moon = _get_sun_moon(clips[indices[0]])
+        times = [clips[i].start_time for i in indices]
+        for i, value in zip(indices, measure(sun_moon, times)):
+            values[i] = value
+    
+    return values
+
+
 class AstronomicalDawnMeasurement(_SolarEventTimeMeasurement):
     name = 'Astronomical Dawn'
 
@@ -749,6 +855,11 @@ class _IndexMeasurement(Measurement):
         
         return clip_index - reference_index
     
+    def measure_batch(self, clips):
+        if self._reference_name not in _RECORDING_INDEX_REFERENCE_NAMES:
+            _cache_recording_file_info(clips)
+        return super().measure_batch(clips)
+    
     def _get_reference_index(self, clip):
         
         reference_name = self._reference_name
@@ -774,6 +885,24 @@ class _IndexMeasurement(Measurement):
             return getattr(recording_file, name + '_index')
 
 
+_RECORDING_INDEX_REFERENCE_NAMES = frozenset((
+    'Recording Start Index', 'Recording End Index'))
+
+
+def _cache_recording_file_info(clips):
+    
+    try:
+        clip_manager.cache_recording_file_info(clips)
+    
+    except Exception as e:
+        
+        # We can still get recording file information clip by clip,
+        # so we only log a warning.
+        logging.warning(
+            f'Could not cache recording file information for clips. '
+            f'Error message was: {str(e)}')
+
+
 def _get_recording_file_info(clip):
     
     try:
@@ -828,6 +957,10 @@ class _RecordingFileMeasurement(Measurement):
             recording_file = info[0][self._file_index]
             return self._measure(recording_file)
     
+    def measure_batch(self, clips):
+        _cache_recording_file_info(clips)
+        return super().measure_batch(clips)
+    
     def _measure(self, recording_file):
         raise NotImplementedError()
 
@@ -1038,12 +1171,24 @@ class LunarAltitudeMeasurement(Measurement):
     def measure(self, clip):
         return _get_lunar_position(clip).altitude
     
+    def measure_batch(self, clips):
+        return _get_lunar_position_values(clips, 'altitude')
+    
     
 def _get_lunar_position(clip):
     sun_moon = _get_sun_moon(clip)
     return sun_moon.get_lunar_position(clip.start_time)
     
     
+def _get_lunar_position_values(clips, name):
+    
+    def measure(sun_moon, times):
+        position = sun_moon.get_lunar_position(times)
+        return getattr(position, name).tolist()
+    
+    return _measure_by_station(clips, measure)
+    
+    
 class LunarAzimuthMeasurement(Measurement):
     
     name = 'Lunar Azimuth'
@@ -1051,6 +1196,9 @@ class LunarAzimuthMeasurement(Measurement):
     def measure(self, clip):
         return _get_lunar_position(clip).azimuth
     
+    def measure_batch(self, clips):
+        return _get_lunar_position_values(clips, 'azimuth')
+    
     
 class LunarIlluminationMeasurement(Measurement):
     
@@ -1060,6 +1208,13 @@ class LunarIlluminationMeasurement(Measurement):
         sun_moon = _get_sun_moon(clip)
         return sun_moon.get_lunar_illumination(clip.start_time)
     
+    def measure_batch(self, clips):
+        
+        def measure(sun_moon, times):
+            return sun_moon.get_lunar_illumination(times).tolist()
+        
+        return _measure_by_station(clips, measure)
+    
     
 class MicrophoneOutputNameMeasurement(Measurement):
     
@@ -1112,9 +1267,21 @@ class RecentClipCountMeasurement(Measurement):
         return TimeDelta(seconds=window_size)
 
     def measure(self, clip):
-        
         classification = \
             model_utils.get_clip_annotation_value(clip, self._annotation_info)
+        return self._count_clip(clip, classification)
+    
+    def measure_batch(self, clips):
+        
+        classifications = model_utils.get_clip_annotation_values(
+            clips, self._annotation_info)
+        
+        # Count clips in order, since counts depend on the clips
+        # visited before.
+        return [
+            self._count_clip(c, classifications.get(c.id)) for c in clips]
+    
+    def _count_clip(self, clip, classification):
         
         if classification is None:
             return None
@@ -1227,6 +1394,12 @@ class RecordingStartTimeMeasurement(Measurement):
 _SOLAR_EVENT_NAMES = frozenset(SunMoon.SOLAR_EVENT_NAMES)
 
 
+_RECORDING_FILE_TIME_REFERENCE_NAMES = frozenset(
+    f'{position} Recording File {event} Time'
+    for position in ('First', 'Last')
+    for event in ('Start', 'End'))
+
+
 class _RelativeTimeMeasurement(Measurement):
     
     def __init__(self, settings=None):
@@ -1238,11 +1411,13 @@ class _RelativeTimeMeasurement(Measurement):
             'reference_time', 'Recording Start Time')
         
         if self._reference_name in _SOLAR_EVENT_NAMES:
-            self._get_required_setting(settings, 'diurnal')
+            self._diurnal = self._get_required_setting(settings, 'diurnal')
     
     def measure(self, clip):
-        
         reference_time = self._get_reference_time(clip)
+        return self._get_relative_time(clip, reference_time)
+    
+    def _get_relative_time(self, clip, reference_time):
         
         if reference_time is None:
             return None
@@ -1271,6 +1446,24 @@ class _RelativeTimeMeasurement(Measurement):
         else:
             return _get_solar_event_time(clip, reference_name, self._diurnal)
     
+    def measure_batch(self, clips):
+        
+        reference_name = self._reference_name
+        
+        if reference_name in _SOLAR_EVENT_NAMES:
+            
+            reference_times = _get_solar_event_times(
+                clips, reference_name, self._diurnal)
+            
+            return [
+                self._get_relative_time(c, t)
+                for c, t in zip(clips, reference_times)]
+        
+        if reference_name in _RECORDING_FILE_TIME_REFERENCE_NAMES:
+            _cache_recording_file_info(clips)
+        
+        return super().measure_batch(clips)
+    
     def _get_recording_file_reference_time(self, clip, name):
         info = _get_recording_file_info(clip)
         if info is None:
@@ -1341,12 +1534,24 @@ class SolarAltitudeMeasurement(Measurement):
     def measure(self, clip):
         return _get_solar_position(clip).altitude
     
+    def measure_batch(self, clips):
+        return _get_solar_position_values(clips, 'altitude')
+    
     
 def _get_solar_position(clip):
     sun_moon = _get_sun_moon(clip)
     return sun_moon.get_solar_position(clip.start_time)
     
     
+def _get_solar_position_values(clips, name):
+    
+    def measure(sun_moon, times):
+        position = sun_moon.get_solar_position(times)
+        return getattr(position, name).tolist()
+    
+    return _measure_by_station(clips, measure)
+    
+    
 class SolarAzimuthMeasurement(Measurement):
     
     name = 'Solar Azimuth'
@@ -1354,6 +1559,9 @@ class SolarAzimuthMeasurement(Measurement):
     def measure(self, clip):
         return _get_solar_position(clip).azimuth
     
+    def measure_batch(self, clips):
+        return _get_solar_position_values(clips, 'azimuth')
+    
     
 class SolarMidnightMeasurement(_SolarEventTimeMeasurement):
     name = 'Solar Midnight'
@@ -1370,6 +1578,13 @@ class SolarPeriodMeasurement(Measurement):
     def measure(self, clip):
         sun_moon = _get_sun_moon(clip)
         return sun_moon.get_solar_period_name(clip.start_time)
+    
+    def measure_batch(self, clips):
+        
+        def measure(sun_moon, times):
+            return sun_moon.get_solar_period_name(times)
+        
+        return _measure_by_station(clips, measure)
 
 
 class StartIndexMeasurement(_IndexMeasurement):
@@ -1424,6 +1639,11 @@ class TagStatusMeasurement(Measurement):
     
     def measure(self, clip):
         return model_utils.is_clip_tagged(clip, self._tag_info)
+    
+    def measure_batch(self, clips):
+        tagged_clip_ids = \
+            model_utils.get_tagged_clip_ids(clips, self._tag_info)
+        return [c.id in tagged_clip_ids for c in clips]
 
 
 _MEASUREMENT_CLASSES = dict((c.name, c) for c in [
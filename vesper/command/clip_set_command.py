@@ -4,6 +4,7 @@
 import logging
 
 from vesper.command.command import Command
+from vesper.django.app.clip_iterator import ClipIterator
 import vesper.command.command_utils as command_utils
 import vesper.django.app.model_utils as model_utils
 
@@ -11,6 +12,13 @@ import vesper.django.app.model_utils as model_utils
 _logger = logging.getLogger()
 
 
+_MAX_DATE_RANGE_CLIP_COUNT = 100000
+"""
+Maximum number of clips of a date range of `_get_clip_set_date_ranges`,
+unless a single date has more clips.
+"""
+
+
 class ClipSetCommand(Command):
     
     """Command that operates on each clip of a set of clips."""
@@ -38,19 +46,155 @@ class ClipSetCommand(Command):
         self._tag_name = model_utils.get_clip_query_tag_name(tag)
             
         
-    def _create_clip_query_values_iterator(self):
+    def _get_clip_set_query_values(self):
         
         try:
-            return model_utils.create_clip_query_values_iterator(
-                self._sm_pair_ui_names, self._start_date, self._end_date,
-                self._detector_names)
+            return model_utils.get_clip_set_query_values(
+                self._sm_pair_ui_names, self._detector_names)
+            
+        except Exception as e:
+            self._handle_clip_query_error(
+                e, 'Clip set query values construction')
+            
             
+    def _get_clips(self, station, mic_output, detector, **kwargs):
+        
+        """
+        Gets the clips of this command's clip set for the specified
+        station, mic output, and detector.
+        
+        The clips are those of the command's entire date range, and
+        are not ordered. Keyword arguments are passed on to the
+        `model_utils.get_clips` function, and can override this
+        command's annotation and tag query arguments.
+        """
+        
+        kwargs = dict({
+            'station': station,
+            'mic_output': mic_output,
+            'start_date': self._start_date,
+            'end_date': self._end_date,
+            'detector': detector,
+            'annotation_name': self._annotation_name,
+            'annotation_value': self._annotation_value,
+            'tag_name': self._tag_name,
+            'order': False
+        }, **kwargs)
+        
+        try:
+            return model_utils.get_clips(**kwargs)
+        except Exception as e:
+            self._handle_clip_query_error(e, 'Clip query')
+    
+    
+    def _count_clips(self):
+        
+        """Counts the clips of this command's clip set."""
+        
+        value_tuples = self._get_clip_set_query_values()
+        count = 0
+        
+        for station, mic_output, detector in value_tuples:
+            clips = self._get_clips(station, mic_output, detector)
+            count += clips.order_by().count()
+        
+        return count
+    
+    
+    def _get_clips_by_date(self, clips, related_fields=()):
+        
+        """
+        Generates (date, clips) pairs for the specified clips.
+        
+        The clips must all be of one station, so that ordering them by
+        start time also orders them by date. The clips of each pair are
+        an iterator that is valid only until the next pair is generated.
+        
+        This method gets the clips with a `ClipIterator`, so it holds
+        only one page of clips in memory at a time, and the caller can
+        modify the archive database while iterating.
+        """
+        
+        clips = ClipIterator(clips, related_fields)
+        
+        try:
+            yield from model_utils.group_clips_by_date(clips)
         except Exception as e:
+            command_utils.log_and_reraise_fatal_exception(e, 'Clip query')
+            
             
-            if self._is_mutating:
-                result_text = 'The archive was not modified.'
-            else:
-                result_text = None
+    def _get_clip_set_date_ranges(self, **kwargs):
+        
+        """
+        Partitions this command's clip set into date ranges.
+        
+        This method gets the numbers of clips of the clip set per
+        station, mic output, detector, and date with one query per
+        station, mic output, and detector, and then groups consecutive
+        dates with clips into date ranges with at most
+        `_MAX_DATE_RANGE_CLIP_COUNT` clips each (a date range has more
+        clips only if it comprises a single date that has more). A
+        command that modifies the clip set in one transaction per date
+        range thus has transactions of bounded size.
+        
+        Keyword arguments are passed on to the `_get_clips` method.
+        
+        Returns
+        -------
+        list
+            list of (station, mic output, detector, start date,
+            end date, clip count) tuples, one per date range.
+        """
+        
+        date_ranges = []
+        
+        for station, mic_output, detector in \
+                self._get_clip_set_query_values():
+            
+            clips = self._get_clips(station, mic_output, detector, **kwargs)
+            
+            try:
+                counts = model_utils.get_clip_counts_by_date(clips)
+            except Exception as e:
+                self._handle_clip_query_error(e, 'Clip count query')
+                
+            start_date = None
+            end_date = None
+            range_count = 0
+            
+            for date, count in sorted(counts.items()):
+                
+                if start_date is not None and \
+                        range_count + count > _MAX_DATE_RANGE_CLIP_COUNT:
+                    # date will not fit in current date range
+                    
+                    date_ranges.append((
+                        station, mic_output, detector, start_date,
+                        end_date, range_count))
+                    
+                    start_date = None
+                    
+                if start_date is None:
+                    start_date = date
+                    range_count = 0
+                    
+                end_date = date
+                range_count += count
                 
-            command_utils.log_and_reraise_fatal_exception(
-                e, 'Clip query values iterator construction', result_text)
+            if start_date is not None:
+                date_ranges.append((
+                    station, mic_output, detector, start_date, end_date,
+                    range_count))
+                
+        return date_ranges
+    
+    
+    def _handle_clip_query_error(self, e, action_text):
+        
+        if self._is_mutating:
+            result_text = 'The archive was not modified.'
+        else:
+            result_text = None
+            
+        command_utils.log_and_reraise_fatal_exception(
+            e, action_text, result_text)
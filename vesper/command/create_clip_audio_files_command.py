@@ -7,13 +7,16 @@ import time
 from vesper.command.clip_set_command import ClipSetCommand
 from vesper.singleton.clip_manager import clip_manager
 import vesper.command.command_utils as command_utils
-import vesper.django.app.model_utils as model_utils
 import vesper.util.text_utils as text_utils
 
 
 _logger = logging.getLogger()
 
 
+_CLIP_RELATED_FIELDS = (
+    'station', 'mic_output', 'recording_channel__recording')
+
+
 class CreateClipAudioFilesCommand(ClipSetCommand):
     
     
@@ -34,40 +37,43 @@ class CreateClipAudioFilesCommand(ClipSetCommand):
         
         start_time = time.time()
         
-        value_tuples = self._create_clip_query_values_iterator()
+        clip_count = self._count_clips()
+        metrics = self._job_info.metrics
+        metrics.start_phase('Create clip audio files', clip_count, 'clips')
+        
+        value_tuples = self._get_clip_set_query_values()
         
         total_num_clips = 0
         total_num_created_files = 0
         
-        for station, mic_output, date, detector in value_tuples:
+        for station, mic_output, detector in value_tuples:
+            
+            # Get clips for all dates, a page at a time.
+            clips = self._get_clips(station, mic_output, detector)
+            clips_by_date = \
+                self._get_clips_by_date(clips, _CLIP_RELATED_FIELDS)
             
-            clips = model_utils.get_clips(
-                station=station,
-                mic_output=mic_output,
-                date=date,
-                detector=detector,
-                annotation_name=self._annotation_name,
-                annotation_value=self._annotation_value,
-                tag_name=self._tag_name,
-                order=False)
+            for date, date_clips in clips_by_date:
             
-            num_clips = len(clips)
-            num_created_files = 0
+                num_clips = 0
+                num_created_files = 0
             
-            for clip in clips:
-                if self._create_clip_audio_file_if_needed(clip):
-                    num_created_files += 1
+                for clip in date_clips:
+                    num_clips += 1
+                    metrics.add_progress()
+                    if self._create_clip_audio_file_if_needed(clip):
+                        num_created_files += 1
                 
-            # Log file creations for this detector/station/mic_output/date.
-            count_text = text_utils.create_count_text(num_clips, 'clip')
-            _logger.info(
-                f'Created audio files for {num_created_files} of '
-                f'{count_text} for station "{station.name}", '
-                f'mic output "{mic_output.name}", date {date}, '
-                f'and detector "{detector.name}".')
+                # Log file creations for this detector/station/mic_output/date.
+                count_text = text_utils.create_count_text(num_clips, 'clip')
+                _logger.info(
+                    f'Created audio files for {num_created_files} of '
+                    f'{count_text} for station "{station.name}", '
+                    f'mic output "{mic_output.name}", date {date}, '
+                    f'and detector "{detector.name}".')
                 
-            total_num_clips += num_clips
-            total_num_created_files += num_created_files
+                total_num_clips += num_clips
+                total_num_created_files += num_created_files
             
         # Log total file creations and creation rate.
         count_text = text_utils.create_count_text(total_num_clips, 'clip')
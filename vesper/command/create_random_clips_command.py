@@ -13,6 +13,7 @@ from vesper.singleton.archive import archive
 from vesper.singleton.preset_manager import preset_manager
 from vesper.util.schedule import Interval, Schedule
 import vesper.command.command_utils as command_utils
+import vesper.django.app.clip_count_utils as clip_count_utils
 import vesper.util.signal_utils as signal_utils
 import vesper.util.time_utils as time_utils
 
@@ -495,4 +496,6 @@ class _ClipCreator:
     def flush(self):
         if len(self._clips) != 0:
             Clip.objects.bulk_create(self._clips)
+            clip_count_utils.increment_clip_counts(
+                [c.id for c in self._clips])
             self._clips.clear()
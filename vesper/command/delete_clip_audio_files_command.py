@@ -7,7 +7,6 @@ import time
 from vesper.command.clip_set_command import ClipSetCommand
 from vesper.singleton.clip_manager import clip_manager
 import vesper.command.command_utils as command_utils
-import vesper.django.app.model_utils as model_utils
 import vesper.util.text_utils as text_utils
 
 
@@ -40,40 +39,41 @@ class DeleteClipAudioFilesCommand(ClipSetCommand):
         
         start_time = time.time()
         
-        value_tuples = self._create_clip_query_values_iterator()
+        clip_count = self._count_clips()
+        metrics = self._job_info.metrics
+        metrics.start_phase('Delete clip audio files', clip_count, 'clips')
+        
+        value_tuples = self._get_clip_set_query_values()
         
         total_num_clips = 0
         total_num_deleted_files = 0
         
-        for station, mic_output, date, detector in value_tuples:
+        for station, mic_output, detector in value_tuples:
+            
+            # Get clips for all dates, a page at a time.
+            clips = self._get_clips(station, mic_output, detector)
             
-            clips = model_utils.get_clips(
-                station=station,
-                mic_output=mic_output,
-                date=date,
-                detector=detector,
-                annotation_name=self._annotation_name,
-                annotation_value=self._annotation_value,
-                tag_name=self._tag_name,
-                order=False)
+            for date, date_clips in self._get_clips_by_date(clips):
             
-            num_clips = len(clips)
-            num_deleted_files = 0
+                num_clips = 0
+                num_deleted_files = 0
             
-            for clip in clips:
-                if self._delete_clip_audio_file_if_needed(clip):
-                    num_deleted_files += 1
+                for clip in date_clips:
+                    num_clips += 1
+                    metrics.add_progress()
+                    if self._delete_clip_audio_file_if_needed(clip):
+                        num_deleted_files += 1
                 
-            # Log file deletions for this detector/station/mic_output/date.
-            count_text = text_utils.create_count_text(num_clips, 'clip')
-            _logger.info(
-                f'Deleted audio files for {num_deleted_files} of '
-                f'{count_text} for station "{station.name}", '
-                f'mic output "{mic_output.name}", date {date}, '
-                f'and detector "{detector.name}".')
+                # Log file deletions for this detector/station/mic_output/date.
+                count_text = text_utils.create_count_text(num_clips, 'clip')
+                _logger.info(
+                    f'Deleted audio files for {num_deleted_files} of '
+                    f'{count_text} for station "{station.name}", '
+                    f'mic output "{mic_output.name}", date {date}, '
+                    f'and detector "{detector.name}".')
                 
-            total_num_clips += num_clips
-            total_num_deleted_files += num_deleted_files
+                total_num_clips += num_clips
+                total_num_deleted_files += num_deleted_files
             
         # Log total file deletions and deletion rate.
         count_text = text_utils.create_count_text(total_num_clips, 'clip')
@@ -10,6 +10,7 @@ from vesper.command.command import Command, CommandExecutionError
 from vesper.django.app.models import Clip, Recording, Station
 from vesper.singleton.clip_manager import clip_manager
 import vesper.command.command_utils as command_utils
+import vesper.django.app.model_utils as model_utils
 import vesper.util.archive_lock as archive_lock
 
 
@@ -103,18 +104,24 @@ class DeleteRecordingsCommand(Command):
         
         self._logger.info('Deleting recording "{}"...'.format(str(recording)))
         
+        clips = list(
+            Clip.objects.filter(recording_channel__recording=recording).
+            only('id'))
+        
         with archive_lock.atomic():
             
             with transaction.atomic():
             
-                # TODO: Consider moving file deletions outside of database
-                # transaction.
-                
-                clips = Clip.objects.filter(
-                    recording_channel__recording=recording)
-                
-                # Delete clip files.
-                for clip in clips:
-                    clip_manager.delete_audio_file(clip)
+                # Delete clips and update clip counts. We delete clips
+                # before deleting the recording since
+                # `model_utils.delete_clips` is much faster than letting
+                # `recording.delete` delete the clips.
+                model_utils.delete_clips([clip.id for clip in clips])
                 
                 recording.delete()
+                
+        # Delete clip audio files. We do this after the transaction so
+        # that if the transaction fails, leaving the clips in the
+        # database and raising an exception, we don't delete any clip
+        # files.
+        clip_manager.delete_audio_files(clips)
@@ -4,6 +4,7 @@
 from collections import defaultdict
 import datetime
 import itertools
+import json
 import logging
 import pickle
 import random
@@ -14,15 +15,18 @@ from django.db import transaction
 from vesper.archive_paths import archive_paths
 from vesper.command.command import Command, CommandExecutionError
 from vesper.django.app.models import (
-    AnnotationInfo, Clip, Job, Recording, RecordingChannel, Station)
+    AnnotationInfo, Clip, DetectionWorkUnit, Job, Recording,
+    RecordingChannel, Station)
 from vesper.old_bird.old_bird_detector_runner import OldBirdDetectorRunner
-from vesper.signal.wave_file_signal import WaveFileSignal
 from vesper.singleton.archive import archive
 from vesper.singleton.extension_manager import extension_manager
 from vesper.singleton.preset_manager import preset_manager
 from vesper.util.schedule import Interval, Schedule
 import vesper.command.command_utils as command_utils
+import vesper.command.detection_work_queue as detection_work_queue
+import vesper.django.app.clip_count_utils as clip_count_utils
 import vesper.django.app.model_utils as model_utils
+import vesper.signal.audio_file_signal_utils as audio_file_signal_utils
 import vesper.util.archive_lock as archive_lock
 import vesper.util.os_utils as os_utils
 import vesper.util.signal_utils as signal_utils
@@ -97,6 +101,13 @@ End index of shuffled station-nights for which to run detectors, when
 """
 
 
+_WORK_UNIT_POLL_INTERVAL = 5
+"""
+Time in seconds between checks of the statuses of the work units of a
+distributed detection job.
+"""
+
+
 _DEFERRED_DATABASE_WRITE_FILE_NAME_FORMAT = 'Job {} Part {:03d}.pkl'
 
 
@@ -118,8 +129,16 @@ class DetectCommand(Command):
         self._schedule_name = get('schedule', args)
         self._defer_clip_creation = get('defer_clip_creation', args)
         
+        get_opt = command_utils.get_optional_arg
+        self._distributed = get_opt('distributed', args, False)
+        
         self._schedule = _get_schedule(self._schedule_name)
         self._station_schedules = {}
+        
+        # Event set when a detection worker loses its lease on the
+        # work unit it is running, or `None` if we are not running a
+        # work unit.
+        self._lease_lost_event = None
                 
         self._process_random_station_nights = _PROCESS_RANDOM_STATION_NIGHTS
         self._start_station_night_index = _START_STATION_NIGHT_INDEX
@@ -137,15 +156,28 @@ class DetectCommand(Command):
         recording_lists = self._get_recording_lists()
         station_nights = sorted(recording_lists.keys())
         
+        metrics = job_info.metrics
+        metrics.start_phase(
+            'Run detectors', len(station_nights), 'station-nights')
+        
         for i, station_night in enumerate(station_nights):
             
             self._log_station_night(station_night, i, len(station_nights))
             
             recordings = recording_lists[station_night]
             self._run_old_bird_detectors(old_bird_detectors, recordings)
-            self._run_other_detectors(other_detectors, recordings)
             
-        return True
+            if self._distributed:
+                self._publish_work_units(other_detectors, recordings)
+            else:
+                self._run_other_detectors(other_detectors, recordings)
+            
+            metrics.add_progress()
+            
+        if self._distributed:
+            return self._wait_for_work_units()
+        else:
+            return True
     
     
     def _get_detectors(self):
@@ -417,7 +449,8 @@ class DetectCommand(Command):
             else:
                 # have absolute path of recording file
                 
-                with WaveFileSignal(abs_path) as signal:
+                with audio_file_signal_utils.create_audio_file_signal(
+                        abs_path) as signal:
                 
                     intervals = _get_file_detection_intervals(
                         file_, recording_intervals)
@@ -457,11 +490,13 @@ class DetectCommand(Command):
                   
             # Detect.
             for samples in _generate_sample_buffers(signal, index_interval):
+                self._check_lease()
                 for detector in detectors:
                     channel_samples = samples[detector.channel_num]
                     detector.detect(channel_samples)
                       
             # Wrap up detection.
+            self._check_lease()
             for detector in detectors:
                 detector.complete_detection()
                 
@@ -480,6 +515,193 @@ class DetectCommand(Command):
             processing_time)
                     
                 
+    def _check_lease(self):
+        if self._lease_lost_event is not None and \
+                self._lease_lost_event.is_set():
+            raise WorkUnitLeaseLostError()
+        
+        
+    def _publish_work_units(self, detector_models, recordings):
+        
+        if len(detector_models) == 0:
+            return
+        
+        detector_names = json.dumps([d.name for d in detector_models])
+        
+        work_units = []
+        
+        for recording in recordings:
+            
+            recording_files = recording.files.all()
+            
+            if len(recording_files) == 0:
+                self._logger.error(
+                    f'    Archive has no file information for recording '
+                    f'"{str(recording)}", so no detectors will be run '
+                    f'on it.')
+                continue
+            
+            recording_intervals = self._get_detection_intervals(recording)
+            
+            for file_ in recording_files:
+                
+                if file_.path is None:
+                    self._logger.error(
+                        f'    Archive has no path for file {file_.file_num} '
+                        f'of recording "{str(recording)}", so no detectors '
+                        f'will be run on it.')
+                    continue
+                
+                intervals = _get_file_detection_intervals(
+                    file_, recording_intervals)
+                
+                for interval in intervals:
+                    work_units.append(DetectionWorkUnit(
+                        job_id=self._job_info.job_id,
+                        recording_file=file_,
+                        start_time=interval.start,
+                        end_time=interval.end,
+                        detectors=detector_names))
+        
+        detection_work_queue.publish_work_units(work_units)
+        
+        count_text = text_utils.create_count_text(
+            len(work_units), 'detection work unit')
+        self._logger.info(f'    Published {count_text}.')
+        
+        
+    def _wait_for_work_units(self):
+        
+        job_id = self._job_info.job_id
+        
+        counts = detection_work_queue.get_work_unit_counts(job_id)
+        unit_count = sum(counts.values())
+        
+        if unit_count == 0:
+            return True
+        
+        metrics = self._job_info.metrics
+        metrics.start_phase(
+            'Wait for detection workers', unit_count, 'work units')
+        
+        count_text = text_utils.create_count_text(
+            unit_count, 'detection work unit')
+        self._logger.info(
+            f'Waiting for detection workers to complete {count_text}...')
+        
+        ended_count = 0
+        
+        while True:
+            
+            if self._job_info.stop_requested:
+                
+                canceled_count = \
+                    detection_work_queue.cancel_work_units(job_id)
+                
+                count_text = text_utils.create_count_text(
+                    canceled_count, 'detection work unit')
+                self._logger.info(f'Canceled {count_text}.')
+                
+                return False
+            
+            # Reclaim units whose workers have stopped renewing their
+            # leases, for example because they died. Workers also do
+            # this, but they may all be busy with other units.
+            reclaimed_count, failed_count = \
+                detection_work_queue.reclaim_expired_work_units()
+            
+            if reclaimed_count != 0 or failed_count != 0:
+                self._logger.warning(
+                    f'Reclaimed {reclaimed_count} and failed '
+                    f'{failed_count} detection work units whose leases '
+                    f'expired.')
+            
+            counts = detection_work_queue.get_work_unit_counts(job_id)
+            pending_count = sum(
+                counts[s] for s in detection_work_queue.PENDING_STATUSES)
+            
+            new_ended_count = unit_count - pending_count
+            metrics.add_progress(new_ended_count - ended_count)
+            ended_count = new_ended_count
+            
+            if pending_count == 0:
+                break
+            
+            time.sleep(_WORK_UNIT_POLL_INTERVAL)
+        
+        completed_count = counts[detection_work_queue.COMPLETED]
+        failed_count = counts[detection_work_queue.FAILED]
+        
+        if failed_count == 0:
+            self._logger.info(
+                f'Detection workers completed all {unit_count} detection '
+                f'work units.')
+        
+        else:
+            self._logger.error(
+                f'Detection workers completed {completed_count} of '
+                f'{unit_count} detection work units. Detection failed '
+                f'for the other {failed_count} units. See the detection '
+                f'worker logs for details.')
+        
+        return True
+    
+    
+    def run_work_unit(self, work_unit, job_info):
+        
+        """
+        Runs detectors on the recording file interval of a work unit.
+        
+        Detection workers (see the `vesper.command.detection_worker`
+        module) invoke this method on the work units of distributed
+        detection jobs. Each worker constructs its own `DetectCommand`
+        for a job from the job's command specification.
+        
+        Clips created by this method are attributed to the work unit's
+        job. Clip creation is never deferred for a work unit, since a
+        worker may run on a host other than the one on which deferred
+        clip creations would be performed.
+        
+        Parameters:
+        
+            work_unit : `DetectionWorkUnit`
+                the work unit to run detectors on.
+                
+            job_info : `Bunch`
+                information pertaining to the work unit's job,
+                including the job ID and the event that the worker
+                sets if it loses its lease on the work unit.
+                
+        Raises:
+        
+            WorkUnitLeaseLostError
+                if the worker lost its lease on the work unit. No
+                more clips are created for the unit once the lease
+                is lost.
+        """
+        
+        self._job_info = job_info
+        self._logger = logging.getLogger()
+        self._defer_clip_creation = False
+        self._lease_lost_event = job_info.lease_lost_event
+        
+        detector_models = [
+            archive.get_processor(name)
+            for name in json.loads(work_unit.detectors)]
+        
+        file_ = work_unit.recording_file
+        file_path = model_utils.get_absolute_recording_file_path(file_)
+        
+        time_interval = Interval(
+            start=work_unit.start_time, end=work_unit.end_time)
+        
+        with audio_file_signal_utils.create_audio_file_signal(
+                file_path) as signal:
+            
+            self._run_other_detectors_on_file_interval(
+                detector_models, file_, file_path, signal, time_interval)
+        
+        
     def _log_detection_start(
             self, detector_models, file_path, file_, time_interval):
          
@@ -538,7 +760,8 @@ class DetectCommand(Command):
                 listener = _DetectorListener(
                     detector_model, recording, recording_channel,
                     file_start_index, interval_start_index,
-                    self._defer_clip_creation, job, self._logger)
+                    self._defer_clip_creation, job, self._logger,
+                    self._lease_lost_event)
                 
                 detector = _create_detector(
                     detector_model, recording, listener)
@@ -705,6 +928,16 @@ def _create_detector(detector_model, recording, listener):
     return cls(recording.sample_rate, listener)
 
 
+class WorkUnitLeaseLostError(Exception):
+    
+    """
+    Exception raised when a detection worker loses its lease on the
+    work unit on which it is running detectors.
+    """
+    
+    pass
+
+
 class _ClipCreationError(Exception):
     
     def __init__(self, wrapped_exception):
@@ -720,7 +953,7 @@ class _DetectorListener:
     def __init__(
             self, detector_model, recording, recording_channel,
             file_start_index, interval_start_index, defer_clip_creation,
-            job, logger):
+            job, logger, lease_lost_event=None):
         
         # Give this detector listener a unique serial number.
         self._serial_number = _DetectorListener.next_serial_number
@@ -734,6 +967,7 @@ class _DetectorListener:
         self._defer_clip_creation = defer_clip_creation
         self._job = job
         self._logger = logger
+        self._lease_lost_event = lease_lost_event
         
         self._clips = []
         self._deferred_clips = []
@@ -766,6 +1000,12 @@ class _DetectorListener:
         if not _CREATE_CLIPS:
             return
         
+        # Don't create clips for a work unit whose lease was lost,
+        # since another worker may have reclaimed the unit.
+        if self._lease_lost_event is not None and \
+                self._lease_lost_event.is_set():
+            raise WorkUnitLeaseLostError()
+        
         # TODO: Find out exactly what database queries are
         # executed during detection (ideally, record the sequence
         # of queries) to see if database interaction could be
@@ -801,6 +1041,12 @@ class _DetectorListener:
                 
                 with archive_lock.atomic(), transaction.atomic():
                     
+                    clip_ids = []
+                    
+                    # Mapping from (annotation name, value) pairs to
+                    # IDs of clips with those annotations.
+                    annotated_clip_ids = defaultdict(list)
+                    
                     for start_index, length, annotations in self._clips:
                         
                         # Get clip start time as a `datetime`.
@@ -835,19 +1081,12 @@ class _DetectorListener:
                                 creating_processor=detector_model
                             )
                             
+                            clip_ids.append(clip.id)
+                            
                             if annotations is not None:
-                                
                                 for name, value in annotations.items():
-                                    
-                                    annotation_info = \
-                                        self._get_annotation_info(name)
-                                    
-                                    model_utils.annotate_clip(
-                                        clip, annotation_info, str(value),
-                                        creation_time=creation_time,
-                                        creating_user=None,
-                                        creating_job=self._job,
-                                        creating_processor=detector_model)
+                                    key = (name, str(value))
+                                    annotated_clip_ids[key].append(clip.id)
                         
                         except Exception as e:
                             
@@ -857,6 +1096,26 @@ class _DetectorListener:
                             # outside of the transaction to query the
                             # database again.
                             raise _ClipCreationError(e)
+                    
+                    # Update clip counts and annotate clips for the
+                    # whole batch at once rather than clip by clip.
+                    try:
+                        
+                        clip_count_utils.increment_clip_counts(clip_ids)
+                        
+                        for (name, value), ids in annotated_clip_ids.items():
+                            
+                            annotation_info = self._get_annotation_info(name)
+                            
+                            model_utils.annotate_clips(
+                                ids, annotation_info, value,
+                                creation_time=creation_time,
+                                creating_user=None,
+                                creating_job=self._job,
+                                creating_processor=detector_model)
+                    
+                    except Exception as e:
+                        raise _ClipCreationError(e)
 
 #                     trans_end_time = time.time()
 #                     self._transaction_count += 1
@@ -0,0 +1,275 @@
+"""
+Module containing functions for the distributed detection work queue.
+
+A detection job that runs in distributed mode (see the `distributed`
+argument of the `detect` command) publishes its work to a queue in
+the archive database as a set of `DetectionWorkUnit` model instances.
+Each work unit specifies a recording file, a time interval of the
+file, and the names of the detectors to run on the interval.
+Detection workers (see the `vesper.command.detection_worker` module),
+which may run on hosts other than the one that runs the job, claim
+units from the queue, run detectors on them, and write the resulting
+clips to the archive database just as a non-distributed detection
+job would.
+
+A work unit has one of the following statuses:
+
+    Unclaimed
+        The unit is waiting to be claimed by a worker.
+
+    Claimed
+        A worker has claimed the unit and is working on it.
+
+    Completed
+        A worker completed the unit.
+
+    Failed
+        Detection on the unit failed, or the unit was claimed too many
+        times without being completed.
+
+    Canceled
+        The unit's job was stopped before the unit was completed.
+
+A worker claims a unit by leasing it for a specified duration, and
+must renew the lease before it expires for as long as it works on the
+unit. When a lease expires, for example because the worker holding it
+died or lost its database connection, the unit is *reclaimed*, i.e.
+made available for another worker to claim, unless it has already
+been claimed `MAX_ATTEMPT_COUNT` times, in which case it fails.
+
+All of the functions of this module that modify work units do so with
+single conditional `UPDATE` statements, each of which succeeds only if
+the units it modifies are still in the states that the function
+expects. This allows workers of different processes and hosts to use
+the queue concurrently with both SQLite and PostgreSQL archive
+databases, without relying on row-level locks.
+"""
+
+
+import datetime
+
+from django.db.models import Count, F
+
+from vesper.django.app.models import DetectionWorkUnit
+import vesper.util.archive_lock as archive_lock
+import vesper.util.time_utils as time_utils
+
+
+UNCLAIMED = 'Unclaimed'
+CLAIMED = 'Claimed'
+COMPLETED = 'Completed'
+FAILED = 'Failed'
+CANCELED = 'Canceled'
+
+PENDING_STATUSES = (UNCLAIMED, CLAIMED)
+"""Statuses of work units that have not yet ended."""
+
+
+MAX_ATTEMPT_COUNT = 3
+"""
+Maximum number of times a work unit can be claimed.
+
+A unit whose lease expires after it has been claimed this many times
+fails rather than being reclaimed. This keeps a unit that causes
+every worker that claims it to die from being claimed forever.
+"""
+
+
+@archive_lock.atomic
+def publish_work_units(work_units):
+
+    """
+    Publishes work units to the queue.
+
+    Parameters:
+
+        work_units : list of `DetectionWorkUnit`
+            unsaved work units to publish. The status of each unit is
+            set to "Unclaimed".
+    """
+
+    for work_unit in work_units:
+        work_unit.status = UNCLAIMED
+
+    DetectionWorkUnit.objects.bulk_create(work_units)
+
+
+def claim_work_unit(worker_name, lease_duration):
+
+    """
+    Claims the next unclaimed work unit of the queue.
+
+    Units are claimed in order of increasing ID, i.e. in the order in
+    which they were published. Only units of running jobs are claimed.
+    Before claiming a unit, this function reclaims units whose leases
+    have expired.
+
+    Parameters:
+
+        worker_name : str
+            the name of the claiming worker, which must be unique
+            among all workers.
+
+        lease_duration : float
+            the lease duration in seconds.
+
+    Returns:
+        the claimed work unit, or `None` if the queue contains no
+        unclaimed units.
+    """
+
+    reclaim_expired_work_units()
+
+    while True:
+
+        work_unit = _get_next_unclaimed_work_unit()
+
+        if work_unit is None:
+            return None
+
+        if _claim_work_unit(work_unit.id, worker_name, lease_duration):
+            work_unit.refresh_from_db()
+            return work_unit
+
+        # If we get here, another worker claimed the unit after we
+        # got it but before we could claim it. Try the next one.
+
+
+def _get_next_unclaimed_work_unit():
+    return DetectionWorkUnit.objects.filter(
+        status=UNCLAIMED, job__status='Running').order_by('id').first()
+
+
+@archive_lock.atomic
+def _claim_work_unit(work_unit_id, worker_name, lease_duration):
+
+    update_count = DetectionWorkUnit.objects.filter(
+        id=work_unit_id, status=UNCLAIMED
+    ).update(
+        status=CLAIMED,
+        worker=worker_name,
+        lease_expiration_time=_get_lease_expiration_time(lease_duration),
+        attempt_count=F('attempt_count') + 1)
+
+    return update_count == 1
+
+
+def _get_lease_expiration_time(lease_duration):
+    delta = datetime.timedelta(seconds=lease_duration)
+    return time_utils.get_utc_now() + delta
+
+
+@archive_lock.atomic
+def renew_lease(work_unit_id, worker_name, lease_duration):
+
+    """
+    Renews a worker's lease on a work unit.
+
+    Returns `True` if the lease was renewed, or `False` if the worker
+    no longer holds it, for example because it expired and the unit
+    was reclaimed.
+    """
+
+    update_count = DetectionWorkUnit.objects.filter(
+        id=work_unit_id, status=CLAIMED, worker=worker_name
+    ).update(
+        lease_expiration_time=_get_lease_expiration_time(lease_duration))
+
+    return update_count == 1
+
+
+@archive_lock.atomic
+def end_work_unit(work_unit_id, worker_name, status):
+
+    """
+    Ends a worker's work on a work unit.
+
+    Parameters:
+
+        work_unit_id : int
+            the ID of the work unit.
+
+        worker_name : str
+            the name of the worker.
+
+        status : str
+            the final status of the unit, either "Completed" or
+            "Failed".
+
+    Returns:
+        `True` if the unit's status was set, or `False` if the worker
+        no longer held the unit's lease.
+    """
+
+    update_count = DetectionWorkUnit.objects.filter(
+        id=work_unit_id, status=CLAIMED, worker=worker_name
+    ).update(status=status, lease_expiration_time=None)
+
+    return update_count == 1
+
+
+@archive_lock.atomic
+def reclaim_expired_work_units():
+
+    """
+    Reclaims work units whose leases have expired.
+
+    A unit that has already been claimed `MAX_ATTEMPT_COUNT` times
+    fails rather than being reclaimed.
+
+    Returns:
+        the numbers of units reclaimed and failed.
+    """
+
+    units = DetectionWorkUnit.objects.filter(
+        status=CLAIMED, lease_expiration_time__lt=time_utils.get_utc_now())
+
+    failed_count = units.filter(
+        attempt_count__gte=MAX_ATTEMPT_COUNT
+    ).update(status=FAILED, lease_expiration_time=None)
+
+    reclaimed_count = units.update(
+        status=UNCLAIMED, worker=None, lease_expiration_time=None)
+
+    return reclaimed_count, failed_count
+
+
+@archive_lock.atomic
+def cancel_work_units(job_id):
+
+    """
+    Cancels the pending work units of the specified job.
+
+    Workers that hold leases on canceled units will be unable to renew
+    them, and will stop working on the units.
+
+    Returns:
+        the number of units canceled.
+    """
+
+    return DetectionWorkUnit.objects.filter(
+        job_id=job_id, status__in=PENDING_STATUSES
+    ).update(status=CANCELED, lease_expiration_time=None)
+
+
+def get_work_unit_counts(job_id):
+
+    """
+    Gets the numbers of work units of the specified job by status.
+
+    Returns:
+        a dictionary mapping statuses to work unit counts. The
+        dictionary includes every status, with a count of zero for
+        statuses that no unit of the job has.
+    """
+
+    counts = dict((status, 0) for status in (
+        UNCLAIMED, CLAIMED, COMPLETED, FAILED, CANCELED))
+
+    rows = DetectionWorkUnit.objects.filter(job_id=job_id) \
+        .values_list('status').annotate(count=Count('id'))
+
+    for status, count in rows:
+        counts[status] = count
+
+    return counts
@@ -0,0 +1,343 @@
+"""
+Module containing class `DetectionWorker`.
+
+A *detection worker* runs detectors on the work units of distributed
+detection jobs (see the `vesper.command.detection_work_queue` module).
+Detection workers are started with the `vesper_admin detect_worker`
+command, on the host that runs the Vesper server or on other hosts
+that have access to the archive database and recording files. Each
+worker repeatedly claims the next unclaimed work unit from the queue,
+runs detectors on it, and writes the resulting clips to the archive
+database.
+
+A worker renews its lease on a work unit periodically while it runs
+detectors on the unit. If the worker dies, its lease expires and the
+unit is reclaimed so that another worker can claim it. If a live
+worker fails to renew its lease, it abandons the unit without writing
+any more clips for it. Before running detectors on a unit that was
+claimed before, a worker deletes any clips that were created for the
+unit by the earlier attempt, so that they are not duplicated.
+"""
+
+
+from multiprocessing import Process
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.db import close_old_connections, connection, connections
+
+from vesper.command.detect_command import (
+    DetectCommand, WorkUnitLeaseLostError)
+from vesper.django.app.models import Clip
+from vesper.util.bunch import Bunch
+from vesper.util.repeating_timer import RepeatingTimer
+import vesper.command.detection_work_queue as detection_work_queue
+import vesper.command.job_runner as job_runner
+import vesper.django.app.model_utils as model_utils
+import vesper.util.archive_lock as archive_lock
+import vesper.util.django_utils as django_utils
+
+
+DEFAULT_LEASE_DURATION = 60
+"""Default work unit lease duration in seconds."""
+
+
+DEFAULT_POLL_INTERVAL = 5
+"""
+Default time in seconds that an idle worker waits before checking the
+work queue again.
+"""
+
+
+_logger = logging.getLogger()
+
+
+class DetectionWorker:
+
+    """
+    Detection worker.
+
+    Parameters:
+
+        name : str or None
+            the name of this worker, which must be unique among all
+            workers, or `None` to use a name comprising the host name
+            and process ID.
+
+        lease_duration : float
+            the work unit lease duration in seconds. The worker renews
+            its lease on a unit three times per lease duration.
+
+        poll_interval : float
+            the time in seconds that the worker waits before checking
+            the work queue again when it finds the queue empty.
+    """
+
+
+    def __init__(
+            self, name=None, lease_duration=DEFAULT_LEASE_DURATION,
+            poll_interval=DEFAULT_POLL_INTERVAL):
+
+        if name is None:
+            name = f'{socket.gethostname()}:{os.getpid()}'
+
+        self._name = name
+        self._lease_duration = lease_duration
+        self._poll_interval = poll_interval
+
+        # Mapping from job IDs to `DetectCommand` instances.
+        self._commands = {}
+
+
+    @property
+    def name(self):
+        return self._name
+
+
+    def run(self, exit_when_idle=False):
+
+        """
+        Runs this worker.
+
+        Parameters:
+
+            exit_when_idle : bool
+                `True` if this method should return when it finds the
+                work queue empty, or `False` if it should wait for more
+                work forever.
+        """
+
+        _logger.info(f'Detection worker "{self._name}" started.')
+
+        while True:
+
+            # Close database connections that are no longer usable,
+            # for example because the database server closed them
+            # while the worker was idle.
+            close_old_connections()
+
+            if not self.run_next_work_unit():
+
+                if exit_when_idle:
+                    break
+
+                time.sleep(self._poll_interval)
+
+        _logger.info(f'Detection worker "{self._name}" exiting.')
+
+
+    def run_next_work_unit(self):
+
+        """
+        Claims the next unclaimed work unit of the queue and runs
+        detectors on it.
+
+        Returns:
+            `True` if this worker claimed a work unit, or `False` if
+            the queue contained no unclaimed units.
+        """
+
+        work_unit = detection_work_queue.claim_work_unit(
+            self._name, self._lease_duration)
+
+        if work_unit is None:
+            return False
+
+        self._run_work_unit(work_unit)
+
+        return True
+
+
+    def _run_work_unit(self, work_unit):
+
+        _logger.info(
+            f'Detection worker "{self._name}" claimed work unit '
+            f'{work_unit.id} of job {work_unit.job_id} (attempt '
+            f'{work_unit.attempt_count}).')
+
+        # Event set by the lease renewal timer if this worker loses
+        # its lease on the work unit. The detect command checks the
+        # event as it runs detectors, and abandons the unit when it
+        # finds the event set.
+        lease_lost_event = threading.Event()
+
+        timer = RepeatingTimer(
+            self._lease_duration / 3, self._renew_lease,
+            (work_unit.id, lease_lost_event))
+        timer.start()
+
+        try:
+
+            if work_unit.attempt_count > 1:
+                _delete_work_unit_clips(work_unit)
+
+            command = self._get_command(work_unit.job)
+            job_info = Bunch(
+                job_id=work_unit.job_id, lease_lost_event=lease_lost_event)
+            command.run_work_unit(work_unit, job_info)
+
+        except WorkUnitLeaseLostError:
+
+            # The unit was either reclaimed, in which case the worker
+            # that claims it next will delete the clips we created for
+            # it, or canceled. In either case we must not end it.
+            _logger.warning(
+                f'Detection worker "{self._name}" lost its lease on work '
+                f'unit {work_unit.id} and abandoned the unit.')
+            return
+
+        except Exception:
+            _logger.exception(
+                f'Detection on work unit {work_unit.id} failed with an '
+                f'exception. See traceback below.')
+            status = detection_work_queue.FAILED
+
+        else:
+            status = detection_work_queue.COMPLETED
+
+        finally:
+            timer.cancel()
+
+        ended = detection_work_queue.end_work_unit(
+            work_unit.id, self._name, status)
+
+        if not ended:
+            _logger.warning(
+                f'Detection worker "{self._name}" lost its lease on work '
+                f'unit {work_unit.id} before it could end the unit. The '
+                f'unit was either reclaimed or canceled.')
+
+
+    def _renew_lease(self, work_unit_id, lease_lost_event):
+
+        # This method runs in a timer thread, which has its own
+        # database connection. We close the connection when we're
+        # done since the thread will not be used again.
+        try:
+
+            renewed = detection_work_queue.renew_lease(
+                work_unit_id, self._name, self._lease_duration)
+
+            if not renewed:
+                _logger.warning(
+                    f'Detection worker "{self._name}" could not renew its '
+                    f'lease on work unit {work_unit_id}.')
+                lease_lost_event.set()
+
+        except Exception:
+            _logger.exception(
+                f'Detection worker "{self._name}" lease renewal for work '
+                f'unit {work_unit_id} failed with an exception.')
+
+        finally:
+            connection.close()
+
+
+    def _get_command(self, job):
+
+        try:
+            return self._commands[job.id]
+
+        except KeyError:
+            # cache miss
+
+            command_spec = job_runner.parse_command_spec(job.command)
+            command = DetectCommand(command_spec['arguments'])
+            self._commands[job.id] = command
+            return command
+
+
+def _delete_work_unit_clips(work_unit):
+
+    """
+    Deletes the clips created for a work unit by an earlier attempt.
+    """
+
+    detector_names = json.loads(work_unit.detectors)
+    recording_id = work_unit.recording_file.recording_id
+
+    clip_ids = Clip.objects.filter(
+        creating_job_id=work_unit.job_id,
+        creating_processor__name__in=detector_names,
+        recording_channel__recording_id=recording_id,
+        start_time__gte=work_unit.start_time,
+        start_time__lt=work_unit.end_time
+    ).values_list('id', flat=True)
+
+    clip_count = model_utils.delete_clips(clip_ids)
+
+    if clip_count != 0:
+        _logger.info(
+            f'Deleted {clip_count} clips created for work unit '
+            f'{work_unit.id} by an earlier attempt.')
+
+
+def run_workers(worker_count, **kwargs):
+
+    """
+    Runs detection workers.
+
+    This function runs one worker in the current process, or more than
+    one in new processes, one per worker. In the latter case it returns
+    when all of the workers have exited.
+
+    Parameters:
+
+        worker_count : int
+            the number of workers to run.
+
+        kwargs : dict
+            `DetectionWorker` initializer arguments and `run` method
+            arguments.
+    """
+
+    if worker_count == 1:
+        _run_worker(**kwargs)
+
+    else:
+
+        # Close database connections before starting worker processes
+        # so that the processes do not inherit them.
+        connections.close_all()
+
+        # All workers share the archive lock of this process.
+        lock = archive_lock.get_lock()
+
+        # Give each worker a unique name if a name was specified.
+        name = kwargs.pop('name', None)
+        worker_kwargs = [
+            dict(kwargs, name=None if name is None else f'{name}-{i + 1}')
+            for i in range(worker_count)]
+
+        processes = [
+            Process(target=_run_worker_process, args=(lock, k))
+            for k in worker_kwargs]
+
+        for process in processes:
+            process.start()
+
+        for process in processes:
+            process.join()
+
+
+def _run_worker(
+        name=None, lease_duration=DEFAULT_LEASE_DURATION,
+        poll_interval=DEFAULT_POLL_INTERVAL, exit_when_idle=False):
+
+    worker = DetectionWorker(name, lease_duration, poll_interval)
+    worker.run(exit_when_idle)
+
+
+def _run_worker_process(lock, kwargs):
+
+    # Set up Django, which is necessary if this process was spawned
+    # rather than forked.
+    django_utils.set_up_django()
+
+    archive_lock.set_lock(lock)
+
+    _run_worker(**kwargs)
@@ -1,6 +1,7 @@
 """Module containing class `ExecuteDeferredActionsCommand`."""
 
 
+from collections import defaultdict
 from zoneinfo import ZoneInfo
 import datetime
 import logging
@@ -14,6 +15,7 @@ from vesper.command.command import Command, CommandExecutionError
 from vesper.django.app.models import (
     AnnotationInfo, Clip, Job, Processor, RecordingChannel)
 import vesper.command.command_utils as command_utils
+import vesper.django.app.clip_count_utils as clip_count_utils
 import vesper.django.app.model_utils as model_utils
 import vesper.util.signal_utils as signal_utils
 
@@ -118,15 +120,40 @@ class ExecuteDeferredActionsCommand(Command):
         start_time = time.time()
         
         clip_num = 0
+        clip_ids = []
+        
+        # Mapping from (annotation name, value, creation time,
+        # processor) tuples to IDs of clips with those annotations.
+        annotated_clip_ids = defaultdict(list)
         
         for clip in clips:
             
-            self._create_clip(clip)
+            clip_id, annotations = self._create_clip(clip)
+            
+            clip_ids.append(clip_id)
+            
+            for key in annotations:
+                annotated_clip_ids[key].append(clip_id)
             
             clip_num += 1
             
             if clip_num % _LOGGING_PERIOD == 0:
                 self._logger.info('Created {} clips...'.format(clip_num))
+        
+        # Update clip counts and annotate clips for all of the clips
+        # of the action at once rather than clip by clip.
+        
+        clip_count_utils.increment_clip_counts(clip_ids)
+        
+        for (name, value, creation_time, processor), ids in \
+                annotated_clip_ids.items():
+            
+            annotation_info = self._get_annotation_info(name)
+            
+            model_utils.annotate_clips(
+                ids, annotation_info, value,
+                creation_time=creation_time, creating_user=None,
+                creating_job=self._job, creating_processor=processor)
                     
         elapsed_time = time.time() - start_time
         timing_text = command_utils.get_timing_text(
@@ -137,6 +164,12 @@ class ExecuteDeferredActionsCommand(Command):
 
     def _create_clip(self, clip_info):
         
+        """
+        Creates a clip, returning its ID and a list of
+        (annotation name, value, creation time, processor) tuples
+        for its annotations.
+        """
+        
         (recording_channel_id, start_index, length, creation_time,
          creating_job_id, creating_processor_id, annotations) = clip_info
          
@@ -166,16 +199,14 @@ class ExecuteDeferredActionsCommand(Command):
             creating_processor=processor
         )
         
-        if annotations is not None:
-            
-            for name, value in annotations.items():
-                
-                annotation_info = self._get_annotation_info(name)
-                
-                model_utils.annotate_clip(
-                    clip, annotation_info, str(value),
-                    creation_time=creation_time, creating_user=None,
-                    creating_job=self._job, creating_processor=processor)
+        if annotations is None:
+            annotations = {}
+        
+        annotations = [
+            (name, str(value), creation_time, processor)
+            for name, value in annotations.items()]
+        
+        return clip.id, annotations
 
 
     # TODO: The `_get_annotation_info` method and the code above that
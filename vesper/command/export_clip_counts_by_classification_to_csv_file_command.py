@@ -7,9 +7,10 @@ from collections import namedtuple, defaultdict
 import itertools
 import logging
 
-from django.db import connection
+from django.db.models import Sum
 
 from vesper.command.command import Command
+from vesper.django.app.models import ClipCount
 import vesper.command.command_utils as command_utils
 
 
@@ -32,34 +33,6 @@ _ANNOTATION_VALUE_SUBSTITUTIONS = {
 _ANNOTATION_VALUE_COMPONENT_SEPARATOR = '.'
 
 
-def _create_clip_count_query(annotation_name):
-
-    return f'''
-SELECT
-    vesper_processor.name AS detector_name,
-    vesper_station.name AS station_name,
-    vesper_clip.date AS date,
-    vesper_string_annotation.value AS annotation_value,
-    count(*)
-FROM
-    vesper_clip
-LEFT JOIN vesper_string_annotation
-    ON vesper_clip.id = vesper_string_annotation.clip_id
-        AND info_id = (
-            SELECT id from vesper_annotation_info
-            WHERE name = '{annotation_name}')
-INNER JOIN vesper_processor
-    ON vesper_clip.creating_processor_id = vesper_processor.id
-INNER JOIN vesper_station
-    ON vesper_station.id = vesper_clip.station_id
-GROUP BY
-    detector_name,
-    station_name,
-    date,
-    annotation_value
-'''.lstrip()
-
-
 def _get_csv_file_header(annotation_name):
     return ('Detector', 'Station', 'Date', annotation_name, 'Clips')
 
@@ -115,17 +88,32 @@ class ExportClipCountsByClassificationToCsvFileCommand(Command):
 
     def _query_database(self, annotation_name):
 
-        query = _create_clip_count_query(annotation_name)
+        # We get clip counts from the archive's clip count table rather
+        # than by counting clips. We get counts for unannotated clips
+        # by subtracting counts for annotated clips from total counts.
 
         try:
-            with connection.cursor() as cursor:
-                cursor.execute(query)
-                rows = cursor.fetchall()
+            totals = _sum_clip_counts(
+                annotation_info__isnull=True, tag_info__isnull=True)
+            annotated_counts = _sum_clip_counts(
+                'annotation_value', annotation_info__name=annotation_name,
+                tag_info__isnull=True)
         except Exception as e:
             command_utils.handle_command_execution_error(
                 'Database query failed.', e)
 
-        return [_Row(*r) for r in rows]
+        unannotated_counts = defaultdict(int, totals)
+        for (detector_name, station_name, date, _), count in \
+                annotated_counts.items():
+            unannotated_counts[(detector_name, station_name, date)] -= count
+
+        rows = [_Row(*key, count) for key, count in annotated_counts.items()]
+
+        rows += [
+            _Row(*key, None, count)
+            for key, count in unannotated_counts.items() if count > 0]
+
+        return rows
 
 
     def _perform_substitutions(self, rows, substitutions):
@@ -208,3 +196,22 @@ class ExportClipCountsByClassificationToCsvFileCommand(Command):
     def _create_wildcard_row(self, key, clip_count, parent_annotation_value):
         t = key + (parent_annotation_value + '*', clip_count)
         return _Row(*t)
+
+
+def _sum_clip_counts(*field_names, **kwargs):
+
+    """
+    Sums clip counts of the clip count table by detector name, station
+    name, date, and the specified additional fields.
+
+    Counts for clips that were not created by a detector are excluded.
+    """
+
+    field_names = ('detector__name', 'station__name', 'date') + field_names
+
+    counts = ClipCount.objects.filter(
+        detector__isnull=False, **kwargs
+    ).values(*field_names).annotate(sum=Sum('count'))
+
+    return dict(
+        (tuple(c[n] for n in field_names), c['sum']) for c in counts)
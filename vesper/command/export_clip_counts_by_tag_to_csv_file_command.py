@@ -1,12 +1,13 @@
 """Module containing class `ExportClipCountsByTagToCsvFileCommand`."""
 
 
-from collections import namedtuple, defaultdict
+from collections import namedtuple
 import logging
 
-from django.db import connection
+from django.db.models import Sum
 
 from vesper.command.command import Command
+from vesper.django.app.models import ClipCount
 import vesper.command.command_utils as command_utils
 
 
@@ -17,31 +18,6 @@ import vesper.command.command_utils as command_utils
 _logger = logging.getLogger()
 
 
-_CLIP_COUNT_QUERY = f'''
-SELECT
-    vesper_processor.name AS detector_name,
-    vesper_station.name AS station_name,
-    vesper_clip.date AS date,
-    vesper_tag_info.name AS tag_name,
-    count(*)
-FROM
-    vesper_clip
-INNER JOIN vesper_tag
-    ON vesper_clip.id = vesper_tag.clip_id
-INNER JOIN vesper_processor
-    ON vesper_clip.creating_processor_id = vesper_processor.id
-INNER JOIN vesper_station
-    ON vesper_station.id = vesper_clip.station_id
-INNER JOIN vesper_tag_info
-    ON vesper_tag_info.id = vesper_tag.info_id
-GROUP BY
-    detector_name,
-    station_name,
-    date,
-    tag_name
-'''.lstrip()
-
-
 _OUTPUT_FILE_HEADER = ('Detector', 'Station', 'Date', 'Tag', 'Clips')
 
 
@@ -78,12 +54,21 @@ class ExportClipCountsByTagToCsvFileCommand(Command):
 
     def _query_database(self):
 
+        # We get clip counts from the archive's clip count table rather
+        # than by counting clips. Counts for clips that were not
+        # created by a detector are excluded.
+
         try:
-            with connection.cursor() as cursor:
-                cursor.execute(_CLIP_COUNT_QUERY)
-                rows = cursor.fetchall()
+            counts = ClipCount.objects.filter(
+                detector__isnull=False,
+                annotation_info__isnull=True,
+                tag_info__isnull=False
+            ).values(
+                'detector__name', 'station__name', 'date', 'tag_info__name'
+            ).annotate(sum=Sum('count'))
+            rows = [_Row(*c.values()) for c in counts]
         except Exception as e:
             command_utils.handle_command_execution_error(
                 'Database query failed.', e)
 
-        return [_Row(*r) for r in rows]
+        return rows
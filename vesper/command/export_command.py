@@ -54,55 +54,65 @@ class ExportCommand(ClipSetCommand):
 
         exporter = self._exporter
 
-        select_related_args = exporter.clip_query_set_select_related_args
+        # Related objects of clips to get in bulk along with the clips.
+        related_fields = exporter.clip_query_set_select_related_args
+        if related_fields is None:
+            related_fields = ()
 
         exporter.begin_exports()
     
-        value_tuples = self._create_clip_query_values_iterator()
+        # Get clips and clip counts for each station, mic output, and
+        # detector before exporting any clips, so we know the total
+        # number of clips to visit.
+        clip_sets = self._get_clip_sets()
+        clip_count = sum(sum(s[-1].values()) for s in clip_sets)
         
-        for station, mic_output, date, detector in value_tuples:
+        metrics = job_info.metrics
+        metrics.start_phase('Export clips', clip_count, 'clips')
             
-            clips = _get_clips(
-                station, mic_output, date, detector, self._annotation_name,
-                self._annotation_value, self._tag_name)
+        for station, mic_output, detector, clips, clip_counts in clip_sets:
             
-            if select_related_args is not None:
-                clips = clips.select_related(*select_related_args)
-
-            clip_count = clips.count()
-            count_text = text_utils.create_count_text(clip_count, 'clip')
+            # Stream clips for all dates a page at a time.
+            clips_by_date = self._get_clips_by_date(clips, related_fields)
             
-            _logger.info(
-                f'Exporter will visit {count_text} for station '
-                f'"{station.name}", mic output "{mic_output.name}", '
-                f'date {date}, and detector {detector.name}.')
+            for date, date_clips in clips_by_date:
+
+                clip_count = clip_counts.get(date, 0)
+                count_text = text_utils.create_count_text(clip_count, 'clip')
+                
+                _logger.info(
+                    f'Exporter will visit {count_text} for station '
+                    f'"{station.name}", mic output "{mic_output.name}", '
+                    f'date {date}, and detector {detector.name}.')
+                
+                exporter.begin_subset_exports(
+                    station, mic_output, date, detector, clip_count)
+    
+                try:
+                    visited_count, exported_count = \
+                        _export_clips(date_clips, exporter, metrics)
+                        
+                except Exception:
+                    _logger.error(
+                        'Clip export failed. See below for exception '
+                        'traceback.')
+                    raise
+    
+                # final_query_count = len(connection.queries)
+                # for i, query in enumerate(connection.queries):
+                #     if i >= initial_query_count:
+                #         print()
+                #         print(i + 1, query)
+                # print()
+                # query_count = final_query_count - initial_query_count
+                # print(f'Made {query_count} queries.')
+    
+                total_visited_count += visited_count
+                total_exported_count += exported_count
             
-            exporter.begin_subset_exports(
-                station, mic_output, date, detector, clip_count)
-
-            try:
-                visited_count, exported_count = \
-                    _export_clips(clips, exporter)
-                    
-            except Exception:
-                _logger.error(
-                    'Clip export failed. See below for exception traceback.')
-                raise
-
-            # final_query_count = len(connection.queries)
-            # for i, query in enumerate(connection.queries):
-            #     if i >= initial_query_count:
-            #         print()
-            #         print(i + 1, query)
-            # print()
-            # query_count = final_query_count - initial_query_count
-            # print(f'Made {query_count} queries.')
-
-            total_visited_count += visited_count
-            total_exported_count += exported_count
-        
-            exporter.end_subset_exports()
+                exporter.end_subset_exports()
 
+        metrics.start_phase('End exports')
         exporter.end_exports()
 
         elapsed_time = time.time() - start_time
@@ -114,6 +124,30 @@ class ExportCommand(ClipSetCommand):
             f'of {total_visited_count} visited clips{timing_text}.')
 
         return True
+    
+    
+    def _get_clip_sets(self):
+        
+        """
+        Gets (station, mic output, detector, clips, clip counts)
+        tuples for this command's clip set, where the clips are a
+        query set for all dates and the clip counts are a mapping from
+        dates to numbers of clips.
+        """
+        
+        clip_sets = []
+        
+        for station, mic_output, detector in \
+                self._get_clip_set_query_values():
+            
+            # Get clips for all dates with one query.
+            clips = self._get_clips(station, mic_output, detector)
+            clip_counts = model_utils.get_clip_counts_by_date(clips)
+            
+            clip_sets.append(
+                (station, mic_output, detector, clips, clip_counts))
+        
+        return clip_sets
 
 
 def _parse_exporter_spec(spec):
@@ -140,28 +174,10 @@ def _create_exporter(name, arguments):
     return cls(arguments)
 
 
-def _get_clips(
-        station, mic_output, date, detector, annotation_name,
-        annotation_value, tag_name):
-    
-    try:
-        return model_utils.get_clips(
-            station=station,
-            mic_output=mic_output,
-            date=date,
-            detector=detector,
-            annotation_name=annotation_name,
-            annotation_value=annotation_value,
-            tag_name=tag_name)
-        
-    except Exception as e:
-        command_utils.log_and_reraise_fatal_exception(e, 'Clip query')
-    
-    
 _LOGGING_PERIOD = 500    # clips
 
 
-def _export_clips(clips, exporter):
+def _export_clips(clips, exporter, metrics):
     
     start_time = time.time()
     
@@ -174,6 +190,7 @@ def _export_clips(clips, exporter):
             exported_count += 1
         
         visited_count += 1
+        metrics.add_progress()
         
         if visited_count % _LOGGING_PERIOD == 0:
             _logger.info(f'Visited {visited_count} clips...')
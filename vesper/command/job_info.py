@@ -2,6 +2,7 @@
 
 
 from vesper.command.job_logging_manager import JobLoggingManager
+from vesper.command.job_metrics import JobMetrics
 
 
 class JobInfo:
@@ -32,6 +33,12 @@ class JobInfo:
             
             This event is set when it has been requested that this job
             stop without completing.
+            
+        metrics : `JobMetrics`
+            the progress and throughput metrics of this job.
+            
+            A command reports its progress through the methods of this
+            object, for example `start_phase` and `add_progress`.
     """
     
     
@@ -39,6 +46,7 @@ class JobInfo:
         self.job_id = job_id
         self._logging_config = logging_config
         self._stop_event = stop_event
+        self.metrics = JobMetrics(job_id)
         
         
     @property
@@ -5,7 +5,6 @@ from collections import defaultdict
 from logging import FileHandler, Handler
 from logging.handlers import QueueHandler, QueueListener
 from multiprocessing import Queue
-import logging
 
 import vesper.util.logging_utils as logging_utils
 import vesper.util.os_utils as os_utils
@@ -61,6 +60,25 @@ class JobLoggingManager:
         handler = QueueHandler(queue)
         logger.addHandler(handler)
 
+
+    @staticmethod
+    def unconfigure_logger(logger, logging_config):
+        
+        """
+        Removes the handlers that the `configure_logger` static method
+        added to the specified logger for the specified configuration.
+        
+        A job worker process runs many jobs, configuring its root logger
+        for each one, so it must remove the handlers for each job when
+        the job finishes.
+        """
+        
+        _, queue = logging_config
+        
+        for handler in list(logger.handlers):
+            if isinstance(handler, QueueHandler) and handler.queue is queue:
+                logger.removeHandler(handler)
+
         
     def __init__(self, job, level):
         
@@ -75,8 +93,8 @@ class JobLoggingManager:
         
         # Create handler that writes log messages to the job log file.
         os_utils.create_parent_directory(job.log_file_path)
-        file_handler = FileHandler(job.log_file_path, 'w')
-        file_handler.setFormatter(formatter)
+        self._file_handler = FileHandler(job.log_file_path, 'w')
+        self._file_handler.setFormatter(formatter)
 
         # We used to create a second handler here, of type StreamHandler,
         # which wrote messages to stderr, and add it to the QueueListener
@@ -91,7 +109,7 @@ class JobLoggingManager:
         # Create logging listener that will run on its own thread and log
         # messages sent to it via the queue.
         self._listener = QueueListener(
-            self.queue, file_handler, self._record_counts_handler)
+            self.queue, self._file_handler, self._record_counts_handler)
         
         
     @property
@@ -113,4 +131,10 @@ class JobLoggingManager:
         # Tell logging listener to terminate, and wait for it to do so.
         self._listener.stop()
         
-        logging.shutdown()
+        # Close the job log file and the logging queue. We do this
+        # rather than shutting down the `logging` module since the
+        # job worker process that ran the job continues running after
+        # the job finishes.
+        self._file_handler.close()
+        self.queue.close()
+        self.queue.join_thread()
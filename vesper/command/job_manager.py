@@ -1,14 +1,19 @@
 """Module containing class `JobManager`."""
 
 
-from multiprocessing import Event, Lock, Process
+from multiprocessing import Event, Lock, Process, Value
+import atexit
 import datetime
 import json
+import logging
+
+from django.conf import settings
+from django.core.signals import request_started
 
 from vesper.django.app.models import Job
 from vesper.util.bunch import Bunch
 from vesper.util.repeating_timer import RepeatingTimer
-import vesper.command.job_runner as job_runner
+import vesper.command.job_worker as job_worker
 import vesper.util.archive_lock as archive_lock
 import vesper.util.time_utils as time_utils
 
@@ -18,90 +23,217 @@ class JobManager:
     """
     Manager of Vesper jobs.
 
-    A Vesper job executes one Vesper command. Each job runs in its own
-    process, which may or may not start additional processes. The
-    `start_job` method of this class starts a job for a specified command,
-    and the `stop_job` method requests that a running job stop. A job is
-    not required to honor a stop request, but most jobs should, especially
-    longer-running ones.
+    A Vesper job executes one Vesper command. The `start_job` method of
+    this class queues a job for a specified command, and the `stop_job`
+    method requests that a queued or running job stop. A job is not
+    required to honor a stop request once it is running, but most jobs
+    should, especially longer-running ones.
+    
+    Jobs run in a fixed number of long-lived *job worker* processes,
+    each of which runs one job at a time and may or may not start
+    additional processes while doing so. The number of workers is the
+    value of the `VESPER_JOB_WORKER_COUNT` Django setting. A job waits
+    in the job queue until a worker is free to run it. The job queue
+    is persistent, since it comprises the archive database `Job` model
+    instances with status "Queued": jobs that are queued when the
+    Vesper server shuts down run when it starts up again. See the
+    `vesper.command.job_worker` module for more about workers and the
+    job queue.
+    
+    The manager starts its workers when the first job is started, or
+    when the server handles its first request if there are queued
+    jobs then (i.e. jobs left over from a previous run of the server).
+    It does not start workers in processes that do not handle requests,
+    for example processes running Django management commands. The
+    manager also checks on its workers periodically, replacing any
+    worker that terminates unexpectedly and marking the job that the
+    worker was running (if any) as failed.
     """
     
     
-    def __init__(self):
+    def __init__(self, worker_count=None):
         
-        self._job_infos = {}
+        if worker_count is None:
+            worker_count = settings.VESPER_JOB_WORKER_COUNT
+            
+        self._worker_count = max(worker_count, 1)
+        """Number of job workers."""
+        
+        self._workers = []
         """
-        Mapping from job IDs to `Bunch` objects containing job information.
+        List of `Bunch` objects containing job worker information.
         
-        An item is added to this dictionary when each job is started.
-        A job's item is removed from the dictionary after the job terminates.
-        The removal is performed by the `_delete_terminated_jobs` method,
-        which runs off a repeating timer.
+        The list is empty until the workers are started.
         """
+        
+        self._shutdown_event = Event()
+        """Event that requests that workers shut down."""
 
         self._lock = Lock()
         """
-        Lock used to synchronize access to the `_job_infos` dictionary
-        from multiple threads. (The lock can synchronize access from
-        multiple threads and/or processes, but we access the dictionary
+        Lock used to synchronize access to the `_workers` list from
+        multiple threads. (The lock can synchronize access from
+        multiple threads and/or processes, but we access the list
         only from threads of the main Vesper process.)
         """
 
-        self._timer = RepeatingTimer(10, self._delete_terminated_jobs)
-        """Repeating timer that deletes terminated jobs from `_job_infos`."""
+        self._timer = RepeatingTimer(10, self._check_workers)
+        """Repeating timer that checks on workers."""
         
         self._timer.start()
+        
+        atexit.register(self._shut_down_workers)
+        
+        request_started.connect(self._on_first_request)
 
 
-    def start_job(self, command_spec, user):
+    def start_job(self, command_spec, user, priority=0):
+        
+        """
+        Queues a job for the specified command.
+        
+        Jobs with higher priorities run before jobs with lower
+        priorities, and jobs with the same priority run in the order
+        in which they were started.
+        
+        Returns the ID of the new job.
+        """
+        
+        job_id = _create_job(command_spec, user, priority)
         
-        info = Bunch()
-        info.command_spec = command_spec
-        info.job_id = _create_job(command_spec, user)
-        info.archive_lock = archive_lock.get_lock()
-        info.stop_event = Event()
-
         with self._lock:
-            self._job_infos[info.job_id] = info
             
-        info.process = Process(target=job_runner.run_job, args=(info,))
-        info.process.start()
+            if len(self._workers) == 0:
+                self._start_workers()
+            
+            self._notify_workers()
         
-        return info.job_id
+        return job_id
         
         
     def stop_job(self, job_id):
+        
+        # Stop the job if it's queued. If it isn't queued, the update
+        # does nothing.
+        with archive_lock.atomic():
+            stopped = Job.objects.filter(id=job_id, status='Queued').update(
+                end_time=time_utils.get_utc_now(), status='Interrupted')
+            
+        if stopped:
+            return
+        
+        # Ask the worker running the job, if there is one, to stop it.
         with self._lock:
-            try:
-                job_info = self._job_infos[job_id]
-            except KeyError:
-                return
-            else:
-                job_info.stop_event.set()
+            for worker in self._workers:
+                if worker.job_id.value == job_id:
+                    worker.stop_event.set()
             
         
-    def _delete_terminated_jobs(self):
+    def _notify_workers(self):
         
-        terminated_job_ids = set()
+        # We give each worker its own job queued event rather than
+        # sharing one event among all workers since a process that
+        # terminates while waiting on a `multiprocessing.Event` can
+        # leave the event unusable by other processes.
+        for worker in self._workers:
+            worker.job_queued_event.set()
+            
+            
+    def _start_workers(self):
+        for _ in range(self._worker_count):
+            self._workers.append(self._start_worker())
+            
+            
+    def _start_worker(self):
         
-        with self._lock:
+        worker = Bunch()
+        worker.archive_lock = archive_lock.get_lock()
+        worker.job_queued_event = Event()
+        worker.shutdown_event = self._shutdown_event
+        worker.stop_event = Event()
+        worker.job_id = Value('q', 0)
+        
+        process = Process(target=job_worker.run_worker, args=(worker,))
+        process.start()
+        
+        # We set this attribute only after starting the process so that
+        # the process's argument does not include the process.
+        worker.process = process
+        
+        return worker
+    
+    
+    def _check_workers(self):
+        
+        try:
             
-            for info in self._job_infos.values():
-                if not info.process.is_alive():
-                    terminated_job_ids.add(info.job_id)
+            with self._lock:
+                
+                if not self._shutdown_event.is_set():
                     
-            for job_id in terminated_job_ids:
-                del self._job_infos[job_id]
+                    # Replace any workers that have terminated.
+                    for i, worker in enumerate(self._workers):
+                        if not worker.process.is_alive():
+                            _end_worker_job(worker)
+                            self._workers[i] = self._start_worker()
+                            
+        except Exception:
+            
+            # Log exception rather than raising it, which would stop
+            # the repeating timer.
+            logging.getLogger().exception(
+                'Exception raised while checking on job workers.')
+            
+            
+    def _on_first_request(self, **kwargs):
+        
+        request_started.disconnect(self._on_first_request)
+        
+        # Start workers if there are queued jobs.
+        with self._lock:
+            if len(self._workers) == 0 and \
+                    Job.objects.filter(status='Queued').exists():
+                self._start_workers()
+            
+            
+    def _shut_down_workers(self):
+        
+        # Ask idle workers to shut down, and workers that are running
+        # jobs to shut down after their jobs finish.
+        self._shutdown_event.set()
+        
+        with self._lock:
+            self._notify_workers()
+        
+        self._timer.cancel()
+
+
+def _end_worker_job(worker):
+    
+    """Marks the job of a worker that terminated unexpectedly as failed."""
+    
+    job_id = worker.job_id.value
+    
+    if job_id != 0:
+        
+        with archive_lock.atomic():
+            Job.objects.filter(id=job_id, status='Running').update(
+                end_time=time_utils.get_utc_now(), status='Failed')
+        
+        logging.getLogger().error(
+            f'Job worker process terminated unexpectedly while running '
+            f'job {job_id}. The job has been marked as failed.')
 
 
-def _create_job(command_spec, user):
+def _create_job(command_spec, user, priority):
     
     with archive_lock.atomic():
         job = Job.objects.create(
             command=json.dumps(command_spec, default=_json_date_serializer),
+            priority=priority,
             creation_time=time_utils.get_utc_now(),
             creating_user=user,
-            status='Unstarted')
+            status='Queued')
     
     return job.id
     
@@ -0,0 +1,235 @@
+"""
+Module containing class `JobMetrics`.
+
+A `JobMetrics` object keeps track of the progress and throughput of
+a Vesper job, and saves them in the `metrics` field of the job's
+`Job` model instance, from which the Vesper server serves them as
+JSON (see the `job_metrics` view). This allows clients to monitor
+jobs without parsing job logs.
+
+A job comprises a sequence of *phases*, for example "Export clips"
+or "Run detectors". A command starts a phase with the `start_phase`
+method of its job's metrics, specifying the phase's name, the unit
+in which the phase's progress is measured (for example "clips" or
+"recordings"), and the phase's total number of units, if known. The
+command reports progress with the `add_progress` method as it goes.
+The metrics of a phase include the number of units completed, the
+phase's elapsed time, its throughput in units per second, and an
+estimate of its remaining time.
+"""
+
+
+import json
+import time
+
+
+_SAVE_INTERVAL = 5
+"""
+Minimum time in seconds between saves of job metrics by the
+`add_progress` method of `JobMetrics`.
+"""
+
+
+class JobMetrics:
+
+    """
+    Progress and throughput metrics of a Vesper job.
+
+    To limit the cost of progress reporting, the `add_progress` method
+    saves metrics to the archive database at most once every
+    `save_interval` seconds. The other methods save metrics
+    immediately.
+    """
+
+
+    def __init__(self, job_id, save_interval=_SAVE_INTERVAL):
+        self._job_id = job_id
+        self._save_interval = save_interval
+        self._phases = []
+        self._phase = None
+        self._save_time = None
+
+
+    @property
+    def phases(self):
+        return self._phases
+
+
+    def start_phase(self, name, total=None, unit='items'):
+
+        """
+        Starts a new phase of this job.
+
+        Any current phase ends when the new phase starts.
+
+        Parameters:
+
+            name : str
+                the name of the new phase, for example "Export clips".
+
+            total : int or None
+                the total number of units of the new phase, or `None`
+                if unknown. If the total becomes known during the
+                phase, it can be set with the `set_total` method.
+
+            unit : str
+                the plural name of the unit in which progress is
+                measured, for example "clips".
+        """
+
+        self._end_phase()
+
+        self._phase = {
+            'name': name,
+            'unit': unit,
+            'total': total,
+            'completed': 0,
+            'startTime': time.time(),
+            'endTime': None
+        }
+
+        self._phases.append(self._phase)
+
+        self.save()
+
+
+    def set_total(self, total):
+        """Sets the total number of units of the current phase."""
+        self._phase['total'] = total
+        self.save()
+
+
+    def add_progress(self, count=1):
+
+        """
+        Adds to the number of completed units of the current phase.
+
+        This method saves metrics only if at least the save interval
+        has elapsed since they were last saved, so it is inexpensive
+        enough to call for every unit completed.
+        """
+
+        self._phase['completed'] += count
+
+        if time.time() - self._save_time >= self._save_interval:
+            self.save()
+
+
+    def end_phase(self):
+        """Ends the current phase of this job, if there is one."""
+        if self._end_phase():
+            self.save()
+
+
+    def _end_phase(self):
+
+        if self._phase is None:
+            return False
+
+        else:
+            self._phase['endTime'] = time.time()
+            self._phase = None
+            return True
+
+
+    def save(self):
+
+        """Saves this job's metrics to the archive database."""
+
+        # These imports are here rather than at the top of this module
+        # so they will be executed after Django is set up in the job
+        # worker process.
+        from vesper.django.app.models import Job
+        import vesper.util.archive_lock as archive_lock
+
+        metrics = json.dumps({'phases': self._phases})
+
+        with archive_lock.atomic():
+            Job.objects.filter(id=self._job_id).update(metrics=metrics)
+
+        self._save_time = time.time()
+
+
+def get_job_metrics(job, now=None):
+
+    """
+    Gets the metrics of the specified job, for serving as JSON.
+
+    Parameters:
+
+        job : Job
+            the job whose metrics to get.
+
+        now : float or None
+            the current time as a POSIX timestamp, or `None` to use
+            the current time. This is used to compute the elapsed and
+            remaining times of an ongoing phase.
+
+    Returns:
+        dictionary of job metrics.
+
+        The dictionary contains the job's ID and status, its start and
+        end times as ISO 8601 strings, the name of its current phase
+        (or `None` if there is none), and a list of its phases. Each
+        phase includes the phase's name and unit, its total and
+        completed numbers of units, its start and end times as POSIX
+        timestamps, its elapsed time in seconds, its rate in units per
+        second, and its estimated remaining time in seconds. The rate
+        is `None` if no time has elapsed, and the remaining time is
+        `None` unless the phase is ongoing and has a known total and
+        a nonzero rate.
+    """
+
+    if now is None:
+        now = time.time()
+
+    if job.metrics:
+        phases = json.loads(job.metrics)['phases']
+    else:
+        phases = []
+
+    phases = [_get_phase_metrics(p, now) for p in phases]
+
+    if len(phases) != 0 and phases[-1]['endTime'] is None:
+        current_phase = phases[-1]['name']
+    else:
+        current_phase = None
+
+    return {
+        'jobId': job.id,
+        'status': job.status,
+        'startTime': _format_datetime(job.start_time),
+        'endTime': _format_datetime(job.end_time),
+        'currentPhase': current_phase,
+        'phases': phases
+    }
+
+
+def _get_phase_metrics(phase, now):
+
+    start_time = phase['startTime']
+    end_time = phase['endTime']
+    total = phase['total']
+    completed = phase['completed']
+
+    elapsed_time = (now if end_time is None else end_time) - start_time
+
+    if elapsed_time > 0:
+        rate = completed / elapsed_time
+    else:
+        rate = None
+
+    if end_time is None and total is not None and rate:
+        remaining_time = max(total - completed, 0) / rate
+    else:
+        remaining_time = None
+
+    return dict(
+        phase,
+        elapsedTime=elapsed_time,
+        rate=rate,
+        remainingTime=remaining_time)
+
+
+def _format_datetime(dt):
+    return None if dt is None else dt.isoformat()
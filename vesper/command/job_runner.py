@@ -1,11 +1,10 @@
 """
 Module containing function that runs a Vesper job.
 
-The `run_job` function runs in a new process for each job that Vesper
-executes. The new process is called the *main job process* for the job.
-The `run_job` function is in its own module rather than in the `job_manager
-module in order to minimize the number of imports that the module containing
-the function, and hence the new process, must perform.
+The `run_job` function runs in a job worker process for each job that
+Vesper executes. The worker process is called the *main job process*
+for the job while it runs the job. See the `vesper.command.job_worker`
+module for more about job workers.
 """
 
 
@@ -17,18 +16,21 @@ import traceback
 from vesper.command.command import CommandSyntaxError
 from vesper.command.job_info import JobInfo
 from vesper.command.job_logging_manager import JobLoggingManager
-import vesper.util.django_utils as django_utils
 import vesper.util.time_utils as time_utils
 
 
 '''
 Job status values:
 
-Unstarted
+Queued
 Running
 Completed
 Interrupted
 Failed
+
+Jobs created by earlier versions of Vesper, which started a new
+process for each job as soon as the job was created, may also have
+the status "Unstarted".
 '''
 
 
@@ -46,16 +48,18 @@ class _CommandArgsEncoder(json.JSONEncoder):
 def run_job(job_info):
     
     """
-    Runs a job in a new process.
+    Runs a job in a job worker process.
     
-    This function is executed by the Vesper job manager each time it
-    starts a new job. The function is executed in a new process, called
-    the *main job process* of the job.
+    This function is executed by a Vesper job worker for each job that
+    it takes from the job queue, after marking the job as running. The
+    worker process is called the *main job process* of the job while
+    it runs the job.
     
-    The function sets up Django and configures the root logger for the
-    main job process, constructs the command to be executed, and invokes
-    the command's `execute` method. Logging is shut down after that method
-    returns.
+    The function configures the root logger for the job, constructs the
+    command to be executed, and invokes the command's `execute` method.
+    Logging is shut down and the root logger is restored to its previous
+    configuration after that method returns, so that the worker can run
+    more jobs.
     
     Parameters:
     
@@ -66,11 +70,6 @@ def run_job(job_info):
             new job, the ID of the Django Job model instance for the job,
             and the stop event for the job.
             
-            The information includes the ID of the Django job model
-            instance rather than the instance itself so that the job
-            info can be unpickled in the new process without first
-            setting up Django.
-            
             This object is *not* of type `vesper.command.job_info.JobInfo`,
             which contains somewhat different (though overlapping)
             information. This function invokes the `execute` method of the
@@ -78,25 +77,10 @@ def run_job(job_info):
             `vesper.command.job_info.JobInfo`.
     """
     
-    # Set up Django for the main job process. We must do this before we try
-    # to use anything Django (e.g. the ORM) in the new process. We perform
-    # the setup inside of this function rather than at the top of this module
-    # so that it happens only in a new job process, and not in a parent
-    # process that is importing this module merely to be able to execute
-    # this function. In the latter case Django will already have been set up
-    # in the importing process if it is needed, and it would be redundant
-    # and potentially problematic to perform the setup again.
-    django_utils.set_up_django()
-    
-    # These imports are here rather than at the top of this module so
-    # they will be executed after Django is set up in the main job process.
+    # This import is here rather than at the top of this module so it
+    # will be executed after Django is set up in the job worker process.
     from vesper.django.app.models import Job
-    import vesper.util.archive_lock as archive_lock
     
-    # Set the archive lock for this process. The lock is provided to
-    # this process by its creator.
-    archive_lock.set_lock(job_info.archive_lock)
-
     # Get the Django model instance for this job.
     job = Job.objects.get(id=job_info.job_id)
     
@@ -113,12 +97,6 @@ def run_job(job_info):
     
     try:
         
-        # Mark job as running.
-        job.start_time = time_utils.get_utc_now()
-        job.status = 'Running'
-        with archive_lock.atomic():
-            job.save()
-        
         # Create command from command spec.
         command = _create_command(job_info.command_spec)
         
@@ -141,16 +119,16 @@ def run_job(job_info):
     
         # Execute command.
         info = JobInfo(job_info.job_id, logging_config, job_info.stop_event)
-        complete = command.execute(info)
+        try:
+            complete = command.execute(info)
+        finally:
+            info.metrics.end_phase()
         
     except Exception:
         
         # Update job status and log error message
         
-        job.end_time = time_utils.get_utc_now()
-        job.status = 'Failed'
-        with archive_lock.atomic():
-            job.save()
+        end_job(job.id, 'Failed')
         
         logger.error(
             'Job failed with an exception. See traceback below.\n' +
@@ -162,10 +140,7 @@ def run_job(job_info):
         
         status = 'Completed' if complete else 'Interrupted'
 
-        job.end_time = time_utils.get_utc_now()
-        job.status = status
-        with archive_lock.atomic():
-            job.save()
+        end_job(job.id, status)
         
         logger.info('Job {}.'.format(status.lower()))
         
@@ -186,9 +161,76 @@ def run_job(job_info):
         # reported in log displays. See record counts handler
         # TODO in `job_logging_manager` module for more detail.
         
+        # Restore root logger configuration for the next job of the
+        # job worker process.
+        JobLoggingManager.unconfigure_logger(logger, logging_config)
+        
         logging_manager.shut_down_logging()
 
 
+def end_job(job_id, status):
+    
+    """Records the end time and final status of the specified job."""
+    
+    # These imports are here rather than at the top of this module so
+    # they will be executed after Django is set up in the job worker
+    # process.
+    from vesper.django.app.models import Job
+    import vesper.util.archive_lock as archive_lock
+    
+    with archive_lock.atomic():
+        Job.objects.filter(id=job_id).update(
+            end_time=time_utils.get_utc_now(), status=status)
+
+
+def parse_command_spec(command):
+    
+    """
+    Parses the command specification of a job.
+    
+    The command specification of a job is stored in the archive
+    database as JSON, in the `command` field of the job's `Job` model
+    instance. JSON has no date type, so the job manager stores dates
+    (for example the `start_date` and `end_date` arguments of many
+    commands) as ISO 8601 strings, and this function converts the
+    strings back to dates.
+    """
+    
+    return json.loads(command, object_hook=_parse_command_spec_dates)
+
+
+def _parse_command_spec_dates(d):
+    
+    for name, value in d.items():
+        
+        if name.endswith('date') and isinstance(value, str):
+            
+            try:
+                d[name] = date.fromisoformat(value)
+            except ValueError:
+                pass
+            
+    return d
+
+
+def import_extensions():
+    
+    """
+    Imports Vesper extensions, including command classes.
+    
+    A job worker calls this function once when it starts, so that the
+    jobs it runs needn't import extensions themselves.
+    """
+    
+    # This import is here rather than at the top of this module so it
+    # will be executed after Django is set up in the job worker process.
+    # See the comment in the `_create_command` function below for why
+    # this matters.
+    from vesper.singleton.extension_manager import extension_manager
+    
+    extension_manager.get_extensions('Command')
+
+
 def _create_count_phrase(counts, key, name):
     count = counts.get(key, 0)
     if count == 0:
@@ -207,7 +249,7 @@ def _create_command(command_spec):
             'Command specification contains no "name" item.')
         
     # This import is here rather than at the top of this module so it
-    # will be executed after Django is set up in the main job process.
+    # will be executed after Django is set up in the job worker process.
     #
     # The import has to be here for now only because the
     # `vesper.birdvox.detectors` module creates BirdVoxDetect detector
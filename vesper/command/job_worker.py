@@ -0,0 +1,173 @@
+"""
+Module containing function that runs a Vesper job worker.
+
+A *job worker* is a long-lived process that runs Vesper jobs one after
+another. The Vesper job manager starts a fixed number of job workers,
+each of which repeatedly takes the next job from the job queue and
+runs it. The job queue is the set of archive database `Job` model
+instances with status "Queued", ordered first by decreasing priority
+and then by increasing ID, i.e. in order of creation for jobs of the
+same priority.
+
+Since a worker runs many jobs, it sets up Django and imports Vesper
+extensions (including, for example, TensorFlow for extensions that
+use it) only once, rather than once per job. Extensions can also
+keep loaded models and other expensive resources from one job to the
+next: see the `vesper.util.model_cache` module.
+
+The `run_worker` function is in its own module rather than in the
+`job_manager` module in order to minimize the number of imports that
+the module containing the function, and hence a new worker process,
+must perform.
+"""
+
+
+import logging
+
+from django.db import close_old_connections, transaction
+
+from vesper.util.bunch import Bunch
+import vesper.command.job_runner as job_runner
+import vesper.util.django_utils as django_utils
+import vesper.util.time_utils as time_utils
+
+
+_QUEUE_POLL_INTERVAL = 10
+"""
+Maximum time in seconds that an idle worker waits for a job queued
+notification before it checks the job queue.
+
+A worker checks the job queue when it is notified that a job has been
+queued, but it also checks the queue periodically in case a job was
+queued by another process, for example a Vesper server process other
+than the one that started the worker.
+"""
+
+
+def run_worker(worker_info):
+
+    """
+    Runs a job worker in a new process.
+
+    This function is executed by the Vesper job manager for each job
+    worker that it starts. It runs jobs from the job queue until the
+    manager requests that it shut down.
+
+    Parameters:
+
+        worker_info : `Bunch`
+            information pertaining to the new worker.
+
+            The information includes the archive lock, the shutdown
+            event, which is shared by all workers, and the worker's
+            job queued event, stop event, and current job ID value.
+    """
+
+    # Set up Django for the worker process. We must do this before we
+    # try to use anything Django (e.g. the ORM) in the new process. We
+    # perform the setup inside of this function rather than at the top
+    # of this module so that it happens only in a new worker process,
+    # and not in a parent process that is importing this module merely
+    # to be able to execute this function.
+    django_utils.set_up_django()
+
+    # This import is here rather than at the top of this module so it
+    # will be executed after Django is set up in the worker process.
+    import vesper.util.archive_lock as archive_lock
+
+    # Set the archive lock for this process. The lock is provided to
+    # this process by its creator.
+    archive_lock.set_lock(worker_info.archive_lock)
+
+    # Import Vesper extensions, including command classes, before
+    # running any job, so jobs don't have to.
+    job_runner.import_extensions()
+
+    job_queued_event = worker_info.job_queued_event
+    shutdown_event = worker_info.shutdown_event
+
+    while not shutdown_event.is_set():
+
+        # Run queued jobs until the queue is empty.
+        while not shutdown_event.is_set():
+
+            # Close database connections that are no longer usable,
+            # for example because the database server closed them
+            # while the worker was idle.
+            close_old_connections()
+
+            job = _get_next_job(archive_lock)
+
+            if job is None:
+                break
+
+            _run_job(job, worker_info)
+
+        # Wait for a job to be queued, or for the poll interval to
+        # elapse. We clear the event before checking the queue again
+        # so that we will be notified of any job that is queued after
+        # the check.
+        job_queued_event.wait(_QUEUE_POLL_INTERVAL)
+        job_queued_event.clear()
+
+
+def _get_next_job(archive_lock):
+
+    """
+    Gets the next job of the job queue, marking it as running.
+
+    Returns `None` if the queue is empty.
+    """
+
+    from vesper.django.app.models import Job
+
+    with archive_lock.atomic():
+
+        with transaction.atomic():
+
+            # Lock the row of the job we get so that no other worker
+            # (possibly of another Vesper server process) can get the
+            # same job. For SQLite, Django ignores `select_for_update`
+            # and the archive lock serves the same purpose.
+            jobs = Job.objects.select_for_update(skip_locked=True)
+            job = jobs.filter(status='Queued') \
+                .order_by('-priority', 'id').first()
+
+            if job is not None:
+                job.start_time = time_utils.get_utc_now()
+                job.status = 'Running'
+                job.save(update_fields=('start_time', 'status'))
+
+    return job
+
+
+def _run_job(job, worker_info):
+
+    # Publish ID of the job we're running so that the job manager
+    # can find it, for example to stop the job.
+    worker_info.job_id.value = job.id
+    worker_info.stop_event.clear()
+
+    try:
+
+        job_info = Bunch()
+        job_info.command_spec = job_runner.parse_command_spec(job.command)
+        job_info.job_id = job.id
+        job_info.archive_lock = worker_info.archive_lock
+        job_info.stop_event = worker_info.stop_event
+
+        job_runner.run_job(job_info)
+
+    except Exception:
+
+        # `run_job` handles exceptions raised by commands, so we get
+        # here only if something went wrong outside of a command,
+        # for example if the job's command specification is invalid.
+        # We mark the job as failed and continue with the next job
+        # rather than terminating the worker.
+        logging.getLogger().exception(
+            f'Job worker could not run job {job.id}.')
+        job_runner.end_job(job.id, 'Failed')
+
+    finally:
+        worker_info.job_id.value = 0
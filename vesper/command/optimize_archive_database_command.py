@@ -0,0 +1,37 @@
+"""Module containing class `OptimizeArchiveDatabaseCommand`."""
+
+
+import logging
+import time
+
+from vesper.command.command import Command
+import vesper.command.command_utils as command_utils
+import vesper.django.app.database_utils as database_utils
+
+
+_logger = logging.getLogger()
+
+
+class OptimizeArchiveDatabaseCommand(Command):
+    
+    
+    extension_name = 'optimize_archive_database'
+    
+    
+    def execute(self, job_info):
+        
+        _logger.info('Optimizing archive database...')
+        
+        start_time = time.time()
+        
+        try:
+            database_utils.optimize_database()
+        except Exception as e:
+            command_utils.handle_command_execution_error(
+                'Archive database optimization failed.', e)
+            
+        elapsed_time = time.time() - start_time
+        _logger.info(
+            f'Optimized archive database in {elapsed_time:.1f} seconds.')
+        
+        return True
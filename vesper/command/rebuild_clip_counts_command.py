@@ -0,0 +1,36 @@
+"""Module containing class `RebuildClipCountsCommand`."""
+
+
+import logging
+import time
+
+from vesper.command.command import Command
+import vesper.command.command_utils as command_utils
+import vesper.django.app.clip_count_utils as clip_count_utils
+
+
+_logger = logging.getLogger()
+
+
+class RebuildClipCountsCommand(Command):
+    
+    
+    extension_name = 'rebuild_clip_counts'
+    
+    
+    def execute(self, job_info):
+        
+        _logger.info('Rebuilding clip counts...')
+        
+        start_time = time.time()
+        
+        try:
+            clip_count_utils.rebuild_clip_counts()
+        except Exception as e:
+            command_utils.handle_command_execution_error(
+                'Clip count rebuild failed.', e)
+            
+        elapsed_time = time.time() - start_time
+        _logger.info(f'Rebuilt clip counts in {elapsed_time:.1f} seconds.')
+        
+        return True
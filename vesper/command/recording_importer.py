@@ -135,7 +135,7 @@ class RecordingImporter:
     
     def _get_recording_file_info(self, file_path):
         
-        if not file_type_utils.is_wave_file(file_path):
+        if not file_type_utils.is_audio_file(file_path):
             return None
         
         else:
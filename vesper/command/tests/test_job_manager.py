@@ -0,0 +1,50 @@
+from pathlib import Path
+import os
+import subprocess
+import sys
+import tempfile
+
+from vesper.tests.test_case import TestCase
+import vesper
+
+
+_EXIT_TIMEOUT = 60     # seconds
+
+# Script that constructs a job manager and, when it exits, prints
+# whether or not the job manager's shutdown event was set. The exit
+# handler that prints runs after the job manager's own exit handler,
+# since exit handlers run in the reverse of the order in which they
+# were registered.
+_SCRIPT = '''
+import atexit
+import vesper.util.django_utils as django_utils
+django_utils.set_up_django()
+from vesper.command.job_manager import JobManager
+atexit.register(lambda: print(manager._shutdown_event.is_set()))
+manager = JobManager(1)
+'''
+
+
+class JobManagerTests(TestCase):
+
+
+    def test_process_exit(self):
+
+        # Check that a process that constructs a job manager exits
+        # when its main thread finishes, rather than waiting forever
+        # for the job manager's worker check timer, and that the job
+        # manager asks its workers to shut down when it does.
+        # Make sure the script can import Vesper even if it is not
+        # installed.
+        python_path = str(Path(vesper.__file__).parent.parent)
+        if 'PYTHONPATH' in os.environ:
+            python_path += os.pathsep + os.environ['PYTHONPATH']
+        env = dict(os.environ, PYTHONPATH=python_path)
+
+        with tempfile.TemporaryDirectory() as dir_path:
+            result = subprocess.run(
+                [sys.executable, '-c', _SCRIPT], cwd=dir_path, env=env,
+                capture_output=True, timeout=_EXIT_TIMEOUT)
+
+        self.assertEqual(result.returncode, 0, result.stderr.decode())
+        self.assertEqual(result.stdout.decode().strip(), 'True')
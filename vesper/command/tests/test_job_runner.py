@@ -0,0 +1,36 @@
+import datetime
+import json
+
+from vesper.tests.test_case import TestCase
+import vesper.command.job_runner as job_runner
+
+
+class JobRunnerTests(TestCase):
+
+
+    def test_parse_command_spec(self):
+
+        spec = {
+            'name': 'export',
+            'arguments': {
+                'start_date': '2020-05-01',
+                'end_date': '2020-05-31',
+                'station_mics': ['Station 0 / 21c 0 Output'],
+                'update_date': 'Not a date',
+                'exporter': {
+                    'name': 'Clip Metadata CSV File',
+                    'arguments': {'end_date': '2020-06-01'}
+                }
+            }
+        }
+
+        result = job_runner.parse_command_spec(json.dumps(spec))
+
+        args = result['arguments']
+        self.assertEqual(args['start_date'], datetime.date(2020, 5, 1))
+        self.assertEqual(args['end_date'], datetime.date(2020, 5, 31))
+        self.assertEqual(args['station_mics'], ['Station 0 / 21c 0 Output'])
+        self.assertEqual(args['update_date'], 'Not a date')
+
+        exporter_args = args['exporter']['arguments']
+        self.assertEqual(exporter_args['end_date'], datetime.date(2020, 6, 1))
@@ -2,18 +2,14 @@
 
 
 import logging
-import random
 import time
 
-from django.db import transaction
-
 from vesper.command.clip_set_command import ClipSetCommand
-from vesper.django.app.models import Job, Tag, TagEdit, TagInfo
+from vesper.django.app.models import Job, TagInfo
 import vesper.command.command_utils as command_utils
 import vesper.django.app.model_utils as model_utils
-import vesper.util.archive_lock as archive_lock
+import vesper.util.sampling_utils as sampling_utils
 import vesper.util.text_utils as text_utils
-import vesper.util.time_utils as time_utils
 
 
 _logger = logging.getLogger()
@@ -31,113 +27,66 @@ class UntagClipsCommand(ClipSetCommand):
         
         get_opt = command_utils.get_optional_arg
         self._retain_count = get_opt('retain_count', args)
-        
-        
+    
+    
     def execute(self, job_info):
         self._job_info = job_info
-        clip_indices = self._get_retain_clip_indices()
-        if clip_indices is not None:
-            self._untag_clips(clip_indices)
+        self._untag_clips()
         return True
     
     
-    def _get_retain_clip_indices(self):
-        
-        if self._retain_count is None or self._retain_count == 0:
-            # retain no clips
-
-            return []
-            
-        # Count clips that are candidates for untagging.
-        clip_count = self._count_clips()
+    def _untag_clips(self):
         
-        if clip_count <= self._retain_count:
-            # retain all clips
-            
-            _logger.info(
-                f'Retain count {self._retain_count} is greater than '
-                f'or equal to number of specified clips {clip_count}, '
-                f'so no clips will be untagged.')
-            
-            # We use a return value of `None` to inform the caller
-            # that there's nothing to do.
-            return None
-
-        # If we get here, a nonzero retain count is specified that is less
-        # than the number of clips that are candidates for untagging.
-            
-        _logger.info('Selecting clips for which to retain tags...')
+        start_time = time.time()
         
-        indices = random.sample(range(clip_count), self._retain_count)
-            
-        return frozenset(indices)
- 
- 
-    def _count_clips(self):
+        try:
+            tag_info = TagInfo.objects.get(name=self._tag_name)
+            creating_job = Job.objects.get(id=self._job_info.job_id)
+        except Exception as e:
+            command_utils.log_and_reraise_fatal_exception(
+                e, 'Tag lookup', 'The archive was not modified.')
         
-        value_tuples = self._create_clip_query_values_iterator()
-        count = 0
+        # Partition tagged clips into date ranges, each of which we
+        # will untag in one transaction.
+        date_ranges = self._get_clip_set_date_ranges()
         
-        for station, mic_output, date, detector in value_tuples:
-            
-            clips = model_utils.get_clips(
-                station=station,
-                mic_output=mic_output,
-                date=date,
-                detector=detector,
-                annotation_name=self._annotation_name,
-                annotation_value=self._annotation_value,
-                tag_name=self._tag_name,
-                order=False)
-            
-            count += clips.count()
-            
-        return count
-            
-
-    def _untag_clips(self, retain_indices):
+        # Get numbers of clips to untag for date ranges.
+        clip_counts = [r[-1] for r in date_ranges]
+        untag_counts = self._get_untag_counts(clip_counts)
+        if untag_counts is None:
+            return
         
-        start_time = time.time()
-        
-        value_tuples = self._create_clip_query_values_iterator()
+        metrics = self._job_info.metrics
+        metrics.start_phase('Untag clips', sum(untag_counts), 'clips')
         
-        clip_index = 0
         total_clip_count = 0
         total_untagged_count = 0
         
-        for station, mic_output, date, detector in value_tuples:
+        for date_range, untag_count in zip(date_ranges, untag_counts):
             
-            # Get clips for this station, mic_output, date, and detector
-            clips = model_utils.get_clips(
-                station=station,
-                mic_output=mic_output,
-                date=date,
-                detector=detector,
-                annotation_name=self._annotation_name,
-                annotation_value=self._annotation_value,
-                tag_name=self._tag_name,
-                order=False)
+            batch_start_time = time.time()
+            
+            station, mic_output, detector, start_date, end_date, \
+                clip_count = date_range
+            
+            clips = self._get_clips(
+                station, mic_output, detector, start_date=start_date,
+                end_date=end_date)
+            
+            sample_size = None if untag_count == clip_count else untag_count
             
-            # Get list of clip IDs.
-            clip_ids = clips.values_list('pk', flat=True)
-
-            # Get IDs of clips to untag.
-            untag_clip_ids = \
-                self._get_untag_clip_ids(clip_ids, clip_index, retain_indices)
-            clip_count = len(clip_ids)
-            untagged_count = len(untag_clip_ids)
-            clip_index += clip_count
-              
             # Untag clips.
             try:
-                self._untag_clip_batch(untag_clip_ids)
+                untagged_count = model_utils.untag_clip_set(
+                    clips, tag_info, sample_size, creating_job=creating_job)
             except Exception as e:
-                batch_text = \
-                    _get_batch_text(station, mic_output, date, detector)
+                batch_text = _get_batch_text(date_range)
                 command_utils.log_and_reraise_fatal_exception(
                     e, f'Untagging of clips for {batch_text}')
-
-            # Log clip counts.
+            
+            metrics.add_progress(untagged_count)
+            
+            # Log clip counts and untagging rate.
             if untagged_count == clip_count:
                 prefix = 'Untagged'
             else:
@@ -146,12 +95,16 @@ class UntagClipsCommand(ClipSetCommand):
                     f'Untagged {untagged_count} and left tagged '
                     f'{retained_count} of')
             count_text = text_utils.create_count_text(clip_count, 'clip')
-            batch_text = _get_batch_text(station, mic_output, date, detector)
-            _logger.info(f'{prefix} {count_text} for {batch_text}.')
-
+            batch_text = _get_batch_text(date_range)
+            elapsed_time = time.time() - batch_start_time
+            timing_text = command_utils.get_timing_text(
+                elapsed_time, untagged_count, 'clips')
+            _logger.info(
+                f'{prefix} {count_text} for {batch_text}{timing_text}.')
+            
             total_clip_count += clip_count
             total_untagged_count += untagged_count
-                
+        
         # Log total clip counts and untagging rate.
         if total_untagged_count == total_clip_count:
             prefix = 'Untagged'
@@ -165,78 +118,52 @@ class UntagClipsCommand(ClipSetCommand):
         timing_text = command_utils.get_timing_text(
             elapsed_time, total_clip_count, 'clips')
         _logger.info(f'{prefix} a total of {count_text}{timing_text}.')
-
-
-    def _get_untag_clip_ids(self, clip_ids, start_clip_index, retain_indices):
-
-        if len(retain_indices) == 0:
-            # untagging all clips
-
-            return clip_ids
-
-        else:
-            # not untagging all clips
-
-            clip_index = start_clip_index
-            untag_clip_ids = []
-        
-            for clip_id in clip_ids:
-                
-                if clip_index not in retain_indices:
-                    untag_clip_ids.append(clip_id)
-                    
-                clip_index += 1
-
-            return untag_clip_ids
-
-
-    def _untag_clip_batch(self, clip_ids):
+    
+    
+    def _get_untag_counts(self, clip_counts):
+        
+        """
+        Gets the numbers of clips to untag for date ranges with the
+        specified numbers of tagged clips.
+        
+        Returns `None` if no clips should be untagged.
+        """
         
-        with archive_lock.atomic():
-             
-            with transaction.atomic():
+        if self._retain_count is None or self._retain_count == 0:
+            # retain no clips
             
-                # Untag clips in chunks to limit the number of clip IDs
-                # we pass to `Clip.objects.filter`.
-                
-                # Setting this too large can result in a
-                # django.db.utils.OperationalError exception with the
-                # message "too many SQL variables". We have seen this
-                # happen with a maximum chunk size of 1000 on Windows,
-                # though not on macOS. The web page
-                # https://stackoverflow.com/questions/7106016/
-                # too-many-sql-variables-error-in-django-witih-sqlite3
-                # suggests that the maximum chunk size that will work
-                # on Windows is somewhere between 900 and 1000, and
-                # 900 seems to work.
-                max_chunk_size = 900
-                
-                tag_info = TagInfo.objects.get(name=self._tag_name)
-                action = TagEdit.ACTION_DELETE
-                creation_time = time_utils.get_utc_now()
-                creating_job = Job.objects.get(id=self._job_info.job_id)
-                
-                for i in range(0, len(clip_ids), max_chunk_size):
-                    
-                    chunk = clip_ids[i:i + max_chunk_size]
-                    
-                    # Delete tags.
-                    Tag.objects.filter(info=tag_info, clip_id__in=chunk).delete()
-                    
-                    # Create tag edits.
-                    TagEdit.objects.bulk_create([
-                        TagEdit(
-                            clip_id=clip_id,
-                            info=tag_info,
-                            action=action,
-                            creation_time=creation_time,
-                            creating_user=None,
-                            creating_job=creating_job,
-                            creating_processor=None)
-                        for clip_id in chunk])
-                    
-                    
-def _get_batch_text(station, mic_output, date, detector):
+            return clip_counts
+        
+        clip_count = sum(clip_counts)
+        
+        if clip_count <= self._retain_count:
+            # retain all clips
+            
+            _logger.info(
+                f'Retain count {self._retain_count} is greater than '
+                f'or equal to number of specified clips {clip_count}, '
+                f'so no clips will be untagged.')
+            
+            return None
+        
+        # If we get here, a nonzero retain count is specified that is less
+        # than the number of clips that are candidates for untagging.
+        # We allocate a random sample of clips to untag among the date
+        # ranges, and then untag a random sample of the allocated size
+        # in each date range.
+        return sampling_utils.allocate_sample(
+            clip_counts, clip_count - self._retain_count)
+
+
+def _get_batch_text(date_range):
+    
+    station, mic_output, detector, start_date, end_date, _ = date_range
+    
+    if start_date == end_date:
+        date_text = f'date {start_date}'
+    else:
+        date_text = f'dates {start_date} through {end_date}'
+    
     return (
         f'station "{station.name}", mic output "{mic_output.name}", '
-        f'date {date}, and detector "{detector.name}"')
+        f'{date_text}, and detector "{detector.name}"')
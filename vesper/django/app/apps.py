@@ -27,6 +27,13 @@ class VesperConfig(AppConfig):
         # Create the one and only archive lock.
         archive_lock.create_lock()
 
+        # Connect signal handlers that update archive cache versions.
+        # We import the `cache_version_utils` module here rather than
+        # at the top of this module since it imports models, which
+        # cannot be imported until the app registry is ready.
+        import vesper.django.app.cache_version_utils as cache_version_utils
+        cache_version_utils.connect_signal_handlers()
+
 
 def _set_archive_paths():
     
@@ -41,6 +48,7 @@ def _set_archive_paths():
     p.preference_file_path = archive_dir_path / 'Preferences.yaml'
     p.preset_dir_path = archive_dir_path / 'Presets'
     p.recording_dir_paths = _get_recording_dir_paths(archive_dir_path)
+    p.spectrogram_cache_dir_path = archive_dir_path / 'Spectrograms'
 
 
 def _get_recording_dir_paths(archive_dir_path):
@@ -8,24 +8,20 @@ from vesper.django.app.models import (
     AnnotationConstraint, AnnotationInfo, Processor, TagInfo)
 from vesper.singleton.preference_manager import preference_manager
 from vesper.singleton.preset_manager import preset_manager
-        
+import vesper.django.app.cache_version_utils as cache_version_utils
 import vesper.util.yaml_utils as yaml_utils
 
 
-# TODO: Reconsider archive data caches. When I first implemented them,
-# I didn't consider that there can be multiple Django server processes
-# (as there are, for example, with the Django test server), so that
-# refreshing a cache in one process (e.g. refreshing a processer cache
-# after creating a new processor) will not refresh the cache in all of
-# the processes. There are various options for addressing this issue,
-# including not using caches or having them refresh automatically
-# every so often, e.g. if when a request for cache content arrives the
-# cache was last refreshed more than some interval ago. In the interim,
-# I have modified the `_refresh_processor_cache_if_needed` and
-# `_refresh_string_annotation_values_cache_if_needed` methods to always
-# refresh their caches, i.e. so that each cache is refreshed on every
-# access. If we decide to retain the caches, note that for read-only
-# archives we could populate them only once.
+# Archive data caches are versioned to keep them consistent across
+# processes. There can be multiple Django server processes (as there
+# are, for example, with the Django test server) and job processes, so
+# refreshing a cache in one process (e.g. refreshing a processor cache
+# after creating a new processor) would not refresh the cache in all
+# of the processes. Instead, each cache has a version that is stored
+# in the archive database and that changes whenever the data from
+# which the cache is built change, and a process refreshes its copy of
+# a cache only when the version changes. See the
+# `vesper.django.app.cache_version_utils` module for more.
 
 # TODO: Move code that modifies lists of items for presentation in
 # the UI to the client? This includes, for example, wildcard additions
@@ -125,8 +121,11 @@ class Archive:
         no value, any or no value, and any value, respectively.
         """
 
-        self._processor_cache_dirty = True
-        self._string_anno_values_cache_dirty = True
+        self._processor_cache_version = None
+        """Version of processor cache."""
+        
+        self._string_anno_values_cache_version = None
+        """Version of string annotation values cache."""
         
     
     @property
@@ -160,18 +159,30 @@ class Archive:
     
     
     def _refresh_processor_cache_if_needed(self):
-
-        # For the time being, we refresh the cache on every access to
-        # work around a multi-process caching issue. See todo item
-        # near the top of this module for more.
-        self.refresh_processor_cache()
-
-        # if self._processor_cache_dirty:
-        #     self.refresh_processor_cache()
+        
+        version = cache_version_utils.get_cache_version(
+            cache_version_utils.PROCESSOR_CACHE)
+        
+        if self._processors_by_type is None or \
+                version != self._processor_cache_version:
             
+            self._refresh_processor_cache(version)
             
-    def refresh_processor_cache(self):
             
+    def refresh_processor_cache(self):
+        version = cache_version_utils.get_cache_version(
+            cache_version_utils.PROCESSOR_CACHE)
+        self._refresh_processor_cache(version)
+        
+        
+    def _refresh_processor_cache(self, version):
+        
+        # Note that we get the cache version before reading the
+        # processors from which we build the cache. If the processors
+        # change while we are reading them, the cache might include
+        # some of the changes, but it will be refreshed again on the
+        # next access since its version will be out of date.
+        
         ui_names_pref = self._ui_names.get('processors', {})
         
         by_type = defaultdict(list)
@@ -204,7 +215,7 @@ class Archive:
                 (k, self._get_visible_processors(v, hidden_names))
                 for k, v in self._processors_by_type.items())
 
-        self._processor_cache_dirty = False
+        self._processor_cache_version = version
         
             
     def _get_visible_processors(self, processors, hidden_names):
@@ -266,19 +277,28 @@ class Archive:
      
     
     def _refresh_string_annotation_values_cache_if_needed(self):
-
-        # For the time being, we refresh the cache on every access to
-        # work around a multi-process caching issue. See todo item
-        # near the top of this module for more.
-        self.refresh_string_annotation_values_cache()
-
-        # if self._string_anno_values_cache_dirty:
-        #     self.refresh_string_annotation_values_cache()
+        
+        version = cache_version_utils.get_cache_version(
+            cache_version_utils.STRING_ANNOTATION_VALUES_CACHE)
+        
+        if self._string_anno_archive_value_tuples is None or \
+                version != self._string_anno_values_cache_version:
+            
+            self._refresh_string_annotation_values_cache(version)
              
              
     def refresh_string_annotation_values_cache(self):
+        version = cache_version_utils.get_cache_version(
+            cache_version_utils.STRING_ANNOTATION_VALUES_CACHE)
+        self._refresh_string_annotation_values_cache(version)
         
-        infos = AnnotationInfo.objects.all()
+        
+    def _refresh_string_annotation_values_cache(self, version):
+        
+        # As in `_refresh_processor_cache`, we get the cache version
+        # before reading the data from which we build the cache.
+        
+        infos = list(AnnotationInfo.objects.all())
         
         self._string_anno_archive_value_tuples = dict(
             (i.name, _get_string_annotation_archive_values(i.name))
@@ -299,15 +319,15 @@ class Archive:
         self._visible_string_anno_ui_values = dict(
             (i.name, self._get_visible_string_annotation_ui_values(
                 i.name, hidden_values_pref))
-            for i in AnnotationInfo.objects.all())
+            for i in infos)
         
         self._visible_string_anno_ui_value_specs = dict(
             (i.name,
              self._get_visible_string_annotation_ui_value_specs(
                  i.name, hidden_values_pref))
-            for i in AnnotationInfo.objects.all())
+            for i in infos)
 
-        self._string_anno_values_cache_dirty = False
+        self._string_anno_values_cache_version = version
          
              
     def _get_visible_string_annotation_ui_values(
@@ -0,0 +1,90 @@
+"""
+Utility functions pertaining to archive cache versions.
+
+Each archive data cache has a name and a *version*, stored in the
+`CacheVersion` table. A cache's version is replaced with a new one
+whenever the archive data from which the cache is built changes. A
+process that caches the data records the version for which it built
+its cache, and rebuilds the cache only when the current version
+differs from the recorded one. Since versions are stored in the
+archive database, this works across all of the processes that use
+an archive, including Django server processes and job processes.
+
+A new version is a random token rather than the successor of the old
+version. This ensures that a version is never reused, even if the
+transaction that created it is rolled back. If versions were counters,
+a process could cache data created in a transaction that was later
+rolled back, and then mistake a later, different version of the data
+with the same counter value for the data it cached.
+
+Cache versions are replaced automatically when processors, annotation
+infos, and annotation constraints are saved or deleted, via the signal
+handlers connected by `connect_signal_handlers`. Note that Django does
+not send signals for `QuerySet.update` and `QuerySet.bulk_create` calls,
+so code that modifies these models in those ways must call
+`update_cache_versions` itself.
+"""
+
+
+import uuid
+
+from django.db.models.signals import post_delete, post_save
+
+from vesper.django.app.models import (
+    AnnotationConstraint, AnnotationInfo, CacheVersion, Processor)
+import vesper.util.archive_lock as archive_lock
+
+
+PROCESSOR_CACHE = 'Processors'
+STRING_ANNOTATION_VALUES_CACHE = 'String Annotation Values'
+
+
+_MODEL_CACHE_NAMES = {
+    Processor: (PROCESSOR_CACHE,),
+    AnnotationInfo: (STRING_ANNOTATION_VALUES_CACHE,),
+    AnnotationConstraint: (STRING_ANNOTATION_VALUES_CACHE,),
+}
+"""Mapping from model classes to names of caches that depend on them."""
+
+
+def get_cache_version(cache_name):
+
+    """
+    Gets the current version of the specified cache.
+
+    Returns `None` if the cache has never been versioned.
+    """
+
+    versions = CacheVersion.objects.filter(name=cache_name). \
+        values_list('version', flat=True)
+
+    return versions.first()
+
+
+def update_cache_versions(*cache_names):
+
+    """Replaces the versions of the specified caches with new ones."""
+
+    with archive_lock.atomic():
+
+        for name in cache_names:
+            CacheVersion.objects.update_or_create(
+                name=name, defaults={'version': uuid.uuid4().hex})
+
+
+def connect_signal_handlers():
+
+    """
+    Connects model signal handlers that update cache versions.
+
+    This function is called once on startup, from the Vesper Django
+    application's `ready` method.
+    """
+
+    for model_class in _MODEL_CACHE_NAMES:
+        post_save.connect(_update_cache_versions, sender=model_class)
+        post_delete.connect(_update_cache_versions, sender=model_class)
+
+
+def _update_cache_versions(sender, **kwargs):
+    update_cache_versions(*_MODEL_CACHE_NAMES[sender])
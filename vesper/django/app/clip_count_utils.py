@@ -0,0 +1,500 @@
+"""
+Utility functions pertaining to clip counts.
+
+The functions of this module maintain the `ClipCount` table of an
+archive, which holds precomputed counts of clips per station, mic
+output, detector, and date, optionally restricted to clips with a
+particular annotation value, a particular tag, or both. See the note
+preceding the `ClipCount` class in `models.py` for details.
+
+Code that creates clips, annotations, or tags should call the
+`increment_clip_counts` function after doing so, and code that
+deletes them should call the `decrement_clip_counts` function before
+doing so, in the same transaction. Code that changes annotation values
+should call `decrement_clip_counts` before the change and
+`increment_clip_counts` after it. The `rebuild_clip_counts` function
+(which is invoked by the `rebuild_clip_counts` command) recomputes
+all clip counts from scratch, and can be used to repair counts that
+have drifted from the actual numbers of clips, for example because
+clips were deleted by deleting a job or processor.
+
+Updating clip counts involves reading counts and then writing them.
+For database back ends that support row-level locks (e.g. PostgreSQL,
+for which the archive lock does nothing, see the
+`vesper.util.archive_lock` module), this module locks the rows of the
+stations whose counts it updates for the remainder of the enclosing
+transaction, so that concurrent updates of the same counts are
+serialized and none are lost.
+"""
+
+
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from vesper.django.app.models import (
+    AnnotationInfo, Clip, ClipCount, Station, StringAnnotation, Tag,
+    TagInfo)
+from vesper.singleton.archive import archive
+import vesper.django.app.query_utils as query_utils
+import vesper.util.archive_lock as archive_lock
+
+_CLIP_KEY_FIELD_NAMES = ('station', 'mic_output', 'creating_processor', 'date')
+
+_RELATED_CLIP_KEY_FIELD_NAMES = tuple(
+    'clip__' + n for n in _CLIP_KEY_FIELD_NAMES)
+
+# SQL that recomputes all clip counts. Note that the copy of this SQL
+# in the migration that creates the clip count table should *not* be
+# updated if this SQL changes.
+_REBUILD_SQL = (
+
+    'DELETE FROM vesper_clip_count',
+
+    '''
+INSERT INTO vesper_clip_count (
+    station_id, mic_output_id, detector_id, date, annotation_info_id,
+    annotation_value, tag_info_id, count)
+SELECT
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    NULL, NULL, NULL, count(*)
+FROM vesper_clip c
+GROUP BY c.station_id, c.mic_output_id, c.creating_processor_id, c.date
+'''.strip(),
+
+    '''
+INSERT INTO vesper_clip_count (
+    station_id, mic_output_id, detector_id, date, annotation_info_id,
+    annotation_value, tag_info_id, count)
+SELECT
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    a.info_id, a.value, NULL, count(*)
+FROM vesper_clip c
+INNER JOIN vesper_string_annotation a ON a.clip_id = c.id
+GROUP BY
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    a.info_id, a.value
+'''.strip(),
+
+    '''
+INSERT INTO vesper_clip_count (
+    station_id, mic_output_id, detector_id, date, annotation_info_id,
+    annotation_value, tag_info_id, count)
+SELECT
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    NULL, NULL, t.info_id, count(*)
+FROM vesper_clip c
+INNER JOIN vesper_tag t ON t.clip_id = c.id
+GROUP BY
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    t.info_id
+'''.strip(),
+
+    '''
+INSERT INTO vesper_clip_count (
+    station_id, mic_output_id, detector_id, date, annotation_info_id,
+    annotation_value, tag_info_id, count)
+SELECT
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    a.info_id, a.value, t.info_id, count(*)
+FROM vesper_clip c
+INNER JOIN vesper_string_annotation a ON a.clip_id = c.id
+INNER JOIN vesper_tag t ON t.clip_id = c.id
+GROUP BY
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    a.info_id, a.value, t.info_id
+'''.strip(),
+
+)
+
+
+def get_clip_counts(
+        station, mic_output, detector, annotation_name=None,
+        annotation_value=None, tag_name=None):
+
+    """
+    Gets clip counts by date from the clip count table.
+
+    The arguments of this function have the same meanings as the
+    like-named arguments of the `model_utils.get_clips` function,
+    including the special meanings of a `None` annotation value and
+    of annotation values that end with the string annotation value
+    wildcard.
+
+    Returns
+    -------
+    dict
+        mapping from date to clip count. Dates for which the count
+        is zero are omitted.
+    """
+
+    counts = _get_base_clip_counts(station, mic_output, detector)
+
+    if tag_name is None:
+        counts = counts.filter(tag_info__isnull=True)
+    else:
+        tag_info = TagInfo.objects.get(name=tag_name)
+        counts = counts.filter(tag_info=tag_info)
+
+    if annotation_name is None:
+        # want all clips regardless of annotation
+
+        return _sum_counts(counts.filter(annotation_info__isnull=True))
+
+    info = AnnotationInfo.objects.get(name=annotation_name)
+
+    if annotation_value is None:
+        # want only unannotated clips
+
+        # Since a clip can have at most one annotation for a given
+        # annotation info, the number of unannotated clips is the
+        # total number of clips minus the number of annotated ones.
+        totals = _sum_counts(counts.filter(annotation_info__isnull=True))
+        annotated_counts = _sum_counts(counts.filter(annotation_info=info))
+        return _subtract_counts(totals, annotated_counts)
+
+    else:
+        # want only annotated clips
+
+        wildcard = archive.STRING_ANNOTATION_VALUE_WILDCARD
+
+        counts = counts.filter(annotation_info=info)
+
+        if not annotation_value.endswith(wildcard):
+            # want clips with a particular annotation value
+
+            counts = counts.filter(annotation_value=annotation_value)
+
+        elif annotation_value != wildcard:
+            # want clips whose annotation values start with a prefix
+
+            prefix = annotation_value[:-len(wildcard)]
+            counts = counts.filter(annotation_value__startswith=prefix)
+
+        return _sum_counts(counts)
+
+
+def _get_base_clip_counts(station, mic_output, detector):
+
+    kwargs = {}
+    _add_kwarg_if_needed(kwargs, 'station', station)
+    _add_kwarg_if_needed(kwargs, 'mic_output', mic_output)
+    _add_kwarg_if_needed(kwargs, 'detector', detector)
+
+    return ClipCount.objects.filter(**kwargs)
+
+
+def _add_kwarg_if_needed(kwargs, key, value):
+    if value is not None:
+        kwargs[key] = value
+
+
+def _sum_counts(counts):
+    sums = counts.values('date').annotate(sum=Sum('count'))
+    return dict((s['date'], s['sum']) for s in sums if s['sum'] > 0)
+
+
+def _subtract_counts(minuends, subtrahends):
+    differences = (
+        (date, count - subtrahends.get(date, 0))
+        for date, count in minuends.items())
+    return dict((date, count) for date, count in differences if count > 0)
+
+
+def increment_clip_counts(clip_ids, annotation_info=None, tag_info=None):
+
+    """
+    Increments clip counts to account for new clips, annotations, or
+    tags.
+
+    If neither `annotation_info` nor `tag_info` is specified, this
+    function increments clip counts to account for the specified
+    clips and all of their annotations and tags. It should be called
+    after the clips are created. If `annotation_info` is specified,
+    the function increments counts to account only for the annotations
+    of the specified clips with that annotation info. It should be
+    called after the annotations are created or their values are set.
+    If `tag_info` is specified, the function increments counts to
+    account only for the tags of the specified clips with that tag
+    info. It should be called after the tags are created.
+
+    `clip_ids` can be a collection of clip IDs, or a query set or SQL
+    expression that yields clip IDs, for example
+    `Clip.objects.filter(date=date).values('id')`. In the latter case
+    the function performs a fixed number of queries, regardless of the
+    number of clips, with `clip_ids` as a subquery.
+    """
+
+    _update_clip_counts(clip_ids, annotation_info, tag_info, 1)
+
+
+def decrement_clip_counts(clip_ids, annotation_info=None, tag_info=None):
+
+    """
+    Decrements clip counts to account for clips, annotations, or tags
+    that are about to be deleted.
+
+    This function is the inverse of `increment_clip_counts`, and
+    should be called *before* the specified clips, annotations, or
+    tags are deleted, or annotation values are changed.
+    """
+
+    _update_clip_counts(clip_ids, annotation_info, tag_info, -1)
+
+
+def decrement_deleted_tag_clip_counts(clip_ids, tag_info):
+
+    """
+    Decrements clip counts to account for tags that have just been
+    deleted.
+
+    Unlike `decrement_clip_counts`, this function should be called
+    *after* the tags are deleted. Every one of the specified clips
+    must have had a tag with the specified tag info. Since the counts
+    to decrement are determined by the clips and their annotations
+    alone, the function does not need to join clips to their tags.
+
+    `clip_ids` can be a collection of clip IDs, or a query set or SQL
+    expression that yields clip IDs, as for `increment_clip_counts`.
+    """
+
+    deltas = defaultdict(int)
+
+    if hasattr(clip_ids, 'resolve_expression'):
+        _add_deleted_tag_count_deltas(deltas, clip_ids, tag_info)
+
+    else:
+        for chunk in query_utils.get_chunks(clip_ids):
+            _add_deleted_tag_count_deltas(deltas, chunk, tag_info)
+
+    with transaction.atomic():
+        _apply_count_deltas(deltas)
+
+
+def _add_deleted_tag_count_deltas(deltas, clip_ids, tag_info):
+
+    # Update counts for tags.
+
+    counts = Clip.objects.filter(
+        id__in=clip_ids
+    ).values(*_CLIP_KEY_FIELD_NAMES).annotate(count=Count('id'))
+
+    for c in counts:
+        key = _get_clip_key(c, '') + (None, None, tag_info.id)
+        deltas[key] -= c['count']
+
+    # Update counts for annotation/tag combinations.
+
+    counts = StringAnnotation.objects.filter(
+        clip_id__in=clip_ids
+    ).values(
+        *_RELATED_CLIP_KEY_FIELD_NAMES, 'info', 'value'
+    ).annotate(count=Count('id'))
+
+    for c in counts:
+        key = _get_clip_key(c, 'clip__') + \
+            (c['info'], c['value'], tag_info.id)
+        deltas[key] -= c['count']
+
+
+def _update_clip_counts(clip_ids, annotation_info, tag_info, sign):
+
+    deltas = defaultdict(int)
+
+    if hasattr(clip_ids, 'resolve_expression'):
+        # `clip_ids` is a query set or SQL expression that yields clip
+        # IDs rather than a collection of clip IDs
+
+        # Compute deltas for all clips at once, using `clip_ids` as a
+        # subquery.
+        _add_count_deltas(deltas, clip_ids, annotation_info, tag_info, sign)
+
+    else:
+        # `clip_ids` is a collection of clip IDs
+
+        for chunk in query_utils.get_chunks(clip_ids):
+            _add_count_deltas(deltas, chunk, annotation_info, tag_info, sign)
+
+    with transaction.atomic():
+        _apply_count_deltas(deltas)
+
+
+def _add_count_deltas(deltas, clip_ids, annotation_info, tag_info, sign):
+
+    # Each key of `deltas` is a tuple of the form (station ID, mic
+    # output ID, detector ID, date, annotation info ID, annotation
+    # value, tag info ID), and each value is a count increment.
+
+    all_infos = annotation_info is None and tag_info is None
+
+    if all_infos:
+        # updating counts for clips
+
+        counts = Clip.objects.filter(
+            id__in=clip_ids
+        ).values(*_CLIP_KEY_FIELD_NAMES).annotate(count=Count('id'))
+
+        for c in counts:
+            key = _get_clip_key(c, '') + (None, None, None)
+            deltas[key] += sign * c['count']
+
+    if all_infos or annotation_info is not None:
+        # updating counts for annotations
+
+        annotations = StringAnnotation.objects.filter(clip_id__in=clip_ids)
+
+        if annotation_info is not None:
+            annotations = annotations.filter(info=annotation_info)
+
+        counts = annotations.values(
+            *_RELATED_CLIP_KEY_FIELD_NAMES, 'info', 'value'
+        ).annotate(count=Count('id'))
+
+        for c in counts:
+            key = _get_clip_key(c, 'clip__') + (c['info'], c['value'], None)
+            deltas[key] += sign * c['count']
+
+    if all_infos or tag_info is not None:
+        # updating counts for tags
+
+        tags = Tag.objects.filter(clip_id__in=clip_ids)
+
+        if tag_info is not None:
+            tags = tags.filter(info=tag_info)
+
+        counts = tags.values(
+            *_RELATED_CLIP_KEY_FIELD_NAMES, 'info'
+        ).annotate(count=Count('id'))
+
+        for c in counts:
+            key = _get_clip_key(c, 'clip__') + (None, None, c['info'])
+            deltas[key] += sign * c['count']
+
+    # Update counts for annotation/tag combinations.
+    _add_annotation_tag_count_deltas(
+        deltas, clip_ids, annotation_info, tag_info, sign)
+
+
+def _get_clip_key(values, prefix):
+    return tuple(values[prefix + n] for n in _CLIP_KEY_FIELD_NAMES)
+
+
+def _add_annotation_tag_count_deltas(
+        deltas, clip_ids, annotation_info, tag_info, sign):
+
+    # Count (annotation, tag) pairs of the same clips by joining
+    # annotations to the tags of their clips.
+
+    annotations = StringAnnotation.objects.filter(clip_id__in=clip_ids)
+
+    if annotation_info is not None:
+        annotations = annotations.filter(info=annotation_info)
+
+    if tag_info is not None:
+        annotations = annotations.filter(clip__tag__info=tag_info)
+    else:
+        annotations = annotations.filter(clip__tag__isnull=False)
+
+    counts = annotations.values(
+        *_RELATED_CLIP_KEY_FIELD_NAMES, 'info', 'value', 'clip__tag__info'
+    ).annotate(count=Count('id'))
+
+    for c in counts:
+        key = _get_clip_key(c, 'clip__') + \
+            (c['info'], c['value'], c['clip__tag__info'])
+        deltas[key] += sign * c['count']
+
+
+def _apply_count_deltas(deltas):
+
+    # Group deltas by station, mic output, and detector.
+    groups = defaultdict(dict)
+    for key, delta in deltas.items():
+        if delta != 0:
+            groups[key[:3]][key[3:]] = delta
+
+    _lock_stations(frozenset(key[0] for key in groups.keys()))
+
+    for (station_id, mic_output_id, detector_id), group_deltas in \
+            groups.items():
+
+        dates = sorted(frozenset(key[0] for key in group_deltas.keys()))
+
+        counts = ClipCount.objects.filter(
+            station_id=station_id,
+            mic_output_id=mic_output_id,
+            detector_id=detector_id,
+            date__in=dates)
+
+        counts = dict(
+            ((c.date, c.annotation_info_id, c.annotation_value,
+              c.tag_info_id), c)
+            for c in counts)
+
+        new_counts = []
+        updated_counts = []
+        deleted_count_ids = []
+
+        for key, delta in group_deltas.items():
+
+            count = counts.get(key)
+
+            if count is None:
+                # no count for this key yet
+
+                if delta > 0:
+                    date, annotation_info_id, annotation_value, \
+                        tag_info_id = key
+                    new_counts.append(ClipCount(
+                        station_id=station_id,
+                        mic_output_id=mic_output_id,
+                        detector_id=detector_id,
+                        date=date,
+                        annotation_info_id=annotation_info_id,
+                        annotation_value=annotation_value,
+                        tag_info_id=tag_info_id,
+                        count=delta))
+
+            else:
+                # already have count for this key
+
+                count.count += delta
+
+                if count.count > 0:
+                    updated_counts.append(count)
+                else:
+                    deleted_count_ids.append(count.id)
+
+        ClipCount.objects.bulk_create(new_counts)
+        ClipCount.objects.bulk_update(updated_counts, ['count'])
+
+        query_utils.delete_in(ClipCount.objects.all(), 'id', deleted_count_ids)
+
+
+def _lock_stations(station_ids):
+
+    """
+    Locks the rows of the specified stations until the end of the
+    current transaction.
+
+    The rows are locked in order of increasing ID to avoid deadlocks
+    between concurrent transactions. This function does nothing for
+    database back ends that do not support row-level locks, like
+    SQLite.
+    """
+
+    if connection.features.has_select_for_update and station_ids:
+        stations = Station.objects.select_for_update().order_by('id')
+        list(stations.filter(id__in=sorted(station_ids)).values_list('id'))
+
+
+@archive_lock.atomic
+@transaction.atomic
+def rebuild_clip_counts():
+
+    """Recomputes all clip counts from scratch."""
+
+    with connection.cursor() as cursor:
+        for sql in _REBUILD_SQL:
+            cursor.execute(sql)
@@ -0,0 +1,150 @@
+"""Module containing class `ClipIterator`."""
+
+
+from django.db.models import Q, prefetch_related_objects
+
+from vesper.django.app.models import Clip
+
+
+DEFAULT_PAGE_SIZE = 1000
+"""Default number of clips per page."""
+
+
+class ClipIterator:
+
+    """
+    Iterator over the clips of a query set that uses constant memory.
+
+    A `ClipIterator` gets the clips of a query set one *page* at a
+    time, in order of start time and ID. It gets each page with a
+    separate query that resumes after the last clip of the previous
+    page (this is known as *keyset pagination*), so it holds only one
+    page of clips in memory at a time, and the time it takes to get a
+    page does not depend on the page's position in the query results
+    as it would with `OFFSET` pagination. No query is in progress
+    between pages, so a caller can modify the archive database while
+    iterating, for example to tag or delete clips that the iterator
+    has already yielded.
+
+    For each page, the iterator gets the related objects (for example
+    stations, microphone outputs, and processors) of the page's clips
+    in bulk, with one query per related field rather than one query
+    per clip. It reuses the related objects of the previous page for
+    the clips of the current page, so it usually does not query for
+    objects like stations and processors that most clips share.
+
+    Iterating over a `ClipIterator` yields clips. The `pages` method
+    yields lists of clips instead, for callers that process clips in
+    batches. If a page callback is specified, the iterator calls it
+    with each page before yielding the page or its clips.
+
+    Parameters
+    ----------
+    clips : QuerySet
+        the clips to iterate over. Any ordering of the query set is
+        replaced with ordering by start time and ID. Note that if the
+        query set defers fields (e.g. via `only`), it must not defer
+        the `start_time` field, since the iterator accesses it to get
+        each page.
+    related_fields : iterable of str
+        the names of the related fields to get in bulk, in the form
+        accepted by Django's `prefetch_related_objects`. For example,
+        the names "station" and "mic_output__device" get the stations
+        of the clips, and the microphone outputs of the clips and the
+        devices of the outputs, respectively.
+    page_size : int
+        the maximum number of clips per page.
+    page_callback : callable or None
+        function that the iterator calls with each page of clips.
+    """
+
+
+    def __init__(
+            self, clips, related_fields=(), page_size=DEFAULT_PAGE_SIZE,
+            page_callback=None):
+
+        self._clips = clips.order_by('start_time', 'id')
+        self._related_fields = tuple(related_fields)
+        self._page_size = page_size
+        self._page_callback = page_callback
+
+        # Top-level related fields, i.e. the related fields of the
+        # `Clip` model, whose objects we reuse from page to page.
+        names = frozenset(f.split('__')[0] for f in self._related_fields)
+        self._clip_fields = tuple(Clip._meta.get_field(n) for n in names)
+
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from page
+
+
+    def pages(self):
+
+        """Generates pages of clips, as lists."""
+
+        clips = self._clips
+        related_objects = {}
+
+        while True:
+
+            page = list(clips[:self._page_size])
+
+            if len(page) == 0:
+                return
+
+            related_objects = self._get_related_objects(page, related_objects)
+
+            if self._page_callback is not None:
+                self._page_callback(page)
+
+            yield page
+
+            if len(page) < self._page_size:
+                return
+
+            last = page[-1]
+            clips = self._clips.filter(
+                Q(start_time__gt=last.start_time) |
+                Q(start_time=last.start_time, id__gt=last.id))
+
+
+    def _get_related_objects(self, page, previous_objects):
+
+        if len(self._related_fields) == 0:
+            return previous_objects
+
+        # Reuse related objects of previous page.
+        for field in self._clip_fields:
+
+            objects = previous_objects.get(field.name)
+
+            if objects is not None:
+
+                for clip in page:
+                    obj = objects.get(getattr(clip, field.attname))
+                    if obj is not None:
+                        field.set_cached_value(clip, obj)
+
+        # Get other related objects in bulk. This skips clips whose
+        # related objects are already cached.
+        prefetch_related_objects(page, *self._related_fields)
+
+        # Get related objects of this page for reuse with next page.
+        # We keep only the objects of this page so that the number of
+        # objects we keep is bounded by the page size.
+        return dict(
+            (field.name, self._get_field_objects(page, field))
+            for field in self._clip_fields)
+
+
+    def _get_field_objects(self, page, field):
+
+        objects = {}
+
+        for clip in page:
+            key = getattr(clip, field.attname)
+            if key is not None and key not in objects:
+                objects[key] = getattr(clip, field.name)
+
+        return objects
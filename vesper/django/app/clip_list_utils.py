@@ -0,0 +1,159 @@
+"""
+Utility functions pertaining to clip lists.
+
+A *clip list* describes a sequence of clips to a clip album. For each
+clip it includes the clip's ID, start index, length, sample rate, and
+start time. Clip lists are sent to clients in one of two formats:
+
+"json"
+    A JSON array of clips, each represented as an array of the form
+    [ID, start index, length, sample rate, start time], in which the
+    start time is an ISO 8601 string like "2020-09-16T01:23:45.678Z".
+
+"binary"
+    An eight-byte header containing two little-endian, 32-bit unsigned
+    integers, the clip count and the format version (currently 1),
+    followed by five columns of clip count little-endian, eight-byte
+    values each. The columns are, in order, the clip IDs (signed
+    integers), the clip start indices (signed integers, with -1
+    indicating an unknown start index), the clip lengths (signed
+    integers), the clip sample rates (IEEE 754 floats), and the clip
+    start times (signed integers, in milliseconds since the UNIX epoch).
+    A client can decode binary clip lists quickly with typed arrays.
+
+Clip lists are created from rows of clip field values obtained with
+`QuerySet.values_list(*CLIP_LIST_FIELD_NAMES)`, which is much faster
+than creating `Clip` model instances.
+"""
+
+
+import datetime
+import operator
+
+import numpy as np
+
+
+JSON_FORMAT = 'json'
+BINARY_FORMAT = 'binary'
+
+FORMATS = (JSON_FORMAT, BINARY_FORMAT)
+"""Supported clip list formats."""
+
+CLIP_LIST_FIELD_NAMES = (
+    'id', 'start_index', 'length', 'sample_rate', 'start_time')
+"""Names of the clip fields of a clip list row."""
+
+_BINARY_FORMAT_VERSION = 1
+_BINARY_HEADER_DTYPE = np.dtype('<u4')
+_BINARY_COLUMN_DTYPES = (
+    np.dtype('<i8'), np.dtype('<i8'), np.dtype('<i8'), np.dtype('<f8'),
+    np.dtype('<i8'))
+
+_UNKNOWN_START_INDEX = -1
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_ONE_MILLISECOND = datetime.timedelta(milliseconds=1)
+
+
+def encode_binary_clip_list(rows):
+
+    """
+    Encodes clip rows as a binary clip list.
+
+    Parameters
+    ----------
+    rows : sequence of tuple
+        clip rows, each containing the values of the clip fields named
+        in `CLIP_LIST_FIELD_NAMES`.
+
+    Returns
+    -------
+    bytes
+        the binary clip list.
+    """
+
+    clip_count = len(rows)
+
+    def get_column(index, dtype):
+        values = map(operator.itemgetter(index), rows)
+        return np.fromiter(values, dtype=dtype, count=clip_count)
+
+    id_dtype, start_index_dtype, length_dtype, sample_rate_dtype, \
+        start_time_dtype = _BINARY_COLUMN_DTYPES
+
+    clip_ids = get_column(0, id_dtype)
+    lengths = get_column(2, length_dtype)
+    sample_rates = get_column(3, sample_rate_dtype)
+
+    # Start indices can be `None`, so we get them as objects and
+    # replace `None` with `_UNKNOWN_START_INDEX` before conversion.
+    start_indices = get_column(1, object)
+    start_indices[np.equal(start_indices, None)] = _UNKNOWN_START_INDEX
+    start_indices = start_indices.astype(start_index_dtype)
+
+    # Convert start times to milliseconds since the epoch. We do this
+    # with object array arithmetic rather than by converting the start
+    # times to `datetime64` values, since NumPy converts Python
+    # `datetime` objects to `datetime64` values slowly, especially
+    # timezone-aware ones.
+    start_times = get_column(4, object)
+    start_times = ((start_times - _EPOCH) // _ONE_MILLISECOND).astype(
+        start_time_dtype)
+
+    header = np.array(
+        [clip_count, _BINARY_FORMAT_VERSION], dtype=_BINARY_HEADER_DTYPE)
+
+    columns = (clip_ids, start_indices, lengths, sample_rates, start_times)
+
+    parts = [header.tobytes()] + [c.tobytes() for c in columns]
+
+    return b''.join(parts)
+
+
+def decode_binary_clip_list(data):
+
+    """
+    Decodes a binary clip list.
+
+    Returns
+    -------
+    tuple of NumPy arrays
+        the clip IDs, start indices, lengths, sample rates, and start
+        times (in milliseconds since the UNIX epoch) of the clip list.
+
+    Raises
+    ------
+    ValueError
+        If the clip list is malformed or of an unsupported version.
+    """
+
+    header_size = 2 * _BINARY_HEADER_DTYPE.itemsize
+
+    if len(data) < header_size:
+        raise ValueError('Binary clip list is too short to have a header.')
+
+    clip_count, version = np.frombuffer(
+        data, dtype=_BINARY_HEADER_DTYPE, count=2)
+
+    if version != _BINARY_FORMAT_VERSION:
+        raise ValueError(
+            f'Unsupported binary clip list format version {version}.')
+
+    expected_size = header_size + int(clip_count) * sum(
+        dtype.itemsize for dtype in _BINARY_COLUMN_DTYPES)
+
+    if len(data) != expected_size:
+        raise ValueError(
+            f'Binary clip list has size {len(data)} bytes rather than '
+            f'expected {expected_size} bytes.')
+
+    columns = []
+    offset = header_size
+
+    for dtype in _BINARY_COLUMN_DTYPES:
+        column = np.frombuffer(
+            data, dtype=dtype, count=clip_count, offset=offset)
+        columns.append(column)
+        offset += column.nbytes
+
+    return tuple(columns)
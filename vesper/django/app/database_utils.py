@@ -0,0 +1,44 @@
+"""Utility functions pertaining to the archive database."""
+
+
+from django.db import connection
+
+import vesper.util.archive_lock as archive_lock
+
+
+def optimize_database():
+
+    """
+    Optimizes the archive database for queries.
+
+    This function updates the statistics that the database query
+    planner uses to choose query plans (with the SQL `ANALYZE`
+    statement). For an SQLite database it also checkpoints the
+    write-ahead log, if any, transferring its contents to the database
+    file and truncating it, and lets SQLite perform any other
+    optimizations it deems worthwhile (with `PRAGMA optimize`).
+
+    The query planner statistics are not updated automatically, so
+    this function should be invoked (via the `optimize_archive_database`
+    command) after large changes to an archive, for example after
+    importing recordings and running detectors on them.
+    """
+
+    with archive_lock.atomic():
+
+        with connection.cursor() as cursor:
+
+            cursor.execute('ANALYZE')
+
+            if connection.vendor == 'sqlite':
+
+                # A checkpoint cannot complete within a transaction.
+                if _is_wal_mode(cursor) and not connection.in_atomic_block:
+                    cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+                cursor.execute('PRAGMA optimize')
+
+
+def _is_wal_mode(cursor):
+    cursor.execute('PRAGMA journal_mode')
+    return cursor.fetchone()[0].lower() == 'wal'
@@ -8,6 +8,7 @@ import vesper.django.app.form_utils as form_utils
 _FORM_TITLE = 'Detect'
 _SCHEDULE_FIELD_LABEL = 'Detection schedule preset'
 _DEFER_CLIP_CREATION_LABEL = 'Defer clip creation'
+_DISTRIBUTED_LABEL = 'Distribute detection to detection workers'
     
     
 def _get_field_default(name, default):
@@ -33,6 +34,12 @@ class DetectForm(forms.Form):
         initial=_get_field_default(_DEFER_CLIP_CREATION_LABEL, False),
         required=False)
     
+    distributed = forms.BooleanField(
+        label=_DISTRIBUTED_LABEL,
+        label_suffix='',
+        initial=_get_field_default(_DISTRIBUTED_LABEL, False),
+        required=False)
+    
     
     def __init__(self, *args, **kwargs):
         
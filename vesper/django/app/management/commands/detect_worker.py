@@ -0,0 +1,72 @@
+"""
+Module containing the `detect_worker` Django management command.
+
+The command runs detection workers that run detectors on the work
+units of distributed detection jobs. For example:
+
+    vesper_admin detect_worker --workers 4
+
+runs four workers, each in its own process. The command must be run
+in an archive directory (or with the `VESPER_ARCHIVE_DIR_PATH`
+environment variable set) whose settings specify the archive database
+of the jobs, and on a host that can read the archive's recording
+files. See the `vesper.command.detection_worker` module for details.
+"""
+
+
+from django.core.management.base import BaseCommand, CommandError
+
+import vesper.command.detection_worker as detection_worker
+
+
+class Command(BaseCommand):
+
+
+    help = (
+        'Runs detection workers that run detectors on the work units '
+        'of distributed detection jobs.')
+
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='the number of workers to run, each in its own process.')
+
+        parser.add_argument(
+            '--name',
+            help=(
+                'the worker name. If more than one worker is run, a '
+                'worker number is appended to the name of each. The '
+                'default name comprises the host name and process ID.'))
+
+        parser.add_argument(
+            '--lease-duration', type=float,
+            default=detection_worker.DEFAULT_LEASE_DURATION,
+            help='the work unit lease duration in seconds.')
+
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=detection_worker.DEFAULT_POLL_INTERVAL,
+            help=(
+                'the time in seconds that an idle worker waits before '
+                'checking the work queue again.'))
+
+        parser.add_argument(
+            '--exit-when-idle', action='store_true',
+            help='exit when the work queue is empty.')
+
+
+    def handle(self, *args, **options):
+
+        worker_count = options['workers']
+
+        if worker_count < 1:
+            raise CommandError('Number of workers must be at least one.')
+
+        detection_worker.run_workers(
+            worker_count,
+            name=options['name'],
+            lease_duration=options['lease_duration'],
+            poll_interval=options['poll_interval'],
+            exit_when_idle=options['exit_when_idle'])
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# SQL that populates the clip count table from existing clips,
+# annotations, and tags. This is a copy of the SQL of the
+# `vesper.django.app.clip_count_utils` module at the time this
+# migration was written, and should not be modified.
+_POPULATE_CLIP_COUNTS_SQL = [
+
+    '''
+INSERT INTO vesper_clip_count (
+    station_id, mic_output_id, detector_id, date, annotation_info_id,
+    annotation_value, tag_info_id, count)
+SELECT
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    NULL, NULL, NULL, count(*)
+FROM vesper_clip c
+GROUP BY c.station_id, c.mic_output_id, c.creating_processor_id, c.date
+''',
+
+    '''
+INSERT INTO vesper_clip_count (
+    station_id, mic_output_id, detector_id, date, annotation_info_id,
+    annotation_value, tag_info_id, count)
+SELECT
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    a.info_id, a.value, NULL, count(*)
+FROM vesper_clip c
+INNER JOIN vesper_string_annotation a ON a.clip_id = c.id
+GROUP BY
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    a.info_id, a.value
+''',
+
+    '''
+INSERT INTO vesper_clip_count (
+    station_id, mic_output_id, detector_id, date, annotation_info_id,
+    annotation_value, tag_info_id, count)
+SELECT
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    NULL, NULL, t.info_id, count(*)
+FROM vesper_clip c
+INNER JOIN vesper_tag t ON t.clip_id = c.id
+GROUP BY
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    t.info_id
+''',
+
+    '''
+INSERT INTO vesper_clip_count (
+    station_id, mic_output_id, detector_id, date, annotation_info_id,
+    annotation_value, tag_info_id, count)
+SELECT
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    a.info_id, a.value, t.info_id, count(*)
+FROM vesper_clip c
+INNER JOIN vesper_string_annotation a ON a.clip_id = c.id
+INNER JOIN vesper_tag t ON t.clip_id = c.id
+GROUP BY
+    c.station_id, c.mic_output_id, c.creating_processor_id, c.date,
+    a.info_id, a.value, t.info_id
+''',
+
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vesper', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClipCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('annotation_value', models.CharField(blank=True, max_length=255, null=True)),
+                ('count', models.BigIntegerField()),
+                ('annotation_info', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='clip_counts', related_query_name='clip_count', to='vesper.annotationinfo')),
+                ('detector', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='clip_counts', related_query_name='clip_count', to='vesper.processor')),
+                ('mic_output', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clip_counts', related_query_name='clip_count', to='vesper.deviceoutput')),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clip_counts', related_query_name='clip_count', to='vesper.station')),
+                ('tag_info', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='clip_counts', related_query_name='clip_count', to='vesper.taginfo')),
+            ],
+            options={
+                'db_table': 'vesper_clip_count',
+                'indexes': [models.Index(fields=['station', 'mic_output', 'detector', 'date'], name='vesper_clip_station_940f17_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            _POPULATE_CLIP_COUNTS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:51
+
+import uuid
+
+from django.db import migrations, models
+
+
+# Names of the archive caches of the `vesper.django.app.archive` module
+# at the time this migration was written. We give each cache an initial
+# version so that processes can cache archive data as soon as the
+# migration has been applied.
+_CACHE_NAMES = ('Processors', 'String Annotation Values')
+
+
+def _create_cache_versions(apps, schema_editor):
+    CacheVersion = apps.get_model('vesper', 'CacheVersion')
+    CacheVersion.objects.bulk_create([
+        CacheVersion(name=name, version=uuid.uuid4().hex)
+        for name in _CACHE_NAMES])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vesper', '0002_clip_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('version', models.CharField(max_length=255)),
+            ],
+            options={
+                'db_table': 'vesper_cache_version',
+            },
+        ),
+        migrations.RunPython(
+            _create_cache_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vesper', '0003_cache_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='clip',
+            name='vesper_clip_station_50dee1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='clip',
+            index=models.Index(fields=['station', 'mic_output', 'date', 'creating_processor', 'start_time'], name='vesper_clip_sm_date_proc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clip',
+            index=models.Index(fields=['station', 'mic_output', 'creating_processor', 'start_time'], name='vesper_clip_sm_proc_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stringannotation',
+            index=models.Index(fields=['info', 'value', 'clip'], name='vesper_sa_info_value_clip_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['info', 'clip'], name='vesper_tag_info_clip_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vesper', '0004_clip_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='priority',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'priority', 'id'], name='vesper_job_queue_idx'),
+        ),
+    ]
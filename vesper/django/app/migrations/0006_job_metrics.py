@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vesper', '0005_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='metrics',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vesper', '0006_job_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetectionWorkUnit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('detectors', models.TextField()),
+                ('status', models.CharField(max_length=255)),
+                ('worker', models.CharField(blank=True, max_length=255, null=True)),
+                ('lease_expiration_time', models.DateTimeField(blank=True, null=True)),
+                ('attempt_count', models.IntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detection_work_units', related_query_name='detection_work_unit', to='vesper.job')),
+                ('recording_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detection_work_units', related_query_name='detection_work_unit', to='vesper.recordingfile')),
+            ],
+            options={
+                'db_table': 'vesper_detection_work_unit',
+                'indexes': [models.Index(fields=['status', 'id'], name='vesper_work_unit_queue_idx')],
+            },
+        ),
+    ]
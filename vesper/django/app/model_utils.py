@@ -6,16 +6,20 @@ from pathlib import Path
 import datetime
 import itertools
 
-from django.db import transaction
-from django.db.models import Count, F
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, QuerySet
+from django.db.models.expressions import RawSQL
 
 from vesper.django.app.models import (
-    AnnotationInfo, Clip, DeviceConnection, Recording, RecordingChannel,
-    StationDevice, StringAnnotation, StringAnnotationEdit, Tag, TagEdit,
-    TagInfo)
+    AnnotationInfo, Clip, DeviceConnection, Processor, Recording,
+    RecordingChannel, StationDevice, StringAnnotation, StringAnnotationEdit,
+    Tag, TagEdit, TagInfo)
 from vesper.singleton.archive import archive
 from vesper.singleton.recording_manager import recording_manager
 from vesper.util.bunch import Bunch
+import vesper.django.app.clip_count_utils as clip_count_utils
+import vesper.django.app.query_utils as query_utils
 import vesper.util.time_utils as time_utils
 import vesper.util.archive_lock as archive_lock
 
@@ -211,11 +215,11 @@ def get_recorder_microphone_infos(station, microphone_output):
             input__device=recorder)
         
         # Remember channel number and time interval of each connection.
-        for connection in connections:
+        for device_connection in connections:
             info = Bunch(
-                channel_num=connection.input.channel_num,
-                start_time=connection.start_time,
-                end_time=connection.end_time)
+                channel_num=device_connection.input.channel_num,
+                start_time=device_connection.start_time,
+                end_time=device_connection.end_time)
             rm_infos[key].append(info)
             
         rm_infos[key].sort(key=_get_rm_info_sort_key)
@@ -296,12 +300,11 @@ def get_recording_dates(station, mic_output):
     # TODO: Make this work for recordings that span more than one night,
     # and for diurnal recordings.
     
-    # TODO: Annotate channels with recording start times?
-    channels = RecordingChannel.objects.filter(
+    start_times = RecordingChannel.objects.filter(
         recording__station=station,
-        mic_output=mic_output)
+        mic_output=mic_output).values_list('recording__start_time', flat=True)
     
-    nights = set(station.get_night(c.recording.start_time) for c in channels)
+    nights = set(station.get_night(t) for t in start_times)
     
     return sorted(nights)
 
@@ -395,24 +398,11 @@ def get_clip_counts(
     
     counts = dict((date, 0) for date in dates)
     
-    clips = get_clips(
-        station=station,
-        mic_output=mic_output,
-        detector=detector,
-        annotation_name=annotation_name,
-        annotation_value=annotation_value,
-        tag_name=tag_name,
-        order=False)
-    
-    count_dicts = clips.values('date').annotate(count=Count('date'))
-    
-    for d in count_dicts:
-        counts[d['date']] = d['count']
-    
-#     print('_get_clip_counts', count_dicts.query)
-#     
-#     for date, count in counts.items():
-#         print('_get_clip_counts {}: {}'.format(str(date), count))
+    # Get counts from the clip count table rather than by counting
+    # clips, which can be slow for large archives.
+    counts.update(clip_count_utils.get_clip_counts(
+        station, mic_output, detector, annotation_name, annotation_value,
+        tag_name))
     
     return counts
     
@@ -422,6 +412,8 @@ def get_clips(**kwargs):
     station = kwargs.get('station')
     mic_output = kwargs.get('mic_output')
     date = kwargs.get('date')
+    start_date = kwargs.get('start_date')
+    end_date = kwargs.get('end_date')
     detector = kwargs.get('detector')
     annotation_name = kwargs.get('annotation_name')
     annotation_value = kwargs.get('annotation_value')
@@ -429,7 +421,8 @@ def get_clips(**kwargs):
     tag_excluded = kwargs.get('tag_excluded', False)
     order = kwargs.get('order', True)
     
-    clips = _get_base_clips(station, mic_output, date, detector)
+    clips = _get_base_clips(
+        station, mic_output, date, start_date, end_date, detector)
     
     clips = _filter_clips_by_annotation_if_needed(
         clips, annotation_name, annotation_value)
@@ -442,12 +435,15 @@ def get_clips(**kwargs):
     return clips
 
 
-def _get_base_clips(station, mic_output, date, detector):
+def _get_base_clips(
+        station, mic_output, date, start_date, end_date, detector):
     
     kwargs = {}
     _add_kwarg_if_needed(kwargs, 'station', station)
     _add_kwarg_if_needed(kwargs, 'mic_output', mic_output)
     _add_kwarg_if_needed(kwargs, 'date', date)
+    _add_kwarg_if_needed(kwargs, 'date__gte', start_date)
+    _add_kwarg_if_needed(kwargs, 'date__lte', end_date)
     _add_kwarg_if_needed(kwargs, 'creating_processor', detector)
     
     if len(kwargs) == 0:
@@ -489,23 +485,27 @@ def _filter_clips_by_annotation_if_needed(
             
             wildcard = archive.STRING_ANNOTATION_VALUE_WILDCARD
             
-            # Get all annotated clips.
-            clips = clips.filter(string_annotation__info=info)
+            # Note that we must filter on annotation info and value in
+            # a single `filter` call. Separate calls would join clips
+            # to annotations twice, once for the info and once for the
+            # value, which would both match clips with the value for
+            # a different annotation and keep the database from using
+            # the (info, value, clip) string annotation index.
+            kwargs = {'string_annotation__info': info}
             
             if not annotation_value.endswith(wildcard):
                 # want clips with a particular annotation value
                 
-                clips = clips.filter(string_annotation__value=annotation_value)
+                kwargs['string_annotation__value'] = annotation_value
                 
             elif annotation_value != wildcard:
                 # want clips whose annotation values start with a prefix
                 
                 prefix = annotation_value[:-len(wildcard)]
                 
-                clips = clips.filter(
-                    string_annotation__value__startswith=prefix)
+                kwargs['string_annotation__value__startswith'] = prefix
                 
-            return clips
+            return clips.filter(**kwargs)
                 
 
 def _filter_clips_by_tag_if_needed(clips, tag_name, tag_excluded):
@@ -544,6 +544,81 @@ def create_clip_query_values_iterator(
                 yield (station, mic_output, date, detector)
            
          
+def get_clip_set_query_values(sm_pair_ui_names, detector_names):
+    
+    """
+    Gets (station, mic output, detector) triples for a clip set query.
+    
+    A clip set command (e.g. a command that exports, classifies,
+    tags, or deletes clips) can perform one clip query per triple for
+    its entire date range (see the `get_clips` function's `start_date`
+    and `end_date` arguments), rather than one query per date. This
+    requires far fewer queries for long date ranges, especially since
+    many dates of a range typically have no clips.
+    
+    Raises an exception if a station/mic output pair or detector name
+    is not recognized.
+    """
+    
+    sm_pairs_dict = get_station_mic_output_pairs_dict()
+    sm_pairs = [sm_pairs_dict[name] for name in sm_pair_ui_names]
+    
+    detectors = [archive.get_processor(name) for name in detector_names]
+    
+    return [
+        (station, mic_output, detector)
+        for station, mic_output in sm_pairs
+        for detector in detectors]
+    
+    
+def group_clips_by_date(clips):
+    
+    """
+    Generates (date, clips) pairs from a sequence of clips.
+    
+    The clips must be ordered by date. This function iterates over the
+    clips only once and does not hold them in memory, so it can be
+    used with a `ClipIterator` to process the clips of a long date
+    range one date at a time without performing a query per date.
+    
+    Parameters
+    ----------
+    clips : iterable of Clip
+        the clips to group, ordered by date.
+        
+    Yields
+    ------
+    tuple
+        a (date, clips) pair for each date for which there is at least
+        one clip, where `clips` is an iterator over the clips with that
+        date. The iterator is valid only until the next pair is
+        generated.
+    """
+    
+    yield from itertools.groupby(clips, lambda c: c.date)
+            
+            
+def get_clip_counts_by_date(clips):
+    
+    """
+    Gets the numbers of the specified clips with each date.
+    
+    Parameters
+    ----------
+    clips : QuerySet
+        the clips to count.
+        
+    Returns
+    -------
+    dict
+        mapping from dates to clip counts. The mapping includes only
+        dates with at least one clip.
+    """
+    
+    counts = clips.order_by().values_list('date').annotate(Count('id'))
+    return dict(counts)
+            
+            
 _ONE_DAY = datetime.timedelta(days=1)
 
   
@@ -580,25 +655,52 @@ def get_clip_annotation_value(clip, annotation_info):
     return annotation.value
 
 
+def get_clip_annotation_values(clips, annotation_info):
+
+    """
+    Gets the values of an annotation for the specified clips.
+
+    If `clips` is a `Clip` query set, the values are obtained with a
+    single query. Otherwise `clips` can be any iterable of clips, and
+    the values are obtained with one query per chunk of clips (see the
+    `query_utils` module).
+
+    Returns a mapping from clip IDs to annotation values. Clips that
+    do not have the annotation are omitted from the mapping.
+    """
+
+    annotations = StringAnnotation.objects.filter(info=annotation_info)
+
+    if isinstance(clips, QuerySet):
+        annotations = annotations.filter(clip__in=clips.values('id'))
+        return dict(annotations.values_list('clip_id', 'value'))
+
+    clip_ids = [c.id for c in clips]
+    annotations = annotations.values_list('clip_id', 'value')
+    return dict(query_utils.filter_in(annotations, 'clip_id', clip_ids))
+
+
 @archive_lock.atomic
 @transaction.atomic
 def annotate_clips(
         clip_ids, annotation_info, value, creation_time=None,
         creating_user=None, creating_job=None, creating_processor=None):
     
+    _lock_clips(clip_ids)
+
     # Get existing clip annotations.
-    annotations = StringAnnotation.objects.filter(
-        clip_id__in=clip_ids, info=annotation_info)
+    annotations = StringAnnotation.objects.filter(info=annotation_info)
+    annotations = query_utils.filter_in(
+        annotations.values_list('clip_id', 'value'), 'clip_id', clip_ids)
 
     # Get annotated clip IDs.
-    annotated_clip_ids = frozenset(a.clip_id for a in annotations)
+    annotated_clip_ids = frozenset(i for i, _ in annotations)
 
     # Get unannotated clip IDs.
     unannotated_clip_ids = frozenset(clip_ids) - annotated_clip_ids
 
     # Get IDs of clips that are annotated but not with specified value.
-    annotated_clip_ids = frozenset(
-        a.clip_id for a in annotations if a.value != value)
+    annotated_clip_ids = frozenset(i for i, v in annotations if v != value)
 
     if creation_time is None:
         creation_time = time_utils.get_utc_now()
@@ -611,7 +713,9 @@ def annotate_clips(
         'creating_processor': creating_processor
     }
 
-    # TODO: Consider operating on objects in limited-size batches.
+    # Remove old annotation values from clip counts.
+    clip_count_utils.decrement_clip_counts(
+        annotated_clip_ids, annotation_info=annotation_info)
 
     # Create annotations for unannotated clips.
     annotations = [
@@ -620,13 +724,16 @@ def annotate_clips(
     StringAnnotation.objects.bulk_create(annotations)
 
     # Update annotations of already-annotated clips.
-    StringAnnotation.objects.filter(
-        clip_id__in=annotated_clip_ids,
-        info=annotation_info
-    ).update(**kwargs)
+    query_utils.update_in(
+        StringAnnotation.objects.filter(info=annotation_info), 'clip_id',
+        annotated_clip_ids, **kwargs)
 
-    # Create edits for new annotations.
+    # Add new annotation values to clip counts.
     edited_clip_ids = unannotated_clip_ids | annotated_clip_ids
+    clip_count_utils.increment_clip_counts(
+        edited_clip_ids, annotation_info=annotation_info)
+
+    # Create edits for new annotations.
     edits = [
         StringAnnotationEdit(
             clip_id=i,
@@ -654,15 +761,19 @@ def unannotate_clips(
         clip_ids, annotation_info, creation_time=None, creating_user=None,
         creating_job=None, creating_processor=None):
     
-    # Get existing clip annotations.
-    annotations = StringAnnotation.objects.filter(
-        clip_id__in=clip_ids, info=annotation_info)
+    _lock_clips(clip_ids)
 
     # Get annotated clip IDs.
-    annotated_clip_ids = [a.clip_id for a in annotations]
+    annotations = StringAnnotation.objects.filter(info=annotation_info)
+    annotated_clip_ids = query_utils.filter_in(
+        annotations.values_list('clip_id', flat=True), 'clip_id', clip_ids)
+
+    # Remove annotations from clip counts.
+    clip_count_utils.decrement_clip_counts(
+        annotated_clip_ids, annotation_info=annotation_info)
 
     # Delete annotations.
-    annotations.delete()
+    query_utils.delete_in(annotations, 'clip_id', annotated_clip_ids)
 
     if creation_time is None:
         creation_time = time_utils.get_utc_now()
@@ -674,8 +785,6 @@ def unannotate_clips(
         'creating_processor': creating_processor
     }
 
-    # TODO: Consider operating on objects in limited-size batches.
-
     # Create edits for deleted annotations.
     edits = [
         StringAnnotationEdit(
@@ -687,6 +796,71 @@ def unannotate_clips(
     StringAnnotationEdit.objects.bulk_create(edits)
 
 
+def _lock_clips(clip_ids):
+
+    """
+    Locks the rows of the specified clips until the end of the current
+    transaction.
+
+    The functions that modify the annotations and tags of many clips
+    call this before reading the annotations and tags they will modify,
+    so that concurrent modifications (for example by a classification
+    job and a user editing in a clip album) are serialized rather than
+    lost or failing with integrity errors. This is not necessary for
+    SQLite archives, for which the archive lock serializes all archive
+    writes, and this function does nothing for database back ends that
+    do not support row-level locks.
+
+    The rows are locked in order of increasing ID to avoid deadlocks
+    between concurrent transactions.
+    """
+
+    if connection.features.has_select_for_update:
+        clips = Clip.objects.select_for_update().order_by('id')
+        query_utils.filter_in(
+            clips.values_list('id', flat=True), 'id', sorted(clip_ids))
+
+
+# Models that have foreign keys to `Clip`. These must be deleted before
+# the clips they refer to.
+_CLIP_DEPENDENT_MODEL_CLASSES = (
+    StringAnnotation, StringAnnotationEdit, Tag, TagEdit)
+
+
+@archive_lock.atomic
+@transaction.atomic
+def delete_clips(clip_ids):
+    
+    """
+    Deletes the specified clips from the archive database.
+    
+    This function deletes the clips and their annotations, annotation
+    edits, tags, and tag edits, and updates clip counts accordingly.
+    Unlike `QuerySet.delete`, it does not load the clips and their
+    dependent objects into memory to collect and delete them one
+    model instance at a time, but rather deletes them with a few SQL
+    `DELETE` statements per chunk of clip IDs. This is much faster
+    when deleting many clips.
+    
+    This function does not delete clip audio files.
+    
+    Returns the number of clips deleted.
+    """
+    
+    clip_ids = list(clip_ids)
+    
+    # Remove clips from clip counts.
+    clip_count_utils.decrement_clip_counts(clip_ids)
+    
+    # Delete clip dependents.
+    for model_class in _CLIP_DEPENDENT_MODEL_CLASSES:
+        query_utils.raw_delete_in(
+            model_class.objects.all(), 'clip_id', clip_ids)
+        
+    # Delete clips.
+    return query_utils.raw_delete_in(Clip.objects.all(), 'id', clip_ids)
+
+
 # This function doesn't need archive lock and transaction decorators
 # since it just calls another function that does.
 def unannotate_clip(
@@ -717,17 +891,35 @@ def is_clip_tagged(clip, tag_info):
     return True
 
 
+def get_tagged_clip_ids(clips, tag_info):
+
+    """
+    Gets the IDs of those of the specified clips that have a tag.
+
+    This function is equivalent to calling `is_clip_tagged` for each
+    of the clips, but makes one query per chunk of clips (see the
+    `query_utils` module) rather than one query per clip.
+
+    Returns a `frozenset` of clip IDs.
+    """
+
+    tags = Tag.objects.filter(info=tag_info).values_list('clip_id', flat=True)
+    clip_ids = [c.id for c in clips]
+    return frozenset(query_utils.filter_in(tags, 'clip_id', clip_ids))
+
+
 @archive_lock.atomic
 @transaction.atomic
 def tag_clips(
         clip_ids, tag_info, creation_time=None, creating_user=None,
         creating_job=None, creating_processor=None):
     
-    # Get existing tags.
-    tags = Tag.objects.filter(clip_id__in=clip_ids, info=tag_info)
+    _lock_clips(clip_ids)
 
     # Get tagged clip IDs.
-    tagged_clip_ids = frozenset(t.clip_id for t in tags)
+    tags = Tag.objects.filter(info=tag_info)
+    tagged_clip_ids = frozenset(query_utils.filter_in(
+        tags.values_list('clip_id', flat=True), 'clip_id', clip_ids))
 
     # Get IDs of untagged clips.
     untagged_clip_ids = frozenset(clip_ids) - tagged_clip_ids
@@ -742,14 +934,16 @@ def tag_clips(
         'creating_processor': creating_processor
     }
 
-    # TODO: Consider operating on objects in limited-size batches.
-
     # Tag untagged clips.
     tags = [
         Tag(clip_id=i, info=tag_info, **kwargs)
         for i in untagged_clip_ids]
     Tag.objects.bulk_create(tags)
 
+    # Add new tags to clip counts.
+    clip_count_utils.increment_clip_counts(
+        untagged_clip_ids, tag_info=tag_info)
+
     # Create edits for new tags.
     edits = [
         TagEdit(
@@ -778,14 +972,18 @@ def untag_clips(
         clip_ids, tag_info, creation_time=None, creating_user=None,
         creating_job=None, creating_processor=None):
     
-    # Get existing tags.
-    tags = Tag.objects.filter(clip_id__in=clip_ids, info=tag_info)
+    _lock_clips(clip_ids)
 
     # Get tagged clip IDs.
-    tagged_clip_ids = frozenset(t.clip_id for t in tags)
+    tags = Tag.objects.filter(info=tag_info)
+    tagged_clip_ids = frozenset(query_utils.filter_in(
+        tags.values_list('clip_id', flat=True), 'clip_id', clip_ids))
+
+    # Remove tags from clip counts.
+    clip_count_utils.decrement_clip_counts(tagged_clip_ids, tag_info=tag_info)
 
     # Delete tags.
-    tags.delete()
+    query_utils.delete_in(tags, 'clip_id', tagged_clip_ids)
 
     if creation_time is None:
         creation_time = time_utils.get_utc_now()
@@ -797,14 +995,15 @@ def untag_clips(
         'creating_processor': creating_processor
     }
 
-    # TODO: Consider operating on objects in limited-size batches.
-
-    # Create edits for deleted tags.
+    # Create edits for deleted tags. Note that older versions of this
+    # function mistakenly recorded these edits with the set action, so
+    # archives may contain set edits for tag deletions made before the
+    # mistake was fixed.
     edits = [
         TagEdit(
             clip_id=i,
             info=tag_info,
-            action=TagEdit.ACTION_SET,
+            action=TagEdit.ACTION_DELETE,
             **kwargs)
         for i in tagged_clip_ids]
     TagEdit.objects.bulk_create(edits)
@@ -821,6 +1020,222 @@ def untag_clip(
         creating_processor)
     
     
+# Name of the temporary table that holds the IDs of the clips that
+# `tag_clip_set` and `untag_clip_set` tag or untag.
+_CLIP_SET_TABLE_NAME = 'vesper_temp_clip_set'
+
+_CLIP_SET_IDS_SQL = f'SELECT clip_id FROM {_CLIP_SET_TABLE_NAME}'
+
+_INSERT_TAGS_SQL = f'''
+INSERT INTO vesper_tag (
+    clip_id, info_id, creation_time, creating_user_id, creating_job_id,
+    creating_processor_id)
+SELECT s.clip_id, %s, %s, %s, %s, %s
+FROM {_CLIP_SET_TABLE_NAME} s
+'''.strip()
+
+# Deletes tags by joining them to the clip set table rather than with
+# an `IN` subquery, which some databases evaluate less efficiently.
+_DELETE_TAGS_SQL = f'''
+DELETE FROM vesper_tag
+WHERE id IN (
+    SELECT t.id
+    FROM vesper_tag t
+    JOIN {_CLIP_SET_TABLE_NAME} s ON s.clip_id = t.clip_id
+    WHERE t.info_id = %s)
+'''.strip()
+
+_INSERT_TAG_EDITS_SQL = f'''
+INSERT INTO vesper_tag_edit (
+    clip_id, info_id, action, creation_time, creating_user_id,
+    creating_job_id, creating_processor_id)
+SELECT s.clip_id, %s, %s, %s, %s, %s, %s
+FROM {_CLIP_SET_TABLE_NAME} s
+'''.strip()
+
+
+@archive_lock.atomic
+@transaction.atomic
+def tag_clip_set(
+        clips, tag_info, clip_count=None, creation_time=None,
+        creating_user=None, creating_job=None, creating_processor=None):
+    
+    """
+    Tags the clips of a query set, or a random sample of them.
+    
+    This function is a set-based counterpart of `tag_clips` for large
+    numbers of clips. Rather than getting clip IDs from the database
+    and then inserting tags and tag edits for them, it selects the
+    clips to tag (including any random sample of them) and inserts
+    their tags and tag edits with `INSERT ... SELECT` statements, so
+    that clip IDs never leave the database. It also updates clip
+    counts with a fixed number of queries, regardless of the number
+    of clips.
+    
+    The function tags the clips in one transaction, so callers that
+    tag very large sets of clips should partition them into smaller
+    sets (for example by date) and call the function once per set.
+    
+    Parameters
+    ----------
+    clips : QuerySet
+        the clips to tag. Clips that already have the tag are ignored.
+    tag_info : TagInfo
+        the tag to add to the clips.
+    clip_count : int or None
+        the number of clips to tag. If this is `None` or at least the
+        number of untagged clips of `clips`, all of the untagged clips
+        are tagged. Otherwise a random sample of the untagged clips of
+        this size is tagged.
+        
+    Returns
+    -------
+    int
+        the number of clips tagged.
+    """
+    
+    tags = Tag.objects.filter(clip_id=OuterRef('pk'), info=tag_info)
+    clips = clips.exclude(Exists(tags))
+    
+    count = _create_clip_set_table(clips, clip_count)
+    
+    if count == 0:
+        return 0
+    
+    _lock_clip_set()
+    
+    creation_time, creator_ids = _get_creation_data(
+        creation_time, creating_user, creating_job, creating_processor)
+    
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _INSERT_TAGS_SQL, (tag_info.id, creation_time) + creator_ids)
+        
+    # Add new tags to clip counts.
+    clip_count_utils.increment_clip_counts(
+        RawSQL(_CLIP_SET_IDS_SQL, ()), tag_info=tag_info)
+    
+    _create_clip_set_tag_edits(
+        tag_info, TagEdit.ACTION_SET, creation_time, creator_ids)
+    
+    return count
+    
+    
+@archive_lock.atomic
+@transaction.atomic
+def untag_clip_set(
+        clips, tag_info, clip_count=None, creation_time=None,
+        creating_user=None, creating_job=None, creating_processor=None):
+    
+    """
+    Untags the clips of a query set, or a random sample of them.
+    
+    This function is the inverse of `tag_clip_set`. It removes the tag
+    from the clips of `clips` that have it or, if `clip_count` is not
+    `None` and is less than the number of such clips, from a random
+    sample of `clip_count` of them.
+    
+    Returns the number of clips untagged.
+    """
+    
+    tags = Tag.objects.filter(clip_id=OuterRef('pk'), info=tag_info)
+    clips = clips.filter(Exists(tags))
+    
+    count = _create_clip_set_table(clips, clip_count)
+    
+    if count == 0:
+        return 0
+    
+    _lock_clip_set()
+    
+    with connection.cursor() as cursor:
+        cursor.execute(_DELETE_TAGS_SQL, (tag_info.id,))
+        
+    # Remove deleted tags from clip counts. Every clip of the clip set
+    # had the tag, so this needs no join of the clips to their tags.
+    clip_count_utils.decrement_deleted_tag_clip_counts(
+        RawSQL(_CLIP_SET_IDS_SQL, ()), tag_info)
+    
+    creation_time, creator_ids = _get_creation_data(
+        creation_time, creating_user, creating_job, creating_processor)
+    
+    _create_clip_set_tag_edits(
+        tag_info, TagEdit.ACTION_DELETE, creation_time, creator_ids)
+    
+    return count
+    
+    
+def _create_clip_set_table(clips, clip_count):
+    
+    """
+    Fills the clip set table with the IDs of the specified clips, or
+    of a random sample of them.
+    
+    Returns the number of clip IDs in the table.
+    """
+    
+    clip_ids = clips.values('id')
+    
+    if clip_count is None:
+        clip_ids = clip_ids.order_by()
+    else:
+        # Select random sample of clips in SQL.
+        clip_ids = clip_ids.order_by('?')[:clip_count]
+        
+    try:
+        sql, params = clip_ids.query.sql_with_params()
+    except EmptyResultSet:
+        # query set is empty (e.g. it was created with `none`)
+        return 0
+    
+    with connection.cursor() as cursor:
+        
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {_CLIP_SET_TABLE_NAME} '
+            f'(clip_id BIGINT PRIMARY KEY)')
+        
+        cursor.execute(f'DELETE FROM {_CLIP_SET_TABLE_NAME}')
+        
+        cursor.execute(
+            f'INSERT INTO {_CLIP_SET_TABLE_NAME} (clip_id) {sql}', params)
+        
+        cursor.execute(f'SELECT count(*) FROM {_CLIP_SET_TABLE_NAME}')
+        
+        return cursor.fetchone()[0]
+    
+    
+def _lock_clip_set():
+    
+    """Locks the rows of the clips of the clip set table."""
+    
+    if connection.features.has_select_for_update:
+        clips = Clip.objects.select_for_update().order_by('id')
+        clips = clips.filter(id__in=RawSQL(_CLIP_SET_IDS_SQL, ()))
+        list(clips.values_list('id'))
+        
+        
+def _get_creation_data(
+        creation_time, creating_user, creating_job, creating_processor):
+    
+    if creation_time is None:
+        creation_time = time_utils.get_utc_now()
+        
+    creation_time = connection.ops.adapt_datetimefield_value(creation_time)
+    
+    creator_ids = tuple(
+        None if c is None else c.id
+        for c in (creating_user, creating_job, creating_processor))
+    
+    return creation_time, creator_ids
+
+
+def _create_clip_set_tag_edits(tag_info, action, creation_time, creator_ids):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _INSERT_TAG_EDITS_SQL,
+            (tag_info.id, action, creation_time) + creator_ids)
+        
+        
 def get_clip_detector_name(clip):
     
     processor = clip.creating_processor
@@ -833,9 +1248,39 @@ def get_clip_detector_name(clip):
 
 
 def get_clip_type(clip):
-    
-    processor = clip.creating_processor
-    
+    return _get_clip_type(clip.creating_processor)
+
+
+def get_clip_types(clips):
+
+    """
+    Gets the types of the specified clips.
+
+    This function is equivalent to calling `get_clip_type` for each
+    of the clips, but gets the clips' creating processors with a single
+    query rather than with one query per clip.
+
+    Returns a mapping from clip IDs to clip types.
+    """
+
+    clips = list(clips)
+
+    processor_ids = set(
+        c.creating_processor_id for c in clips
+        if c.creating_processor_id is not None)
+
+    processors = Processor.objects.in_bulk(processor_ids)
+
+    clip_types = dict(
+        (processor_id, _get_clip_type(processor))
+        for processor_id, processor in processors.items())
+
+    return dict(
+        (c.id, clip_types.get(c.creating_processor_id)) for c in clips)
+
+
+def _get_clip_type(processor):
+
     if processor is None:
         return None
     
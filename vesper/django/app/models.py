@@ -485,6 +485,8 @@ class Job(Model):
     start_time = DateTimeField(null=True, blank=True)
     end_time = DateTimeField(null=True, blank=True)
     status = CharField(max_length=255)
+    priority = IntegerField(default=0)
+    metrics = TextField(null=True, blank=True)
     creation_time = DateTimeField()
     creating_user = ForeignKey(
         User, CASCADE, null=True, blank=True,
@@ -502,6 +504,11 @@ class Job(Model):
         
     class Meta:
         db_table = 'vesper_job'
+        indexes = [
+            Index(
+                fields=('status', 'priority', 'id'),
+                name='vesper_job_queue_idx'),
+        ]
         
     @property
     def log_file_path(self):
@@ -799,10 +806,27 @@ class Clip(Model):
     # be desirable to add a command that can detect duplicate clips in a
     # database, regardless of which job created them, and optionally
     # delete them. This todo item corresponds to issue #213.
+    #
+    # The indexes support the main clip queries. The first supports
+    # queries for the clips of one station, mic output, date, and
+    # detector ordered by start time, e.g. for clip albums and clip
+    # exports, and the second supports queries for the clips of one
+    # station, mic output, and detector ordered by start time, e.g. for
+    # paging through all of a detector's clips.
     class Meta:
         db_table = 'vesper_clip'
-        indexes = [Index(
-            fields=('station', 'mic_output', 'date', 'creating_processor'))]
+        indexes = [
+            Index(
+                fields=(
+                    'station', 'mic_output', 'date', 'creating_processor',
+                    'start_time'),
+                name='vesper_clip_sm_date_proc_idx'),
+            Index(
+                fields=(
+                    'station', 'mic_output', 'creating_processor',
+                    'start_time'),
+                name='vesper_clip_sm_proc_time_idx'),
+        ]
         unique_together = (
             'recording_channel', 'start_time', 'creating_processor')
         
@@ -923,9 +947,16 @@ class StringAnnotation(Model):
         return 'Clip {} / {} / {}'.format(
             self.clip.id, self.info.name, self.value)
     
+    # The index supports queries for clips with a particular annotation
+    # value or annotation value prefix. It includes the clip ID so that
+    # the database can get clip IDs from the index without reading
+    # annotations.
     class Meta:
         unique_together = ('clip', 'info')
         db_table = 'vesper_string_annotation'
+        indexes = [Index(
+            fields=('info', 'value', 'clip'),
+            name='vesper_sa_info_value_clip_idx')]
     
     
 class StringAnnotationEdit(Model):
@@ -1018,9 +1049,14 @@ class Tag(Model):
     def __str__(self):
         return 'Clip {} / {}'.format(self.clip.id, self.info.name)
      
+    # The index supports queries for clips with a particular tag. It
+    # includes the clip ID so that the database can get clip IDs from
+    # the index without reading tags.
     class Meta:
         unique_together = ('clip', 'info')
         db_table = 'vesper_tag'
+        indexes = [Index(
+            fields=('info', 'clip'), name='vesper_tag_info_clip_idx')]
      
      
 class TagEdit(Model):
@@ -1058,6 +1094,124 @@ class TagEdit(Model):
         db_table = 'vesper_tag_edit'
 
 
+# A `ClipCount` is a precomputed count of the clips of one station, mic
+# output, detector, and date, optionally restricted to clips that have a
+# particular annotation value, a particular tag, or both. There is one
+# count with null `annotation_info`, `annotation_value`, and `tag_info`
+# for each station, mic output, detector, and date that has clips, one
+# count with null `tag_info` for each annotation value that the clips
+# have, one count with null `annotation_info` and `annotation_value` for
+# each tag that the clips have, and one count for each combination of
+# annotation value and tag that the clips have. Counts are maintained
+# incrementally as clips, annotations, and tags are created and deleted
+# (see the `clip_count_utils` module), and can be rebuilt from scratch
+# with the `rebuild_clip_counts` command. They allow the clip calendar
+# and the clip count export commands to get clip counts without
+# counting clips.
+class ClipCount(Model):
+
+    station = ForeignKey(
+        Station, CASCADE,
+        related_name='clip_counts',
+        related_query_name='clip_count')
+    mic_output = ForeignKey(
+        DeviceOutput, CASCADE,
+        related_name='clip_counts',
+        related_query_name='clip_count')
+    detector = ForeignKey(
+        Processor, CASCADE, null=True, blank=True,
+        related_name='clip_counts',
+        related_query_name='clip_count')
+    date = DateField()
+    annotation_info = ForeignKey(
+        AnnotationInfo, CASCADE, null=True, blank=True,
+        related_name='clip_counts',
+        related_query_name='clip_count')
+    annotation_value = CharField(max_length=255, null=True, blank=True)
+    tag_info = ForeignKey(
+        TagInfo, CASCADE, null=True, blank=True,
+        related_name='clip_counts',
+        related_query_name='clip_count')
+    count = BigIntegerField()
+
+    def __str__(self):
+        return '{} / {} / {} / {} / {} / {} / {}'.format(
+            self.station_id, self.mic_output_id, self.detector_id, self.date,
+            self.annotation_info_id, self.annotation_value, self.tag_info_id)
+
+    class Meta:
+        db_table = 'vesper_clip_count'
+        indexes = [Index(
+            fields=('station', 'mic_output', 'detector', 'date'))]
+
+
+# A note on cache versions:
+#
+# Vesper server and job processes cache some archive data in memory,
+# for example processors and string annotation values (see the
+# `vesper.django.app.archive` module). The `CacheVersion` table holds
+# one row per such cache, whose `version` is replaced whenever the
+# archive data from which the cache is built changes. A process can
+# then tell whether its copy of a cache is stale by comparing the
+# version it built the cache for with the current version, which is
+# much cheaper than rebuilding the cache. See the
+# `vesper.django.app.cache_version_utils` module for details.
+class CacheVersion(Model):
+
+    name = CharField(max_length=255, unique=True)
+    version = CharField(max_length=255)
+
+    def __str__(self):
+        return f'{self.name} {self.version}'
+
+    class Meta:
+        db_table = 'vesper_cache_version'
+
+
+# A note on detection work units:
+#
+# A detection job that runs in distributed mode does not run its
+# detectors itself, but rather publishes a work unit for each recording
+# file interval on which they are to run. Detection worker processes,
+# possibly on other hosts, claim work units and run detectors on them.
+# A worker claims a unit by leasing it for a limited time, and renews
+# the lease while it works on the unit. When a lease expires, for
+# example because the worker that holds it has died, the unit is
+# reclaimed so that another worker can claim it. See the
+# `vesper.command.detection_work_queue` module for details.
+class DetectionWorkUnit(Model):
+
+    job = ForeignKey(
+        Job, CASCADE,
+        related_name='detection_work_units',
+        related_query_name='detection_work_unit')
+    recording_file = ForeignKey(
+        RecordingFile, CASCADE,
+        related_name='detection_work_units',
+        related_query_name='detection_work_unit')
+    start_time = DateTimeField()
+    end_time = DateTimeField()
+    detectors = TextField()
+    status = CharField(max_length=255)
+    worker = CharField(max_length=255, null=True, blank=True)
+    lease_expiration_time = DateTimeField(null=True, blank=True)
+    attempt_count = IntegerField(default=0)
+
+    def __str__(self):
+        return (
+            f'Detection work unit {self.id} / job {self.job_id} / '
+            f'file {self.recording_file_id} / start {self.start_time} / '
+            f'end {self.end_time} / {self.status}')
+
+    class Meta:
+        db_table = 'vesper_detection_work_unit'
+        indexes = [
+            Index(
+                fields=('status', 'id'),
+                name='vesper_work_unit_queue_idx'),
+        ]
+
+
 # class RecordingJob(Model):
 #     
 #     recording = ForeignKey(
@@ -0,0 +1,5 @@
+from django import forms
+
+
+class OptimizeArchiveDatabaseForm(forms.Form):
+    pass
@@ -0,0 +1,177 @@
+"""
+Utility functions pertaining to database queries.
+
+The functions of this module perform queries of the form
+
+    SELECT ... WHERE <field> IN (<value>, <value>, ...)
+
+and analogous updates and deletes for arbitrarily long value lists,
+for example lists of clip IDs. They do so by splitting the value list
+into chunks and performing one query per chunk. This avoids exceeding
+database limits on the number of query parameters (the maximum number
+of host parameters in an SQLite query on Windows is somewhere between
+900 and 1000, and 900 seems to work) and keeps query plans efficient
+for very long lists.
+
+On database back ends other than SQLite, `filter_in` performs its
+chunk queries concurrently when it is not called within a transaction.
+Each concurrent query runs in a worker thread with its own database
+connection, so it cannot see the uncommitted changes of a transaction
+in the calling thread. That is why `filter_in` performs its queries in
+the calling thread within transactions.
+"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+
+from django.db import connection, connections
+
+
+DEFAULT_CHUNK_SIZE = 900
+"""Default number of values per query."""
+
+_MAX_QUERY_THREAD_COUNT = 4
+
+
+def get_chunks(items, chunk_size=DEFAULT_CHUNK_SIZE):
+
+    """
+    Generates consecutive chunks of the specified items.
+
+    Each chunk is a list of at most `chunk_size` items. The items can
+    be any iterable, including an iterator: this function holds only
+    one chunk of items in memory at a time.
+    """
+
+    items = iter(items)
+
+    while True:
+
+        chunk = list(itertools.islice(items, chunk_size))
+
+        if len(chunk) == 0:
+            return
+
+        yield chunk
+
+
+def filter_in(query_set, field_name, values, chunk_size=DEFAULT_CHUNK_SIZE):
+
+    """
+    Filters a query set by field values, one chunk of values at a time.
+
+    Parameters
+    ----------
+    query_set : QuerySet
+        the query set to filter. The query set may be a values query
+        set (i.e. it may have been created using the `values` or
+        `values_list` method), but must not be sliced.
+    field_name : str
+        the name of the field to filter on, e.g. "clip_id".
+    values : iterable
+        the field values to filter on.
+    chunk_size : int
+        the maximum number of values per query.
+
+    Returns
+    -------
+    list
+        the concatenated results of the chunk queries, with the results
+        of each query in the query set's order. Results from different
+        chunks are not ordered with respect to each other.
+    """
+
+    chunks = list(get_chunks(values, chunk_size))
+
+    def get_results(chunk):
+        return list(query_set.filter(**{f'{field_name}__in': chunk}))
+
+    if len(chunks) > 1 and _can_query_concurrently():
+
+        thread_count = min(len(chunks), _MAX_QUERY_THREAD_COUNT)
+
+        with ThreadPoolExecutor(
+                thread_count, thread_name_prefix='Vesper Query') as executor:
+
+            def get_results_and_close_connection(chunk):
+                try:
+                    return get_results(chunk)
+                finally:
+                    connections.close_all()
+
+            result_lists = list(
+                executor.map(get_results_and_close_connection, chunks))
+
+    else:
+        result_lists = [get_results(c) for c in chunks]
+
+    return list(itertools.chain.from_iterable(result_lists))
+
+
+def _can_query_concurrently():
+
+    # We don't query SQLite concurrently since the archive lock
+    # serializes SQLite database access anyway.
+    return connection.vendor != 'sqlite' and not connection.in_atomic_block
+
+
+def update_in(
+        query_set, field_name, values, chunk_size=DEFAULT_CHUNK_SIZE,
+        **kwargs):
+
+    """
+    Updates query set objects by field values, one chunk at a time.
+
+    The update is performed with one `query_set.filter(...).update(...)`
+    call per chunk of values, in the calling thread. `kwargs` are the
+    field values to update.
+
+    Returns the total number of objects updated.
+    """
+
+    return sum(
+        query_set.filter(**{f'{field_name}__in': chunk}).update(**kwargs)
+        for chunk in get_chunks(values, chunk_size))
+
+
+def delete_in(query_set, field_name, values, chunk_size=DEFAULT_CHUNK_SIZE):
+
+    """
+    Deletes query set objects by field values, one chunk at a time.
+
+    The deletion is performed with one `query_set.filter(...).delete()`
+    call per chunk of values, in the calling thread.
+
+    Returns the total number of objects deleted, including objects
+    deleted by cascades.
+    """
+
+    return sum(
+        query_set.filter(**{f'{field_name}__in': chunk}).delete()[0]
+        for chunk in get_chunks(values, chunk_size))
+
+
+def raw_delete_in(
+        query_set, field_name, values, chunk_size=DEFAULT_CHUNK_SIZE):
+
+    """
+    Deletes query set objects by field values with one SQL `DELETE`
+    statement per chunk of values, in the calling thread.
+
+    Unlike `delete_in`, this function does not load the objects to be
+    deleted or their dependent objects into memory, does not send
+    `pre_delete` or `post_delete` signals, and does not delete
+    dependent objects. The caller must delete any dependent objects
+    first.
+
+    Returns the total number of objects deleted.
+    """
+
+    return sum(
+        _raw_delete(query_set.filter(**{f'{field_name}__in': chunk}))
+        for chunk in get_chunks(values, chunk_size))
+
+
+def _raw_delete(query_set):
+    return query_set._raw_delete(query_set.db)
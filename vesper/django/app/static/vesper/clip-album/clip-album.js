@@ -4,6 +4,7 @@ import { DateTime, IANAZone }
 import { ArrayUtils } from '../util/array-utils.js';
 import { Clip, CLIP_LOAD_STATUS } from './clip.js';
 import { ClipAlbumUtils } from './clip-album-utils.js';
+import { ClipList } from './clip-list.js';
 import { CommandableDelegate, KeyboardInputInterpreter }
     from './keyboard-input-interpreter.js';
 import { Layout } from './layout.js';
@@ -319,7 +320,9 @@ export class ClipAlbum {
         
         this._readOnly = state.archiveReadOnly;
         this._clipFilter = state.clipFilter;
-        this._clips = state.clips.map(_parseClip);
+        this._clips = ClipList.decode(state.clips).map(_parseClip);
+        this._clipPager = state.clipPager ?? null;
+        this._nextClipsPromise = null;
         this._recordings = state.recordings.map(_parseRecording);
         this._solarEventTimes = _parseSolarEventTimes(state.solarEventTimes);
         this._timeZone = new IANAZone(state.timeZoneName);
@@ -372,6 +375,8 @@ export class ClipAlbum {
         
         this._initUrlAndHistory();
         
+        this._initPageNum(state.pageNum - 1);
+        
     }
     
     
@@ -529,16 +534,26 @@ export class ClipAlbum {
         
         if (this.numPages !== 0) {
             
-            // Set label to include page number range.
             const label = document.getElementById('go-to-page-modal-label');
-            label.textContent = `Page number (1 to ${this.numPages}):`;
-            
-            // Configure number input.
             const number = document.getElementById('go-to-page-modal-number');
             number.min = 1;
-            number.max = this.numPages;
             number.value = '';
             
+            if (this._allClipsLoaded) {
+                
+                // Set label to include page number range.
+                label.textContent = `Page number (1 to ${this.numPages}):`;
+                number.max = this.numPages;
+                
+            } else {
+                
+                // We don't know how many pages the album has until all
+                // of its clips are loaded.
+                label.textContent = 'Page number:';
+                number.removeAttribute('max');
+                
+            }
+            
         }
         
     }
@@ -816,7 +831,14 @@ export class ClipAlbum {
 
 
     async _handleAutoAdvancePage(pageNum) {
-        this.pageNum = pageNum;
+        
+        await this._loadClipsThroughPage(pageNum);
+        
+        if (pageNum < this.numPages)
+            this.pageNum = pageNum;
+        else
+            this._stopPageAutoAdvance();
+        
     }
 
 
@@ -835,13 +857,24 @@ export class ClipAlbum {
 
 
     async _handleAutoAdvanceClip(clipNum) {
-        this._selectClip(clipNum);
-        await this._clipViews[clipNum].playClip();
+        
+        await this._selectClip(clipNum);
+        
+        if (clipNum < this.clips.length)
+            await this._clipViews[clipNum].playClip();
+        else
+            this._stopClipAutoAdvance();
+        
     }
 
 
-    _selectClip(i) {
+    async _selectClip(i) {
 
+        await this._loadClipsThroughClip(i);
+        
+        if (i >= this.clips.length)
+            return;
+        
         const clipPageNum = this._layout.getClipPageNum(i);
 
         if (this.pageNum !== clipPageNum) {
@@ -951,9 +984,9 @@ export class ClipAlbum {
 
 	_getTitlePageText() {
 
-		const numClips = this.clips.length;
+		const numClips = this.clipCount;
 
-		if (numClips === 0) {
+		if (this.numPages === 0) {
 
 			return 'No Clips';
 
@@ -962,7 +995,11 @@ export class ClipAlbum {
 			const numPages = this.numPages;
 			const pageNum = this.pageNum;
 
-			const pageText = `Page ${pageNum + 1} of ${numPages}`;
+			// We don't know how many pages the album has until all of
+			// its clips are loaded.
+			const pageText = this._allClipsLoaded ?
+			    `Page ${pageNum + 1} of ${numPages}` :
+			    `Page ${pageNum + 1}`;
 
 			const [startNum, endNum] = this.getPageClipNumRange(pageNum);
 
@@ -1062,6 +1099,18 @@ export class ClipAlbum {
 	}
 
 
+    /**
+     * The number of clips of this album, including any that are not
+     * yet loaded.
+     */
+    get clipCount() {
+        if (this._allClipsLoaded)
+            return this.clips.length;
+        else
+            return Math.max(this._clipPager.clipCount, this.clips.length);
+    }
+
+
     get recordings() {
         return this._recordings;
     }
@@ -1520,7 +1569,8 @@ export class ClipAlbum {
 	}
 
 
-	_annotateAllClips(annotations) {
+	async _annotateAllClips(annotations) {
+		await this._loadAllClips();
 		this._annotateClips(this.clips, annotations);
 	}
 
@@ -1573,7 +1623,8 @@ export class ClipAlbum {
     }
 
 
-    _unannotateAllClips(annotationNames) {
+    async _unannotateAllClips(annotationNames) {
+        await this._loadAllClips();
         this._unannotateClips(this.clips, annotationNames);
     }
 
@@ -1639,7 +1690,8 @@ export class ClipAlbum {
     }
 
 
-    _tagAllClips(tags) {
+    async _tagAllClips(tags) {
+        await this._loadAllClips();
         this._tagClips(this.clips, tags);
     }
 
@@ -1692,7 +1744,8 @@ export class ClipAlbum {
     }
 
 
-    _untagAllClips(tags) {
+    async _untagAllClips(tags) {
+        await this._loadAllClips();
         this._untagClips(this.clips, tags);
     }
 
@@ -1718,8 +1771,23 @@ export class ClipAlbum {
 
 
 	set pageNum(pageNum) {
-        if (this._setPageNum(pageNum))
-            this._updateUrlAndHistory();
+	    
+	    if (this._isPageLoaded(pageNum)) {
+	        
+            if (this._setPageNum(pageNum))
+                this._updateUrlAndHistory();
+            
+            this._preloadClips();
+            
+        } else {
+            
+            // Load clips of page and then set page number.
+            this._loadClipsThroughPage(pageNum).then(
+                () => this.pageNum = pageNum,
+                error => window.alert(error.message));
+            
+        }
+        
 	}
 
 
@@ -1778,6 +1846,155 @@ export class ClipAlbum {
 	}
 	
 	
+    /*
+     * Clip album pages do not always include all of the clips of their
+     * albums, since there may be very many of them. When an album page
+     * includes only the first page of clips of its album, it also
+     * provides a clip pager from which the album gets later pages of
+     * clips from the server as they are needed, for example as the
+     * user moves to album pages whose clips are not yet loaded. Each
+     * loaded page of clips is appended to `this.clips`, and the album
+     * is repaginated.
+     *
+     * The last page of an album whose clips are not all loaded may be
+     * missing clips. We consider an album page loaded if and only if
+     * it is not the last page or all of the album's clips are loaded.
+     */
+
+
+    _initPageNum(pageNum) {
+        
+        if (this._isPageLoaded(pageNum)) {
+            
+            this._preloadClips();
+            
+        } else {
+            // initial page not loaded
+            
+            // Load clips of initial page, and then go to it.
+            this._loadClipsThroughPage(pageNum).then(() => {
+                this._setPageNum(pageNum);
+                window.history.replaceState(
+                    this._historyState, null, this._url);
+                this._preloadClips();
+            }, error => window.alert(error.message));
+            
+        }
+        
+    }
+    
+    
+    get _allClipsLoaded() {
+        return this._clipPager === null || this._clipPager.done;
+    }
+    
+    
+    _isPageLoaded(pageNum) {
+        return this._allClipsLoaded || pageNum < this.numPages - 1;
+    }
+    
+    
+    _isClipLoaded(clipNum) {
+        return this._allClipsLoaded ||
+            clipNum < this.clips.length &&
+            this._isPageLoaded(this.getClipPageNum(clipNum));
+    }
+    
+    
+    async _loadClipsThroughPage(pageNum) {
+        while (!this._isPageLoaded(pageNum))
+            await this._loadNextClips();
+    }
+    
+    
+    async _loadClipsThroughClip(clipNum) {
+        while (!this._isClipLoaded(clipNum))
+            await this._loadNextClips();
+    }
+    
+    
+    async _loadAllClips() {
+        while (!this._allClipsLoaded)
+            await this._loadNextClips();
+    }
+    
+    
+    /*
+     * Loads clips through the page following the current one in the
+     * background, so that moving to that page need not wait for them.
+     */
+    _preloadClips() {
+        this._loadClipsThroughPage(this.pageNum + 1).catch(
+            error => window.alert(error.message));
+    }
+    
+    
+    /*
+     * Loads the next page of clips from the server.
+     *
+     * Concurrent calls to this method share a single server request.
+     */
+    _loadNextClips() {
+        
+        if (this._nextClipsPromise === null)
+            this._nextClipsPromise = this._loadNextClipsAux().finally(
+                () => this._nextClipsPromise = null);
+            
+        return this._nextClipsPromise;
+        
+    }
+    
+    
+    async _loadNextClipsAux() {
+        
+        const clipInfos = await this._clipPager.getNextClips();
+        
+        const viewSettings = this.settings.clipView;
+        
+        for (const clipInfo of clipInfos) {
+            const clip = _parseClip(clipInfo, this.clips.length);
+            clip.view = new this.clipViewClass(this, clip, viewSettings);
+            this.clips.push(clip);
+            this._clipViews.push(clip.view);
+        }
+        
+        this._updatePagination();
+        
+    }
+    
+    
+    _updatePagination() {
+        
+        const pageNum = this.pageNum;
+        const oldRange = this.numPages !== 0 ?
+            this.getPageClipNumRange(pageNum) : null;
+        
+        this._layout = this._createLayout(this.settings);
+        this._clipManager = this._createClipManager();
+        
+        const newRange = this.numPages !== 0 ?
+            this.getPageClipNumRange(pageNum) : null;
+        
+        if (oldRange === null || newRange === null ||
+                !ArrayUtils.arraysEqual(oldRange, newRange)) {
+            // clips of current page changed
+            
+            // Set `this._pageNum` to `null` so setting page number
+            // again below triggers full page update.
+            this._pageNum = null;
+            this._setPageNum(pageNum);
+            
+        } else {
+            
+            this._clipManager.pageNum = pageNum;
+            this._updateTitle();
+            this._updateButtonStates();
+            
+        }
+        
+    }
+    
+    
 	onResize() {
 	    if (this._rugPlot !== null)
 		    this._rugPlot.onResize();
@@ -1847,7 +2064,13 @@ export class ClipAlbum {
             // page and clip auto advance are both stopped, clip album
             // is not empty, and current page is not final page
 
-            this._pageIterator.iterate(this.pageNum, this.numPages);
+            // We don't know how many pages the album has until all
+            // of its clips are loaded, so we iterate until
+            // `_handleAutoAdvancePage` finds there are no more pages.
+            const endPageNum =
+                this._allClipsLoaded ? this.numPages : Infinity;
+
+            this._pageIterator.iterate(this.pageNum, endPageNum);
 
         }
 
@@ -1901,7 +2124,7 @@ export class ClipAlbum {
             // is not empty
 
             const startClipNum = this._getAutoAdvanceStartClipNum();
-            const endClipNum = this.clips.length;
+            const endClipNum = this.clipCount;
             this._clipIterator.iterate(startClipNum, endClipNum);
 
         }
@@ -1991,9 +2214,8 @@ export class ClipAlbum {
 				if (this.pageNum != this.numPages - 1) {
 					// page is not last
 
-				    this.pageNum += 1;
-			        this.selectClip(i + 1);
-			        _scrollToTop();
+				    // This loads the clips of the next page if needed.
+				    this._selectClip(i + 1);
 
 				}
 
@@ -2480,9 +2702,12 @@ export class ClipAlbum {
 
 function _parseClip(clipInfo, clipNum) {
 
-    const [id, startIndex, length, sampleRate, isoStartTime] = clipInfo;
+    const [id, startIndex, length, sampleRate, startTime] = clipInfo;
 
-    const utcStartTime = DateTime.fromISO(isoStartTime);
+    // The start time is either an ISO 8601 string or, for clips from
+    // a binary clip list, a number of milliseconds since the epoch.
+    const utcStartTime = typeof startTime === 'number' ?
+        DateTime.fromMillis(startTime) : DateTime.fromISO(startTime);
 
     return new Clip(
         clipNum, id, startIndex, length, sampleRate, utcStartTime);
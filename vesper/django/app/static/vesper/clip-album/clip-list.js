@@ -0,0 +1,126 @@
+// Version of binary clip list format decoded by this module. See the
+// `vesper.django.app.clip_list_utils` Python module for a description
+// of the format.
+const _BINARY_FORMAT_VERSION = 1;
+
+const _BINARY_HEADER_SIZE = 8;
+const _BINARY_COLUMN_COUNT = 5;
+const _BINARY_VALUE_SIZE = 8;
+
+const _UNKNOWN_START_INDEX = -1;
+
+
+export class ClipList {
+
+
+    /**
+     * Decodes a clip list included in a clip album page.
+     *
+     * The clip list is either an array of clips, each represented as
+     * an array of the form [ID, start index, length, sample rate,
+     * ISO 8601 start time], or an object whose `format` property is
+     * "binary" and whose `data` property is a base64-encoded binary
+     * clip list.
+     *
+     * Returns an array of clips, each represented as an array of the
+     * form [ID, start index, length, sample rate, start time], where
+     * the start time is either an ISO 8601 string or a number of
+     * milliseconds since the UNIX epoch.
+     */
+    static decode(clipList) {
+
+        if (Array.isArray(clipList))
+            return clipList;
+
+        else if (clipList.format === 'binary')
+            return ClipList.decodeBase64(clipList.data);
+
+        else
+            throw new Error(
+                `Unrecognized clip list format "${clipList.format}".`);
+
+    }
+
+
+    /**
+     * Decodes a base64-encoded binary clip list.
+     */
+    static decodeBase64(data) {
+
+        const string = atob(data);
+        const bytes = new Uint8Array(string.length);
+
+        for (let i = 0; i < string.length; i++)
+            bytes[i] = string.charCodeAt(i);
+
+        return ClipList.decodeBinary(bytes.buffer);
+
+    }
+
+
+    /**
+     * Decodes a binary clip list.
+     *
+     * Returns an array of clips, each represented as an array of the
+     * form [ID, start index, length, sample rate, start time], where
+     * the start time is a number of milliseconds since the UNIX epoch.
+     */
+    static decodeBinary(buffer) {
+
+        if (buffer.byteLength < _BINARY_HEADER_SIZE)
+            throw new Error('Binary clip list is too short to have a header.');
+
+        const header = new DataView(buffer, 0, _BINARY_HEADER_SIZE);
+        const clipCount = header.getUint32(0, true);
+        const version = header.getUint32(4, true);
+
+        if (version !== _BINARY_FORMAT_VERSION)
+            throw new Error(
+                `Unsupported binary clip list format version ${version}.`);
+
+        const columnSize = clipCount * _BINARY_VALUE_SIZE;
+        const expectedSize =
+            _BINARY_HEADER_SIZE + _BINARY_COLUMN_COUNT * columnSize;
+
+        if (buffer.byteLength !== expectedSize)
+            throw new Error(
+                `Binary clip list has size ${buffer.byteLength} bytes ` +
+                `rather than expected ${expectedSize} bytes.`);
+
+        // The columns of a binary clip list are aligned for typed
+        // arrays since the header size is a multiple of the value size.
+        // Typed arrays use platform byte order, which is little-endian
+        // for all platforms on which browsers run in practice.
+        const getColumn = (i, ArrayType) => new ArrayType(
+            buffer, _BINARY_HEADER_SIZE + i * columnSize, clipCount);
+
+        const ids = getColumn(0, BigInt64Array);
+        const startIndices = getColumn(1, BigInt64Array);
+        const lengths = getColumn(2, BigInt64Array);
+        const sampleRates = getColumn(3, Float64Array);
+        const startTimes = getColumn(4, BigInt64Array);
+
+        const clips = new Array(clipCount);
+
+        for (let i = 0; i < clipCount; i++) {
+
+            let startIndex = Number(startIndices[i]);
+            if (startIndex === _UNKNOWN_START_INDEX)
+                startIndex = null;
+
+            clips[i] = [
+                Number(ids[i]),
+                startIndex,
+                Number(lengths[i]),
+                sampleRates[i],
+                Number(startTimes[i])
+            ];
+
+        }
+
+        return clips;
+
+    }
+
+
+}
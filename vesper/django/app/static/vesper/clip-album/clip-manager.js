@@ -50,6 +50,14 @@ const _MAX_CLIP_SAMPLES_BATCH_SIZE = 200;
 // last batch.
 const _MAX_CLIP_METADATA_BATCH_SIZE = 200;
 
+// Encoding in which to request clip audio from the server, either
+// "wave", "flac", or "delta-zlib". WAVE and FLAC audio are decoded by
+// `decodeAudioData`. "delta-zlib" audio is zlib-compressed first
+// differences of 16-bit samples, which we decode ourselves (see the
+// `vesper.util.clip_audio_encoder` Python module). FLAC audio is
+// typically about half the size of WAVE audio.
+const _CLIP_AUDIO_ENCODING = 'flac';
+
 // Set this `true` to randomly simulate load errors for both clip batches
 // and individual clips.
 //
@@ -600,9 +608,8 @@ class _ClipLoader {
 
             try {
 
-                const result = await this._fetchClipBatchAudios(clips);
-                const arrayBuffer = await result.arrayBuffer();
-                return this._decodeClipBatchAudios(clips, arrayBuffer);
+                const response = await this._fetchClipBatchAudios(clips);
+                return this._decodeClipBatchAudios(clips, response);
 
             } catch (error) {
 
@@ -658,51 +665,63 @@ class _ClipLoader {
             },
             method: 'POST',
             body: JSON.stringify({
-                'clip_ids': clipIds
+                'clip_ids': clipIds,
+                'encoding': _CLIP_AUDIO_ENCODING
             })
         });
 
     }
 
 
-    async _decodeClipBatchAudios(clips, arrayBuffer) {
+    async _decodeClipBatchAudios(clips, response) {
 
 
-        // Get array of clip audios from buffer. Audios are stored one
-        // after the other, with each prefixed with its size in bytes
-        // in a 32-bit little-endian integer.
+        // The response body contains clip audios one after the other,
+        // with each prefixed with its size in bytes in a 32-bit
+        // little-endian integer. The server streams the body, so we
+        // read it incrementally and start decoding each audio as soon
+        // as it has arrived, rather than waiting for the entire body.
 
-        const audios = [];
-        const dataView = new DataView(arrayBuffer);
-        let offset = 0;
+        const reader = response.body.getReader();
+        const promises = [];
+        let buffer = new Uint8Array(0);
+        let i = 0;
 
-        while (offset < arrayBuffer.byteLength) {
+        while (true) {
 
-            // Get audio size, a 32-bit little-endian integer.
-            const size = dataView.getUint32(offset, true);
-            offset += 4;
+            const { done, value } = await reader.read();
 
-            // Get audio.
-            //
-            // Note that the ArrayBuffer.prototype.slice method
-            // copies a specified portion of an existing ArrayBuffer
-            // into a new ArrayBuffer. There does not appear to be
-            // a way to create a new ArrayBuffer that is just a view
-            // of a portion of an existing ArrayBuffer, i.e. without
-            // copying the contents of the new ArrayBuffer.
-            const audio = arrayBuffer.slice(offset, offset + size);
-            offset += size;
+            if (done)
+                break;
 
-            audios.push(audio);
+            buffer = _concatenateByteArrays(buffer, value);
 
-        }
+            let offset = 0;
 
+            while (buffer.length - offset >= 4) {
+
+                // Get audio size, a 32-bit little-endian integer.
+                const dataView = new DataView(
+                    buffer.buffer, buffer.byteOffset + offset, 4);
+                const size = dataView.getUint32(0, true);
+
+                if (buffer.length - offset - 4 < size)
+                    // don't yet have all of audio
+
+                    break;
+
+                // Get audio. We copy the audio into its own
+                // `ArrayBuffer` since `decodeAudioData` requires one.
+                const start = offset + 4;
+                const audio = buffer.slice(start, start + size).buffer;
+                offset = start + size;
+
+                promises.push(this._decodeClipAudio(clips[i++], audio));
+
+            }
+
+            buffer = buffer.slice(offset);
 
-        // Get promises for individual clip audio decodes.
-        const promises = [];
-        for (let i = 0; i < audios.length; i++) {
-            const promise = this._decodeClipAudio(clips[i], audios[i]);
-            promises.push(promise);
         }
 
         return Promise.all(promises);
@@ -716,6 +735,13 @@ class _ClipLoader {
 
         try {
 
+            if (_CLIP_AUDIO_ENCODING === 'delta-zlib') {
+                const audioBuffer =
+                    await _decodeDeltaZlibAudio(context, arrayBuffer);
+                this._setClipSamples(clip, audioBuffer);
+                return;
+            }
+
             // As of October, 2018, Safari does not support the
             // single-argument promises version of `decodeAudioData` used
             // here. Instead, it supports only an older, three-argument,
@@ -1059,3 +1085,48 @@ class _ClipLoader {
 
 
 }
+
+
+function _concatenateByteArrays(a, b) {
+    if (a.length === 0)
+        return b;
+    const result = new Uint8Array(a.length + b.length);
+    result.set(a, 0);
+    result.set(b, a.length);
+    return result;
+}
+
+
+// Decodes "delta-zlib" clip audio. See the `vesper.util.clip_audio_encoder`
+// Python module for a description of the encoding.
+async function _decodeDeltaZlibAudio(context, arrayBuffer) {
+
+    const header = new DataView(arrayBuffer, 0, 8);
+    const sampleRate = header.getUint32(0, true);
+    const length = header.getUint32(4, true);
+
+    // Decompress sample differences.
+    const compressed = new Blob([arrayBuffer.slice(8)]);
+    const stream =
+        compressed.stream().pipeThrough(new DecompressionStream('deflate'));
+    const bytes = await new Response(stream).arrayBuffer();
+    const deltas = new Int16Array(bytes);
+
+    if (deltas.length !== length)
+        throw Error(
+            `Decoded clip audio has ${deltas.length} samples rather ` +
+            `than expected ${length}.`);
+
+    // Accumulate differences with 16-bit wraparound and scale samples
+    // to [-1, 1) as `decodeAudioData` does.
+    const audioBuffer = context.createBuffer(1, Math.max(length, 1), sampleRate);
+    const samples = audioBuffer.getChannelData(0);
+    let sample = 0;
+    for (let i = 0; i < length; i++) {
+        sample = ((sample + deltas[i]) << 16) >> 16;
+        samples[i] = sample / 32768;
+    }
+
+    return audioBuffer;
+
+}
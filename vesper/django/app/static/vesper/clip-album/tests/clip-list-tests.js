@@ -0,0 +1,50 @@
+import { ClipList } from '../clip-list.js';
+
+
+describe('ClipList', () => {
+
+
+    // Binary clip list of two clips encoded by the `clip_list_utils`
+    // Python module. The first clip has ID 1, unknown start index,
+    // length 100, sample rate 24000, and start time
+    // 2020-09-16T01:23:45.678Z. The second clip has ID 2 ** 40, start
+    // index 5, length 200, sample rate 22050, and the same start time.
+    const binaryData =
+        'AgAAAAEAAAABAAAAAAAAAAAAAAAAAQAA//////////8FAAAAAAAAAGQAAAAAAAAA' +
+        'yAAAAAAAAAAAAAAAAHDXQAAAAACAiNVAjquClHQBAACOq4KUdAEAAA==';
+
+    const startTime = Date.parse('2020-09-16T01:23:45.678Z');
+
+    const expectedClips = [
+        [1, null, 100, 24000, startTime],
+        [2 ** 40, 5, 200, 22050, startTime]
+    ];
+
+
+    it('decode binary', () => {
+        const clips = ClipList.decode({format: 'binary', data: binaryData});
+        expect(clips).toEqual(expectedClips);
+    });
+
+
+    it('decode JSON', () => {
+        const clipList = [[1, 0, 100, 24000, '2020-09-16T01:23:45.678Z']];
+        expect(ClipList.decode(clipList)).toBe(clipList);
+    });
+
+
+    it('decode errors', () => {
+
+        const cases = [
+            {format: 'bobo', data: ''},
+            {format: 'binary', data: ''},
+            {format: 'binary', data: binaryData.slice(0, 8)},
+        ];
+
+        for (const clipList of cases)
+            expect(() => ClipList.decode(clipList)).toThrowError();
+
+    });
+
+
+});
@@ -1,4 +1,10 @@
 import { ClipAlbum } from '../clip-album/clip-album.js';
+import { ClipList } from '../clip-album/clip-list.js';
+
+
+// Maximum number of clips to get from the server per request when the
+// clips of an album are not included in the album's page.
+const _CLIP_PAGE_LIMIT = 10000;
 
 
 // Module-level state, set via `init` function.
@@ -20,11 +26,109 @@ export function init(state_) {
 let clipAlbum = null;
 
 
-function onLoad() {
+async function onLoad() {
+
+    // The clip album page does not include the clips of the album,
+    // since there may be very many of them. Instead we get the first
+    // page of clips from the server here, and the clip album gets
+    // later pages from the server as they are needed. The night page
+    // includes its clips.
+    if (state.clips === null) {
+        const clipPager = new _ClipPager();
+        state.clips = await clipPager.getNextClips();
+        state.clipPager = clipPager;
+    }
+
     clipAlbum = new ClipAlbum(state);
+
 }
 
 
 function onResize() {
-    clipAlbum.onResize();
+    if (clipAlbum !== null)
+        clipAlbum.onResize();
+}
+
+
+/*
+ * Gets the clips of this page's clip album from the server, one page
+ * of clips at a time.
+ *
+ * The server pages clips by start time and ID, returning with each
+ * page a cursor that we send back to it to get the next page. We get
+ * the pages as binary clip lists, which are much smaller and faster
+ * to decode than JSON ones.
+ */
+class _ClipPager {
+
+
+    constructor() {
+
+        // The clip filter parameters of the clip album URL are also
+        // those of the `get-clips` URL.
+        this._params = new URLSearchParams(window.location.search);
+        this._params.set('limit', _CLIP_PAGE_LIMIT);
+        this._params.set('format', 'binary');
+
+        this._clipCount = null;
+        this._cursor = null;
+        this._done = false;
+
+    }
+
+
+    /**
+     * The total number of clips of the album, or `null` if no page
+     * of clips has been gotten yet.
+     */
+    get clipCount() {
+        return this._clipCount;
+    }
+
+
+    /**
+     * `true` if and only if all pages of clips have been gotten.
+     */
+    get done() {
+        return this._done;
+    }
+
+
+    /**
+     * Gets the next page of clips.
+     *
+     * Returns an array of clips as decoded by `ClipList.decodeBinary`,
+     * or an empty array if all pages of clips have been gotten.
+     */
+    async getNextClips() {
+
+        if (this._done)
+            return [];
+
+        if (this._cursor !== null)
+            this._params.set('cursor', this._cursor);
+
+        const response = await _fetch(`get-clips/?${this._params}`);
+
+        if (!response.ok)
+            throw new Error(
+                `Could not get clips from server. Server response ` +
+                `was "${response.status} ${response.statusText}".`);
+
+        // A binary clip page includes its clip count (first page only)
+        // and next cursor (all pages but the last) in response headers.
+        if (this._clipCount === null)
+            this._clipCount =
+                Number(response.headers.get('Vesper-Clip-Count'));
+
+        this._cursor = response.headers.get('Vesper-Next-Cursor');
+        this._done = this._cursor === null;
+
+        const buffer = await response.arrayBuffer();
+
+        return ClipList.decodeBinary(buffer);
+
+    }
+
+
 }
@@ -0,0 +1,85 @@
+from vesper.command.annotator import Annotator
+from vesper.django.app.models import (
+    AnnotationInfo, StringAnnotation, StringAnnotationEdit)
+from vesper.django.app.tests.dtest_case import TestCase
+import vesper.command.annotator as annotator_module
+import vesper.django.app.model_utils as model_utils
+
+
+class AnnotatorTests(TestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+
+        self._clips = self._create_test_clips(5)
+
+        self._classification = \
+            AnnotationInfo.objects.get(name='Classification')
+        self._score = AnnotationInfo.objects.get(name='Detector Score')
+
+        self._annotator = Annotator(self._classification)
+
+
+    def test_buffered_annotations(self):
+
+        annotator = self._annotator
+        clips = self._clips
+
+        annotator._buffer_annotation(clips[0], 'Call')
+        annotator._buffer_annotation(clips[1], 'Noise')
+        annotator._buffer_annotation(clips[2], 'Call')
+        annotator._buffer_annotation(clips[3], '50', self._score)
+
+        # Annotate a clip twice. Only the second value should be written.
+        annotator._buffer_annotation(clips[1], 'Call')
+
+        # Nothing should be written until annotations are flushed.
+        self.assertEqual(StringAnnotation.objects.count(), 0)
+
+        annotator.end_annotations()
+
+        self._assert_annotations(
+            self._classification, ['Call', 'Call', 'Call', None, None])
+        self._assert_annotations(self._score, [None, None, None, '50', None])
+        self.assertEqual(StringAnnotationEdit.objects.count(), 4)
+
+        # Flushing again should do nothing.
+        annotator._flush_annotations()
+        self.assertEqual(StringAnnotationEdit.objects.count(), 4)
+
+
+    def test_full_buffer_flush(self):
+
+        original_count = annotator_module._MAX_BUFFERED_ANNOTATION_COUNT
+        annotator_module._MAX_BUFFERED_ANNOTATION_COUNT = 2
+
+        try:
+
+            annotator = self._annotator
+            clips = self._clips
+
+            annotator._buffer_annotation(clips[0], 'Call')
+            self.assertEqual(StringAnnotation.objects.count(), 0)
+
+            annotator._buffer_annotation(clips[1], 'Noise')
+            self.assertEqual(StringAnnotation.objects.count(), 2)
+
+            annotator._buffer_annotation(clips[2], 'Noise')
+            self.assertEqual(StringAnnotation.objects.count(), 2)
+
+            annotator._flush_annotations()
+
+            self._assert_annotations(
+                self._classification, ['Call', 'Noise', 'Noise', None, None])
+
+        finally:
+            annotator_module._MAX_BUFFERED_ANNOTATION_COUNT = original_count
+
+
+    def _assert_annotations(self, annotation_info, expected_values):
+        for clip, expected_value in zip(self._clips, expected_values):
+            value = model_utils.get_clip_annotation_value(
+                clip, annotation_info)
+            self.assertEqual(value, expected_value)
@@ -1,8 +1,12 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from vesper.django.app.archive import Archive
-from vesper.django.app.models import Processor
+from vesper.django.app.models import AnnotationInfo, Processor
 from vesper.django.app.tests.dtest_case import TestCase
 from vesper.singleton.preference_manager import preference_manager
 import vesper.django.app.metadata_import_utils as metadata_import_utils
+import vesper.util.time_utils as time_utils
 import vesper.util.yaml_utils as yaml_utils
 
 
@@ -148,14 +152,38 @@ class ArchiveTests(TestCase):
             self.assertEqual(ui_name, expected_ui_name)
             
             
-    # Commented this out after recent workaround to processor caching
-    # problem effectively disabled caching.
-    # def test_get_processor_ui_name_errors(self):
-    #     self._archive.refresh_processor_cache()
-    #     processor = Processor.objects.create(name='Bobo', type='Detector')
-    #     self.assert_raises(
-    #         ValueError, self._archive.get_processor_ui_name, processor)
-    #     processor.delete()
+    def test_processor_cache_versioning(self):
+        
+        # Populate cache.
+        self._archive.get_processor('Tseep Detector')
+        
+        # Cache should not be rebuilt if processors have not changed.
+        with CaptureQueriesContext(connection) as context:
+            self._archive.get_processor('Tseep Detector')
+        self.assertEqual(len(context.captured_queries), 1)
+        
+        # Cache should be rebuilt after processor is created...
+        processor = Processor.objects.create(name='Bobo', type='Detector')
+        self.assertEqual(self._archive.get_processor('Bobo'), processor)
+        
+        # ...and after processor is deleted.
+        processor.delete()
+        self.assert_raises(ValueError, self._archive.get_processor, 'Bobo')
+        
+        
+    def test_string_annotation_values_cache_versioning(self):
+        
+        self._archive.get_string_annotation_values('Classification')
+        
+        with CaptureQueriesContext(connection) as context:
+            self._archive.get_string_annotation_values('Classification')
+        self.assertEqual(len(context.captured_queries), 1)
+        
+        AnnotationInfo.objects.create(
+            name='Bobo', type='String',
+            creation_time=time_utils.get_utc_now())
+        values = self._archive.get_string_annotation_values('Bobo')
+        self.assertEqual(values, ())
         
         
     def test_string_annotation_value_constants(self):
@@ -1,11 +1,18 @@
-"""Module containing Django unit test test case superclass."""
+"""Module containing Django unit test test case superclasses."""
 
 
+from datetime import datetime as DateTime, timedelta as TimeDelta
+
 from django.contrib.auth.models import User
 import django
 
+from vesper.django.app.models import (
+    Clip, DeviceOutput, Processor, Recording, RecordingChannel, Station,
+    StationDevice)
 from vesper.tests.test_case_mixin import TestCaseMixin
+import vesper.django.app.clip_count_utils as clip_count_utils
 import vesper.django.app.metadata_import_utils as metadata_import_utils
+import vesper.util.time_utils as time_utils
 import vesper.util.yaml_utils as yaml_utils
 
 
@@ -197,7 +204,7 @@ _TEST_USER_NAME = 'Test'
 _TEST_USER_PASSWORD = 'test'
 
 
-class TestCase(django.test.TestCase, TestCaseMixin):
+class _TestCaseMixin(TestCaseMixin):
 
 
     def _create_test_user(self):
@@ -227,6 +234,78 @@ class TestCase(django.test.TestCase, TestCaseMixin):
         metadata_import_utils.import_metadata(model_data)
 
 
+    def _create_test_clips(
+            self, clip_count, station_name='Station 0',
+            detector_name='Old Bird Tseep Detector Redux 1.1',
+            start_time=DateTime(2050, 5, 2, 2), sample_rate=24000):
+
+        """
+        Creates test clips in a new one-hour recording.
+
+        The shared test models must already exist. The recording starts
+        at the specified local start time, and the clips are one second
+        long and one second apart in the first channel of the recording.
+        """
+
+        station = Station.objects.get(name=station_name)
+        detector = Processor.objects.get(name=detector_name)
+        creation_time = time_utils.get_utc_now()
+
+        recorder = StationDevice.objects.get(
+            station=station, device__model__type='Audio Recorder').device
+
+        mic = StationDevice.objects.filter(
+            station=station, device__model__type='Microphone'). \
+            order_by('device__name')[0].device
+        mic_output = DeviceOutput.objects.get(device=mic)
+
+        start_time = station.local_to_utc(start_time)
+        duration = 3600
+
+        recording = Recording.objects.create(
+            station=station,
+            recorder=recorder,
+            num_channels=1,
+            length=duration * sample_rate,
+            sample_rate=sample_rate,
+            start_time=start_time,
+            end_time=start_time + TimeDelta(seconds=duration),
+            creation_time=creation_time)
+
+        channel = RecordingChannel.objects.create(
+            recording=recording,
+            channel_num=0,
+            recorder_channel_num=0,
+            mic_output=mic_output)
+
+        date = station.get_night(start_time)
+
+        clips = []
+
+        for i in range(clip_count):
+
+            clip_start_time = start_time + TimeDelta(seconds=2 * i)
+
+            clips.append(Clip(
+                station=station,
+                mic_output=mic_output,
+                recording_channel=channel,
+                start_index=2 * i * sample_rate,
+                length=sample_rate,
+                sample_rate=sample_rate,
+                start_time=clip_start_time,
+                end_time=clip_start_time + TimeDelta(seconds=1),
+                date=date,
+                creation_time=creation_time,
+                creating_processor=detector))
+
+        clips = Clip.objects.bulk_create(clips)
+
+        clip_count_utils.increment_clip_counts([c.id for c in clips])
+
+        return clips
+
+
     def _assert_model_attributes(
             self, model_class, expected_attributes,
             key_attribute_names=['name'],
@@ -248,3 +327,18 @@ class TestCase(django.test.TestCase, TestCaseMixin):
         for name, value in expected_attributes.items():
             if name not in excluded_attribute_names:
                 self.assertEqual(getattr(model, name), value)
+
+
+class TestCase(django.test.TestCase, _TestCaseMixin):
+    pass
+
+
+class TransactionTestCase(django.test.TransactionTestCase, _TestCaseMixin):
+    
+    """
+    Test case for tests that commit transactions.
+    
+    Use this rather than `TestCase` for tests that access the archive
+    database from multiple threads, since `TestCase` runs each test in
+    a transaction that is invisible to other threads' connections.
+    """
@@ -0,0 +1,125 @@
+import itertools
+
+from vesper.django.app.models import (
+    AnnotationInfo, Clip, ClipCount, Processor, Tag, TagInfo)
+from vesper.django.app.tests.dtest_case import TestCase
+import vesper.django.app.clip_count_utils as clip_count_utils
+import vesper.django.app.model_utils as model_utils
+
+
+_ANNOTATION_NAMES = (None, 'Classification')
+_ANNOTATION_VALUES = (None, 'Call.AMRE', 'Call.WIWA', 'Call*', '*', 'Noise')
+_TAG_NAMES = (None, 'Review')
+
+
+class ClipCountUtilsTests(TestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+
+        self._clips = self._create_test_clips(6)
+        self._clip_ids = [c.id for c in self._clips]
+
+        self._classification = \
+            AnnotationInfo.objects.get(name='Classification')
+        self._review = TagInfo.objects.get(name='Review')
+
+
+    def test_counts(self):
+
+        self._assert_counts()
+
+        # Annotate clips.
+        ids = self._clip_ids
+        self._annotate(ids[:3], 'Call.AMRE')
+        self._annotate(ids[3:4], 'Call.WIWA')
+        self._annotate(ids[4:5], 'Noise')
+        self._assert_counts()
+
+        # Tag clips.
+        model_utils.tag_clips(ids[1:5], self._review)
+        self._assert_counts()
+
+        # Change annotation values, including to the same value.
+        self._annotate(ids[:2], 'Noise')
+        self._annotate(ids[4:6], 'Noise')
+        self._assert_counts()
+
+        # Delete tags of annotated clips, decrementing counts afterwards.
+        Tag.objects.filter(clip_id__in=ids[1:3]).delete()
+        clip_count_utils.decrement_deleted_tag_clip_counts(
+            ids[1:3], self._review)
+        self._assert_counts()
+
+        # Unannotate and untag clips.
+        model_utils.unannotate_clips(ids[1:4], self._classification)
+        model_utils.untag_clips(ids[3:], self._review)
+        self._assert_counts()
+
+        # Delete clips.
+        clip_count_utils.decrement_clip_counts(ids[:2])
+        Clip.objects.filter(id__in=ids[:2]).delete()
+        self._assert_counts()
+
+        # Delete all clips.
+        clip_count_utils.decrement_clip_counts(ids[2:])
+        Clip.objects.filter(id__in=ids[2:]).delete()
+        self._assert_counts()
+        self.assertEqual(ClipCount.objects.count(), 0)
+
+
+    def _annotate(self, clip_ids, value):
+        model_utils.annotate_clips(clip_ids, self._classification, value)
+
+
+    def _assert_counts(self):
+
+        clip = self._clips[0]
+        station = clip.station
+        mic_output = clip.mic_output
+        detector = clip.creating_processor
+
+        # Compare counts from clip count table to counts obtained by
+        # counting clips.
+        for annotation_name, annotation_value, tag_name in itertools.product(
+                _ANNOTATION_NAMES, _ANNOTATION_VALUES, _TAG_NAMES):
+
+            clips = model_utils.get_clips(
+                station=station,
+                mic_output=mic_output,
+                detector=detector,
+                annotation_name=annotation_name,
+                annotation_value=annotation_value,
+                tag_name=tag_name,
+                order=False)
+
+            count = clips.count()
+            expected = {} if count == 0 else {clip.date: count}
+
+            counts = clip_count_utils.get_clip_counts(
+                station, mic_output, detector, annotation_name,
+                annotation_value, tag_name)
+
+            self.assertEqual(counts, expected)
+
+        # Check that there are no counts for other detectors.
+        other_detector = Processor.objects.get(
+            name='Old Bird Thrush Detector Redux 1.1')
+        counts = clip_count_utils.get_clip_counts(
+            station, mic_output, other_detector)
+        self.assertEqual(counts, {})
+
+        # Check that rebuilding counts does not change them.
+        counts = _get_clip_count_table_contents()
+        clip_count_utils.rebuild_clip_counts()
+        self.assertEqual(_get_clip_count_table_contents(), counts)
+
+
+def _get_clip_count_table_contents():
+    return sorted(
+        ClipCount.objects.values_list(
+            'station', 'mic_output', 'detector', 'date', 'annotation_info',
+            'annotation_value', 'tag_info', 'count'),
+        key=str)
@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from vesper.django.app.clip_iterator import ClipIterator
+from vesper.django.app.models import Clip
+from vesper.django.app.tests.dtest_case import TestCase
+
+
+class ClipIteratorTests(TestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+
+        # Create clips of two stations with the same start times, so
+        # that some clips have the same start time.
+        self._create_test_clips(4)
+        self._create_test_clips(
+            3, station_name='Station 1',
+            detector_name='Old Bird Thrush Detector Redux 1.1')
+
+        self._clips = list(Clip.objects.order_by('start_time', 'id'))
+
+
+    def test_iteration(self):
+
+        clips = Clip.objects.order_by('-id')
+
+        for page_size in (1, 2, 3, 7, 10):
+
+            iterator = ClipIterator(clips, page_size=page_size)
+            self.assertEqual(list(iterator), self._clips)
+
+            pages = list(iterator.pages())
+            expected = [
+                self._clips[i:i + page_size]
+                for i in range(0, len(self._clips), page_size)]
+            self.assertEqual(pages, expected)
+
+
+    def test_page_callback(self):
+
+        pages = []
+        iterator = ClipIterator(
+            Clip.objects.all(), page_size=3, page_callback=pages.append)
+
+        self.assertEqual(list(iterator), self._clips)
+        self.assertEqual(
+            pages, [self._clips[:3], self._clips[3:6], self._clips[6:]])
+
+
+    def test_related_fields(self):
+
+        iterator = ClipIterator(
+            Clip.objects.all(),
+            ('station', 'mic_output__device', 'creating_processor'),
+            page_size=3)
+
+        with CaptureQueriesContext(connection) as context:
+
+            for clip in iterator:
+                clip.station.name
+                clip.mic_output.device.name
+                clip.creating_processor.name
+
+        # We expect one query per page, plus one query per related
+        # field for the first page. The iterator reuses the related
+        # objects of the first page for later pages.
+        self.assertEqual(len(context), 3 + 4)
+
+
+    def test_modification_during_iteration(self):
+
+        clips = Clip.objects.only('id', 'start_time')
+        deleted_ids = []
+
+        for page in ClipIterator(clips, page_size=2).pages():
+            ids = [c.id for c in page]
+            Clip.objects.filter(id__in=ids).delete()
+            deleted_ids += ids
+
+        self.assertEqual(deleted_ids, [c.id for c in self._clips])
+        self.assertEqual(Clip.objects.count(), 0)
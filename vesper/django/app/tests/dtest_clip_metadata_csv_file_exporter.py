@@ -0,0 +1,109 @@
+from datetime import datetime as DateTime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from vesper.django.app.models import (
+    AnnotationInfo, Clip, RecordingFile, TagInfo)
+from vesper.django.app.tests.dtest_case import TestCase
+from vesper.util.clip_manager import ClipManager
+import vesper.command.clip_metadata_csv_file_exporter as exporter
+import vesper.django.app.model_utils as model_utils
+
+
+class ClipMetadataCsvFileExporterTests(TestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+
+        clips = \
+            self._create_test_clips(4) + \
+            self._create_test_clips(2, start_time=DateTime(2050, 5, 2, 4))
+
+        # Give each recording two files.
+        for clip in (clips[0], clips[-1]):
+            recording = clip.recording
+            length = recording.length // 2
+            for i in range(2):
+                RecordingFile.objects.create(
+                    recording=recording, file_num=i, start_index=i * length,
+                    length=length, path=f'{recording.id}_{i}.wav')
+
+        ids = [c.id for c in clips]
+        classification = AnnotationInfo.objects.get(name='Classification')
+        model_utils.annotate_clips(ids[:3], classification, 'Call')
+        model_utils.annotate_clips(ids[4:5], classification, 'Noise')
+        model_utils.tag_clips(ids[1:3], TagInfo.objects.get(name='Review'))
+
+        self._clips = self._get_clips()
+
+
+    def _get_clips(self):
+        related_fields = \
+            exporter.ClipMetadataCsvFileExporter \
+            .clip_query_set_select_related_args
+        clips = Clip.objects.select_related(*related_fields)
+        return list(clips.order_by('start_time'))
+
+
+    def test_measure_batch(self):
+
+        cases = (
+            (exporter.AnnotationValueMeasurement(
+                {'annotation_name': 'Classification'}),
+             ['Call', 'Call', 'Call', None, 'Noise', None]),
+            (exporter.TagStatusMeasurement({'tag_name': 'Review'}),
+             [False, True, True, False, False, False]),
+            (exporter.IdMeasurement(), [c.id for c in self._clips]),
+        )
+
+        for measurement, expected in cases:
+
+            with CaptureQueriesContext(connection) as context:
+                values = measurement.measure_batch(self._clips)
+
+            self.assertEqual(values, expected)
+            self.assertLessEqual(len(context.captured_queries), 1)
+
+            # Measuring clips one at a time should yield the same values.
+            values = [measurement.measure(c) for c in self._clips]
+            self.assertEqual(values, expected)
+
+
+    def test_recent_clip_count_measure_batch(self):
+
+        def create_measurement():
+            return exporter.RecentClipCountMeasurement(
+                {'count_window_size': 3})
+
+        measurement = create_measurement()
+        with CaptureQueriesContext(connection) as context:
+            values = measurement.measure_batch(self._clips)
+        self.assertEqual(values, [1, 2, 2, None, 1, None])
+        self.assertEqual(len(context.captured_queries), 1)
+
+        measurement = create_measurement()
+        self.assertEqual([measurement.measure(c) for c in self._clips], values)
+
+
+    def test_cache_recording_file_info(self):
+
+        manager = ClipManager()
+
+        with CaptureQueriesContext(connection) as context:
+            manager.cache_recording_file_info(self._clips)
+        self.assertEqual(len(context.captured_queries), 2)
+
+        # Getting recording file info for clips should now require no
+        # queries.
+        with CaptureQueriesContext(connection) as context:
+            infos = [manager.get_recording_file_info(c) for c in self._clips]
+        self.assertEqual(len(context.captured_queries), 0)
+
+        for clip, (files, channel_num, _, _) in zip(self._clips, infos):
+            recording = clip.recording
+            self.assertEqual(
+                [f.path for f in files], [f'{recording.id}_0.wav'])
+            self.assertEqual(channel_num, 0)
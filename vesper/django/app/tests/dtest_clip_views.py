@@ -0,0 +1,215 @@
+from urllib.parse import urlencode
+import json
+
+from vesper.django.app.models import (
+    AnnotationInfo, StringAnnotation, Tag, TagInfo)
+from vesper.django.app.tests.dtest_case import TestCase
+from vesper.singleton.archive import archive
+from vesper.singleton.clip_manager import clip_manager
+from vesper.util.bunch import Bunch
+from vesper.util.latency_histogram import LatencyHistogram
+import vesper.django.app.clip_list_utils as clip_list_utils
+import vesper.django.app.model_utils as model_utils
+import vesper.django.app.views as views
+import vesper.util.time_utils as time_utils
+
+
+class ClipViewsTests(TestCase):
+
+
+    def setUp(self):
+        self._create_shared_test_models()
+        self._clips = self._create_test_clips(5)
+
+
+    def _post_json(self, url, content):
+        return self.client.post(
+            url, json.dumps(content), content_type='application/json')
+
+
+    def test_get_clip_metadata(self):
+
+        creation_time = time_utils.get_utc_now()
+        classification = AnnotationInfo.objects.get(name='Classification')
+        score = AnnotationInfo.objects.get(name='Detector Score')
+        review = TagInfo.objects.get(name='Review')
+
+        c0, c1, _, c3, _ = self._clips
+
+        for clip, info, value in (
+                (c0, classification, 'Call'),
+                (c0, score, '50'),
+                (c3, classification, 'Noise')):
+            StringAnnotation.objects.create(
+                clip=clip, info=info, value=value,
+                creation_time=creation_time)
+
+        for clip in (c1, c3):
+            Tag.objects.create(
+                clip=clip, info=review, creation_time=creation_time)
+
+        # Request metadata in an order other than clip creation order,
+        # with a chunk size smaller than the number of clips.
+        clip_ids = [c.id for c in reversed(self._clips)]
+
+        saved_chunk_size = views._CLIP_METADATA_CHUNK_SIZE
+        views._CLIP_METADATA_CHUNK_SIZE = 2
+
+        try:
+            response = self._post_json(
+                '/get-clip-metadata/', {'clip_ids': clip_ids})
+            self.assertTrue(response.streaming)
+            content = b''.join(response.streaming_content)
+        finally:
+            views._CLIP_METADATA_CHUNK_SIZE = saved_chunk_size
+
+        metadata = json.loads(content)
+
+        self.assertEqual(list(metadata.keys()), [str(i) for i in clip_ids])
+
+        def expected(annotations, tags):
+            return {'annotations': annotations, 'tags': tags}
+
+        self.assertEqual(metadata[str(c0.id)], expected(
+            [['Classification', 'Call'], ['Detector Score', '50']], []))
+        self.assertEqual(metadata[str(c1.id)], expected([], ['Review']))
+        self.assertEqual(metadata[str(c3.id)], expected(
+            [['Classification', 'Noise']], ['Review']))
+
+
+    def test_get_clip_metadata_for_no_clips(self):
+        response = self._post_json('/get-clip-metadata/', {'clip_ids': []})
+        content = b''.join(response.streaming_content)
+        self.assertEqual(json.loads(content), {})
+
+
+    def test_get_clip_audios_bad_encoding(self):
+        response = self._post_json(
+            '/get-clip-audios/',
+            {'clip_ids': [self._clips[0].id], 'encoding': 'mp3'})
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_get_clips(self):
+
+        params = self._get_clip_filter_params()
+        params['limit'] = 2
+
+        clip_ids = []
+        cursor = None
+
+        while True:
+
+            if cursor is not None:
+                params['cursor'] = cursor
+
+            response = self.client.get(f'/get-clips/?{urlencode(params)}')
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.content)
+
+            if cursor is None:
+                self.assertEqual(page['clipCount'], len(self._clips))
+            else:
+                self.assertNotIn('clipCount', page)
+
+            self.assertLessEqual(len(page['clips']), 2)
+            clip_ids += [c[0] for c in page['clips']]
+
+            cursor = page['nextCursor']
+
+            if cursor is None:
+                break
+
+        self.assertEqual(clip_ids, [c.id for c in self._clips])
+
+
+    def test_get_clips_binary(self):
+
+        params = self._get_clip_filter_params()
+        params['limit'] = 2
+        params['format'] = 'binary'
+
+        clip_ids = []
+        start_times = []
+        cursor = None
+
+        while True:
+
+            if cursor is not None:
+                params['cursor'] = cursor
+
+            response = self.client.get(f'/get-clips/?{urlencode(params)}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response['Content-Type'], 'application/octet-stream')
+
+            if cursor is None:
+                self.assertEqual(
+                    int(response['Vesper-Clip-Count']), len(self._clips))
+            else:
+                self.assertNotIn('Vesper-Clip-Count', response)
+
+            ids, _, _, _, times = \
+                clip_list_utils.decode_binary_clip_list(response.content)
+            self.assertLessEqual(len(ids), 2)
+            clip_ids += ids.tolist()
+            start_times += times.tolist()
+
+            cursor = response.get('Vesper-Next-Cursor')
+
+            if cursor is None:
+                break
+
+        self.assertEqual(clip_ids, [c.id for c in self._clips])
+
+        expected_start_times = [
+            int(c.start_time.timestamp()) * 1000 +
+            c.start_time.microsecond // 1000
+            for c in self._clips]
+        self.assertEqual(start_times, expected_start_times)
+
+
+    def _get_clip_filter_params(self):
+        clip = self._clips[0]
+        get_ui_name = model_utils.get_station_mic_output_pair_ui_name
+        return {
+            'station_mic': get_ui_name((clip.station, clip.mic_output)),
+            'detector': clip.creating_processor.name,
+            'classification': archive.NULL_CHOICE,
+            'tag': archive.NULL_CHOICE
+        }
+
+
+    def test_get_clips_bad_parameters(self):
+        for params in (
+                {'limit': 0}, {'limit': 'x'}, {'cursor': 'bobo'},
+                {'format': 'bobo'}):
+            response = self.client.get(f'/get-clips/?{urlencode(params)}')
+            self.assertEqual(response.status_code, 400)
+
+
+    def test_s3_latency_stats(self):
+
+        # no S3 reads
+        response = self.client.get('/s3-latency-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {})
+
+        reader = Bunch(
+            object_latencies=LatencyHistogram(),
+            batch_latencies=LatencyHistogram())
+        reader.object_latencies.record(.1)
+        reader.object_latencies.record(.3)
+        reader.batch_latencies.record(.3)
+
+        saved_reader = clip_manager._s3_object_reader
+        clip_manager._s3_object_reader = reader
+        try:
+            response = self.client.get('/s3-latency-stats/')
+        finally:
+            clip_manager._s3_object_reader = saved_reader
+
+        content = json.loads(response.content)
+        self.assertEqual(content['object']['count'], 2)
+        self.assertEqual(content['batch']['count'], 1)
+        self.assertAlmostEqual(content['batch']['max'], .3)
@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+import random
+
+from django.db import OperationalError, connection
+
+from vesper.django.app.models import (
+    AnnotationInfo, ClipCount, StringAnnotation, Tag, TagInfo)
+from vesper.django.app.tests.dtest_case import TransactionTestCase
+import vesper.django.app.clip_count_utils as clip_count_utils
+import vesper.django.app.model_utils as model_utils
+import vesper.util.archive_lock as archive_lock
+
+
+_THREAD_COUNT = 4
+_CLIPS_PER_THREAD = 10
+_ITERATION_COUNT = 10
+_VALUES = ('Call', 'Noise', 'Call.CHSP', 'Call.COYE')
+
+
+class ConcurrentWritesTests(TransactionTestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+
+        clips = self._create_test_clips(_THREAD_COUNT * _CLIPS_PER_THREAD)
+        self._clip_ids = [c.id for c in clips]
+
+        self._classification = \
+            AnnotationInfo.objects.get(name='Classification')
+        self._review = TagInfo.objects.get(name='Review')
+
+
+    def test_concurrent_annotation_and_tagging(self):
+
+        # Each thread annotates its own clips, but tags and untags
+        # all clips. All threads update the same clip counts, since
+        # all of the clips are of the same station, mic output,
+        # detector, and date.
+
+        def edit(thread_num):
+
+            try:
+
+                rng = random.Random(thread_num)
+
+                start = thread_num * _CLIPS_PER_THREAD
+                own_clip_ids = \
+                    self._clip_ids[start:start + _CLIPS_PER_THREAD]
+
+                for _ in range(_ITERATION_COUNT):
+
+                    model_utils.annotate_clips(
+                        own_clip_ids, self._classification,
+                        rng.choice(_VALUES))
+
+                    clip_ids = rng.sample(self._clip_ids, _CLIPS_PER_THREAD)
+
+                    if rng.random() < .5:
+                        model_utils.tag_clips(clip_ids, self._review)
+                    else:
+                        model_utils.untag_clips(clip_ids, self._review)
+
+                # Annotate clips with final values that depend only on
+                # thread number.
+                model_utils.annotate_clips(
+                    own_clip_ids, self._classification,
+                    _VALUES[thread_num % len(_VALUES)])
+
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(_THREAD_COUNT) as executor:
+            list(executor.map(edit, range(_THREAD_COUNT)))
+
+        # Check annotations.
+        for thread_num in range(_THREAD_COUNT):
+            start = thread_num * _CLIPS_PER_THREAD
+            clip_ids = self._clip_ids[start:start + _CLIPS_PER_THREAD]
+            annotations = StringAnnotation.objects.filter(
+                clip_id__in=clip_ids, info=self._classification)
+            values = list(annotations.values_list('value', flat=True))
+            expected = [_VALUES[thread_num % len(_VALUES)]] * len(clip_ids)
+            self.assertEqual(values, expected)
+
+        # Check that no clip count updates were lost.
+        counts = _get_counts()
+        clip_count_utils.rebuild_clip_counts()
+        self.assertEqual(counts, _get_counts())
+
+        # Check tag count.
+        tag_counts = ClipCount.objects.filter(
+            annotation_info=None, tag_info=self._review)
+        tag_count = sum(c.count for c in tag_counts)
+        self.assertEqual(
+            tag_count, Tag.objects.filter(info=self._review).count())
+
+
+    def test_retry(self):
+
+        errors = [
+            OperationalError('database is locked'),
+            OperationalError('database is locked')]
+
+        @archive_lock.atomic
+        def f(x):
+            if len(errors) != 0:
+                raise errors.pop()
+            return x
+
+        delay = archive_lock._INITIAL_RETRY_DELAY
+        archive_lock._INITIAL_RETRY_DELAY = 0
+
+        try:
+
+            # transient errors
+            self.assertEqual(f(1), 1)
+
+            # non-transient error
+            errors.append(OperationalError('no such table: bobo'))
+            self.assertRaises(OperationalError, f, 1)
+
+        finally:
+            archive_lock._INITIAL_RETRY_DELAY = delay
+
+
+def _get_counts():
+    counts = ClipCount.objects.values_list(
+        'station_id', 'mic_output_id', 'detector_id', 'date',
+        'annotation_info_id', 'annotation_value', 'tag_info_id', 'count')
+    return frozenset(counts)
@@ -0,0 +1,28 @@
+from django.db import connection
+
+from vesper.django.app.tests.dtest_case import TestCase
+import vesper.django.app.database_utils as database_utils
+
+
+class DatabaseUtilsTests(TestCase):
+
+
+    def setUp(self):
+        self._create_shared_test_models()
+        self._create_test_clips(10)
+
+
+    def test_optimize_database(self):
+
+        database_utils.optimize_database()
+
+        if connection.vendor == 'sqlite':
+
+            # Check that `ANALYZE` created query planner statistics.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM sqlite_stat1 "
+                    "WHERE tbl = 'vesper_clip'")
+                count = cursor.fetchone()[0]
+
+            self.assertGreater(count, 0)
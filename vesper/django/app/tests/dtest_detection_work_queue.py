@@ -0,0 +1,381 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as Date, timedelta as TimeDelta
+from pathlib import Path
+from threading import Event
+import json
+import tempfile
+
+from django.db import connection
+import numpy as np
+
+from vesper.command.detect_command import (
+    DetectCommand, WorkUnitLeaseLostError)
+from vesper.command.job_info import JobInfo
+from vesper.django.app.models import (
+    Clip, ClipCount, DetectionWorkUnit, Job, Processor, Recording,
+    RecordingFile)
+from vesper.django.app.tests.dtest_case import TestCase, TransactionTestCase
+from vesper.singleton.archive import archive
+from vesper.util.bunch import Bunch
+import vesper.command.detection_work_queue as detection_work_queue
+import vesper.command.detection_worker as detection_worker
+import vesper.util.audio_file_utils as audio_file_utils
+import vesper.util.time_utils as time_utils
+
+
+_DETECTOR_NAME = 'Old Bird Tseep Detector Redux 1.1'
+
+_SAMPLE_RATE = 24000
+_WORK_UNIT_DURATION = 10
+_WORK_UNIT_COUNT = 6
+_WORKER_COUNT = 2
+
+
+class DetectionWorkQueueTests(TestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+
+        # Create a one-hour recording with two clips that were not
+        # created by a job, and a file for the recording.
+        clips = self._create_test_clips(2)
+        recording = clips[0].recording_channel.recording
+        self._clip_id = clips[0].id
+        self._file = RecordingFile.objects.create(
+            recording=recording, file_num=0, start_index=0,
+            length=recording.length, path='Recording.wav')
+
+        self._job = _create_job('Running')
+
+
+    def _publish_work_units(self, count, job=None):
+
+        if job is None:
+            job = self._job
+
+        start_time = self._file.start_time
+        duration = TimeDelta(seconds=60)
+
+        work_units = [
+            DetectionWorkUnit(
+                job=job,
+                recording_file=self._file,
+                start_time=start_time + i * duration,
+                end_time=start_time + (i + 1) * duration,
+                detectors=json.dumps([_DETECTOR_NAME]))
+            for i in range(count)]
+
+        detection_work_queue.publish_work_units(work_units)
+
+        return list(DetectionWorkUnit.objects.order_by('id'))
+
+
+    def _assert_counts(self, job, **expected_counts):
+        counts = detection_work_queue.get_work_unit_counts(job.id)
+        expected_counts = dict(
+            (s, expected_counts.get(s.lower(), 0)) for s in counts)
+        self.assertEqual(counts, expected_counts)
+
+
+    def test_claim_work_units(self):
+
+        units = self._publish_work_units(2)
+        self._assert_counts(self._job, unclaimed=2)
+
+        claim = detection_work_queue.claim_work_unit
+
+        # Units are claimed in order of publication.
+        unit = claim('Worker 1', 60)
+        self.assertEqual(unit.id, units[0].id)
+        self.assertEqual(unit.status, detection_work_queue.CLAIMED)
+        self.assertEqual(unit.worker, 'Worker 1')
+        self.assertEqual(unit.attempt_count, 1)
+        self.assertGreater(
+            unit.lease_expiration_time, time_utils.get_utc_now())
+
+        unit = claim('Worker 2', 60)
+        self.assertEqual(unit.id, units[1].id)
+
+        self.assertIsNone(claim('Worker 3', 60))
+        self._assert_counts(self._job, claimed=2)
+
+        # Only a unit's worker can renew its lease and end it.
+        renew = detection_work_queue.renew_lease
+        self.assertTrue(renew(units[0].id, 'Worker 1', 60))
+        self.assertFalse(renew(units[0].id, 'Worker 2', 60))
+
+        end = detection_work_queue.end_work_unit
+        self.assertFalse(
+            end(units[0].id, 'Worker 2', detection_work_queue.COMPLETED))
+        self.assertTrue(
+            end(units[0].id, 'Worker 1', detection_work_queue.COMPLETED))
+        self.assertTrue(
+            end(units[1].id, 'Worker 2', detection_work_queue.FAILED))
+
+        self._assert_counts(self._job, completed=1, failed=1)
+
+
+    def test_claim_only_units_of_running_jobs(self):
+
+        job = _create_job('Interrupted')
+        self._publish_work_units(1, job)
+
+        self.assertIsNone(
+            detection_work_queue.claim_work_unit('Worker 1', 60))
+
+
+    def test_reclaim_expired_work_units(self):
+
+        unit_id = self._publish_work_units(1)[0].id
+
+        claim = detection_work_queue.claim_work_unit
+
+        # Claim unit with a lease that has already expired.
+        unit = claim('Worker 1', -1)
+        self.assertEqual(unit.attempt_count, 1)
+
+        # Another worker should reclaim the unit and claim it.
+        unit = claim('Worker 2', -1)
+        self.assertEqual(unit.id, unit_id)
+        self.assertEqual(unit.worker, 'Worker 2')
+        self.assertEqual(unit.attempt_count, 2)
+
+        # The first worker can no longer renew its lease or end the unit.
+        self.assertFalse(
+            detection_work_queue.renew_lease(unit_id, 'Worker 1', 60))
+        self.assertFalse(
+            detection_work_queue.end_work_unit(
+                unit_id, 'Worker 1', detection_work_queue.COMPLETED))
+
+        unit = claim('Worker 3', -1)
+        self.assertEqual(unit.attempt_count, 3)
+
+        # The unit has been claimed the maximum number of times, so
+        # it should fail rather than be reclaimed.
+        self.assertIsNone(claim('Worker 4', -1))
+        self._assert_counts(self._job, failed=1)
+
+
+    def test_cancel_work_units(self):
+
+        units = self._publish_work_units(3)
+
+        detection_work_queue.claim_work_unit('Worker 1', 60)
+        detection_work_queue.end_work_unit(
+            units[0].id, 'Worker 1', detection_work_queue.COMPLETED)
+        detection_work_queue.claim_work_unit('Worker 1', 60)
+
+        count = detection_work_queue.cancel_work_units(self._job.id)
+        self.assertEqual(count, 2)
+        self._assert_counts(self._job, completed=1, canceled=2)
+
+        self.assertFalse(
+            detection_work_queue.renew_lease(units[1].id, 'Worker 1', 60))
+
+
+    def test_delete_work_unit_clips(self):
+
+        unit = self._publish_work_units(2)[0]
+
+        # Create clips for both units as if by the unit's job.
+        detector = Processor.objects.get(name=_DETECTOR_NAME)
+        for i in range(4):
+            clip = Clip.objects.get(id=self._clip_id)
+            clip.id = None
+            clip.start_time = \
+                unit.start_time + TimeDelta(seconds=40 * i + 1)
+            clip.creating_job = self._job
+            clip.creating_processor = detector
+            clip.save()
+
+        detection_worker._delete_work_unit_clips(unit)
+
+        # Only the job's two clips in the unit's interval should be
+        # deleted.
+        clips = Clip.objects.filter(creating_job=self._job)
+        self.assertEqual(clips.count(), 2)
+        for clip in clips:
+            self.assertGreaterEqual(clip.start_time, unit.end_time)
+        self.assertEqual(Clip.objects.count(), 4)
+
+
+    def test_distributed_detect_command(self):
+
+        command = DetectCommand({
+            'detectors': [_DETECTOR_NAME],
+            'stations': ['Station 0'],
+            'start_date': Date(2050, 5, 1),
+            'end_date': Date(2050, 5, 1),
+            'schedule': archive.NULL_CHOICE,
+            'defer_clip_creation': False,
+            'distributed': True
+        })
+
+        # Request that the job stop, so that it cancels the work units
+        # it publishes rather than waiting for workers to run them.
+        stop_event = Event()
+        stop_event.set()
+        job_info = JobInfo(self._job.id, None, stop_event)
+
+        self.assertFalse(command.execute(job_info))
+
+        unit = DetectionWorkUnit.objects.get(job=self._job)
+        self.assertEqual(unit.recording_file_id, self._file.id)
+        self.assertEqual(unit.start_time, self._file.start_time)
+        self.assertEqual(unit.end_time, self._file.end_time)
+        self.assertEqual(json.loads(unit.detectors), [_DETECTOR_NAME])
+        self.assertEqual(unit.status, detection_work_queue.CANCELED)
+
+
+class DetectionWorkerTests(TransactionTestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+
+        # Create a recording with a file comprising one work unit of
+        # audio per call.
+        self._create_test_clips(0, sample_rate=_SAMPLE_RATE)
+        self._recording = Recording.objects.get()
+
+        self._temp_dir = tempfile.TemporaryDirectory()
+        file_path = Path(self._temp_dir.name) / 'Recording.wav'
+        _write_recording_file(file_path)
+
+        self._file = RecordingFile.objects.create(
+            recording=self._recording, file_num=0, start_index=0,
+            length=_WORK_UNIT_COUNT * _WORK_UNIT_DURATION * _SAMPLE_RATE,
+            path=str(file_path))
+
+        self._job = _create_job('Running', {
+            'detectors': [_DETECTOR_NAME],
+            'stations': ['Station 0'],
+            'start_date': '2050-05-01',
+            'end_date': '2050-05-01',
+            'schedule': archive.NULL_CHOICE,
+            'defer_clip_creation': False,
+            'distributed': True
+        })
+
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+
+    def test_run_workers(self):
+
+        self._publish_work_units()
+
+        worker_names = [f'Worker {i + 1}' for i in range(_WORKER_COUNT)]
+
+        def run_worker(name):
+            try:
+                worker = detection_worker.DetectionWorker(name, 60, .1)
+                worker.run(exit_when_idle=True)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(_WORKER_COUNT) as executor:
+            list(executor.map(run_worker, worker_names))
+
+        # Every unit should have been completed by one of the workers
+        # on its first attempt.
+        self._assert_counts(completed=_WORK_UNIT_COUNT)
+        for unit in DetectionWorkUnit.objects.all():
+            self.assertIn(unit.worker, worker_names)
+            self.assertEqual(unit.attempt_count, 1)
+
+        # Each call should have been detected and written exactly once.
+        start_time = self._file.start_time
+        duration = TimeDelta(seconds=_WORK_UNIT_DURATION)
+        clips = Clip.objects.filter(creating_job=self._job)
+        self.assertEqual(clips.count(), _WORK_UNIT_COUNT)
+        unit_nums = sorted(
+            (c.start_time - start_time) // duration for c in clips)
+        self.assertEqual(unit_nums, list(range(_WORK_UNIT_COUNT)))
+
+        # Clip counts should include each clip exactly once.
+        count = sum(ClipCount.objects.values_list('count', flat=True))
+        self.assertEqual(count, _WORK_UNIT_COUNT)
+
+
+    def test_abandon_work_unit_when_lease_lost(self):
+
+        self._publish_work_units()
+
+        worker = detection_worker.DetectionWorker('Worker 1', 60, .1)
+        unit = detection_work_queue.claim_work_unit(worker.name, 60)
+
+        # Run detectors on the unit as if the worker's lease renewal
+        # timer found that the worker lost its lease.
+        command = worker._get_command(unit.job)
+        lease_lost_event = Event()
+        lease_lost_event.set()
+        job_info = Bunch(
+            job_id=self._job.id, lease_lost_event=lease_lost_event)
+
+        with self.assertRaises(WorkUnitLeaseLostError):
+            command.run_work_unit(unit, job_info)
+
+        self.assertEqual(Clip.objects.count(), 0)
+
+
+    def _publish_work_units(self):
+
+        start_time = self._file.start_time
+        duration = TimeDelta(seconds=_WORK_UNIT_DURATION)
+
+        detection_work_queue.publish_work_units([
+            DetectionWorkUnit(
+                job=self._job,
+                recording_file=self._file,
+                start_time=start_time + i * duration,
+                end_time=start_time + (i + 1) * duration,
+                detectors=json.dumps([_DETECTOR_NAME]))
+            for i in range(_WORK_UNIT_COUNT)])
+
+
+    def _assert_counts(self, **expected_counts):
+        counts = detection_work_queue.get_work_unit_counts(self._job.id)
+        expected_counts = dict(
+            (s, expected_counts.get(s.lower(), 0)) for s in counts)
+        self.assertEqual(counts, expected_counts)
+
+
+def _create_job(status, arguments=None):
+
+    command = {'name': 'detect'}
+    if arguments is not None:
+        command['arguments'] = arguments
+
+    return Job.objects.create(
+        command=json.dumps(command),
+        creation_time=time_utils.get_utc_now(),
+        status=status)
+
+
+def _write_recording_file(file_path):
+
+    """
+    Writes a recording file of noise with a Tseep-like upsweep in the
+    middle of each work unit.
+    """
+
+    unit_length = _WORK_UNIT_DURATION * _SAMPLE_RATE
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 300, _WORK_UNIT_COUNT * unit_length)
+
+    call_duration = .1
+    times = np.arange(int(call_duration * _SAMPLE_RATE)) / _SAMPLE_RATE
+    freqs = 7000 + 1500 * times / call_duration
+    call = 8000 * np.sin(2 * np.pi * freqs * times)
+
+    for i in range(_WORK_UNIT_COUNT):
+        start_index = i * unit_length + unit_length // 2
+        samples[start_index:start_index + len(call)] += call
+
+    samples = np.round(samples).astype('int16')
+    audio_file_utils.write_wave_file(str(file_path), samples, _SAMPLE_RATE)
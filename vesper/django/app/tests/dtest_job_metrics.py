@@ -0,0 +1,88 @@
+import json
+
+from vesper.command.job_metrics import JobMetrics, get_job_metrics
+from vesper.django.app.models import Job
+from vesper.django.app.tests.dtest_case import TestCase
+import vesper.util.time_utils as time_utils
+
+
+class JobMetricsTests(TestCase):
+
+
+    def setUp(self):
+        self._job = Job.objects.create(
+            command=json.dumps({'name': 'export'}),
+            creation_time=time_utils.get_utc_now(),
+            status='Running')
+
+
+    def _get_job_metrics(self, now=None):
+        job = Job.objects.get(id=self._job.id)
+        return get_job_metrics(job, now)
+
+
+    def test_job_metrics(self):
+
+        metrics = JobMetrics(self._job.id, save_interval=1000)
+
+        # Job with no phases.
+        result = self._get_job_metrics()
+        self.assertEqual(result['jobId'], self._job.id)
+        self.assertEqual(result['status'], 'Running')
+        self.assertIsNone(result['currentPhase'])
+        self.assertEqual(result['phases'], [])
+
+        metrics.start_phase('Create exporter')
+        metrics.start_phase('Export clips', 100, 'clips')
+
+        # `add_progress` should not save metrics since the save
+        # interval has not elapsed.
+        metrics.add_progress(10)
+        phases = self._get_job_metrics()['phases']
+        self.assertEqual(phases[1]['completed'], 0)
+
+        metrics.add_progress(15)
+        metrics.save()
+
+        # Get metrics ten seconds after start of second phase.
+        start_time = metrics.phases[1]['startTime']
+        result = self._get_job_metrics(start_time + 10)
+        self.assertEqual(result['currentPhase'], 'Export clips')
+
+        phase = result['phases'][0]
+        self.assertEqual(phase['name'], 'Create exporter')
+        self.assertEqual(phase['unit'], 'items')
+        self.assertIsNone(phase['total'])
+        self.assertIsNotNone(phase['endTime'])
+        self.assertIsNone(phase['remainingTime'])
+
+        phase = result['phases'][1]
+        self.assertEqual(phase['unit'], 'clips')
+        self.assertEqual(phase['total'], 100)
+        self.assertEqual(phase['completed'], 25)
+        self.assertIsNone(phase['endTime'])
+        self.assertAlmostEqual(phase['elapsedTime'], 10)
+        self.assertAlmostEqual(phase['rate'], 2.5)
+        self.assertAlmostEqual(phase['remainingTime'], 30)
+
+        metrics.end_phase()
+        result = self._get_job_metrics()
+        self.assertIsNone(result['currentPhase'])
+        self.assertIsNone(result['phases'][1]['remainingTime'])
+
+
+    def test_job_metrics_view(self):
+
+        metrics = JobMetrics(self._job.id)
+        metrics.start_phase('Export clips', 10, 'clips')
+        metrics.add_progress(3)
+        metrics.save()
+
+        response = self.client.get(f'/jobs/{self._job.id}/metrics/')
+        self.assertEqual(response.status_code, 200)
+        content = json.loads(response.content)
+        self.assertEqual(content['currentPhase'], 'Export clips')
+        self.assertEqual(content['phases'][0]['completed'], 3)
+
+        response = self.client.get(f'/jobs/{self._job.id + 1}/metrics/')
+        self.assertEqual(response.status_code, 404)
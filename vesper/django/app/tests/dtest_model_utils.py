@@ -0,0 +1,242 @@
+from datetime import datetime as DateTime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from vesper.django.app.models import (
+    AnnotationInfo, Clip, ClipCount, StringAnnotation, StringAnnotationEdit,
+    Tag, TagEdit, TagInfo)
+from vesper.django.app.tests.dtest_case import TestCase
+import vesper.django.app.clip_count_utils as clip_count_utils
+import vesper.django.app.model_utils as model_utils
+
+
+class ModelUtilsTests(TestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+
+        self._clips = \
+            self._create_test_clips(3) + \
+            self._create_test_clips(
+                2, detector_name='Old Bird Thrush Detector Redux 1.1',
+                start_time=DateTime(2050, 5, 2, 4))
+
+        self._classification = \
+            AnnotationInfo.objects.get(name='Classification')
+
+        ids = [c.id for c in self._clips]
+        model_utils.annotate_clips(ids[:2], self._classification, 'Call')
+        model_utils.annotate_clips(ids[3:4], self._classification, 'Noise')
+
+
+    def test_get_clip_annotation_values(self):
+
+        expected = dict(
+            (c.id, model_utils.get_clip_annotation_value(
+                c, self._classification))
+            for c in self._clips)
+        expected = dict((k, v) for k, v in expected.items() if v is not None)
+
+        # query set
+        clips = Clip.objects.all()
+        with CaptureQueriesContext(connection) as context:
+            values = model_utils.get_clip_annotation_values(
+                clips, self._classification)
+        self.assertEqual(values, expected)
+        self.assertEqual(len(context.captured_queries), 1)
+
+        # list
+        values = model_utils.get_clip_annotation_values(
+            self._clips, self._classification)
+        self.assertEqual(values, expected)
+
+
+    def test_get_clip_types(self):
+
+        clips = list(Clip.objects.all())
+
+        expected = dict((c.id, model_utils.get_clip_type(c)) for c in clips)
+        self.assertEqual(
+            sorted(expected.values()),
+            ['Thrush', 'Thrush', 'Tseep', 'Tseep', 'Tseep'])
+
+        clips = list(Clip.objects.all())
+        with CaptureQueriesContext(connection) as context:
+            clip_types = model_utils.get_clip_types(clips)
+        self.assertEqual(clip_types, expected)
+        self.assertEqual(len(context.captured_queries), 1)
+
+
+    def test_get_tagged_clip_ids(self):
+
+        ids = [c.id for c in self._clips]
+        review = TagInfo.objects.get(name='Review')
+        model_utils.tag_clips(ids[1:3], review)
+
+        with CaptureQueriesContext(connection) as context:
+            tagged_ids = model_utils.get_tagged_clip_ids(self._clips, review)
+        self.assertEqual(tagged_ids, frozenset(ids[1:3]))
+        self.assertEqual(len(context.captured_queries), 1)
+
+        expected = frozenset(
+            c.id for c in self._clips
+            if model_utils.is_clip_tagged(c, review))
+        self.assertEqual(tagged_ids, expected)
+
+
+    def test_delete_clips(self):
+
+        ids = [c.id for c in self._clips]
+        model_utils.tag_clips(ids[1:4], TagInfo.objects.get(name='Review'))
+
+        deleted_ids = ids[:2] + ids[3:4]
+        count = model_utils.delete_clips(deleted_ids)
+
+        self.assertEqual(count, 3)
+
+        remaining_ids = list(
+            Clip.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(remaining_ids, [ids[2], ids[4]])
+
+        # Check that clip dependents were deleted.
+        for model_class in (
+                StringAnnotation, StringAnnotationEdit, Tag, TagEdit):
+            objects = model_class.objects.filter(clip_id__in=deleted_ids)
+            self.assertEqual(objects.count(), 0)
+        self.assertEqual(Tag.objects.get().clip_id, ids[2])
+
+        # Check that clip counts were updated.
+        counts = _get_clip_counts()
+        clip_count_utils.rebuild_clip_counts()
+        self.assertEqual(counts, _get_clip_counts())
+
+
+    def test_tag_and_untag_clips(self):
+
+        review = TagInfo.objects.get(name='Review')
+        ids = [c.id for c in self._clips]
+
+        model_utils.tag_clips(ids[:3], review)
+        self.assertEqual(Tag.objects.filter(info=review).count(), 3)
+
+        # Untag two tagged clips and one untagged one.
+        model_utils.untag_clips(ids[1:4], review)
+        self.assertEqual(
+            list(Tag.objects.filter(info=review).values_list(
+                'clip_id', flat=True)),
+            ids[:1])
+
+        # Check tag edits. Untagging should record delete edits only
+        # for the clips that were tagged.
+        edits = TagEdit.objects.filter(info=review).order_by('id')
+        self.assertEqual(
+            [(e.clip_id, e.action) for e in edits[:3]],
+            [(i, TagEdit.ACTION_SET) for i in ids[:3]])
+        self.assertEqual(
+            sorted((e.clip_id, e.action) for e in edits[3:]),
+            [(i, TagEdit.ACTION_DELETE) for i in ids[1:3]])
+
+
+    def test_tag_and_untag_clip_set(self):
+
+        review = TagInfo.objects.get(name='Review')
+        ids = [c.id for c in self._clips]
+        model_utils.tag_clips(ids[:1], review)
+
+        def check(expected_count):
+            self.assertEqual(
+                Tag.objects.filter(info=review).count(), expected_count)
+            counts = _get_clip_counts()
+            clip_count_utils.rebuild_clip_counts()
+            self.assertEqual(counts, _get_clip_counts())
+
+        # Tag random sample of untagged clips.
+        count = model_utils.tag_clip_set(Clip.objects.all(), review, 2)
+        self.assertEqual(count, 2)
+        check(3)
+
+        # Tag remaining untagged clips.
+        count = model_utils.tag_clip_set(Clip.objects.all(), review)
+        self.assertEqual(count, 2)
+        check(5)
+
+        # Untag random sample of clips.
+        count = model_utils.untag_clip_set(Clip.objects.all(), review, 3)
+        self.assertEqual(count, 3)
+        check(2)
+
+        # Untag remaining tagged clips.
+        count = model_utils.untag_clip_set(Clip.objects.all(), review)
+        self.assertEqual(count, 2)
+        check(0)
+
+        # Try to tag clips of empty clip set.
+        count = model_utils.tag_clip_set(Clip.objects.none(), review)
+        self.assertEqual(count, 0)
+
+        # Check tag edits. We tagged each clip once and untagged it
+        # once.
+        edits = TagEdit.objects.filter(info=review).exclude(clip_id=ids[0])
+        actions = [e.action for e in edits.order_by('id')]
+        self.assertEqual(
+            actions, [TagEdit.ACTION_SET] * 4 + [TagEdit.ACTION_DELETE] * 4)
+        self.assertEqual(
+            frozenset(edits.values_list('clip_id', flat=True)),
+            frozenset(ids[1:]))
+
+
+    def test_clip_dependent_model_classes(self):
+
+        # Make sure `model_utils.delete_clips` deletes all clip
+        # dependents.
+        model_classes = frozenset(
+            r.related_model for r in Clip._meta.related_objects)
+        self.assertEqual(
+            model_classes,
+            frozenset(model_utils._CLIP_DEPENDENT_MODEL_CLASSES))
+
+
+    def test_get_clips_for_date_range(self):
+
+        detector = self._clips[0].creating_processor
+        clips = [c for c in self._clips if c.creating_processor == detector]
+        clips += self._create_test_clips(
+            2, start_time=DateTime(2050, 5, 4, 2))
+        dates = sorted(frozenset(c.date for c in clips))
+        self.assertEqual(len(dates), 2)
+
+        def get_clips(start_date, end_date):
+            clips = model_utils.get_clips(
+                detector=detector, start_date=start_date,
+                end_date=end_date, order=False)
+            return list(clips.order_by('date', 'start_time'))
+
+        cases = (
+            (dates[0], dates[1], clips),
+            (dates[0], dates[0], clips[:3]),
+            (dates[1], None, clips[3:]),
+            (None, dates[0], clips[:3]),
+        )
+
+        for start_date, end_date, expected in cases:
+            self.assertEqual(get_clips(start_date, end_date), expected)
+
+        pairs = [
+            (date, list(date_clips)) for date, date_clips in
+            model_utils.group_clips_by_date(get_clips(None, None))]
+        self.assertEqual(
+            pairs, [(dates[0], clips[:3]), (dates[1], clips[3:])])
+
+        clips = model_utils.get_clips(detector=detector, order=False)
+        self.assertEqual(
+            model_utils.get_clip_counts_by_date(clips),
+            {dates[0]: 3, dates[1]: 2})
+
+
+def _get_clip_counts():
+    return frozenset(ClipCount.objects.values_list(
+        'station_id', 'mic_output_id', 'detector_id', 'date',
+        'annotation_info_id', 'annotation_value', 'tag_info_id', 'count'))
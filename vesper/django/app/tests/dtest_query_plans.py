@@ -0,0 +1,141 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
+
+from vesper.django.app.models import (
+    AnnotationInfo, ClipCount, StringAnnotation, Station)
+from vesper.django.app.tests.dtest_case import TestCase
+import vesper.django.app.model_utils as model_utils
+
+
+# These tests check that the archive database uses indexes for the
+# main clip queries, i.e. that it neither scans entire tables nor sorts
+# query results. The tests parse the query plans output by the SQLite
+# `EXPLAIN QUERY PLAN` statement, so they run only for SQLite.
+
+
+@skipUnless(
+    connection.vendor == 'sqlite', 'Query plan tests require SQLite.')
+class QueryPlanTests(TestCase):
+
+
+    def setUp(self):
+
+        self._create_shared_test_models()
+        clips = self._create_test_clips(10)
+
+        clip = clips[0]
+        self._station = Station.objects.get(name='Station 0')
+        self._mic_output = clip.mic_output
+        self._detector = clip.creating_processor
+        self._date = clip.date
+        self._start_time = clip.start_time
+        self._clip_ids = [c.id for c in clips]
+
+
+    def _get_clips(self, **kwargs):
+        return model_utils.get_clips(
+            station=self._station, mic_output=self._mic_output,
+            detector=self._detector, **kwargs)
+
+
+    def test_clip_album_queries(self):
+
+        clips = self._get_clips(date=self._date)
+        self._assert_plan(clips, 'vesper_clip_sm_date_proc_idx')
+
+        clips = self._get_clips(
+            date=self._date, annotation_name='Classification',
+            annotation_value='Call')
+        self._assert_plan(
+            clips, 'vesper_clip_sm_date_proc_idx',
+            'vesper_sa_info_value_clip_idx')
+
+        for annotation_value in ('Call*', '*', None):
+            clips = self._get_clips(
+                date=self._date, annotation_name='Classification',
+                annotation_value=annotation_value)
+            self._assert_plan(clips, 'vesper_clip_sm_date_proc_idx')
+
+        for tag_excluded in (False, True):
+            clips = self._get_clips(
+                date=self._date, tag_name='Review',
+                tag_excluded=tag_excluded)
+            self._assert_plan(clips, 'vesper_clip_sm_date_proc_idx')
+
+
+    def test_clip_page_query(self):
+
+        # This is the query of the `get_clips` view, which pages
+        # through a detector's clips in order of start time.
+        clips = self._get_clips(
+            annotation_name='Classification', annotation_value='Call',
+            order=False)
+        clips = clips.filter(
+            Q(start_time__gt=self._start_time) |
+            Q(start_time=self._start_time, id__gt=self._clip_ids[0]))
+        clips = clips.order_by('start_time', 'id')
+        self._assert_plan(
+            clips, 'vesper_clip_sm_proc_time_idx',
+            'vesper_sa_info_value_clip_idx')
+
+
+    def test_clip_set_page_query(self):
+
+        # This is the query with which a `ClipIterator` gets a page of
+        # clips for a clip set command, e.g. a command that exports,
+        # classifies, tags, or deletes clips.
+        clips = self._get_clips(
+            start_date=self._date, end_date=self._date,
+            annotation_name='Classification', annotation_value='Call',
+            order=False)
+        clips = clips.filter(
+            Q(start_time__gt=self._start_time) |
+            Q(start_time=self._start_time, id__gt=self._clip_ids[0]))
+        clips = clips.order_by('start_time', 'id')[:1000]
+        self._assert_plan(
+            clips, 'vesper_clip_sm_proc_time_idx',
+            'vesper_sa_info_value_clip_idx')
+
+
+    def test_clip_calendar_queries(self):
+
+        counts = ClipCount.objects.filter(
+            station=self._station, mic_output=self._mic_output,
+            detector=self._detector)
+
+        self._assert_plan(
+            counts.filter(annotation_info=None, tag_info=None))
+
+        info = AnnotationInfo.objects.get(name='Classification')
+        self._assert_plan(
+            counts.filter(annotation_info=info, annotation_value='Call'))
+
+
+    def test_clip_export_queries(self):
+
+        # Clip exporters get clips as for clip albums, and then get
+        # annotation values for batches of clips.
+        clips = self._get_clips(date=self._date)
+        self._assert_plan(clips, 'vesper_clip_sm_date_proc_idx')
+
+        info = AnnotationInfo.objects.get(name='Classification')
+        annotations = StringAnnotation.objects.filter(
+            info=info, clip_id__in=self._clip_ids)
+        self._assert_plan(annotations.values_list('clip_id', 'value'))
+
+
+    def _assert_plan(self, query_set, *index_names):
+
+        plan = query_set.explain()
+
+        for name in index_names:
+            self.assertRegex(plan, rf'USING (COVERING )?INDEX {name}\b')
+
+        # Make sure database does not scan any table or index from
+        # beginning to end.
+        self.assertNotRegex(plan, r'\bSCAN\b')
+
+        # Make sure database does not sort query results.
+        self.assertNotIn('TEMP B-TREE', plan)
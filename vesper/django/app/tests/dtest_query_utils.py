@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from vesper.django.app.models import Clip
+from vesper.django.app.tests.dtest_case import TestCase
+import vesper.django.app.query_utils as query_utils
+
+
+class QueryUtilsTests(TestCase):
+
+
+    def setUp(self):
+        self._create_shared_test_models()
+        self._clips = self._create_test_clips(7)
+        self._clip_ids = [c.id for c in self._clips]
+
+
+    def test_get_chunks(self):
+
+        cases = [
+            ([], 3, []),
+            ([1, 2], 3, [[1, 2]]),
+            ([1, 2, 3], 3, [[1, 2, 3]]),
+            (range(1, 8), 3, [[1, 2, 3], [4, 5, 6], [7]]),
+            (iter(range(1, 8)), 3, [[1, 2, 3], [4, 5, 6], [7]]),
+        ]
+
+        for items, chunk_size, expected in cases:
+            chunks = list(query_utils.get_chunks(items, chunk_size))
+            self.assertEqual(chunks, expected)
+
+
+    def test_filter_in(self):
+
+        ids = self._clip_ids[1:]
+        clips = Clip.objects.values_list('id', flat=True)
+
+        with CaptureQueriesContext(connection) as context:
+            result = query_utils.filter_in(clips, 'id', ids, chunk_size=4)
+
+        self.assertEqual(sorted(result), ids)
+        self.assertEqual(len(context.captured_queries), 2)
+
+        result = query_utils.filter_in(clips, 'id', [])
+        self.assertEqual(result, [])
+
+
+    def test_update_in(self):
+
+        ids = self._clip_ids[:5]
+
+        count = query_utils.update_in(
+            Clip.objects.all(), 'id', ids, chunk_size=2, length=1)
+
+        self.assertEqual(count, 5)
+        self.assertEqual(Clip.objects.filter(length=1).count(), 5)
+
+
+    def test_delete_in(self):
+
+        ids = self._clip_ids[2:]
+
+        query_utils.delete_in(Clip.objects.all(), 'id', ids, chunk_size=2)
+
+        remaining_ids = list(
+            Clip.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(remaining_ids, self._clip_ids[:2])
+
+
+    def test_raw_delete_in(self):
+
+        ids = self._clip_ids[2:]
+
+        with CaptureQueriesContext(connection) as context:
+            count = query_utils.raw_delete_in(
+                Clip.objects.all(), 'id', ids, chunk_size=2)
+
+        self.assertEqual(count, 5)
+        self.assertEqual(len(context.captured_queries), 3)
+
+        remaining_ids = list(
+            Clip.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(remaining_ids, self._clip_ids[:2])
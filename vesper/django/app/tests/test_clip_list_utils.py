@@ -0,0 +1,64 @@
+import datetime
+
+import vesper.django.app.clip_list_utils as clip_list_utils
+from vesper.tests.test_case import TestCase
+
+
+_UTC = datetime.timezone.utc
+
+
+class ClipListUtilsTests(TestCase):
+
+
+    def test_binary_clip_list_round_trip(self):
+
+        rows = [
+            (1, 0, 1000, 24000., datetime.datetime(
+                2020, 9, 16, 1, 23, 45, 678900, tzinfo=_UTC)),
+            (2 ** 40, None, 2000, 22050., datetime.datetime(
+                2020, 9, 16, 1, 23, 46, tzinfo=_UTC)),
+        ]
+
+        data = clip_list_utils.encode_binary_clip_list(rows)
+
+        self.assertEqual(len(data), 8 + 2 * 5 * 8)
+
+        ids, start_indices, lengths, sample_rates, start_times = \
+            clip_list_utils.decode_binary_clip_list(data)
+
+        self.assertEqual(ids.tolist(), [1, 2 ** 40])
+        self.assertEqual(start_indices.tolist(), [0, -1])
+        self.assertEqual(lengths.tolist(), [1000, 2000])
+        self.assertEqual(sample_rates.tolist(), [24000., 22050.])
+
+        # Start times are truncated to milliseconds.
+        self.assertEqual(
+            start_times.tolist(), [1600219425678, 1600219426000])
+
+
+    def test_empty_binary_clip_list(self):
+
+        data = clip_list_utils.encode_binary_clip_list([])
+
+        self.assertEqual(len(data), 8)
+
+        columns = clip_list_utils.decode_binary_clip_list(data)
+
+        self.assertEqual(len(columns), 5)
+
+        for column in columns:
+            self.assertEqual(len(column), 0)
+
+
+    def test_decode_malformed_binary_clip_list(self):
+
+        data = clip_list_utils.encode_binary_clip_list([
+            (1, 0, 1000, 24000., datetime.datetime(2020, 1, 1, tzinfo=_UTC))
+        ])
+
+        # wrong version
+        bad_data = data[:4] + (2).to_bytes(4, 'little') + data[8:]
+
+        for data in (b'', data[:-1], data + b'\0', bad_data):
+            self.assert_raises(
+                ValueError, clip_list_utils.decode_binary_clip_list, data)
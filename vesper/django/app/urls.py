@@ -13,6 +13,7 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('clip-calendar/', views.clip_calendar, name='clip-calendar'),
     path('clip-album/', views.clip_album, name='clip-album'),
+    path('get-clips/', views.get_clips, name='get-clips'),
     path('night/', views.night, name='night'),
     
     path('get-clip-audios/', views.get_clip_audios, name='get-clip-audios'),
@@ -20,12 +21,17 @@ urlpatterns = [
     path('get-clip-metadata/', views.get_clip_metadata,
          name='get-clip-metadata'),
     
+    path('get-clip-spectrograms/', views.get_clip_spectrograms,
+         name='get-clip-spectrograms'),
+    
     # path('clips/<int:clip_id>/audio/', views.clip_audio, name='clip-audio'),
     
     # path('clips/<int:clip_id>/metadata/', views.clip_metadata,
     #      name='clip-metadata'),
     
     path('health-check/', views.health_check, name='health-check'),
+    path('s3-latency-stats/', views.s3_latency_stats,
+         name='s3-latency-stats'),
     path('about-vesper/', views.about_vesper, name='about-vesper'),
     
 ]
@@ -79,6 +85,10 @@ if not settings.VESPER_ARCHIVE_READ_ONLY:
         path('refresh-recording-audio-file-paths/',
              views.refresh_recording_audio_file_paths,
              name='refresh-recording-audio-file-paths'),
+        path('rebuild-clip-counts/', views.rebuild_clip_counts,
+             name='rebuild-clip-counts'),
+        path('optimize-archive-database/', views.optimize_archive_database,
+             name='optimize-archive-database'),
         path('add-recording-audio-files/', views.add_recording_audio_files,
              name='add-recording-audio-files'),
         path('add-old-bird-clip-start-indices/',
@@ -112,6 +122,8 @@ if not settings.VESPER_ARCHIVE_READ_ONLY:
         #      name='presets'),
     
         path('jobs/<int:job_id>/', views.job, name='job'),
+        path('jobs/<int:job_id>/metrics/', views.job_metrics,
+             name='job-metrics'),
     
     ]
 
@@ -1,5 +1,6 @@
 from collections import defaultdict
 from urllib.parse import quote
+import base64
 import datetime
 import itertools
 import json
@@ -7,15 +8,18 @@ import logging
 
 from django import forms, urls
 from django.db import connection, reset_queries, transaction
+from django.db.models import Q
 from django.conf import settings
 from django.http import (
-    Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed,
-    HttpResponseRedirect, JsonResponse)
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden,
+    HttpResponseNotAllowed, HttpResponseRedirect, JsonResponse,
+    StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import NoReverseMatch, reverse
 from django.views.decorators.csrf import csrf_exempt
 import numpy as np
 
+from vesper.command.job_metrics import get_job_metrics
 from vesper.django.app.add_recording_audio_files_form import \
     AddRecordingAudioFilesForm
 from vesper.django.app.classify_form import ClassifyForm
@@ -40,6 +44,9 @@ from vesper.django.app.import_metadata_form import ImportMetadataForm
 from vesper.django.app.import_recordings_form import ImportRecordingsForm
 from vesper.django.app.models import (
     AnnotationInfo, Clip, Job, StringAnnotation, Tag, TagInfo)
+from vesper.django.app.optimize_archive_database_form import \
+    OptimizeArchiveDatabaseForm
+from vesper.django.app.rebuild_clip_counts_form import RebuildClipCountsForm
 from vesper.django.app.refresh_recording_audio_file_paths_form import \
     RefreshRecordingAudioFilePathsForm
 from vesper.django.app.tag_clips_form import TagClipsForm
@@ -53,12 +60,20 @@ from vesper.old_bird.export_clip_counts_csv_file_form import \
     ExportClipCountsCsvFileForm as OldBirdExportClipCountsCsvFileForm
 from vesper.old_bird.import_clips_form import ImportClipsForm
 from vesper.singleton.archive import archive
+from vesper.singleton.clip_audio_encoder import clip_audio_encoder
 from vesper.singleton.clip_manager import clip_manager
+from vesper.singleton.clip_spectrogram_manager import \
+    clip_spectrogram_manager
 from vesper.singleton.job_manager import job_manager
 from vesper.singleton.preference_manager import preference_manager
 from vesper.singleton.preset_manager import preset_manager
 from vesper.util.bunch import Bunch
+from vesper.util.clip_audio_encoder import (
+    ENCODINGS as CLIP_AUDIO_ENCODINGS, WAVE_ENCODING)
+from vesper.util.clip_spectrogram_manager import ClipSpectrogramManagerError
+import vesper.django.app.clip_list_utils as clip_list_utils
 import vesper.django.app.model_utils as model_utils
+import vesper.django.app.query_utils as query_utils
 import vesper.django.util.view_utils as view_utils
 import vesper.external_urls as external_urls
 import vesper.old_bird.export_clip_counts_csv_file_utils as \
@@ -201,6 +216,12 @@ _DEFAULT_NAVBAR_DATA_READ_WRITE = yaml_utils.load(f'''
       - name: Refresh recording audio file paths
         url_name: refresh-recording-audio-file-paths
         
+      - name: Rebuild clip counts
+        url_name: rebuild-clip-counts
+        
+      - name: Optimize archive database
+        url_name: optimize-archive-database
+        
       # - name: Add recording audio files
       #   url_name: add-recording-audio-files
         
@@ -386,6 +407,18 @@ def _create_navbar_right_items(request):
 _ONE_DAY = datetime.timedelta(days=1)
 _GET_AND_HEAD = ('GET', 'HEAD')
 
+_CLIP_AUDIOS_CHUNK_SIZE = 50
+"""
+Number of clips whose audios are read and encoded at a time for a
+`get_clip_audios` response.
+"""
+
+_CLIP_METADATA_CHUNK_SIZE = 200
+"""
+Number of clips whose metadata are queried and encoded at a time for a
+`get_clip_metadata` response.
+"""
+
 
 def index(request):
     return redirect(reverse('clip-calendar'))
@@ -425,7 +458,8 @@ def _create_detect_command_spec(form):
             'start_date': data['start_date'],
             'end_date': data['end_date'],
             'schedule': data['schedule'],
-            'defer_clip_creation': data['defer_clip_creation']
+            'defer_clip_creation': data['defer_clip_creation'],
+            'distributed': data['distributed']
         }
     }
 
@@ -893,6 +927,66 @@ def _create_refresh_recording_audio_file_paths_command_spec(form):
     }
 
 
+@view_utils.login_required
+def rebuild_clip_counts(request):
+
+    if request.method in _GET_AND_HEAD:
+        form = RebuildClipCountsForm()
+
+    elif request.method == 'POST':
+
+        form = RebuildClipCountsForm(request.POST)
+
+        if form.is_valid():
+            command_spec = _create_rebuild_clip_counts_command_spec(form)
+            return _start_job(command_spec, request.user)
+
+    else:
+        return HttpResponseNotAllowed(('GET', 'HEAD', 'POST'))
+
+    context = _create_template_context(request, 'Admin', form=form)
+
+    return render(request, 'vesper/rebuild-clip-counts.html', context)
+
+
+def _create_rebuild_clip_counts_command_spec(form):
+
+    return {
+        'name': 'rebuild_clip_counts',
+        'arguments': {}
+    }
+
+
+@view_utils.login_required
+def optimize_archive_database(request):
+
+    if request.method in _GET_AND_HEAD:
+        form = OptimizeArchiveDatabaseForm()
+
+    elif request.method == 'POST':
+
+        form = OptimizeArchiveDatabaseForm(request.POST)
+
+        if form.is_valid():
+            command_spec = _create_optimize_archive_database_command_spec(form)
+            return _start_job(command_spec, request.user)
+
+    else:
+        return HttpResponseNotAllowed(('GET', 'HEAD', 'POST'))
+
+    context = _create_template_context(request, 'Admin', form=form)
+
+    return render(request, 'vesper/optimize-archive-database.html', context)
+
+
+def _create_optimize_archive_database_command_spec(form):
+
+    return {
+        'name': 'optimize_archive_database',
+        'arguments': {}
+    }
+
+
 @view_utils.login_required
 def delete_recordings(request):
 
@@ -1229,34 +1323,138 @@ def get_clip_audios(request):
 # either with all of the requested clip audios or a server error,
 # even if, say, all but one of the audios are available. A better
 # approach would be to return all of the audios that are available,
-# and some sort of error message for each one that is not.
+# and some sort of error message for each one that is not. Note that
+# since the response is streamed, an error that occurs after the first
+# chunk of audios has been sent truncates the response rather than
+# producing a server error response.
 def _get_clip_audios_aux(content):
     
-    # reset_queries()
-
     clip_ids = content['clip_ids']
+    encoding = content.get('encoding', WAVE_ENCODING)
+
+    if encoding not in CLIP_AUDIO_ENCODINGS:
+        return HttpResponseBadRequest(
+            reason=f'Unrecognized clip audio encoding "{encoding}".')
+
+    content = _generate_clip_audios_content(clip_ids, encoding)
+
+    return StreamingHttpResponse(
+        content, content_type='application/octet-stream')
+    
+
+def _generate_clip_audios_content(clip_ids, encoding):
+
+    """
+    Generates clip audios response content.
+
+    The content is alternating binary audio sizes and audios. We get
+    clips and their audios a chunk at a time and yield the content for
+    each chunk as soon as it is ready. This bounds the server memory
+    used for a response regardless of the number of clips, and lets
+    the client start decoding and displaying the first clips before
+    the audios of the rest have been read.
+    """
+
+    chunks = query_utils.get_chunks(clip_ids, _CLIP_AUDIOS_CHUNK_SIZE)
+
+    for clip_ids_chunk in chunks:
+
+        clips = Clip.objects.filter(id__in=clip_ids_chunk)
+
+        # Ensure that clips are ordered as in `clip_ids_chunk`.
+        clips = {clip.id: clip for clip in clips}
+        clips = [clips[id] for id in clip_ids_chunk]
+
+        audios = clip_audio_encoder.get_encoded_audios(clips, encoding)
+
+        audio_sizes = [_get_uint32_bytes(len(a)) for a in audios]
+        pairs = zip(audio_sizes, audios)
+        parts = itertools.chain.from_iterable(pairs)
+
+        yield b''.join(parts)
+
+
+# This view handles an HTTP POST request to read data from the server,
+# but does not modify the server state other than its spectrogram
+# cache, so we exempt it from Django's CSRF protection like the
+# `get_clip_audios` view.
+@csrf_exempt
+def get_clip_spectrograms(request):
+    if request.method == 'POST':
+        return view_utils.handle_json_post(
+            request, _get_clip_spectrograms_aux)
+    else:
+        return HttpResponseNotAllowed(['POST'])
+
+
+def _get_clip_spectrograms_aux(content):
+
+    """
+    Gets encoded spectrograms of the specified clips.
+
+    The request content is a JSON object with a `clip_ids` item and
+    either a `settings` item, whose value is clip album spectrogram
+    settings (with camel case keys), or a `settings_preset_path` item,
+    whose value is the path of a clip album settings preset as a list
+    of strings. An optional `encoding` item specifies the spectrogram
+    encoding, either "uint8" (the default) or "float16".
+
+    The response content is formatted like that of `get_clip_audios`,
+    as alternating binary spectrogram sizes and spectrograms. See the
+    `vesper.util.clip_spectrogram_manager` module for the spectrogram
+    encodings.
+    """
+
+    try:
+        clip_ids = content['clip_ids']
+        spectrogram_settings = _get_clip_spectrogram_settings(content)
+    except (KeyError, TypeError, ValueError) as e:
+        return HttpResponseBadRequest(
+            reason=f'Bad clip spectrograms request: {e}')
+
+    encoding = content.get('encoding', 'uint8')
 
-    # TODO: Limit number of clip IDs per query?
-    clips = Clip.objects.filter(id__in=clip_ids)
+    clips = query_utils.filter_in(Clip.objects.all(), 'id', clip_ids)
 
     # Ensure that clips are ordered as in `clip_ids`.
     clips = {clip.id: clip for clip in clips}
     clips = [clips[id] for id in clip_ids]
 
-    audios = clip_manager.get_audio_file_contents(clips)
-
-    # Concatenate alternating binary audio sizes and audios to make
-    # response content.
-    audio_sizes = [_get_uint32_bytes(len(a)) for a in audios]
-    pairs = zip(audio_sizes, audios)
+    try:
+        spectrograms = clip_spectrogram_manager.get_spectrograms(
+            clips, spectrogram_settings, encoding)
+    except ClipSpectrogramManagerError as e:
+        return HttpResponseBadRequest(reason=str(e))
+
+    # Concatenate alternating binary spectrogram sizes and spectrograms
+    # to make response content.
+    sizes = [_get_uint32_bytes(len(s)) for s in spectrograms]
+    pairs = zip(sizes, spectrograms)
     parts = itertools.chain.from_iterable(pairs)
     content = b''.join(parts)
-    
-    # _show_queries('_get_clip_audios_aux')
 
-    # Construct response
     return HttpResponse(content, content_type='application/octet-stream')
-    
+
+
+def _get_clip_spectrogram_settings(content):
+
+    settings_ = content.get('settings')
+
+    if settings_ is None:
+
+        preset_path = content['settings_preset_path']
+        preset_path = ('Clip Album Settings',) + tuple(preset_path)
+        preset = preset_manager.get_preset(preset_path)
+
+        if preset is None:
+            path = '/'.join(preset_path[1:])
+            raise ValueError(
+                f'Could not find clip album settings preset "{path}".')
+
+        settings_ = preset.camel_case_data
+
+    return settings_['spectrogram']
+
 
 def _show_queries(name):
     queries = connection.queries
@@ -1290,26 +1488,50 @@ def _get_clip_metadata_aux(content):
     
     clip_ids = content['clip_ids']
     
-    # reset_queries()
+    content = _generate_clip_metadata_content(clip_ids)
 
-    annos = _get_annotations(clip_ids)
-    tags = _get_tags(clip_ids)
-
-    metadata = dict(
-        (i, _get_clip_metadata(i, annos, tags))
-        for i in clip_ids)
-    
-    # _show_queries('_get_clip_metadata_aux')
-    
-    return JsonResponse(metadata)
+    return StreamingHttpResponse(content, content_type='application/json')
             
 
+def _generate_clip_metadata_content(clip_ids):
+
+    """
+    Generates clip metadata response content.
+
+    The content is a JSON object that maps clip IDs to clip metadata,
+    exactly as `JsonResponse` would produce for a dictionary. We query
+    and encode metadata a chunk of clips at a time, yielding the JSON
+    for each chunk as soon as it is ready, so that server memory use
+    does not grow with the number of clips.
+    """
+
+    yield '{'
+
+    separator = ''
+
+    chunks = query_utils.get_chunks(clip_ids, _CLIP_METADATA_CHUNK_SIZE)
+
+    for clip_ids_chunk in chunks:
+
+        annos = _get_annotations(clip_ids_chunk)
+        tags = _get_tags(clip_ids_chunk)
+
+        items = [
+            f'{json.dumps(str(i))}: '
+            f'{json.dumps(_get_clip_metadata(i, annos, tags))}'
+            for i in clip_ids_chunk]
+
+        yield separator + ', '.join(items)
+
+        separator = ', '
+
+    yield '}'
+
+
 def _get_annotations(clip_ids):
     
-    # TODO: Limit number of clip IDs per query?
-    annos = StringAnnotation.objects. \
-        filter(clip_id__in=clip_ids). \
-        select_related('info')
+    annos = StringAnnotation.objects.select_related('info')
+    annos = query_utils.filter_in(annos, 'clip_id', clip_ids)
 
     # Group annotation (name, value) pairs by clip ID into lists.
     annos_dict = defaultdict(list)
@@ -1326,10 +1548,8 @@ def _get_annotations(clip_ids):
 
 def _get_tags(clip_ids):
 
-    # TODO: Limit number of clip IDs per query?
-    tags = Tag.objects. \
-        filter(clip_id__in=clip_ids). \
-        select_related('info')
+    tags = Tag.objects.select_related('info')
+    tags = query_utils.filter_in(tags, 'clip_id', clip_ids)
 
     # Group tag names by clip ID into lists.
     tags_dict = defaultdict(list)
@@ -1876,6 +2096,12 @@ def night(request):
     recordings = model_utils.get_recordings(station, mic_output, time_interval)
     recordings_json = _get_recordings_json(recordings, station)
 
+    try:
+        clip_list_format = _parse_clip_list_format(
+            params.get('clip_list_format'), clip_list_utils.BINARY_FORMAT)
+    except ValueError as e:
+        return HttpResponseBadRequest(reason=str(e))
+
     clips = model_utils.get_clips(
         station=station,
         mic_output=mic_output,
@@ -1884,7 +2110,8 @@ def night(request):
         annotation_name=annotation_name,
         annotation_value=annotation_value,
         tag_name=tag_name)
-    clips_json = _get_clips_json(clips, station)
+    clips = clips.values_list(*clip_list_utils.CLIP_LIST_FIELD_NAMES)
+    clips_json = _get_clips_json(clips, clip_list_format)
 
     page_num = params.get('page', 1)
     
@@ -1956,15 +2183,35 @@ def _get_recording_dict(recording):
     }
 
 
-def _get_clips_json(clips, station):
-    clip_lists = [_get_clip_list(c) for c in clips]
-    result = json.dumps(clip_lists)
-    return result
+def _get_clips_json(clips, clip_list_format=clip_list_utils.JSON_FORMAT):
+
+    """
+    Gets JSON for the clips of a clip album page.
+
+    `clips` is an iterable of clip rows, each containing the values of
+    the clip fields named in `clip_list_utils.CLIP_LIST_FIELD_NAMES`.
+
+    For the JSON clip list format the result is a JSON array of clip
+    lists. For the binary format it is a JSON object whose "format"
+    property is "binary" and whose "data" property is the base64
+    encoding of the binary clip list.
+    """
+
+    if clip_list_format == clip_list_utils.BINARY_FORMAT:
+        data = clip_list_utils.encode_binary_clip_list(list(clips))
+        return json.dumps({
+            'format': clip_list_format,
+            'data': base64.b64encode(data).decode('ascii')
+        })
+
+    else:
+        return json.dumps([_get_clip_list(c) for c in clips])
 
 
-def _get_clip_list(c):
-    start_time = _format_time(c.start_time)
-    return [c.id, c.start_index, c.length, c.sample_rate, start_time]
+def _get_clip_list(row):
+    clip_id, start_index, length, sample_rate, start_time = row
+    start_time = _format_time(start_time)
+    return [clip_id, start_index, length, sample_rate, start_time]
 
 
 def _format_time(time):
@@ -2038,15 +2285,12 @@ def clip_album(request):
 
     d = _get_clip_filter_data(params, preferences)
 
-    station, mic_output = d.sm_pair
-    clips = model_utils.get_clips(
-        station=station,
-        mic_output=mic_output,
-        detector=d.detector,
-        annotation_name=d.annotation_name,
-        annotation_value=d.annotation_value,
-        tag_name=d.tag_name)
-    clips_json = _get_clips_json(clips, station)
+    station, _ = d.sm_pair
+
+    # We do not include the album's clips in the page, since there may
+    # be very many of them. Instead, the page gets them from the
+    # `get_clips` view, one page of clips at a time.
+    clips_json = 'null'
     
     page_num = params.get('page', 1)
 
@@ -2080,6 +2324,178 @@ def clip_album(request):
     return _render_clip_album(request, context)
 
 
+def get_clips(request):
+
+    """
+    Gets one page of the clips of a clip album.
+
+    The clip album is specified by the "station_mic", "detector",
+    "classification", and "tag" query parameters, just as for the
+    `clip_album` view. The clips are ordered by start time and ID, and
+    pages are delimited using keyset pagination. The optional "cursor"
+    query parameter is the cursor returned with the previous page,
+    and is omitted to get the first page. The optional "limit" query
+    parameter is the maximum number of clips to return. The optional
+    "format" query parameter is the clip list format of the response,
+    either "json" (the default) or "binary".
+
+    A JSON response is a JSON object with the following properties:
+
+        clips - a list of clips, each represented as a list of the
+            form [ID, start index, length, sample rate, start time].
+
+        nextCursor - the cursor for the next page, or `null` if this
+            is the last page.
+
+        clipCount - the total number of clips of the album, included
+            only in the response for the first page. The count is
+            obtained from the archive's clip count table rather than
+            by counting clips.
+
+    A binary response has content type "application/octet-stream" and
+    contains a binary clip list as described in the `clip_list_utils`
+    module. The next cursor and the clip count are included in the
+    "Vesper-Next-Cursor" and "Vesper-Clip-Count" response headers,
+    either of which is omitted when the corresponding JSON property
+    would be `null` or omitted.
+    """
+
+    if request.method not in _GET_AND_HEAD:
+        return HttpResponseNotAllowed(_GET_AND_HEAD)
+
+    params = request.GET
+
+    try:
+        cursor = _parse_clip_cursor(params.get('cursor'))
+        limit = _parse_clip_page_limit(params.get('limit'))
+        clip_list_format = _parse_clip_list_format(
+            params.get('format'), clip_list_utils.JSON_FORMAT)
+    except ValueError as e:
+        return HttpResponseBadRequest(reason=str(e))
+
+    if not settings.VESPER_PREFERENCES_STATIC:
+        preference_manager.reload_preferences()
+
+    d = _get_clip_filter_data(params, preference_manager.preferences)
+
+    station, mic_output = d.sm_pair
+
+    clips = model_utils.get_clips(
+        station=station,
+        mic_output=mic_output,
+        detector=d.detector,
+        annotation_name=d.annotation_name,
+        annotation_value=d.annotation_value,
+        tag_name=d.tag_name,
+        order=False)
+
+    if cursor is not None:
+        start_time, clip_id = cursor
+        clips = clips.filter(
+            Q(start_time__gt=start_time) |
+            Q(start_time=start_time, id__gt=clip_id))
+
+    clips = clips.order_by('start_time', 'id')
+    clips = clips.values_list(*clip_list_utils.CLIP_LIST_FIELD_NAMES)
+    clips = list(clips[:limit])
+
+    if len(clips) == limit:
+        next_cursor = _format_clip_cursor(clips[-1])
+    else:
+        next_cursor = None
+
+    if cursor is None:
+        counts = model_utils.get_clip_counts(
+            station, mic_output, d.detector, d.annotation_name,
+            d.annotation_value, d.tag_name)
+        clip_count = sum(counts.values())
+    else:
+        clip_count = None
+
+    if clip_list_format == clip_list_utils.BINARY_FORMAT:
+
+        response = HttpResponse(
+            clip_list_utils.encode_binary_clip_list(clips),
+            content_type='application/octet-stream')
+
+        if next_cursor is not None:
+            response['Vesper-Next-Cursor'] = next_cursor
+
+        if clip_count is not None:
+            response['Vesper-Clip-Count'] = str(clip_count)
+
+        return response
+
+    else:
+
+        content = {
+            'clips': [_get_clip_list(c) for c in clips],
+            'nextCursor': next_cursor
+        }
+
+        if clip_count is not None:
+            content['clipCount'] = clip_count
+
+        return JsonResponse(content)
+
+
+_DEFAULT_CLIP_PAGE_LIMIT = 10000
+_MAX_CLIP_PAGE_LIMIT = 100000
+
+
+def _parse_clip_cursor(cursor):
+
+    # A cursor has the form "<start time>,<clip ID>", where the start
+    # time is in ISO 8601 format with full precision.
+
+    if cursor is None:
+        return None
+
+    try:
+        start_time, clip_id = cursor.rsplit(',', 1)
+        return datetime.datetime.fromisoformat(start_time), int(clip_id)
+    except Exception:
+        raise ValueError(f'Bad clip cursor "{cursor}".')
+
+
+def _format_clip_cursor(row):
+    clip_id = row[0]
+    start_time = row[-1]
+    return f'{start_time.isoformat()},{clip_id}'
+
+
+def _parse_clip_list_format(clip_list_format, default):
+
+    if clip_list_format is None:
+        return default
+
+    if clip_list_format not in clip_list_utils.FORMATS:
+        formats = ', '.join(f'"{f}"' for f in clip_list_utils.FORMATS)
+        raise ValueError(
+            f'Unrecognized clip list format "{clip_list_format}". '
+            f'Format must be one of {formats}.')
+
+    return clip_list_format
+
+
+def _parse_clip_page_limit(limit):
+
+    if limit is None:
+        return _DEFAULT_CLIP_PAGE_LIMIT
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 0
+
+    if limit < 1 or limit > _MAX_CLIP_PAGE_LIMIT:
+        raise ValueError(
+            f'Clip page limit must be an integer between 1 and '
+            f'{_MAX_CLIP_PAGE_LIMIT}.')
+
+    return limit
+
+
 def _get_clip_filter_data(params, preferences):
     
     sm_pairs = model_utils.get_station_mic_output_pairs_list()
@@ -2373,10 +2789,44 @@ def job(request, job_id):
     return render(request, 'vesper/job.html', context)
 
 
+def job_metrics(request, job_id):
+    
+    """
+    Gets the progress and throughput metrics of a job as JSON.
+    
+    See the `vesper.command.job_metrics.get_job_metrics` function for
+    a description of the metrics.
+    """
+    
+    if request.method not in _GET_AND_HEAD:
+        return HttpResponseNotAllowed(_GET_AND_HEAD)
+    
+    job = get_object_or_404(Job, pk=job_id)
+    return JsonResponse(get_job_metrics(job))
+
+
 def health_check(request):
     return HttpResponse('Hello from Vesper!')
 
 
+def s3_latency_stats(request):
+    
+    """
+    Gets S3 clip audio file read latency statistics as JSON.
+    
+    See the `vesper.util.clip_manager.ClipManager.get_s3_latency_stats`
+    method for a description of the statistics. The response is an
+    empty object if S3 clip storage is not in use or no clip audio
+    files have yet been read from S3.
+    """
+    
+    if request.method not in _GET_AND_HEAD:
+        return HttpResponseNotAllowed(_GET_AND_HEAD)
+    
+    stats = clip_manager.get_s3_latency_stats()
+    return JsonResponse({} if stats is None else stats)
+
+
 def about_vesper(request):
 
     if request.method not in _GET_AND_HEAD:
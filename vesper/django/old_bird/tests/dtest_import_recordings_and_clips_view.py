@@ -1,7 +1,9 @@
 import json
 
-from vesper.django.app.models import AnnotationInfo, Clip, Recording
+from vesper.django.app.models import (
+    AnnotationInfo, Clip, ClipCount, Recording)
 from vesper.django.app.tests.dtest_case import TestCase
+import vesper.django.app.clip_count_utils as clip_count_utils
 
 
 _URL = '/import-recordings-and-clips/'
@@ -297,6 +299,38 @@ class ImportRecordingsAndClipsViewTests(TestCase):
             })
        
 
+    def test_clip_counts(self):
+
+        self._log_in_as_test_user()
+
+        self._do_post_requests([
+            ({
+                'recordings': [_RECORDING_1],
+                'clips': [_CLIP_1, _CLIP_2, _CLIP_1]
+            }, {
+                'recordings': [{'id': 1, 'created': True}],
+                'clips': [
+                    {'id': 1, 'created': True},
+                    {'id': 2, 'created': True},
+                    {'id': 1, 'created': False}
+                ]
+            })
+        ])
+
+        counts = _get_clip_counts()
+
+        # Each created clip should be counted once, and each of its
+        # annotations once.
+        self.assertEqual(counts[(None, None)], 2)
+        self.assertEqual(counts[('Classification', 'Tseep')], 1)
+        self.assertEqual(counts[('Classification', 'Thrush')], 1)
+        self.assertEqual(counts[('Bobo', 'Bobo')], 1)
+
+        # Rebuilding counts should not change them.
+        clip_count_utils.rebuild_clip_counts()
+        self.assertEqual(_get_clip_counts(), counts)
+
+
     def test_missing_recording_item_error(self):
 
         for item_name in (
@@ -503,3 +537,9 @@ class ImportRecordingsAndClipsViewTests(TestCase):
         
         self._test_clip_creation_error(
             request_data, clip_info, expected_error_message)
+
+
+def _get_clip_counts():
+    counts = ClipCount.objects.filter(tag_info=None).values_list(
+        'annotation_info__name', 'annotation_value', 'count')
+    return dict(((name, value), count) for name, value, count in counts)
@@ -9,6 +9,7 @@ from django.views import View
 from vesper.django.app.models import (
     AnnotationInfo, Clip, Device, DeviceOutput, Processor, Recording,
     RecordingChannel, Station)
+import vesper.django.app.clip_count_utils as clip_count_utils
 import vesper.django.app.model_utils as model_utils
 import vesper.django.util.view_utils as view_utils
 import vesper.util.signal_utils as signal_utils
@@ -261,6 +262,11 @@ class ImportRecordingsAndClipsView(View):
             if created:
                 # clip did not already exist
 
+                # Add clip to clip counts. We do this before annotating
+                # the clip since `annotate_clip` updates the counts for
+                # its annotations.
+                clip_count_utils.increment_clip_counts([clip.id])
+
                 # Create clip annotations.
                 annotations = info.get('annotations', {})
 
@@ -26,6 +26,7 @@ from pathlib import Path
 from environs import Env
 
 import vesper.util.logging_utils as logging_utils
+import vesper.util.sqlite_utils as sqlite_utils
 
 
 # TODO: Set server-wide logging level here. The logging level is currently
@@ -196,6 +197,34 @@ VESPER_ARCHIVE_DATABASE_URL = env.dj_db_url(
     f'sqlite:///{VESPER_ARCHIVE_DIR_PATH}/Archive Database.sqlite')
 
 
+# Whether or not the archive is read-only. We get this setting here
+# instead of with the other Vesper settings below so we can use it in
+# the SQLite settings of the archive database.
+VESPER_ARCHIVE_READ_ONLY = env.bool('VESPER_ARCHIVE_READ_ONLY', False)
+
+
+# The SQLite performance profile of the archive database, and PRAGMA
+# settings that override or add to those of the profile, for example
+# "cache_size=-131072,mmap_size=1073741824". These settings apply only
+# to SQLite archive databases, and are applied to each database
+# connection when it is opened. See the `vesper.util.sqlite_utils`
+# module for descriptions of the profiles.
+VESPER_ARCHIVE_DATABASE_SQLITE_PROFILE = env(
+    'VESPER_ARCHIVE_DATABASE_SQLITE_PROFILE',
+    sqlite_utils.DEFAULT_PROFILE_NAME)
+
+VESPER_ARCHIVE_DATABASE_SQLITE_PRAGMAS = env.dict(
+    'VESPER_ARCHIVE_DATABASE_SQLITE_PRAGMAS', {})
+
+if VESPER_ARCHIVE_DATABASE_URL['ENGINE'] == 'django.db.backends.sqlite3':
+    _sqlite_pragmas = sqlite_utils.get_pragmas(
+        VESPER_ARCHIVE_DATABASE_SQLITE_PROFILE,
+        VESPER_ARCHIVE_DATABASE_SQLITE_PRAGMAS,
+        VESPER_ARCHIVE_READ_ONLY)
+    VESPER_ARCHIVE_DATABASE_URL.setdefault('OPTIONS', {}).setdefault(
+        'init_command', sqlite_utils.get_init_command(_sqlite_pragmas))
+
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 DATABASES = {
@@ -203,10 +232,13 @@ DATABASES = {
 }
 
 
-VESPER_ARCHIVE_READ_ONLY = env.bool('VESPER_ARCHIVE_READ_ONLY', False)
-
 VESPER_PRESETS_STATIC = env.bool('VESPER_PRESETS_STATIC', True)
 
 VESPER_PREFERENCES_STATIC = env.bool('VESPER_PREFERENCES_STATIC', True)
 
 VESPER_ADMIN_URL_PATTERN = env('VESPER_ADMIN_URL_PATTERN', 'admin/')
+
+# The number of worker processes that run Vesper jobs, i.e. the
+# maximum number of jobs that can run at once. See the
+# `vesper.command.job_manager` module for more about job workers.
+VESPER_JOB_WORKER_COUNT = env.int('VESPER_JOB_WORKER_COUNT', 2)
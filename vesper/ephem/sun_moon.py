@@ -12,6 +12,7 @@ import heapq
 
 from skyfield import almanac
 from skyfield.api import Topos, load, load_file
+import numpy as np
 
 from vesper.util.lru_cache import LruCache
 
@@ -264,6 +265,14 @@ class SunMoon:
     Methods that have `datetime` arguments require that those arguments
     be time-zone-aware.
     
+    The `get_solar_position`, `get_solar_date`, `get_solar_period_name`,
+    `get_lunar_position`, and `get_lunar_illumination` methods accept
+    either a single `datetime` or an iterable of them. Given an
+    iterable, they compute their results for all of the times at once,
+    with a small, fixed number of Skyfield calls rather than one or
+    more calls per time. This is much faster for large numbers of
+    times.
+    
     Several of the methods of this class cache results to improve the
     efficiency of repeated invocations with the same arguments. These
     methods are:
@@ -587,7 +596,7 @@ class SunMoon:
             
             # Asume `time` is a `DateTime` iterable.
             
-            return [self._get_solar_date(t, day) for t in time]
+            return self._get_solar_dates(time, day)
     
     
     def _get_solar_date(self, time, day):
@@ -614,6 +623,84 @@ class SunMoon:
             return date + _ONE_DAY
     
     
+    def _get_solar_dates(self, times, day):
+        
+        """
+        Gets the solar dates of an iterable of times.
+        
+        Rather than getting solar transit events for each time as
+        `_get_solar_date` does, this method gets a table of the start
+        times of the solar days or nights of all of the times with one
+        Skyfield search, and then looks up the solar dates of the times
+        in the table with `numpy.searchsorted`.
+        """
+        
+        times = list(times)
+        
+        if len(times) == 0:
+            return []
+        
+        for time in times:
+            _check_time_zone_awareness(time)
+        
+        # As in `_get_solar_date`, the solar date of a time is either
+        # the calendar date of the time or the preceding or following
+        # date.
+        dates = [time.date() for time in times]
+        start_date = min(dates) - _ONE_DAY
+        end_date = max(dates) + _ONE_DAY
+        
+        table_dates, start_times = \
+            self._get_solar_date_table(start_date, end_date, day)
+        
+        times = np.array([time.timestamp() for time in times])
+        indices = np.searchsorted(start_times, times, side='right') - 1
+        
+        return [table_dates[i] for i in indices]
+    
+    
+    def _get_solar_date_table(self, start_date, end_date, day):
+        
+        """
+        Gets the dates from `start_date` through `end_date` and the
+        POSIX start times of their solar days or nights.
+        """
+        
+        # Get the start times of the solar transit event search
+        # intervals that `_get_solar_transit_events_aux` would use
+        # for the dates.
+        date_count = (end_date - start_date).days + 1
+        dates = [start_date + i * _ONE_DAY for i in range(date_count)]
+        start_offset = TimeDelta(hours=-4 if day else 8)
+        interval_start_times = [
+            DateTime(d.year, d.month, d.day, tzinfo=self.time_zone) +
+            start_offset
+            for d in dates]
+        
+        # Get solar transit events in the union of the intervals.
+        start_time = self._timescale.from_datetime(interval_start_times[0])
+        end_time = self._timescale.from_datetime(
+            interval_start_times[-1] + TimeDelta(hours=32))
+        times, codes = almanac.find_discrete(
+            start_time, end_time, self._solar_transit_function)
+        
+        # Get times of solar midnights (for days) or noons (for nights),
+        # i.e. of transit events that start solar days or nights.
+        start_code = 0 if day else 1
+        event_times = np.array([
+            t.timestamp()
+            for t, code in zip(times.utc_datetime(), codes)
+            if code == start_code])
+        
+        # The solar day or night of a date starts with the first such
+        # event of the date's search interval.
+        interval_start_times = np.array(
+            [t.timestamp() for t in interval_start_times])
+        indices = np.searchsorted(event_times, interval_start_times)
+        
+        return dates, event_times[indices]
+    
+    
     def get_solar_events(self, date, name_filter=None, day=True):
         
         self._check_for_polar_location('get solar events')
@@ -812,20 +899,54 @@ class SunMoon:
         
         self._check_for_polar_location('get solar period name')
 
-        arg = self._get_skyfield_time(time)
-        period_codes = self._solar_period_function(arg)
-        
-        if len(period_codes.shape) == 0:
+        if isinstance(time, DateTime):
             # getting period name for single time
             
-            return self._get_solar_period_name(period_codes, time)
+            arg = self._get_scalar_skyfield_time(time)
+            period_code = self._solar_period_function(arg)
+            return self._get_solar_period_name(period_code, time)
         
         else:
             # getting period names for iterable of times
             
-            return [
-                self._get_solar_period_name(c, t)
-                for c, t in zip(period_codes, time)]
+            return self._get_solar_period_names(time)
+    
+    
+    def _get_solar_period_names(self, times):
+        
+        """
+        Gets the solar period names of an iterable of times.
+        
+        This method gets the period codes of all of the times with one
+        Skyfield call, and then determines whether it is morning or
+        evening at all of the twilight times at once with
+        `_get_mornings`.
+        """
+        
+        times = list(times)
+        
+        if len(times) == 0:
+            return []
+        
+        arg = self._get_vector_skyfield_time(times)
+        period_codes = self._solar_period_function(arg)
+        
+        names = [_SOLAR_PERIOD_NAMES[float(c)] for c in period_codes]
+        
+        twilight_indices = [
+            i for i, name in enumerate(names)
+            if name != 'Day' and name != 'Night']
+        
+        if len(twilight_indices) != 0:
+            
+            mornings = self._get_mornings(
+                [times[i] for i in twilight_indices])
+            
+            for i, morning in zip(twilight_indices, mornings):
+                prefix = 'Morning' if morning else 'Evening'
+                names[i] = f'{prefix} {names[i]}'
+        
+        return names
     
     
     def _get_skyfield_time(self, arg):
@@ -953,6 +1074,44 @@ class SunMoon:
             return 'Evening'
     
     
+    def _get_mornings(self, times):
+        
+        """
+        Returns whether it's morning or evening at each of a list of
+        times.
+        
+        This is a vector version of `_get_morning_or_evening`. It
+        returns a NumPy boolean array that is `True` for morning times
+        and `False` for evening ones. It gets the sun's altitudes at
+        all of the times, and one second before and after them, with
+        one Skyfield call. It falls back on `_get_morning_or_evening`
+        for the (rare) times at which the altitude is not strictly
+        increasing or decreasing over those two seconds.
+        """
+        
+        td = TimeDelta(seconds=1)
+        all_times = \
+            times + [t - td for t in times] + [t + td for t in times]
+        
+        altitudes = self.get_solar_position(all_times).altitude
+        altitude, altitude_before, altitude_after = \
+            altitudes.reshape(3, len(times))
+        
+        delta_before = altitude - altitude_before
+        delta_after = altitude_after - altitude
+        
+        increasing = (delta_before > 0) & (delta_after > 0)
+        decreasing = (delta_before < 0) & (delta_after < 0)
+        
+        mornings = increasing
+        
+        for i in np.flatnonzero(~(increasing | decreasing)):
+            mornings[i] = \
+                self._get_morning_or_evening(times[i]) == 'Morning'
+        
+        return mornings
+    
+    
     # The following is an older version of the `_get_solar_period_name`
     # method. It assumes that solar noons and midnights coincide with
     # altitude maxima and minima, which is nearly but not exactly true.
@@ -537,6 +537,27 @@ class SunMoonTests(TestCase):
         self.assertEqual(len(actual_names), len(expected_names))
         for actual, expected in zip(actual_names, expected_names):
             self.assertEqual(actual, expected)
+    
+    
+    def test_vector_and_scalar_results_agree(self):
+        
+        # Every ten minutes for three days.
+        start_time = _utc(2020, 10, 1)
+        times = [start_time + TimeDelta(minutes=10 * i) for i in range(432)]
+        
+        sun_moon = self.sun_moon
+        
+        for day in (True, False):
+            expected = [sun_moon.get_solar_date(t, day) for t in times]
+            actual = sun_moon.get_solar_date(times, day)
+            self.assertEqual(actual, expected)
+            
+        expected = [sun_moon.get_solar_period_name(t) for t in times]
+        actual = sun_moon.get_solar_period_name(iter(times))
+        self.assertEqual(actual, expected)
+        
+        self.assertEqual(sun_moon.get_solar_date([]), [])
+        self.assertEqual(sun_moon.get_solar_period_name([]), [])
         
         
     def test_get_lunar_position(self):
@@ -19,7 +19,6 @@ from vesper.django.app.models import AnnotationInfo
 from vesper.mpg_ranch.nfc_bounding_interval_annotator_1_0.inferrer \
     import Inferrer
 from vesper.singleton.clip_manager import clip_manager
-import vesper.django.app.model_utils as model_utils
 import vesper.mpg_ranch.nfc_bounding_interval_annotator_1_0.dataset_utils \
     as dataset_utils
 import vesper.util.open_mp_utils as open_mp_utils
@@ -76,6 +75,9 @@ class Annotator(AnnotatorBase):
                
         self._annotation_infos = _get_annotation_infos()
         
+        self._classification_annotation_info = \
+            _get_annotation_info(_CLASSIFICATION_ANNOTATION_NAME)
+        
  
     def annotate_clips(self, clips):
         
@@ -109,6 +111,8 @@ class Annotator(AnnotatorBase):
                     
                 annotated_clip_count += len(clips)
                 
+        self._flush_annotations()
+        
         return annotated_clip_count
         
         
@@ -117,12 +121,17 @@ class Annotator(AnnotatorBase):
         """Gets a mapping from clip types to lists of call clips."""
         
         
+        # Get clip classifications and types in bulk rather than with
+        # several queries per clip.
+        classifications = self._get_annotation_values(
+            clips, self._classification_annotation_info)
+        clips = [c for c in clips if _is_call(classifications.get(c.id))]
+        clip_types = self._get_clip_types(clips)
+        
         # Get mapping from clip types to call clip lists.
         clip_lists = defaultdict(list)
         for clip in clips:
-            if _is_call_clip(clip):
-                clip_type = model_utils.get_clip_type(clip)
-                clip_lists[clip_type].append(clip)
+            clip_lists[clip_types[clip.id]].append(clip)
         
         return clip_lists
     
@@ -184,11 +193,7 @@ class Annotator(AnnotatorBase):
         annotation_info = self._annotation_infos[annotation_name]
         annotation_value = str(index)
         
-        model_utils.annotate_clip(
-            clip, annotation_info, annotation_value,
-            creating_user=self._creating_user,
-            creating_job=self._creating_job,
-            creating_processor=self._creating_processor)
+        self._buffer_annotation(clip, annotation_value, annotation_info)
         
         
 def _create_inferrer(clip_type):
@@ -209,9 +214,7 @@ def _get_annotation_info(name):
         raise ValueError(f'Unrecognized annotation "{name}".')
 
 
-def _is_call_clip(clip):
-    annotations = model_utils.get_clip_annotations(clip)
-    classification = annotations.get(_CLASSIFICATION_ANNOTATION_NAME)
+def _is_call(classification):
     return classification is not None and classification.startswith('Call')
 
 
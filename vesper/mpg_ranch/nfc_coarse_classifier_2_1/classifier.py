@@ -25,6 +25,7 @@ from vesper.util.settings import Settings
 import vesper.django.app.model_utils as model_utils
 import vesper.mpg_ranch.nfc_coarse_classifier_2_1.classifier_utils as \
     classifier_utils
+import vesper.util.model_cache as model_cache
 import vesper.util.open_mp_utils as open_mp_utils
 import vesper.util.yaml_utils as yaml_utils
 
@@ -90,7 +91,8 @@ class _Classifier:
         from tensorflow import keras
         
         path = classifier_utils.get_model_file_path(self._clip_type)
-        return keras.models.load_model(str(path))
+        return model_cache.get_model(
+            path, lambda: keras.models.load_model(str(path)))
     
     
     def _load_settings(self):
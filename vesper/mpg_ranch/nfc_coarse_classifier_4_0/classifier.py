@@ -126,6 +126,8 @@ class Classifier(Annotator):
                 
                 num_clips_classified += self._annotate_clips(clips, classifier)
                 
+        self._flush_annotations()
+        
         return num_clips_classified
                 
                 
@@ -134,16 +136,23 @@ class Classifier(Annotator):
         """Gets a mapping from clip types to lists of clips to classify."""
         
         
+        # Get existing annotation values and clip types in bulk rather
+        # than with several queries per clip.
+        
+        if _EVALUATION_MODE_ENABLED:
+            clips = list(clips)
+            
+        else:
+            annotation_values = self._get_annotation_values(clips)
+            clips = [
+                c for c in clips if annotation_values.get(c.id) is None]
+            
+        clip_types = self._get_clip_types(clips)
+        
         clip_lists = defaultdict(list)
         
         for clip in clips:
-            
-            if _EVALUATION_MODE_ENABLED or \
-                    self._get_annotation_value(clip) is None:
-                # clip should be classified
-                
-                clip_type = model_utils.get_clip_type(clip)
-                clip_lists[clip_type].append(clip)
+            clip_lists[clip_types[clip.id]].append(clip)
                 
         return clip_lists
  
@@ -172,7 +181,7 @@ class Classifier(Annotator):
                         old_classification, auto_classification, score)
                     
                     if new_classification is not None:
-                        self._annotate(clip, new_classification)
+                        self._buffer_annotation(clip, new_classification)
                         num_clips_classified += 1
                         
                     self._set_clip_score(clip, score)
@@ -180,7 +189,7 @@ class Classifier(Annotator):
                 else:
                     # normal mode
                     
-                    self._annotate(clip, auto_classification)
+                    self._buffer_annotation(clip, auto_classification)
                     num_clips_classified += 1
                         
         return num_clips_classified
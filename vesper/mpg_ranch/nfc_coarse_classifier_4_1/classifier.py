@@ -36,6 +36,7 @@ import vesper.mpg_ranch.nfc_coarse_classifier_4_1.classifier_utils as \
     classifier_utils
 import vesper.mpg_ranch.nfc_coarse_classifier_4_1.dataset_utils as \
     dataset_utils
+import vesper.util.model_cache as model_cache
 import vesper.util.open_mp_utils as open_mp_utils
 import vesper.util.signal_utils as signal_utils
 import vesper.util.yaml_utils as yaml_utils
@@ -134,6 +135,8 @@ class Classifier(Annotator):
                 
                 num_clips_classified += self._annotate_clips(clips, classifier)
                 
+        self._flush_annotations()
+        
         return num_clips_classified
                 
                 
@@ -142,16 +145,23 @@ class Classifier(Annotator):
         """Gets a mapping from clip types to lists of clips to classify."""
         
         
+        # Get existing annotation values and clip types in bulk rather
+        # than with several queries per clip.
+        
+        if _EVALUATION_MODE_ENABLED:
+            clips = list(clips)
+            
+        else:
+            annotation_values = self._get_annotation_values(clips)
+            clips = [
+                c for c in clips if annotation_values.get(c.id) is None]
+            
+        clip_types = self._get_clip_types(clips)
+        
         clip_lists = defaultdict(list)
         
         for clip in clips:
-            
-            if _EVALUATION_MODE_ENABLED or \
-                    self._get_annotation_value(clip) is None:
-                # clip should be classified
-                
-                clip_type = model_utils.get_clip_type(clip)
-                clip_lists[clip_type].append(clip)
+            clip_lists[clip_types[clip.id]].append(clip)
                 
         return clip_lists
  
@@ -180,7 +190,7 @@ class Classifier(Annotator):
                         old_classification, auto_classification, score)
                     
                     if new_classification is not None:
-                        self._annotate(clip, new_classification)
+                        self._buffer_annotation(clip, new_classification)
                         num_clips_classified += 1
                         
                     self._set_clip_score(clip, score)
@@ -188,7 +198,7 @@ class Classifier(Annotator):
                 else:
                     # normal mode
                     
-                    self._annotate(clip, auto_classification)
+                    self._buffer_annotation(clip, auto_classification)
                     num_clips_classified += 1
                         
         return num_clips_classified
@@ -320,8 +330,7 @@ class _Classifier:
     
     def _load_model(self):
         path = classifier_utils.get_keras_model_file_path(self.clip_type)
-        logging.info(f'Loading classifier model from "{path}"...')
-        return tf.keras.models.load_model(path)
+        return model_cache.get_model(path, lambda: _load_model(path))
 
     
     def _load_settings(self):
@@ -442,3 +451,8 @@ class _Classifier:
             classification = 'Noise'
 
         return clips[index], classification, score
+
+
+def _load_model(path):
+    logging.info(f'Loading classifier model from "{path}"...')
+    return tf.keras.models.load_model(path)
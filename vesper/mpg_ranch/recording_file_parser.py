@@ -181,7 +181,7 @@ class _VesperRecorderFileNameParser(_FileNameParser):
         r'(?P<year>\d\d\d\d)-(?P<month>\d\d)-(?P<day>\d\d)'
         r'_'
         r'(?P<hour>\d\d)\.(?P<minute>\d\d)\.(?P<second>\d\d)_Z'
-        r'\.(?:wav|WAV)'
+        r'\.(?:wav|WAV|flac|FLAC)'
         r'$')
     
     
@@ -209,7 +209,7 @@ class _SongMeterFileNameParser0(_FileNameParser):
         r'(?P<year>\d\d\d\d)(?P<month>\d\d)(?P<day>\d\d)'
         r'_'
         r'(?P<hour>\d\d)(?P<minute>\d\d)(?P<second>\d\d)'
-        r'\.(?:wav|WAV)'
+        r'\.(?:wav|WAV|flac|FLAC)'
         r'$')
     
     
@@ -235,7 +235,7 @@ class _SongMeterFileNameParser1(_FileNameParser):
         r'(?P<year>\d\d\d\d)(?P<month>\d\d)(?P<day>\d\d)'
         r'(_|\$)'
         r'(?P<hour>\d\d)(?P<minute>\d\d)(?P<second>\d\d)'
-        r'\.(?:wav|WAV)'
+        r'\.(?:wav|WAV|flac|FLAC)'
         r'$')
     
     
@@ -271,7 +271,7 @@ class _SongMeterFileNameParser2(_FileNameParser):
         r'(?P<hour>\d\d)(?P<minute>\d\d)(?P<second>\d\d)'
         r'_'
         r'(?P<fraction>\d\d\d)'
-        r'\.(?:wav|WAV)'
+        r'\.(?:wav|WAV|flac|FLAC)'
         r'$')
     
     
@@ -303,7 +303,7 @@ class _MpgRanchFileNameParser0(_FileNameParser):
         r'_'
         r'(?P<hour>\d\d)(?P<minute>\d\d)(?P<second>\d\d)'
         r'(_.+)'      # trailing comment
-        r'\.(?:wav|WAV)'
+        r'\.(?:wav|WAV|flac|FLAC)'
         r'$')
 
     
@@ -332,7 +332,7 @@ class _MpgRanchFileNameParser1(_FileNameParser):
         r'(?P<year>\d\d\d\d)(?P<month>\d\d)(?P<day>\d\d)'
         r'(_|\$)'
         r'(?P<hour>\d\d)(?P<minute>\d\d)(?P<second>\d\d)'
-        r'\.(?:wav|WAV)'
+        r'\.(?:wav|WAV|flac|FLAC)'
         r'$')
     
     
@@ -370,7 +370,7 @@ class _MpgRanchFileNameParser2(_FileNameParser):
         r'_'
         r'(\d{6})'    # hhmmss recording duration
         r'(_.+)?'     # optional trailing comment
-        r'\.(?:wav|WAV)'
+        r'\.(?:wav|WAV|flac|FLAC)'
         r'$')
 
     
@@ -395,7 +395,7 @@ class _MpgRanchFileNameParser3(_FileNameParser):
         r'_'
         r'(?P<hour>\d\d)(?P<minute>\d\d)(?P<second>\d\d)'
         r'_000'
-        r'(__22050)?\.(?:wav|WAV)'
+        r'(__22050)?\.(?:wav|WAV|flac|FLAC)'
         r'$')
 
     
@@ -417,7 +417,7 @@ class _EasyHiQRecorderFileNameParser(_FileNameParser):
         r'(?P<hour>\d\d?);(?P<minute>\d\d);(?P<second>\d\d)'
         r'_'
         r'(?P<period>AM|PM)'
-        r'\.(?:wav|WAV)'
+        r'\.(?:wav|WAV|flac|FLAC)'
         r'$')
     
     
@@ -583,7 +583,7 @@ class RecordingFileParser:
     def _get_audio_file_info(self, file_path):
 
         try:
-            info = audio_file_utils.get_wave_file_info(file_path)
+            info = audio_file_utils.get_audio_file_info(file_path)
                 
         except Exception as e:
             raise ValueError((
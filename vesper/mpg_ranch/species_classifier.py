@@ -40,13 +40,50 @@ class SpeciesClassifier(Annotator):
             if clip_type == 'Tseep':
                 # clip was detected by Old Bird Tseep
                 
-                classification = self._classifier.classify_clip(clip)
-                
-                if classification is not None:
-                    self._annotate(clip, classification)
-                    annotated = True
+                annotated = self._classify_tseep_call_clip(clip)
                     
         return annotated
+    
+    
+    def annotate_clips(self, clips):
+        
+        """
+        Annotates the specified clips.
+        
+        This method is equivalent to calling `annotate` for each of
+        the clips, but gets the clips' classifications and types in
+        bulk rather than with several queries per clip.
+        """
+        
+        
+        classifications = self._get_annotation_values(clips)
+        clips = [c for c in clips if classifications.get(c.id) == 'Call']
+        clip_types = self._get_clip_types(clips)
+        
+        annotated_count = 0
+        
+        for clip in clips:
+            
+            if clip_types[clip.id] == 'Tseep' and \
+                    self._classify_tseep_call_clip(clip):
+                
+                annotated_count += 1
+                
+        self._flush_annotations()
+        
+        return annotated_count
+    
+    
+    def _classify_tseep_call_clip(self, clip):
+        
+        classification = self._classifier.classify_clip(clip)
+        
+        if classification is not None:
+            self._buffer_annotation(clip, classification)
+            return True
+        
+        else:
+            return False
         
             
 def _create_classifier(name):
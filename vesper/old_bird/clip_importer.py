@@ -1,6 +1,7 @@
 """Module containing class `ClipImporter`."""
 
 
+from collections import defaultdict
 import datetime
 import logging
 import os.path
@@ -17,6 +18,7 @@ from vesper.django.app.models import (
 from vesper.singleton.clip_manager import clip_manager
 from vesper.util.bunch import Bunch
 import vesper.command.command_utils as command_utils
+import vesper.django.app.clip_count_utils as clip_count_utils
 import vesper.django.app.model_utils as model_utils
 import vesper.old_bird.clip_import_utils as clip_import_utils
 import vesper.util.audio_file_utils as audio_file_utils
@@ -266,15 +268,90 @@ class ClipImporter:
             self._logger.info(
                 'Importing clips from directory "{}"...'.format(dir_path))
             
-            for file_name in file_names:
+            imported_count = self._imported_count
+            
+            try:
                 
-                file_path = os.path.join(dir_path, file_name)
+                # Import the clips of each directory in a single
+                # transaction so we can update clip counts and
+                # annotate clips for the whole directory at once.
+                # `_import_clip` creates a savepoint for each clip
+                # so that failure to import one clip does not prevent
+                # the import of the others.
+                with transaction.atomic():
+                    
+                    self._clip_ids = []
+                    self._classified_clip_ids = defaultdict(list)
+                    self._clip_audio_files = []
+                    
+                    for file_name in file_names:
+                        
+                        file_path = os.path.join(dir_path, file_name)
+                        
+                        if file_type_utils.is_wave_file(Path(file_path)):
+                            self._process_audio_file(file_path)
+                            self._file_count += 1
+                            
+                    self._update_imported_clips()
+                    
+            except Exception as e:
                 
-                if file_type_utils.is_wave_file(Path(file_path)):
-                    self._process_audio_file(file_path)
-                    self._file_count += 1
+                self._logger.error(
+                    'Clip import failed for directory "{}" with message: '
+                    '{}'.format(dir_path, str(e)))
+                
+                # The transaction was rolled back, so forget clips
+                # and recording channels created for the directory.
+                self._imported_count = imported_count
+                self._recording_channels = self._get_recording_channels()
+                
+                continue
+            
+            # Copy clip audio files only after the transaction commits,
+            # so that a failed transaction leaves no orphaned audio
+            # files and the archive database is not locked while the
+            # files are copied.
+            self._copy_clip_audio_files()
                     
                     
+    def _update_imported_clips(self):
+        
+        clip_count_utils.increment_clip_counts(self._clip_ids)
+        
+        # We assume that any classification performed before the
+        # import was by the user who started the import.
+        creating_user = self._job.creating_user
+        
+        creation_time = time_utils.get_utc_now()
+        
+        for classification, clip_ids in self._classified_clip_ids.items():
+            model_utils.annotate_clips(
+                clip_ids, self._annotation_info, classification,
+                creation_time=creation_time, creating_user=creating_user)
+        
+        
+    def _copy_clip_audio_files(self):
+        
+        failed_clip_ids = []
+        
+        for file_path, clip in self._clip_audio_files:
+            
+            try:
+                _copy_clip_audio_file(file_path, clip)
+                
+            except Exception as e:
+                self._logger.error(
+                    'Clip audio file copy failed for file "{}", so clip '
+                    'was not imported. Error message was: {}'.format(
+                        file_path, str(e)))
+                failed_clip_ids.append(clip.id)
+                
+        if len(failed_clip_ids) != 0:
+            # Delete clips without audio files.
+            model_utils.delete_clips(failed_clip_ids)
+            self._imported_count -= len(failed_clip_ids)
+        
+        
     def _process_audio_file(self, file_path):
         
         try:
@@ -374,19 +451,15 @@ class ClipImporter:
             creating_job=self._job,
             creating_processor=info.detector)
 
-        _copy_clip_audio_file(file_path, clip)
+        # Clip counts and classifications are updated for all of the
+        # clips of a directory at once by `_update_imported_clips`, and
+        # clip audio files are copied after the clips are committed by
+        # `_copy_clip_audio_files`.
+        self._clip_ids.append(clip.id)
+        self._clip_audio_files.append((file_path, clip))
         
         if info.classification is not None:
-            
-            creation_time = time_utils.get_utc_now()
-            
-            # We assume that any classification performed before the
-            # import was by the user who started the import.
-            creating_user = self._job.creating_user
-            
-            model_utils.annotate_clip(
-                clip, self._annotation_info, info.classification,
-                creation_time=creation_time, creating_user=creating_user)
+            self._classified_clip_ids[info.classification].append(clip.id)
             
             
     def _get_station(self, dir_names):
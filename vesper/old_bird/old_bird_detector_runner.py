@@ -14,6 +14,7 @@ from django.db import transaction
 from vesper.django.app.models import Clip, Job, RecordingChannel
 from vesper.signal.wave_file_signal import WaveFileSignal
 from vesper.util.logging_utils import append_stack_trace
+import vesper.django.app.clip_count_utils as clip_count_utils
 import vesper.django.app.model_utils as model_utils
 import vesper.util.archive_lock as archive_lock
 import vesper.util.audio_file_utils as audio_file_utils
@@ -393,6 +394,9 @@ class _DetectorMonitor(Thread):
         # Sort file paths in order of detection time.
         file_paths.sort()
         
+        processed_file_paths = []
+        found_clips = []
+        
         for file_path in file_paths:
             
             # We've had problems attempting to read audio files before
@@ -406,11 +410,17 @@ class _DetectorMonitor(Thread):
             # Try to find clip in recording.
             clip_data = self._find_clip_in_recording(file_path)
             
-            # Archive clip if found.
             if clip_data is not None:
-                self._archive_clip(file_path, *clip_data)
+                found_clips.append((file_path, *clip_data))
                 
-            # Delete clip file after processing.
+            processed_file_paths.append(file_path)
+            
+        # Archive found clips.
+        if len(found_clips) != 0:
+            self._archive_clips(found_clips)
+            
+        # Delete clip files after processing.
+        for file_path in processed_file_paths:
             self._delete_file(file_path)
                 
             
@@ -502,6 +512,45 @@ class _DetectorMonitor(Thread):
             return (clip_samples, clip_start_index)
         
         
+    def _archive_clips(self, found_clips):
+        
+        """
+        Archives the specified clips.
+        
+        The clips are created in a single transaction, and clip counts
+        are updated for all of them at once. Each clip is created in
+        its own savepoint, so that failure to create one clip does not
+        prevent the creation of the others.
+        """
+        
+        clips = []
+        
+        try:
+            
+            with archive_lock.atomic():
+                
+                with transaction.atomic():
+                    
+                    for file_path, samples, start_index in found_clips:
+                        clip = self._archive_clip(
+                            file_path, samples, start_index)
+                        if clip is not None:
+                            clips.append(clip)
+                    
+                    clip_count_utils.increment_clip_counts(
+                        [clip.id for clip in clips])
+                    
+        except Exception as e:
+            self._logger.error(
+                f'Attempt to archive {len(found_clips)} {self.name} '
+                f'clips failed with message: {str(e)}. Clip files will '
+                f'be ignored.')
+        
+        else:
+            for clip in clips:
+                self._logger.info(f'Archived {self.name} clip {clip}.')
+
+
     def _archive_clip(self, file_path, samples, start_index):
         
         station = self._recording.station
@@ -521,33 +570,32 @@ class _DetectorMonitor(Thread):
         
         try:
             
-            with archive_lock.atomic():
+            with transaction.atomic():
                 
-                with transaction.atomic():
-                    
-                    clip = Clip.objects.create(
-                        station=station,
-                        mic_output=self._mic_output,
-                        recording_channel=self._recording_channel,
-                        start_index=start_index,
-                        length=length,
-                        sample_rate=self._sample_rate,
-                        start_time=start_time,
-                        end_time=end_time,
-                        date=station.get_night(start_time),
-                        creation_time=creation_time,
-                        creating_user=None,
-                        creating_job=self._job,
-                        creating_processor=self._detector
-                    )
+                clip = Clip.objects.create(
+                    station=station,
+                    mic_output=self._mic_output,
+                    recording_channel=self._recording_channel,
+                    start_index=start_index,
+                    length=length,
+                    sample_rate=self._sample_rate,
+                    start_time=start_time,
+                    end_time=end_time,
+                    date=station.get_night(start_time),
+                    creation_time=creation_time,
+                    creating_user=None,
+                    creating_job=self._job,
+                    creating_processor=self._detector
+                )
                     
         except Exception as e:
             self._logger.error(
                 f'Attempt to create clip from file "{file_path}" failed '
                 f'with message: {str(e)}. File will be ignored.')
+            return None
         
         else:
-            self._logger.info(f'Archived {self.name} clip {clip}.')
+            return clip
 
 
     def _delete_file(self, file_path):
@@ -0,0 +1,44 @@
+"""Utility functions pertaining to audio file signals."""
+
+
+from vesper.signal.flac_file_signal import FlacFileSignal
+from vesper.signal.signal_error import SignalError
+from vesper.signal.wave_file_signal import WaveFileSignal
+
+
+def is_audio_file(path):
+
+    """
+    Determines whether or not the specified path is that of an audio
+    file that can be read by an audio file signal.
+
+    The determination is made according to the file name extension.
+    """
+
+    return WaveFileSignal.is_wave_file(path) or \
+        FlacFileSignal.is_flac_file(path)
+
+
+def create_audio_file_signal(path, name=None):
+
+    """
+    Creates an audio file signal for the specified file.
+
+    The class of the signal (e.g. `WaveFileSignal` or `FlacFileSignal`)
+    is chosen according to the file name extension.
+
+    Raises
+    ------
+    SignalError
+        If the file type is not supported or the file cannot be opened.
+    """
+
+    if WaveFileSignal.is_wave_file(path):
+        return WaveFileSignal(path, name)
+
+    elif FlacFileSignal.is_flac_file(path):
+        return FlacFileSignal(path, name)
+
+    else:
+        raise SignalError(
+            f'File "{path}" is not of a supported audio file type.')
@@ -0,0 +1,184 @@
+"""Module containing class `FlacFileSignal`."""
+
+
+from pathlib import Path
+import os
+
+import numpy as np
+import soundfile
+
+from vesper.signal.audio_file_signal import AudioFileSignal
+from vesper.signal.signal_error import SignalError
+
+
+_FLAC_FILE_EXTENSIONS = frozenset(['.flac', '.FLAC'])
+
+# FLAC sample subtypes that we support, and the NumPy dtypes of the
+# samples we read for them. We currently support only 16-bit samples,
+# like `WaveFileSignal`.
+_SUBTYPE_DTYPES = {
+    'PCM_16': np.dtype('<i2'),
+}
+
+
+class FlacFileSignal(AudioFileSignal):
+
+    """
+    Signal whose samples are read from a FLAC file.
+
+    A FLAC file signal reads samples with `libsndfile` (via the
+    `soundfile` package), which in turn uses `libFLAC`. When a read
+    starts somewhere other than where the previous read stopped, the
+    signal seeks to the start of the read. `libFLAC` uses the file's
+    seek table (when there is one, as in FLAC files written by the
+    Vesper Recorder's WAVE to FLAC converter sidecar) to locate the
+    FLAC frame that contains the target sample, so random reads, like
+    clip reads, decode only a small amount of audio. When reads are
+    sequential, as they are during detection, the signal does not
+    seek at all, and simply continues decoding the stream where it
+    left off.
+    """
+
+
+    @staticmethod
+    def is_flac_file(path):
+
+        if isinstance(path, Path):
+            extension = path.suffix
+        else:
+            extension = os.path.splitext(path)[1]
+
+        return extension in _FLAC_FILE_EXTENSIONS
+
+
+    def __init__(self, file, name=None):
+
+        file, path = _get_file_and_path(file)
+
+        if path is not None:
+            _check_flac_file_path(path)
+
+        self._file_text = _get_file_text(file)
+
+        try:
+            self._reader = soundfile.SoundFile(file)
+        except Exception:
+            raise SignalError(f'Could not open {self._file_text}.')
+
+        if self._reader.format != 'FLAC':
+            self._handle_error(
+                f'{self._file_text} does not appear to be a FLAC file.')
+
+        subtype = self._reader.subtype
+
+        try:
+            dtype = _SUBTYPE_DTYPES[subtype]
+        except KeyError:
+            self._handle_error(
+                f'{self._file_text} contains samples of subtype '
+                f'"{subtype}", which is not supported.')
+
+        # Position of next sample frame that will be read from the file.
+        self._position = 0
+
+        super().__init__(
+            self._reader.frames, self._reader.samplerate,
+            self._reader.channels, dtype, name=name, file_path=path)
+
+
+    def _handle_error(self, message):
+        self.close()
+        raise SignalError(message)
+
+
+    @property
+    def is_open(self):
+        return self._reader is not None
+
+
+    def close(self):
+        if self.is_open:
+            self._reader.close()
+            self._reader = None
+
+
+    def _read(self, frame_slice, channel_slice):
+
+        if not self.is_open:
+            raise SignalError(
+                'Attempt to read samples from closed FLAC file signal.')
+
+        read_frame_count = frame_slice.stop - frame_slice.start
+
+        # Set read position if needed. We avoid seeking for sequential
+        # reads, since a seek discards the decoder state and requires
+        # decoding to restart at the beginning of a FLAC frame.
+        if frame_slice.start != self._position:
+
+            try:
+                self._reader.seek(frame_slice.start)
+            except Exception:
+                self._handle_error(
+                    f'Could not set read position for {self._file_text}.')
+
+            self._position = frame_slice.start
+
+        # Read samples.
+        try:
+            samples = self._reader.read(
+                read_frame_count, dtype=self.dtype.name, always_2d=True)
+        except Exception:
+            self._handle_error(
+                f'Could not read sample data from {self._file_text}.')
+
+        self._position += len(samples)
+
+        # Check actual read size.
+        if len(samples) != read_frame_count:
+            self._handle_error(
+                f'Sample data read yielded {len(samples)} sample frames '
+                f'rather than expected {read_frame_count} frames for '
+                f'{self._file_text}.')
+
+        # Select channels if needed.
+        read_channel_count = channel_slice.stop - channel_slice.start
+        if read_channel_count != self.channel_count:
+            samples = samples[:, channel_slice]
+
+        return samples, True
+
+
+def _get_file_and_path(file):
+
+    if isinstance(file, Path):
+        return str(file), file
+
+    elif isinstance(file, str):
+        return file, Path(file)
+
+    else:
+        # `file` should be file-like object
+
+        return file, None
+
+
+def _check_flac_file_path(path):
+
+    if not path.exists():
+        raise SignalError(f'Purported FLAC file "{path}" does not exist.')
+
+    if not path.is_file():
+        raise SignalError(f'Purported FLAC file "{path}" is not a file.')
+
+    if not FlacFileSignal.is_flac_file(path):
+        raise SignalError(f'File "{path}" does not appear to be a FLAC file.')
+
+
+def _get_file_text(file):
+
+    if isinstance(file, str):
+        suffix = f' "{file}"'
+    else:
+        suffix = ''
+
+    return f'FLAC file{suffix}'
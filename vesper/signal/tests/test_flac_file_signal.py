@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import numpy as np
+
+from vesper.signal.flac_file_signal import FlacFileSignal
+from vesper.signal.signal_error import SignalError
+from vesper.signal.tests.signal_test_case import SignalTestCase
+from vesper.signal.time_axis import TimeAxis
+import vesper.signal.audio_file_signal_utils as audio_file_signal_utils
+import vesper.signal.tests.utils as utils
+import vesper.tests.test_utils as test_utils
+
+
+_DATA_DIR_PATH = Path(test_utils.get_test_data_dir_path(__file__))
+
+
+class FlacFileSignalTests(SignalTestCase):
+
+
+    def test_init(self):
+
+        cases = [
+            ('One Channel.flac', 10, 1, 22050, '<i2'),
+            ('Two Channels.flac', 10, 2, 24000, '<i2')
+        ]
+
+        for (file_name, frame_count, channel_count, frame_rate, dtype) in \
+                cases:
+
+            file_path = _DATA_DIR_PATH / file_name
+            time_axis = TimeAxis(frame_count, frame_rate)
+            shape = (channel_count, frame_count)
+            samples = utils.create_samples(shape, dtype='<i2')
+
+            signal = FlacFileSignal(file_path, name=file_name)
+            self.assert_signal(
+                signal, file_name, time_axis, channel_count, (), dtype,
+                samples)
+
+            with FlacFileSignal(file_path) as signal:
+                self.assertTrue(signal.is_open)
+                self.assert_signal(
+                    signal, 'Signal', time_axis, channel_count, (), dtype,
+                    samples)
+
+            self.assertFalse(signal.is_open)
+
+
+    def test_random_and_sequential_reads(self):
+
+        file_path = _DATA_DIR_PATH / 'Long.flac'
+        frame_count = 100000
+        samples = (np.arange(frame_count) % 30000 - 15000).astype('<i2')
+        samples = np.stack([samples, -samples])
+
+        with FlacFileSignal(file_path) as signal:
+
+            self.assertEqual(len(signal), frame_count)
+
+            # Random reads, including backwards ones.
+            for start_index in (90000, 5, 50000, 12345, 99990):
+                actual = signal.read(start_index, 10, frame_first=False)
+                expected = samples[:, start_index:start_index + 10]
+                self.assertTrue(np.array_equal(actual, expected))
+
+            # Sequential reads, as during detection.
+            start_index = 0
+            while start_index < frame_count:
+                actual = signal.read(start_index, 7000, frame_first=False)
+                expected = samples[:, start_index:start_index + 7000]
+                self.assertTrue(np.array_equal(actual, expected))
+                start_index += actual.shape[1]
+
+
+    def test_create_audio_file_signal(self):
+
+        file_path = _DATA_DIR_PATH / 'One Channel.flac'
+        self.assertTrue(audio_file_signal_utils.is_audio_file(file_path))
+
+        with audio_file_signal_utils.create_audio_file_signal(file_path) \
+                as signal:
+            self.assertIsInstance(signal, FlacFileSignal)
+
+        self.assert_raises(
+            SignalError, audio_file_signal_utils.create_audio_file_signal,
+            _DATA_DIR_PATH / 'Empty')
+
+
+    def test_nonexistent_file_error(self):
+        file_path = _DATA_DIR_PATH / 'Nonexistent.flac'
+        self.assert_raises(SignalError, FlacFileSignal, file_path)
+
+
+    def test_empty_flac_file_error(self):
+        file_path = _DATA_DIR_PATH / 'Empty.flac'
+        self.assert_raises(SignalError, FlacFileSignal, file_path)
+
+
+    def test_closed_flac_file_read_error(self):
+        file_path = _DATA_DIR_PATH / 'One Channel.flac'
+        signal = FlacFileSignal(file_path)
+        signal.close()
+        self.assert_raises(SignalError, signal.as_frames.__getitem__, 0)
@@ -0,0 +1,4 @@
+from vesper.util.clip_audio_encoder import ClipAudioEncoder
+
+
+clip_audio_encoder = ClipAudioEncoder()
@@ -0,0 +1,4 @@
+from vesper.util.clip_spectrogram_manager import ClipSpectrogramManager
+
+
+clip_spectrogram_manager = ClipSpectrogramManager()
@@ -41,14 +41,24 @@ process should call this module's `create_lock` function, and the
 resulting lock should then be passed to other processes for them to
 use.
 
-Vesper archives that use a database engine that supports concurrent
-writes better than SQLite (perhaps PostgreSQL, for example) may not
-require this lock. In that case, we could make the value of the
-`_lock` attribute of this module an instance of our own context
-manager that can behave differently for different database back ends.
-Such a context manager might behave as the current one does when the
-database back end is SQLite, but do nothing when the back end is
-PostgreSQL.
+The lock strategy depends on the archive database back end:
+
+* For SQLite, the lock is a `multiprocessing.RLock` shared by all of
+  the processes that write to the archive.
+
+* For other back ends, including PostgreSQL, the lock does nothing,
+  so that processes (for example detection, classification, and
+  tagging jobs and the Django server) can write to the archive
+  concurrently. Code that reads and then modifies data that other
+  processes might modify concurrently must then lock the rows it
+  reads with `select_for_update`, which Django ignores for SQLite.
+  See, for example, the `vesper.django.app.clip_count_utils` module.
+
+In decorator mode, `atomic` also retries the decorated callable when
+it fails with a transient database error, i.e. an SQLite "database is
+locked" error or a PostgreSQL serialization failure or deadlock. It
+does so only when the callable is not invoked within a transaction,
+since the transaction would have to be retried as a whole.
 
 I also tried using a semaphore that allowed just two concurrent
 transactions (see commented-out code below) and setting the SQLite
@@ -67,8 +77,15 @@ transactions at all.
 
 
 from multiprocessing import RLock
+import logging
+import random
+import time
 
 from django.conf import settings
+from django.db import OperationalError, transaction
+
+
+_logger = logging.getLogger()
 
 
 class DoNothingLock:
@@ -84,6 +101,13 @@ class DoNothingLock:
 
 _lock = None
 
+_MAX_RETRY_COUNT = 5
+_INITIAL_RETRY_DELAY = .1    # seconds
+
+# PostgreSQL SQLSTATE codes of transient errors.
+_POSTGRESQL_SERIALIZATION_FAILURE = '40001'
+_POSTGRESQL_DEADLOCK_DETECTED = '40P01'
+
 
 def create_lock():
     
@@ -140,8 +164,17 @@ def atomic(arg=None):
         # obtaining archive lock.
         
         def decorated(*args, **kwargs):
-            with _lock:
-                arg(*args, **kwargs)
+            
+            if transaction.get_connection().in_atomic_block:
+                # invoked within transaction
+                
+                # We can't retry here since a transient error aborts
+                # the enclosing transaction.
+                with _lock:
+                    return arg(*args, **kwargs)
+            
+            else:
+                return _call_with_retries(arg, args, kwargs)
                 
         return decorated
     
@@ -150,3 +183,46 @@ def atomic(arg=None):
         
         raise ValueError(
             'Decorator argument does not appear to be a callable.')
+
+
+def _call_with_retries(function, args, kwargs):
+    
+    delay = _INITIAL_RETRY_DELAY
+    
+    for i in range(_MAX_RETRY_COUNT + 1):
+        
+        try:
+            with _lock:
+                return function(*args, **kwargs)
+            
+        except OperationalError as e:
+            
+            if i == _MAX_RETRY_COUNT or not _is_transient_error(e):
+                raise
+            
+            _logger.warning(
+                f'Archive database operation failed with transient error '
+                f'"{e}". Will retry in {delay:.2f} seconds.')
+            
+        # Sleep outside of lock so other processes can proceed. We
+        # randomize the delay a little so that processes that failed
+        # together don't all retry together.
+        time.sleep(delay * random.uniform(.5, 1.5))
+        delay *= 2
+        
+        
+def _is_transient_error(e):
+    
+    if 'database is locked' in str(e):
+        # SQLite lock timeout
+        
+        return True
+    
+    # Get SQLSTATE code of underlying database driver error, if any.
+    # psycopg 3 exceptions have a `sqlstate` attribute, and psycopg2
+    # exceptions have a `pgcode` attribute.
+    cause = e.__cause__
+    code = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    
+    return code in (
+        _POSTGRESQL_SERIALIZATION_FAILURE, _POSTGRESQL_DEADLOCK_DETECTED)
@@ -23,6 +23,8 @@ from vesper.util.byte_buffer import ByteBuffer
 
 
 WAVE_FILE_NAME_EXTENSION = '.wav'
+_FLAC_FILE_NAME_EXTENSIONS = ('.flac', '.FLAC')
+_FLAC_SAMPLE_SIZES = {'PCM_S8': 8, 'PCM_16': 16, 'PCM_24': 24}
 _WAVE_HEADER_SIZE = 44
 _WAVE_FMT_CHUNK_SIZE = 24
 _WAVE_RIFF_CHUNK_SIZE_OFFSET = 4
@@ -41,6 +43,37 @@ class UnsupportedAudioFileFormatError(AudioFileFormatError):
     pass
 
 
+def get_audio_file_info(path):
+    
+    """
+    Gets information about a WAVE or FLAC audio file.
+    
+    The file type is determined from the file name extension.
+    """
+    
+    if str(path).endswith(_FLAC_FILE_NAME_EXTENSIONS):
+        return get_flac_file_info(path)
+    else:
+        return get_wave_file_info(path)
+    
+    
+def get_flac_file_info(path):
+    
+    # We import `soundfile` here rather than at the top of this module
+    # so that it is not loaded unless FLAC files are used.
+    import soundfile
+    
+    info = soundfile.info(str(path))
+    
+    return Bunch(
+        num_channels=info.channels,
+        length=info.frames,
+        sample_size=_FLAC_SAMPLE_SIZES.get(info.subtype),
+        sample_rate=float(info.samplerate),
+        compression_type='FLAC',
+        compression_name=info.subtype_info)
+
+
 def get_wave_file_info(path):
     with wave.open(path, 'rb') as reader:
         return _read_header(reader, check_format=False)
@@ -0,0 +1,223 @@
+"""Module containing class `ClipAudioEncoder`."""
+
+
+from io import BytesIO
+from threading import Lock
+import zlib
+
+import numpy as np
+import soundfile
+
+from vesper.util.lru_cache import LruCache
+import vesper.util.audio_file_utils as audio_file_utils
+
+
+WAVE_ENCODING = 'wave'
+FLAC_ENCODING = 'flac'
+DELTA_ZLIB_ENCODING = 'delta-zlib'
+
+ENCODINGS = (WAVE_ENCODING, FLAC_ENCODING, DELTA_ZLIB_ENCODING)
+"""Supported clip audio encodings."""
+
+_DEFAULT_CACHE_SIZE = 2000
+"""Default maximum number of encoded clip audios to cache."""
+
+_DELTA_ZLIB_HEADER_DTYPE = np.dtype('<u4')
+_DELTA_ZLIB_SAMPLE_DTYPE = np.dtype('<i2')
+_DELTA_ZLIB_COMPRESSION_LEVEL = 6
+
+
+class ClipAudioEncoderError(Exception):
+    pass
+
+
+class ClipAudioEncoder:
+
+    """
+    Encodes clip audio for transport to clients.
+
+    A clip audio encoder gets clip audio file contents (which are
+    16-bit WAVE files) from a clip manager and encodes them in one of
+    the following encodings:
+
+    "wave"
+        The WAVE file contents themselves.
+
+    "flac"
+        A FLAC file with the same samples. FLAC files are typically
+        about half the size of the corresponding WAVE files, and are
+        decoded by the browser's `decodeAudioData` function just as
+        WAVE files are.
+
+    "delta-zlib"
+        An eight-byte header containing two little-endian, 32-bit
+        unsigned integers, the sample rate in hertz and the number of
+        samples, followed by a zlib stream that decompresses to the
+        first differences of the samples (with the first difference
+        taken to be the first sample), as little-endian, 16-bit
+        integers that wrap around on overflow. The samples are the
+        cumulative sums of the differences, again with wraparound.
+        This encoding is lossless, much cheaper to compute than FLAC,
+        and can be decoded by a client with the standard
+        `DecompressionStream` class.
+
+    Non-WAVE encodings are cached in memory in an LRU cache, keyed
+    by clip ID and encoding, so that a clip that is viewed repeatedly
+    is encoded only once.
+    """
+
+
+    def __init__(self, clip_manager=None, cache_size=_DEFAULT_CACHE_SIZE):
+
+        if clip_manager is None:
+            from vesper.singleton.clip_manager import clip_manager
+
+        self._clip_manager = clip_manager
+        self._cache = LruCache(cache_size)
+        self._cache_lock = Lock()
+
+
+    def get_encoded_audios(self, clips, encoding=WAVE_ENCODING):
+
+        """
+        Gets encoded audio for the specified clips.
+
+        Parameters
+        ----------
+        clips : sequence of Clip
+            the clips for which to get encoded audio.
+
+        encoding : str
+            the audio encoding, one of "wave", "flac", and "delta-zlib".
+
+        Returns
+        -------
+        list of bytes
+            the encoded clip audios, in the order of `clips`.
+
+        Raises
+        ------
+        ClipAudioEncoderError
+            If the encoding is not recognized.
+        """
+
+        check_encoding(encoding)
+
+        if encoding == WAVE_ENCODING:
+            return self._clip_manager.get_audio_file_contents(clips)
+
+        # Get cached audios.
+        with self._cache_lock:
+            audios = [self._get_cached_audio(clip, encoding) for clip in clips]
+
+        # Get audio file contents of clips whose audios were not cached.
+        uncached_indices = [i for i, a in enumerate(audios) if a is None]
+        uncached_clips = [clips[i] for i in uncached_indices]
+        contents = self._clip_manager.get_audio_file_contents(uncached_clips)
+
+        # Encode audio file contents and cache results.
+        for i, clip, content in zip(
+                uncached_indices, uncached_clips, contents):
+
+            audio = encode_audio_file_contents(content, encoding)
+
+            with self._cache_lock:
+                self._cache[(clip.id, encoding)] = audio
+
+            audios[i] = audio
+
+        return audios
+
+
+    def _get_cached_audio(self, clip, encoding):
+
+        # We use `__getitem__` rather than `get` since only the former
+        # updates the recency of use of a cache item.
+        try:
+            return self._cache[(clip.id, encoding)]
+        except KeyError:
+            return None
+
+
+def check_encoding(encoding):
+    if encoding not in ENCODINGS:
+        raise ClipAudioEncoderError(
+            f'Unrecognized clip audio encoding "{encoding}".')
+
+
+def encode_audio_file_contents(contents, encoding):
+
+    """Encodes WAVE audio file contents in the specified encoding."""
+
+    check_encoding(encoding)
+
+    if encoding == WAVE_ENCODING:
+        return contents
+
+    samples, sample_rate = \
+        audio_file_utils.read_wave_file(BytesIO(contents))
+
+    # Use first channel only, as the clip album does.
+    samples = samples[0]
+
+    if encoding == FLAC_ENCODING:
+        return _encode_flac(samples, sample_rate)
+    else:
+        return _encode_delta_zlib(samples, sample_rate)
+
+
+def _encode_flac(samples, sample_rate):
+    buffer = BytesIO()
+    soundfile.write(
+        buffer, samples, int(sample_rate), format='FLAC', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def _encode_delta_zlib(samples, sample_rate):
+
+    samples = samples.astype(_DELTA_ZLIB_SAMPLE_DTYPE, copy=False)
+
+    # Compute first differences. Subtraction of 16-bit integers
+    # wraps around on overflow, which the decoder's cumulative sum
+    # undoes exactly.
+    deltas = np.empty_like(samples)
+    if len(samples) != 0:
+        deltas[0] = samples[0]
+        np.subtract(samples[1:], samples[:-1], out=deltas[1:])
+
+    header = np.array(
+        [int(sample_rate), len(samples)], dtype=_DELTA_ZLIB_HEADER_DTYPE)
+
+    data = zlib.compress(deltas.tobytes(), _DELTA_ZLIB_COMPRESSION_LEVEL)
+
+    return header.tobytes() + data
+
+
+def decode_delta_zlib(data):
+
+    """
+    Decodes "delta-zlib" clip audio.
+
+    Returns
+    -------
+    tuple
+        (samples, sample rate) pair, with the samples in a
+        one-dimensional NumPy array of 16-bit integers.
+    """
+
+    header_size = 2 * _DELTA_ZLIB_HEADER_DTYPE.itemsize
+
+    sample_rate, length = np.frombuffer(
+        data[:header_size], dtype=_DELTA_ZLIB_HEADER_DTYPE)
+
+    deltas = np.frombuffer(
+        zlib.decompress(data[header_size:]), dtype=_DELTA_ZLIB_SAMPLE_DTYPE)
+
+    if len(deltas) != length:
+        raise ClipAudioEncoderError(
+            f'Decoded clip audio has {len(deltas)} samples rather than '
+            f'expected {length}.')
+
+    samples = np.cumsum(deltas, dtype=_DELTA_ZLIB_SAMPLE_DTYPE)
+
+    return samples, int(sample_rate)
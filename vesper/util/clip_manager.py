@@ -1,19 +1,19 @@
 """Module containing `ClipManager` class."""
 
 
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from threading import Lock
-import asyncio
 import os.path
 
 from environs import Env
-import aioboto3
 import numpy as np
 
 from vesper.archive_paths import archive_paths
-from vesper.signal.wave_file_signal import WaveFileSignal
 from vesper.singleton.recording_manager import recording_manager
 from vesper.util.bunch import Bunch
+from vesper.util.s3_object_reader import S3ObjectReader
+import vesper.signal.audio_file_signal_utils as audio_file_signal_utils
 import vesper.util.audio_file_utils as audio_file_utils
 import vesper.util.os_utils as os_utils
 import vesper.util.signal_utils as signal_utils
@@ -45,12 +45,32 @@ class ClipManager:
             env('VESPER_AWS_S3_CLIP_BUCKET_NAME', None)
         self._aws_s3_clip_folder_path = \
             env('VESPER_AWS_S3_CLIP_FOLDER_PATH', None)
+        self._aws_s3_endpoint_url = env('VESPER_AWS_S3_ENDPOINT_URL', None)
+        self._aws_s3_max_pool_connections = \
+            env.int('VESPER_AWS_S3_MAX_POOL_CONNECTIONS', 50)
+        self._aws_s3_max_concurrent_requests = \
+            env.int('VESPER_AWS_S3_MAX_CONCURRENT_REQUESTS', 50)
+        self._aws_s3_max_retry_attempts = \
+            env.int('VESPER_AWS_S3_MAX_RETRY_ATTEMPTS', 3)
+        
+        # Number of threads with which to delete clip audio files. The
+        # default of one deletes files serially, which is fastest for
+        # local file systems. More threads are faster for file systems
+        # with high latency, for example network file systems.
+        self._audio_file_deletion_thread_count = \
+            env.int('VESPER_AUDIO_FILE_DELETION_THREAD_COUNT', 1)
         
         # Make sure non-`None` clip folder path ends with "/".
         if self._aws_s3_clip_folder_path is not None and \
                 not self._aws_s3_clip_folder_path.endswith('/'):
             self._aws_s3_clip_folder_path += '/'
 
+        # S3 object reader, created when first needed. The reader is
+        # long-lived and shared by all request threads, so that its
+        # S3 client and connection pool are reused across requests.
+        self._s3_object_reader = None
+        self._s3_object_reader_lock = Lock()
+
 
     def get_audio_file_path(self, clip):
         return _get_audio_file_path(clip.id)
@@ -189,6 +209,48 @@ class ClipManager:
         return files, channel_num, start_index, end_index
     
     
+    def cache_recording_file_info(self, clips):
+        
+        """
+        Caches the recording file information of the specified clips.
+        
+        This method gets the information that `get_recording_file_info`
+        needs for all of the clips with at most two queries, rather
+        than with up to two queries per recording channel.
+        """
+        
+        # We import models here rather than at the top of this module
+        # since this module does not otherwise require Django.
+        from vesper.django.app.models import RecordingChannel, RecordingFile
+        import vesper.django.app.query_utils as query_utils
+        
+        channel_cache = self._recording_channel_info_cache
+        recording_cache = self._recording_info_cache
+        
+        # Cache recording IDs and channel numbers of channels.
+        channel_ids = set(
+            c.recording_channel_id for c in clips
+            if c.recording_channel_id not in channel_cache)
+        channels = RecordingChannel.objects.values_list(
+            'id', 'recording_id', 'channel_num')
+        for channel_id, recording_id, channel_num in \
+                query_utils.filter_in(channels, 'id', channel_ids):
+            channel_cache[channel_id] = recording_id, channel_num
+        
+        # Cache files and file bounds of recordings.
+        recording_ids = set(
+            channel_cache[c.recording_channel_id][0] for c in clips
+            if c.recording_channel_id in channel_cache)
+        recording_ids -= recording_cache.keys()
+        recording_files = dict((i, []) for i in recording_ids)
+        files = RecordingFile.objects.order_by('file_num')
+        for file_ in query_utils.filter_in(
+                files, 'recording_id', recording_ids):
+            recording_files[file_.recording_id].append(file_)
+        for recording_id, files in recording_files.items():
+            recording_cache[recording_id] = files, _get_file_bounds(files)
+    
+    
     def _get_recording_file_info_aux(self, clip):
         
         try:
@@ -207,9 +269,7 @@ class ClipManager:
         
         except KeyError:
             files = list(clip.recording.files.all())
-            bounds = [f.start_index for f in files]
-            if len(files) != 0:
-                bounds.append(bounds[-1] + files[-1].length)
+            bounds = _get_file_bounds(files)
             self._recording_info_cache[recording_id] = files, bounds
         
         return files, bounds, channel_num
@@ -322,7 +382,7 @@ class ClipManager:
             self._clear_recording_file_signal_cache()
             
             # Create new signal.
-            signal = WaveFileSignal(path)
+            signal = audio_file_signal_utils.create_audio_file_signal(path)
             
             # Cache new signal.
             self._recording_file_signal_cache[path] = signal
@@ -352,31 +412,56 @@ class ClipManager:
 
     def _get_s3_audio_file_contents(self, clips):
 
-        # Get clip IDs. We must do this before calling asynchronous code
-        # since Django will raise a `SynchronousOnlyOperation` exception
-        # if we try to perform database operations in an asynchronous
-        # function.
-        clip_ids = [clip.id for clip in clips]
+        object_keys = [
+            self._get_s3_audio_file_object_key(clip.id)
+            for clip in clips]
 
-        return asyncio.run(self._get_s3_audio_file_contents_async(clip_ids))
+        reader = self._get_s3_object_reader()
+
+        return reader.read_objects(self._aws_s3_clip_bucket_name, object_keys)
     
 
-    async def _get_s3_audio_file_contents_async(self, clip_ids):
+    def _get_s3_object_reader(self):
 
-        object_keys = [
-            self._get_s3_audio_file_object_key(i)
-            for i in clip_ids]
+        with self._s3_object_reader_lock:
 
-        session = aioboto3.Session(
-            aws_access_key_id=self._aws_access_key_id,
-            aws_secret_access_key=self._aws_secret_access_key,
-            region_name=self._aws_region_name)
-        
-        async with session.resource('s3') as s3:
-            coroutines = [
-                self._get_s3_audio_file_contents_aux(s3, object_key)
-                for object_key in object_keys]
-            return await asyncio.gather(*coroutines)
+            if self._s3_object_reader is None:
+                self._s3_object_reader = S3ObjectReader(
+                    self._aws_access_key_id,
+                    self._aws_secret_access_key,
+                    self._aws_region_name,
+                    self._aws_s3_endpoint_url,
+                    self._aws_s3_max_pool_connections,
+                    self._aws_s3_max_concurrent_requests,
+                    self._aws_s3_max_retry_attempts)
+
+            return self._s3_object_reader
+
+
+    def get_s3_latency_stats(self):
+
+        """
+        Gets S3 clip audio file read latency statistics.
+
+        Returns
+        -------
+        dict or None
+            dictionary with `'object'` and `'batch'` items containing
+            latency statistics for individual clip audio file reads and
+            for batches of reads, respectively, or `None` if S3 clip
+            storage is not in use or no clip audio files have yet been
+            read from S3.
+        """
+
+        reader = self._s3_object_reader
+
+        if reader is None:
+            return None
+
+        return {
+            'object': reader.object_latencies.get_stats(),
+            'batch': reader.batch_latencies.get_stats()
+        }
 
 
     def _get_s3_audio_file_object_key(self, i):
@@ -395,14 +480,6 @@ class ClipManager:
         return '/'.join(parts)
 
 
-    async def _get_s3_audio_file_contents_aux(self, s3, object_key):
-        obj = await s3.Object(self._aws_s3_clip_bucket_name, object_key)
-        result = await obj.get()
-        body = result['Body']
-        data = await body.read()
-        return data
-
-
     def _get_audio_file_contents(self, clips):
         return [self._get_audio_file_contents_aux(clip) for clip in clips]
             
@@ -451,6 +528,45 @@ class ClipManager:
         path = self.get_audio_file_path(clip)
         os_utils.delete_file(path)
         
+        
+    def delete_audio_files(self, clips):
+        
+        """
+        Deletes the audio files of the specified clips.
+        
+        The files are deleted serially unless the
+        `VESPER_AUDIO_FILE_DELETION_THREAD_COUNT` environment variable
+        specifies more than one thread, in which case they are deleted
+        concurrently by a pool of that many worker threads. A pool is
+        much faster than serial deletion when file system operations
+        have high latency, for example for network file systems, but
+        slower for local file systems. Clips whose audio files are not
+        present are ignored.
+        
+        Parameters
+        ----------
+        clips : iterable of Clip
+            the clips whose audio files should be deleted. Only the
+            `id` attributes of the clips are used.
+        """
+        
+        thread_count = self._audio_file_deletion_thread_count
+        
+        if thread_count <= 1:
+            
+            for clip in clips:
+                self.delete_audio_file(clip)
+                
+            return
+        
+        with ThreadPoolExecutor(
+                thread_count,
+                thread_name_prefix='Vesper Audio File Deletion') as executor:
+            
+            # Consume results to raise any exception raised by a worker.
+            for _ in executor.map(self.delete_audio_file, clips):
+                pass
+        
             
     def create_audio_file(self, clip, samples=None):
         
@@ -559,6 +675,13 @@ def _get_clip_id_parts(num, format_):
     return parts
     
     
+def _get_file_bounds(files):
+    bounds = [f.start_index for f in files]
+    if len(files) != 0:
+        bounds.append(bounds[-1] + files[-1].length)
+    return bounds
+
+
 def _get_clip_time_interval_length(clip, start_offset, length):
     
     if length is None:
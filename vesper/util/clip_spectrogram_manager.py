@@ -0,0 +1,429 @@
+"""Module containing class `ClipSpectrogramManager`."""
+
+
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from vesper.archive_paths import archive_paths
+import vesper.util.data_windows as data_windows
+import vesper.util.time_frequency_analysis_utils as tfa_utils
+
+
+_logger = logging.getLogger(__name__)
+
+
+# Default spectrogram settings. These are the same as the defaults of
+# the clip album's spectrogram clip view (see the JavaScript module
+# `spectrogram-clip-view.js`), so that spectrograms computed on the
+# server look like spectrograms computed in the browser.
+_DEFAULT_SPECTRAL_INTERPOLATION_FACTOR = 1
+_DEFAULT_REFERENCE_POWER = 1e-10
+_DEFAULT_POWER_RANGE = (0, 100)
+
+# The browser computes spectrograms from Web Audio samples, which are
+# in [-1, 1). We scale 16-bit clip samples into the same range.
+_SAMPLE_SCALE_FACTOR = 1 / 32768
+
+# Minimum power ratio for conversion to decibels. This is the same as
+# in the JavaScript module `spectrogram.ts`.
+_MIN_POWER_RATIO = 1e-100
+
+ENCODINGS = ('uint8', 'float16')
+"""Supported clip spectrogram encodings."""
+
+_DEFAULT_ENCODING = 'uint8'
+
+# Spectrogram cache format version. Increment this whenever the
+# spectrogram computation or encoding changes, so that spectrograms
+# cached by an older version of this module are not used.
+_CACHE_FORMAT_VERSION = 1
+
+_CACHE_DIR_FORMAT = (3, 3, 3)
+
+_HEADER_DTYPE = np.dtype('<u4')
+_HEADER_SIZE = 2 * _HEADER_DTYPE.itemsize
+
+
+class ClipSpectrogramManagerError(Exception):
+    pass
+
+
+class ClipSpectrogramManager:
+
+    """
+    Computes and caches spectrograms of the clips of a Vesper archive.
+
+    A clip spectrogram manager computes clip spectrograms on the server
+    with the same settings, and hence the same results, as the clip
+    album's browser spectrogram computation. Each spectrogram is
+    encoded compactly, either as 8-bit unsigned integers that map the
+    display power range of the settings onto [0, 255], or as 16-bit
+    floating point decibel values.
+
+    Encoded spectrograms are cached on disk, keyed by clip ID and a
+    hash of the spectrogram settings and encoding, so that each one
+    is computed at most once for a given set of settings. The cache
+    is in the directory `archive_paths.spectrogram_cache_dir_path`.
+
+    An encoded spectrogram comprises an eight-byte header followed by
+    spectrogram data. The header contains two little-endian, 32-bit
+    unsigned integers, the number of spectra and the number of
+    frequency bins per spectrum. The data contain one element per
+    (spectrum, bin) pair in row-major order, i.e. with the spectra one
+    after another.
+    """
+
+
+    def __init__(self, clip_manager=None, cache_dir_path=None):
+
+        if clip_manager is None:
+            from vesper.singleton.clip_manager import clip_manager
+
+        self._clip_manager = clip_manager
+        self._cache_dir_path = cache_dir_path
+
+
+    @property
+    def cache_dir_path(self):
+        if self._cache_dir_path is None:
+            return archive_paths.spectrogram_cache_dir_path
+        else:
+            return self._cache_dir_path
+
+
+    def get_spectrograms(self, clips, settings, encoding=_DEFAULT_ENCODING):
+
+        """
+        Gets encoded spectrograms of the specified clips.
+
+        Parameters
+        ----------
+        clips : iterable of Clip
+            the clips for which to get spectrograms.
+
+        settings : dict
+            clip album spectrogram settings, with camel case keys. The
+            settings must include a `computation` item, and may include
+            a `display` item with a `powerRange` item.
+
+        encoding : str
+            the spectrogram encoding, either "uint8" or "float16".
+
+        Returns
+        -------
+        list of bytes
+            the encoded spectrograms, in the order of `clips`.
+
+        Raises
+        ------
+        ClipSpectrogramManagerError
+            If the settings or encoding are invalid.
+        """
+
+        _check_encoding(encoding)
+        computation_settings = _get_computation_settings(settings)
+        power_range = _get_power_range(settings)
+        settings_hash = _get_settings_hash(
+            computation_settings, power_range, encoding)
+
+        return [
+            self._get_spectrogram(
+                clip, computation_settings, power_range, encoding,
+                settings_hash)
+            for clip in clips]
+
+
+    def _get_spectrogram(
+            self, clip, computation_settings, power_range, encoding,
+            settings_hash):
+
+        path = self._get_cache_file_path(clip.id, settings_hash)
+
+        try:
+            with open(path, 'rb') as file_:
+                return file_.read()
+        except FileNotFoundError:
+            pass
+
+        samples = self._clip_manager.get_samples(clip)
+
+        spectrogram = compute_spectrogram(
+            samples, clip.sample_rate, computation_settings)
+
+        data = encode_spectrogram(spectrogram, encoding, power_range)
+
+        try:
+            _write_file_atomically(path, data)
+        except OSError as e:
+            _logger.warning(
+                f'Could not cache spectrogram for clip {clip.id} in '
+                f'file "{path}". Error message was: {e}')
+
+        return data
+
+
+    def _get_cache_file_path(self, clip_id, settings_hash):
+        id_parts = _get_clip_id_parts(clip_id)
+        file_name = f'Clip {" ".join(id_parts)}.spec'
+        return Path(
+            self.cache_dir_path, settings_hash, *id_parts[:-1], file_name)
+
+
+def _check_encoding(encoding):
+    if encoding not in ENCODINGS:
+        raise ClipSpectrogramManagerError(
+            f'Unrecognized spectrogram encoding "{encoding}".')
+
+
+def _get_computation_settings(settings):
+
+    try:
+        computation = settings['computation']
+        window = computation['window']
+        window_type = window['type']
+        window_size = float(window['size'])
+        hop_size = float(computation['hopSize'])
+    except (KeyError, TypeError, ValueError):
+        raise ClipSpectrogramManagerError(
+            'Spectrogram settings must include window type, window size, '
+            'and hop size computation settings.')
+
+    interpolation_factor = computation.get(
+        'spectralInterpolationFactor',
+        _DEFAULT_SPECTRAL_INTERPOLATION_FACTOR)
+
+    reference_power = \
+        computation.get('referencePower') or _DEFAULT_REFERENCE_POWER
+
+    if window_size <= 0:
+        raise ClipSpectrogramManagerError(
+            f'Bad spectrogram window size {window_size}. '
+            f'Size must be positive.')
+
+    if hop_size <= 0:
+        raise ClipSpectrogramManagerError(
+            f'Bad spectrogram hop size {hop_size}. Size must be positive.')
+
+    return {
+        'window_type': window_type,
+        'window_size': window_size,
+        'hop_size': hop_size,
+        'spectral_interpolation_factor': interpolation_factor,
+        'reference_power': reference_power
+    }
+
+
+def _get_power_range(settings):
+
+    display = settings.get('display') or {}
+    power_range = display.get('powerRange', _DEFAULT_POWER_RANGE)
+
+    try:
+        low, high = (float(p) for p in power_range)
+    except (TypeError, ValueError):
+        raise ClipSpectrogramManagerError(
+            f'Bad spectrogram power range {power_range}.')
+
+    if low >= high:
+        raise ClipSpectrogramManagerError(
+            f'Bad spectrogram power range {power_range}. Low power '
+            f'must be less than high power.')
+
+    return low, high
+
+
+def _get_settings_hash(computation_settings, power_range, encoding):
+
+    key = {
+        'version': _CACHE_FORMAT_VERSION,
+        'computation': computation_settings,
+        'encoding': encoding
+    }
+
+    # The power range affects only the uint8 encoding.
+    if encoding == 'uint8':
+        key['power_range'] = power_range
+
+    text = json.dumps(key, sort_keys=True)
+
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def compute_spectrogram(samples, sample_rate, computation_settings):
+
+    """
+    Computes a decibel spectrogram like the clip album does.
+
+    Parameters
+    ----------
+    samples : NumPy array
+        16-bit clip samples.
+
+    sample_rate : float
+        the clip sample rate, in hertz.
+
+    computation_settings : dict
+        spectrogram computation settings as returned by
+        `_get_computation_settings`.
+
+    Returns
+    -------
+    NumPy array
+        the spectrogram, with shape (number of spectra, number of bins).
+    """
+
+    s = computation_settings
+
+    float_window_size = s['window_size'] * sample_rate
+    window_size = int(round(float_window_size))
+    window = data_windows.create_window(s['window_type'], window_size)
+    hop_size = max(int(round(s['hop_size'] / 100 * float_window_size)), 1)
+    dft_size = _get_dft_size(window_size, s['spectral_interpolation_factor'])
+
+    samples = np.asarray(samples, dtype='float64') * _SAMPLE_SCALE_FACTOR
+
+    if len(samples) < window_size:
+        return np.zeros((0, dft_size // 2 + 1))
+
+    spectra = tfa_utils.compute_spectrogram(
+        samples, window.samples, hop_size, dft_size)
+
+    # Double powers of bins other than DC and Nyquist to account for
+    # the energy of the corresponding negative frequency bins.
+    spectra[:, 1:-1] *= 2
+
+    # Convert to decibels.
+    spectra /= s['reference_power']
+    np.maximum(spectra, _MIN_POWER_RATIO, out=spectra)
+    np.log10(spectra, out=spectra)
+    spectra *= 10
+
+    return spectra
+
+
+def _get_dft_size(window_size, interpolation_factor):
+
+    power_of_two_ceil = tfa_utils.get_dft_size(window_size)
+
+    if interpolation_factor is None or \
+            int(interpolation_factor) != interpolation_factor or \
+            interpolation_factor <= 1 or \
+            not _is_power_of_two(int(interpolation_factor)):
+
+        return power_of_two_ceil
+
+    else:
+        return power_of_two_ceil * int(interpolation_factor)
+
+
+def _is_power_of_two(n):
+    return n > 0 and n & (n - 1) == 0
+
+
+def encode_spectrogram(spectrogram, encoding, power_range=None):
+
+    """
+    Encodes a decibel spectrogram.
+
+    Parameters
+    ----------
+    spectrogram : NumPy array
+        the spectrogram, with shape (number of spectra, number of bins).
+
+    encoding : str
+        the spectrogram encoding, either "uint8" or "float16".
+
+    power_range : pair of float
+        the decibel power range that maps to [0, 255] for the "uint8"
+        encoding. Powers outside of the range are clipped to it.
+
+    Returns
+    -------
+    bytes
+        the encoded spectrogram.
+    """
+
+    _check_encoding(encoding)
+
+    num_spectra, num_bins = spectrogram.shape
+
+    if encoding == 'uint8':
+
+        if power_range is None:
+            power_range = _DEFAULT_POWER_RANGE
+
+        low, high = power_range
+        scaled = (spectrogram - low) * (255 / (high - low))
+        np.clip(scaled, 0, 255, out=scaled)
+        data = np.rint(scaled).astype(np.uint8)
+
+    else:
+        data = spectrogram.astype('<f2')
+
+    header = np.array([num_spectra, num_bins], dtype=_HEADER_DTYPE)
+
+    return header.tobytes() + data.tobytes()
+
+
+def decode_spectrogram(data, encoding):
+
+    """
+    Decodes a spectrogram encoded by `encode_spectrogram`.
+
+    Returns
+    -------
+    NumPy array
+        the encoded spectrogram data, with shape (number of spectra,
+        number of bins) and dtype `uint8` or `float16` according to
+        the encoding.
+    """
+
+    _check_encoding(encoding)
+
+    num_spectra, num_bins = np.frombuffer(
+        data, dtype=_HEADER_DTYPE, count=2)
+
+    dtype = np.uint8 if encoding == 'uint8' else np.dtype('<f2')
+
+    values = np.frombuffer(data, dtype=dtype, offset=_HEADER_SIZE)
+
+    return values.reshape((num_spectra, num_bins))
+
+
+def _get_clip_id_parts(clip_id):
+    num_digits = sum(_CACHE_DIR_FORMAT)
+    digits = f'{clip_id:0{num_digits}d}'
+    parts = []
+    i = 0
+    for num_digits in _CACHE_DIR_FORMAT:
+        parts.append(digits[i:i + num_digits])
+        i += num_digits
+    return parts
+
+
+def _write_file_atomically(path, data):
+
+    # We write to a temporary file in the destination directory and
+    # then rename it so that concurrent readers never see a partially
+    # written file.
+
+    os.makedirs(path.parent, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'wb') as file_:
+            file_.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -1,9 +1,54 @@
+"""
+Module containing classes `ClipHdf5File` and `ColumnarClipWriter`.
+
+A Vesper clip HDF5 file contains a group named "clips" whose layout is
+one of the following:
+
+    clip datasets
+        The group contains one dataset per clip, whose name is the clip
+        ID formatted as an eight-digit number, whose data are the clip
+        samples, and whose attributes are the clip metadata. This is
+        the original layout.
+
+    columnar
+        The group contains one 2-D dataset named "samples", with one
+        row per clip, plus one 1-D *column* dataset per clip metadata
+        item, with one element per clip. Each row of the samples
+        dataset is padded with zeros to the length of the longest
+        clip, and the "sample_count" column holds the unpadded row
+        lengths. A column of strings is stored as integer codes, with
+        the distinct strings of the column in a dataset of the same
+        name in the "values" subgroup: code `i` stands for the `i`th
+        string, and code -1 for a missing value. The group has a
+        "layout" attribute with value "columnar".
+
+Reading a file with the columnar layout requires reading only a few
+large datasets, which is much faster than reading many small datasets
+and their attributes when a file contains many clips.
+"""
+
+
 import h5py
+import numpy as np
 
 from vesper.util.bunch import Bunch
 import vesper.util.numpy_utils as numpy_utils
 
 
+CLIP_DATASETS_LAYOUT = 'clip datasets'
+COLUMNAR_LAYOUT = 'columnar'
+
+_SAMPLES_DATASET_NAME = 'samples'
+_VALUES_GROUP_NAME = 'values'
+_SAMPLE_COUNT_COLUMN_NAME = 'sample_count'
+
+_TARGET_CHUNK_SIZE = 2 ** 20
+"""Approximate size in bytes of a chunk of a samples dataset."""
+
+_COLUMN_CHUNK_SIZE = 4096
+"""Number of elements of a chunk of a column dataset."""
+
+
 class ClipHdf5File:
     
     
@@ -14,12 +59,24 @@ class ClipHdf5File:
     def get_num_clips(self):
         with h5py.File(self._file_path) as f:
             group = f['clips']
-            return len(group)
+            if _is_columnar(group):
+                return len(group[_SAMPLE_COUNT_COLUMN_NAME])
+            else:
+                return len(group)
         
         
     def get_sample_rate(self):
         with h5py.File(self._file_path) as f:
-            return f['clips'].attrs['sample_rate']
+            group = f['clips']
+            if _is_columnar(group):
+                return group['sample_rate'][0]
+            elif 'sample_rate' in group.attrs:
+                return group.attrs['sample_rate']
+            else:
+                # Files written by newer versions of Vesper have clip
+                # sample rates only in clip dataset attributes.
+                dataset = next(iter(group.values()))
+                return dataset.attrs['sample_rate']
  
     
     def read_clips(
@@ -29,60 +86,361 @@ class ClipHdf5File:
             
             group = f['clips']
             
-            total_num_clips = len(group)
-            
-            if max_num_clips is not None:
-                num_clips = min(max_num_clips, total_num_clips)
+            if _is_columnar(group):
+                clips = self._read_columnar_clips(
+                    group, max_num_clips, notification_period, listener)
             else:
-                num_clips = total_num_clips
+                clips = self._read_dataset_clips(
+                    group, max_num_clips, notification_period, listener)
+                    
+        clips.sort(key=lambda c: c.id)
+        
+        return clips
                 
-            clips = []
                 
-            if num_clips == total_num_clips:
-                # getting all clips
+    def _read_dataset_clips(
+            self, group, max_num_clips, notification_period, listener):
+        
+        total_num_clips = len(group)
+        
+        if max_num_clips is not None:
+            num_clips = min(max_num_clips, total_num_clips)
+        else:
+            num_clips = total_num_clips
+            
+        clips = []
+            
+        if num_clips == total_num_clips:
+            # getting all clips
+            
+            for i, dataset in enumerate(group.values()):
                 
-                for i, dataset in enumerate(group.values()):
-                    
-                    if notification_period is not None and \
-                            i != 0 and i % notification_period == 0:
-                        listener(i)
-                        
-                    clip = self._create_clip(dataset)
-                    clips.append(clip)
+                if notification_period is not None and \
+                        i != 0 and i % notification_period == 0:
+                    listener(i)
                     
-            else:
-                # not getting all clips
+                clip = self._create_clip(dataset)
+                clips.append(clip)
                 
-                keys = numpy_utils.reproducible_choice(
-                    list(group.keys()), num_clips, replace=False)
+        else:
+            # not getting all clips
+            
+            keys = numpy_utils.reproducible_choice(
+                list(group.keys()), num_clips, replace=False)
+            
+            for i, key in enumerate(keys):
                 
-                for i, key in enumerate(keys):
-                    
-                    if notification_period is not None and \
-                            i != 0 and i % notification_period == 0:
-                        listener(i)
-                        
-                    dataset = group[key]
-                    clip = self._create_clip(dataset)
-                    clips.append(clip)
+                if notification_period is not None and \
+                        i != 0 and i % notification_period == 0:
+                    listener(i)
                     
-        clips.sort(key=lambda c: c.id)
-        
-        return clips
-                
+                dataset = group[key]
+                clip = self._create_clip(dataset)
+                clips.append(clip)
                 
+        return clips
+            
+            
     def _create_clip(self, dataset):
                     
+        # Files written by older versions of Vesper use different names
+        # for some attributes than files written by newer versions.
         attrs = dataset.attrs
+        get = _get_attribute
         
         return Bunch(
-            id=attrs['id'],
+            id=get(attrs, 'id', 'clip_id'),
             waveform=dataset[:],
             station=attrs['station'],
-            microphone=attrs['microphone'],
+            microphone=get(attrs, 'microphone', 'mic_output'),
             detector=attrs['detector'],
-            night=attrs['night'],
-            start_time=attrs['start_time'],
-            original_sample_rate=attrs['original_sample_rate'],
-            classification=attrs['classification']
+            night=get(attrs, 'night', 'date'),
+            start_time=get(attrs, 'start_time', 'clip_start_time'),
+            original_sample_rate=get(
+                attrs, 'original_sample_rate', 'sample_rate'),
+            classification=attrs.get('classification')
         )
+
+
+    def _read_columnar_clips(
+            self, group, max_num_clips, notification_period, listener):
+
+        total_num_clips = len(group[_SAMPLE_COUNT_COLUMN_NAME])
+
+        if max_num_clips is not None:
+            num_clips = min(max_num_clips, total_num_clips)
+        else:
+            num_clips = total_num_clips
+
+        samples = group[_SAMPLES_DATASET_NAME]
+        columns = _read_columns(group)
+
+        if num_clips == total_num_clips:
+            # getting all clips
+
+            indices = np.arange(total_num_clips)
+            waveforms = samples[:]
+
+        else:
+            # not getting all clips
+
+            # HDF5 requires increasing indices for selecting rows.
+            indices = np.sort(numpy_utils.reproducible_choice(
+                total_num_clips, num_clips, replace=False))
+            waveforms = samples[indices]
+
+        sample_counts = columns[_SAMPLE_COUNT_COLUMN_NAME][indices]
+
+        def get(name, i):
+            column = columns.get(name)
+            return None if column is None else column[i]
+
+        clips = []
+
+        for i, (index, waveform, sample_count) in \
+                enumerate(zip(indices, waveforms, sample_counts)):
+
+            if notification_period is not None and \
+                    i != 0 and i % notification_period == 0:
+                listener(i)
+
+            clips.append(Bunch(
+                id=get('clip_id', index),
+                waveform=waveform[:sample_count],
+                station=get('station', index),
+                microphone=get('mic_output', index),
+                detector=get('detector', index),
+                night=get('date', index),
+                start_time=get('clip_start_time', index),
+                original_sample_rate=get('sample_rate', index),
+                classification=get('classification', index)
+            ))
+
+        return clips
+
+
+def _is_columnar(group):
+    return group.attrs.get('layout') == COLUMNAR_LAYOUT
+
+
+def _get_attribute(attrs, name, alternate_name):
+    try:
+        return attrs[name]
+    except KeyError:
+        return attrs[alternate_name]
+
+
+def _read_columns(group):
+
+    """
+    Reads the column datasets of a columnar clip group.
+
+    String columns are decoded into NumPy object arrays, with `None`
+    for missing values.
+    """
+
+    columns = {}
+
+    values_group = group.get(_VALUES_GROUP_NAME, {})
+
+    for name, dataset in group.items():
+
+        if name in (_SAMPLES_DATASET_NAME, _VALUES_GROUP_NAME):
+            continue
+
+        data = dataset[:]
+
+        if name in values_group:
+            # string column
+
+            # Append `None` to values so that code -1 indexes it.
+            values = values_group[name].asstr()[:]
+            values = np.array(list(values) + [None], dtype=object)
+            data = values[data]
+
+        columns[name] = data
+
+    return columns
+
+
+class ColumnarClipWriter:
+
+    """
+    Writes clips to an HDF5 group with the columnar layout.
+
+    Clips are appended to the group in batches with the `append`
+    method. The `close` method must be invoked after the last batch
+    is appended and before the group's file is closed.
+
+    Parameters:
+
+        group : `h5py.Group`
+            the empty group to write clips to.
+
+        compression : str or None
+            the HDF5 compression filter of the samples dataset, or
+            `None` for no compression.
+    """
+
+
+    def __init__(self, group, compression='gzip'):
+
+        group.attrs['layout'] = COLUMNAR_LAYOUT
+
+        self._group = group
+        self._compression = compression
+        self._clip_count = 0
+        self._samples = None
+        self._columns = {}
+
+        # Mapping from string column names to mappings from column
+        # values to codes.
+        self._codes = {}
+
+
+    @property
+    def clip_count(self):
+        return self._clip_count
+
+
+    def append(self, clips):
+
+        """
+        Appends clips to this writer's group.
+
+        Parameters:
+
+            clips : sequence of dict
+                the clips to append.
+
+                Each clip is a mapping from column names to values,
+                plus a "samples" item whose value is a 1-D NumPy array
+                of the clip's samples. Values of the same column must
+                be either all numbers or all strings. A clip that has
+                no value (or a value of `None`) for a column gets a
+                value of -1 (i.e. missing) for a string column and 0
+                for a numeric column.
+        """
+
+        if len(clips) == 0:
+            return
+
+        start_index = self._clip_count
+        end_index = start_index + len(clips)
+
+        samples = [c[_SAMPLES_DATASET_NAME] for c in clips]
+        self._append_samples(samples, start_index, end_index)
+
+        columns = {}
+        for i, clip in enumerate(clips):
+            for name, value in clip.items():
+                if name != _SAMPLES_DATASET_NAME and value is not None:
+                    columns.setdefault(name, {})[i] = value
+
+        columns[_SAMPLE_COUNT_COLUMN_NAME] = \
+            dict(enumerate(len(s) for s in samples))
+
+        for name, values in columns.items():
+            self._append_column_values(
+                name, values, len(clips), start_index, end_index)
+
+        # Extend columns for which no clip of this batch has a value.
+        for name, dataset in self._columns.items():
+            if name not in columns:
+                dataset.resize((end_index,))
+
+        self._clip_count = end_index
+
+
+    def _append_samples(self, samples, start_index, end_index):
+
+        width = max(len(s) for s in samples)
+
+        if self._samples is None:
+            self._samples = self._create_samples_dataset(
+                samples[0].dtype, width)
+
+        width = max(width, self._samples.shape[1])
+        self._samples.resize((end_index, width))
+
+        rows = np.zeros((len(samples), width), dtype=self._samples.dtype)
+        for i, s in enumerate(samples):
+            rows[i, :len(s)] = s
+
+        self._samples[start_index:end_index] = rows
+
+
+    def _create_samples_dataset(self, dtype, width):
+
+        # Make chunks comprise whole rows, and be about the target size.
+        row_size = max(width, 1) * np.dtype(dtype).itemsize
+        chunk_row_count = max(_TARGET_CHUNK_SIZE // row_size, 1)
+
+        return self._group.create_dataset(
+            _SAMPLES_DATASET_NAME, shape=(0, width), maxshape=(None, None),
+            dtype=dtype, chunks=(chunk_row_count, max(width, 1)),
+            compression=self._compression)
+
+
+    def _append_column_values(
+            self, name, values, clip_count, start_index, end_index):
+
+        dataset = self._columns.get(name)
+
+        if dataset is None:
+            value = next(iter(values.values()))
+            dataset = self._create_column(name, value)
+
+        dataset.resize((end_index,))
+
+        codes = self._codes.get(name)
+
+        if codes is not None:
+            # string column
+
+            data = np.full(clip_count, -1, dtype=dataset.dtype)
+            for i, value in values.items():
+                data[i] = codes.setdefault(value, len(codes))
+
+        else:
+            # numeric column
+
+            data = np.zeros(clip_count, dtype=dataset.dtype)
+            for i, value in values.items():
+                data[i] = value
+
+        dataset[start_index:end_index] = data
+
+
+    def _create_column(self, name, value):
+
+        if isinstance(value, str):
+            dtype = 'int32'
+            fill_value = -1
+            self._codes[name] = {}
+        elif isinstance(value, (float, np.floating)):
+            dtype = 'float64'
+            fill_value = 0
+        else:
+            dtype = 'int64'
+            fill_value = 0
+
+        dataset = self._group.create_dataset(
+            name, shape=(self._clip_count,), maxshape=(None,), dtype=dtype,
+            chunks=(_COLUMN_CHUNK_SIZE,), fillvalue=fill_value)
+
+        self._columns[name] = dataset
+
+        return dataset
+
+
+    def close(self):
+
+        """Writes the values of this writer's string columns."""
+
+        values_group = self._group.create_group(_VALUES_GROUP_NAME)
+
+        for name, codes in self._codes.items():
+            values = sorted(codes, key=codes.get)
+            values_group.create_dataset(
+                name, data=np.array(values, dtype=h5py.string_dtype()))
@@ -235,6 +235,8 @@ Command:
     - vesper.command.export_clip_counts_by_tag_to_csv_file_command.ExportClipCountsByTagToCsvFileCommand
     - vesper.command.export_command.ExportCommand
     - vesper.command.import_command.ImportCommand
+    - vesper.command.optimize_archive_database_command.OptimizeArchiveDatabaseCommand
+    - vesper.command.rebuild_clip_counts_command.RebuildClipCountsCommand
     - vesper.command.refresh_recording_audio_file_paths_command.RefreshRecordingAudioFilePathsCommand
     - vesper.command.tag_clips_command.TagClipsCommand
     - vesper.command.test_command.TestCommand
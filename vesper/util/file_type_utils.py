@@ -2,6 +2,9 @@
 
 
 _WAVE_FILE_NAME_EXTENSIONS = ['.wav', '.WAV']
+_FLAC_FILE_NAME_EXTENSIONS = ['.flac', '.FLAC']
+_AUDIO_FILE_NAME_EXTENSIONS = \
+    _WAVE_FILE_NAME_EXTENSIONS + _FLAC_FILE_NAME_EXTENSIONS
 _YAML_FILE_NAME_EXTENSIONS = ['.yaml', '.YAML']
 
 
@@ -9,6 +12,15 @@ def is_wave_file(path, include_dot_files=False):
     return is_file_of_type(path, _WAVE_FILE_NAME_EXTENSIONS, include_dot_files)
 
 
+def is_flac_file(path, include_dot_files=False):
+    return is_file_of_type(path, _FLAC_FILE_NAME_EXTENSIONS, include_dot_files)
+
+
+def is_audio_file(path, include_dot_files=False):
+    return is_file_of_type(
+        path, _AUDIO_FILE_NAME_EXTENSIONS, include_dot_files)
+
+
 def is_yaml_file(path, include_dot_files=False):
     return is_file_of_type(path, _YAML_FILE_NAME_EXTENSIONS, include_dot_files)
 
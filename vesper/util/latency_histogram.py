@@ -0,0 +1,153 @@
+"""Module containing class `LatencyHistogram`."""
+
+
+from threading import Lock
+import bisect
+import math
+
+
+_DEFAULT_BIN_EDGES = (
+    .001, .002, .005, .01, .02, .05, .1, .2, .5, 1, 2, 5, 10)
+"""Default histogram bin edges, in seconds."""
+
+
+class LatencyHistogram:
+
+    """
+    Thread-safe histogram of operation latencies.
+
+    A latency histogram accumulates counts of operation latencies in
+    bins delimited by an increasing sequence of bin edges. For bin
+    edges `e[0], e[1], ..., e[n - 1]` there are `n + 1` bins. Bin 0
+    counts latencies less than `e[0]`, bin `i` for `0 < i < n` counts
+    latencies in `[e[i - 1], e[i])`, and bin `n` counts latencies
+    greater than or equal to `e[n - 1]`.
+
+    The histogram also keeps a running count, sum, and maximum of the
+    latencies it records, so that it can report a mean latency and
+    approximate latency percentiles without retaining individual
+    latencies.
+    """
+
+
+    def __init__(self, bin_edges=None):
+
+        if bin_edges is None:
+            bin_edges = _DEFAULT_BIN_EDGES
+
+        bin_edges = tuple(bin_edges)
+
+        if len(bin_edges) == 0:
+            raise ValueError(
+                'Latency histogram must have at least one bin edge.')
+
+        if any(a >= b for a, b in zip(bin_edges[:-1], bin_edges[1:])):
+            raise ValueError(
+                'Latency histogram bin edges must be strictly increasing.')
+
+        self._bin_edges = bin_edges
+        self._lock = Lock()
+        self._reset()
+
+
+    def _reset(self):
+        self._counts = [0] * (len(self._bin_edges) + 1)
+        self._count = 0
+        self._sum = 0
+        self._max = 0
+
+
+    @property
+    def bin_edges(self):
+        return self._bin_edges
+
+
+    @property
+    def counts(self):
+        with self._lock:
+            return tuple(self._counts)
+
+
+    @property
+    def count(self):
+        return self._count
+
+
+    @property
+    def mean(self):
+        with self._lock:
+            return self._sum / self._count if self._count != 0 else None
+
+
+    @property
+    def max(self):
+        return self._max if self._count != 0 else None
+
+
+    def record(self, latency):
+
+        """Records one latency, in seconds."""
+
+        bin_num = bisect.bisect_right(self._bin_edges, latency)
+
+        with self._lock:
+            self._counts[bin_num] += 1
+            self._count += 1
+            self._sum += latency
+            if latency > self._max:
+                self._max = latency
+
+
+    def get_percentile(self, percent):
+
+        """
+        Gets an approximate latency percentile.
+
+        The percentile is approximated by the upper edge of the bin in
+        which it falls. For the last bin, which has no upper edge, the
+        maximum recorded latency is returned instead. If no latencies
+        have been recorded, this method returns `None`.
+        """
+
+        with self._lock:
+
+            if self._count == 0:
+                return None
+
+            threshold = math.ceil(self._count * percent / 100)
+            cumulative_count = 0
+
+            for i, count in enumerate(self._counts):
+                cumulative_count += count
+                if cumulative_count >= threshold and count != 0:
+                    if i < len(self._bin_edges):
+                        return min(self._bin_edges[i], self._max)
+                    else:
+                        return self._max
+
+            return self._max
+
+
+    def get_stats(self):
+
+        """
+        Gets a dictionary of summary statistics for this histogram.
+
+        The dictionary is suitable for serialization as JSON.
+        """
+
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'p50': self.get_percentile(50),
+            'p90': self.get_percentile(90),
+            'p99': self.get_percentile(99),
+            'max': self.max,
+            'bin_edges': list(self.bin_edges),
+            'counts': list(self.counts),
+        }
+
+
+    def clear(self):
+        with self._lock:
+            self._reset()
@@ -0,0 +1,54 @@
+"""
+Module containing a per-process cache of loaded models.
+
+Vesper jobs run in long-lived job worker processes (see the
+`vesper.command.job_worker` module), each of which runs many jobs.
+A detector or classifier that loads its model (for example a Keras
+model) with the `get_model` function of this module loads the model
+only the first time it is needed in a process. Later jobs of the
+same process reuse the loaded model.
+
+Cached models are shared by all of the users of a process, so they
+must not be modified after they are loaded. Using a model for
+inference does not modify it.
+"""
+
+
+from threading import Lock
+
+
+_models = {}
+"""Mapping from model keys to loaded models."""
+
+_lock = Lock()
+"""Lock that serializes model loading by the threads of a process."""
+
+
+def get_model(key, load):
+
+    """
+    Gets a model, loading it if needed.
+
+    Parameters:
+
+        key : hashable
+            the key of the model, typically its file path.
+
+        load : callable
+            function that loads the model. The function is called
+            with no arguments, and only if the model is not already
+            cached.
+
+    Returns:
+        the model.
+    """
+
+    with _lock:
+
+        try:
+            return _models[key]
+
+        except KeyError:
+            model = load()
+            _models[key] = model
+            return model
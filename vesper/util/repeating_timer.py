@@ -16,18 +16,31 @@ class RepeatingTimer(Thread):
         self._args = args if args is not None else {}
         self._kwargs = kwargs if kwargs is not None else {}
         self._timer = None
-        self._started = False
+        
+        # Note that we must not name this attribute `_started`, since
+        # that is the name of a `Thread` attribute that the `threading`
+        # module uses, for example in a child process after a fork.
+        self._timer_started = False
         
         
     def start(self):
-        if self._started:
+        if self._timer_started:
             raise ValueError('RepeatingTimer can be started only once.')
         else:
+            self._timer_started = True
             self._start_timer()
         
         
     def _start_timer(self):
         self._timer = Timer(self._interval, self._tick)
+        
+        # Make timer thread a daemon so it does not prevent the process
+        # from exiting. The interpreter waits for non-daemon threads
+        # to finish before it runs `atexit` handlers, so a non-daemon
+        # timer would also prevent handlers that cancel it from
+        # running.
+        self._timer.daemon = True
+        
         self._timer.start()
         
         
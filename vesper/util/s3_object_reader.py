@@ -0,0 +1,337 @@
+"""Module containing class `S3ObjectReader`."""
+
+
+from threading import Lock, Thread
+import asyncio
+import contextlib
+import logging
+import time
+
+from aiobotocore.config import AioConfig
+import aioboto3
+
+from vesper.util.latency_histogram import LatencyHistogram
+
+
+_logger = logging.getLogger(__name__)
+
+
+_DEFAULT_MAX_POOL_CONNECTIONS = 50
+_DEFAULT_MAX_CONCURRENT_REQUESTS = 50
+_DEFAULT_MAX_RETRY_ATTEMPTS = 3
+_DEFAULT_RETRY_MODE = 'standard'
+
+
+class S3ObjectReaderError(Exception):
+    pass
+
+
+class S3ObjectReader:
+
+    """
+    Reads AWS S3 objects with a long-lived, pooled S3 client.
+
+    An S3 object reader runs an `asyncio` event loop on its own daemon
+    thread, and creates a single `aioboto3` S3 client on that loop the
+    first time it is asked to read objects. The client, its HTTP
+    connection pool, and hence its TLS sessions are reused for all
+    subsequent reads, until the reader is closed. This avoids the cost
+    of creating a new session and client (including new TLS handshakes)
+    for every batch of objects read.
+
+    The `read_objects` method of this class is synchronous, and can be
+    called from any number of threads (for example Django request
+    threads) concurrently. Each call submits a coroutine to the reader's
+    event loop and waits for its result. The number of S3 requests in
+    flight at any time, summed over all callers, is bounded by the
+    reader's `max_concurrent_requests` setting.
+
+    The reader records the latency of each object read, and of each
+    call to `read_objects`, in two latency histograms, which are
+    available via the `object_latencies` and `batch_latencies`
+    properties.
+
+    The `endpoint_url` initializer argument allows a reader to work
+    with S3-compatible services other than AWS, for example a local
+    MinIO server or a moto server used for testing.
+    """
+
+
+    def __init__(
+            self, aws_access_key_id=None, aws_secret_access_key=None,
+            region_name=None, endpoint_url=None,
+            max_pool_connections=_DEFAULT_MAX_POOL_CONNECTIONS,
+            max_concurrent_requests=_DEFAULT_MAX_CONCURRENT_REQUESTS,
+            max_retry_attempts=_DEFAULT_MAX_RETRY_ATTEMPTS,
+            retry_mode=_DEFAULT_RETRY_MODE):
+
+        if max_pool_connections < 1:
+            raise ValueError(
+                f'Bad S3 connection pool size {max_pool_connections}. '
+                f'Size must be at least one.')
+
+        if max_concurrent_requests < 1:
+            raise ValueError(
+                f'Bad maximum concurrent S3 request count '
+                f'{max_concurrent_requests}. Count must be at least one.')
+
+        self._aws_access_key_id = aws_access_key_id
+        self._aws_secret_access_key = aws_secret_access_key
+        self._region_name = region_name
+        self._endpoint_url = endpoint_url
+        self._max_pool_connections = max_pool_connections
+        self._max_concurrent_requests = max_concurrent_requests
+        self._max_retry_attempts = max_retry_attempts
+        self._retry_mode = retry_mode
+
+        self._object_latencies = LatencyHistogram()
+        self._batch_latencies = LatencyHistogram()
+
+        # The following are created lazily, by `_start_if_needed`.
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._client_lock = None
+        self._exit_stack = None
+        self._semaphore = None
+
+        self._lock = Lock()
+        self._closed = False
+
+
+    @property
+    def endpoint_url(self):
+        return self._endpoint_url
+
+
+    @property
+    def max_pool_connections(self):
+        return self._max_pool_connections
+
+
+    @property
+    def max_concurrent_requests(self):
+        return self._max_concurrent_requests
+
+
+    @property
+    def max_retry_attempts(self):
+        return self._max_retry_attempts
+
+
+    @property
+    def object_latencies(self):
+
+        """Histogram of the latencies of individual object reads."""
+
+        return self._object_latencies
+
+
+    @property
+    def batch_latencies(self):
+
+        """Histogram of the latencies of `read_objects` calls."""
+
+        return self._batch_latencies
+
+
+    def read_objects(self, bucket_name, object_keys, timeout=None):
+
+        """
+        Reads the specified S3 objects.
+
+        This method can be called from any thread other than the
+        reader's event loop thread. It blocks until all of the
+        specified objects have been read.
+
+        Parameters
+        ----------
+        bucket_name : str
+            the name of the bucket containing the objects.
+
+        object_keys : iterable of str
+            the keys of the objects to read.
+
+        timeout : float or None
+            the maximum time to wait for the reads to complete, in
+            seconds, or `None` to wait indefinitely.
+
+        Returns
+        -------
+        list of bytes
+            the contents of the specified objects, in the order of
+            `object_keys`.
+
+        Raises
+        ------
+        S3ObjectReaderError
+            If this reader has been closed.
+
+        Exception
+            If an object read fails, for example because the object
+            does not exist.
+        """
+
+        object_keys = list(object_keys)
+
+        if len(object_keys) == 0:
+            return []
+
+        loop = self._start_if_needed()
+
+        coroutine = self._read_objects(bucket_name, object_keys)
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+        return future.result(timeout)
+
+
+    def _start_if_needed(self):
+
+        with self._lock:
+
+            if self._closed:
+                raise S3ObjectReaderError('S3 object reader is closed.')
+
+            if self._loop is None:
+
+                loop = asyncio.new_event_loop()
+
+                thread = Thread(
+                    target=_run_event_loop, args=(loop,),
+                    name='S3ObjectReader', daemon=True)
+                thread.start()
+
+                self._loop = loop
+                self._thread = thread
+
+            return self._loop
+
+
+    async def _read_objects(self, bucket_name, object_keys):
+
+        start_time = time.perf_counter()
+
+        client = await self._get_client()
+
+        coroutines = [
+            self._read_object(client, bucket_name, key)
+            for key in object_keys]
+
+        result = await asyncio.gather(*coroutines)
+
+        self._batch_latencies.record(time.perf_counter() - start_time)
+
+        return result
+
+
+    async def _get_client(self):
+
+        # This method always runs on the event loop thread, so the
+        # `asyncio` objects it creates are bound to the right loop.
+
+        if self._client_lock is None:
+            self._client_lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+
+        async with self._client_lock:
+
+            if self._client is None:
+
+                session = aioboto3.Session(
+                    aws_access_key_id=self._aws_access_key_id,
+                    aws_secret_access_key=self._aws_secret_access_key,
+                    region_name=self._region_name)
+
+                config = AioConfig(
+                    max_pool_connections=self._max_pool_connections,
+                    retries={
+                        'max_attempts': self._max_retry_attempts,
+                        'mode': self._retry_mode
+                    })
+
+                exit_stack = contextlib.AsyncExitStack()
+
+                self._client = await exit_stack.enter_async_context(
+                    session.client(
+                        's3', endpoint_url=self._endpoint_url,
+                        config=config))
+
+                self._exit_stack = exit_stack
+
+                _logger.info(
+                    f'Created S3 client with connection pool size '
+                    f'{self._max_pool_connections}, maximum '
+                    f'{self._max_concurrent_requests} concurrent requests, '
+                    f'and maximum {self._max_retry_attempts} retry '
+                    f'attempts.')
+
+            return self._client
+
+
+    async def _read_object(self, client, bucket_name, object_key):
+
+        async with self._semaphore:
+
+            start_time = time.perf_counter()
+
+            response = await client.get_object(
+                Bucket=bucket_name, Key=object_key)
+
+            async with response['Body'] as body:
+                data = await body.read()
+
+            self._object_latencies.record(time.perf_counter() - start_time)
+
+            return data
+
+
+    def close(self, timeout=None):
+
+        """
+        Closes this reader.
+
+        Closing a reader closes its S3 client and stops its event loop.
+        A closed reader cannot read objects.
+        """
+
+        with self._lock:
+
+            if self._closed:
+                return
+
+            self._closed = True
+
+            loop = self._loop
+            thread = self._thread
+
+        if loop is not None:
+
+            future = asyncio.run_coroutine_threadsafe(
+                self._close_client(), loop)
+
+            try:
+                future.result(timeout)
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join(timeout)
+                loop.close()
+
+
+    async def _close_client(self):
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            self._client = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _run_event_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
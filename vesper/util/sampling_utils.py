@@ -0,0 +1,69 @@
+"""Utility functions pertaining to random sampling."""
+
+
+import numpy as np
+
+
+def allocate_sample(population_sizes, sample_size, rng=None):
+    
+    """
+    Allocates a simple random sample among parts of a population.
+    
+    This function supports drawing a simple random sample (i.e. a
+    sample drawn without replacement in which every subset of the
+    population of the sample size is equally likely) from a population
+    that is partitioned into parts, one part at a time. It computes how
+    many of the sampled items fall in each part, so that a caller can
+    then sample each part independently, without ever holding the
+    entire population in memory. This is how, for example, the tag and
+    untag clips commands select random samples of clips one date range
+    at a time.
+    
+    The size of the sample of each part is drawn from the appropriate
+    hypergeometric distribution, conditioned on the sizes of the
+    samples of the preceding parts.
+    
+    Parameters
+    ----------
+    population_sizes : sequence of int
+        the sizes of the parts of the population.
+    sample_size : int
+        the size of the sample. If this is at least the total size of
+        the population, the entire population is sampled.
+    rng : NumPy `Generator` or None
+        the random number generator to use, or `None` to use a new
+        generator.
+        
+    Returns
+    -------
+    list of int
+        the size of the sample of each part.
+    """
+    
+    if rng is None:
+        rng = np.random.default_rng()
+        
+    remaining_population_size = sum(population_sizes)
+    remaining_sample_size = min(sample_size, remaining_population_size)
+    
+    sample_sizes = []
+    
+    for size in population_sizes:
+        
+        if remaining_sample_size == 0:
+            part_sample_size = 0
+            
+        elif remaining_sample_size == remaining_population_size:
+            part_sample_size = size
+            
+        else:
+            part_sample_size = int(rng.hypergeometric(
+                size, remaining_population_size - size,
+                remaining_sample_size))
+            
+        sample_sizes.append(part_sample_size)
+        
+        remaining_population_size -= size
+        remaining_sample_size -= part_sample_size
+        
+    return sample_sizes
@@ -0,0 +1,133 @@
+"""
+Utility functions pertaining to SQLite databases.
+
+A *performance profile* is a named set of SQLite PRAGMA settings that
+Vesper applies to each connection to an SQLite archive database when
+the connection is opened. The profiles are:
+
+Default
+    No PRAGMA settings, i.e. SQLite's stock settings: a rollback
+    journal, no memory mapping, a 2 MB page cache, `synchronous=FULL`,
+    and temporary tables and indices stored in files. This is the
+    default profile, since it works for any archive database.
+
+Performance
+    Opt-in settings that substantially speed up archive writes (for example
+    clip insertion during detection) and large reads (for example clip
+    calendar and clip album queries):
+
+    * `journal_mode=WAL`: write-ahead logging, which makes commits much
+      cheaper and allows readers to proceed concurrently with a
+      writer. Unlike the other settings, the journal mode is persistent,
+      i.e. it is stored in the database file.
+
+    * `synchronous=NORMAL`: sync the write-ahead log only at
+      checkpoints rather than at every commit. A database in WAL mode
+      with this setting cannot be corrupted by an application crash or
+      power failure, though a power failure may roll back the most
+      recent transactions.
+
+    * `cache_size=-65536`: a 64 MB page cache per connection.
+
+    * `mmap_size=268435456`: memory-map up to 256 MB of the database.
+
+    * `temp_store=MEMORY`: store temporary tables and indices (for
+      example for sorts that cannot use an index) in memory.
+
+    * `busy_timeout=30000`: wait up to 30 seconds for a lock held by
+      another connection rather than failing immediately.
+
+The `VESPER_ARCHIVE_DATABASE_SQLITE_PROFILE` setting selects the
+profile of an archive, and the `VESPER_ARCHIVE_DATABASE_SQLITE_PRAGMAS`
+setting can override or add to the settings of the profile. For a
+read-only archive, Vesper omits any `journal_mode` setting, since
+changing the journal mode of a database writes to it.
+
+Note that since the write-ahead log and its index are stored in files
+alongside the database file, the directory containing a WAL-mode
+database must be writable, even if the database is only read. Use the
+"Default" profile for an archive database whose directory is not
+writable, for example one on read-only media. Note also that SQLite's
+documentation recommends against WAL mode for databases on network
+file systems.
+"""
+
+
+DEFAULT_PROFILE_NAME = 'Default'
+
+_PROFILES = {
+
+    'Default': {},
+
+    'Performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+
+}
+
+PROFILE_NAMES = tuple(_PROFILES.keys())
+
+
+def get_pragmas(
+        profile_name=DEFAULT_PROFILE_NAME, overrides=None, read_only=False):
+
+    """
+    Gets the PRAGMA settings of the specified performance profile.
+
+    Parameters
+    ----------
+    profile_name : str
+        the name of the profile.
+    overrides : dict or None
+        mapping from PRAGMA names to values, overriding or adding to
+        the settings of the profile.
+    read_only : bool
+        `True` if and only if the database is read-only. If `True`,
+        any `journal_mode` setting is omitted from the result.
+
+    Returns
+    -------
+    dict
+        mapping from PRAGMA names to values.
+
+    Raises
+    ------
+    ValueError
+        if there is no profile with the specified name.
+    """
+
+    try:
+        pragmas = dict(_PROFILES[profile_name])
+    except KeyError:
+        names = ', '.join(f'"{n}"' for n in PROFILE_NAMES)
+        raise ValueError(
+            f'Unrecognized SQLite performance profile "{profile_name}". '
+            f'Recognized profiles are {names}.')
+
+    if overrides is not None:
+        pragmas.update(overrides)
+
+    if read_only:
+        pragmas.pop('journal_mode', None)
+
+    return pragmas
+
+
+def get_init_command(pragmas):
+
+    """
+    Gets an SQLite connection initialization command for the specified
+    PRAGMA settings.
+
+    The command is a sequence of semicolon-separated PRAGMA statements,
+    suitable as the value of the "init_command" option of a Django
+    SQLite database.
+    """
+
+    return ';'.join(
+        f'PRAGMA {name}={value}' for name, value in pragmas.items())
@@ -0,0 +1,95 @@
+from io import BytesIO
+
+import numpy as np
+import soundfile
+
+from vesper.tests.test_case import TestCase
+from vesper.util.bunch import Bunch
+from vesper.util.clip_audio_encoder import (
+    ClipAudioEncoder, ClipAudioEncoderError)
+import vesper.util.audio_file_utils as audio_file_utils
+import vesper.util.clip_audio_encoder as clip_audio_encoder
+
+
+_SAMPLE_RATE = 24000
+
+
+def _create_samples(clip_id):
+    samples = np.arange(1000 * clip_id, dtype='int64') * 37 % 65536 - 32768
+    return samples.astype('<i2')
+
+
+def _create_wave_file_contents(samples):
+    buffer = BytesIO()
+    audio_file_utils.write_wave_file(
+        buffer, samples.reshape((1, -1)), _SAMPLE_RATE)
+    return buffer.getvalue()
+
+
+class _ClipManager:
+
+    """Clip manager that creates clip audio and counts clips read."""
+
+    def __init__(self):
+        self.num_clips_read = 0
+
+    def get_audio_file_contents(self, clips):
+        self.num_clips_read += len(clips)
+        return [
+            _create_wave_file_contents(_create_samples(c.id)) for c in clips]
+
+
+class ClipAudioEncoderTests(TestCase):
+
+
+    def test_encode_audio_file_contents(self):
+
+        samples = _create_samples(3)
+        contents = _create_wave_file_contents(samples)
+
+        # WAVE
+        audio = clip_audio_encoder.encode_audio_file_contents(
+            contents, 'wave')
+        self.assertEqual(audio, contents)
+
+        # FLAC
+        audio = clip_audio_encoder.encode_audio_file_contents(
+            contents, 'flac')
+        decoded, sample_rate = soundfile.read(BytesIO(audio), dtype='int16')
+        self.assertEqual(sample_rate, _SAMPLE_RATE)
+        self.assertTrue(np.array_equal(decoded, samples))
+
+        # delta-zlib, including difference wraparound
+        audio = clip_audio_encoder.encode_audio_file_contents(
+            contents, 'delta-zlib')
+        decoded, sample_rate = clip_audio_encoder.decode_delta_zlib(audio)
+        self.assertEqual(sample_rate, _SAMPLE_RATE)
+        self.assertTrue(np.array_equal(decoded, samples))
+
+
+    def test_get_encoded_audios(self):
+
+        clip_manager = _ClipManager()
+        encoder = ClipAudioEncoder(clip_manager)
+        clips = [Bunch(id=i) for i in (1, 2, 3)]
+
+        audios = encoder.get_encoded_audios(clips, 'delta-zlib')
+        self.assertEqual(len(audios), 3)
+        self.assertEqual(clip_manager.num_clips_read, 3)
+
+        for clip, audio in zip(clips, audios):
+            samples, _ = clip_audio_encoder.decode_delta_zlib(audio)
+            self.assertTrue(np.array_equal(samples, _create_samples(clip.id)))
+
+        # Only clip 4 should be read, since the others are cached.
+        clips.append(Bunch(id=4))
+        cached_audios = encoder.get_encoded_audios(clips, 'delta-zlib')
+        self.assertEqual(cached_audios[:3], audios)
+        self.assertEqual(clip_manager.num_clips_read, 4)
+
+
+    def test_bad_encoding_error(self):
+        encoder = ClipAudioEncoder(_ClipManager())
+        self.assert_raises(
+            ClipAudioEncoderError, encoder.get_encoded_audios,
+            [Bunch(id=1)], 'mp3')
@@ -0,0 +1,131 @@
+from pathlib import Path
+import tempfile
+
+import numpy as np
+
+from vesper.tests.test_case import TestCase
+from vesper.util.bunch import Bunch
+from vesper.util.clip_spectrogram_manager import (
+    ClipSpectrogramManager, ClipSpectrogramManagerError)
+import vesper.util.clip_spectrogram_manager as clip_spectrogram_manager
+
+
+_SETTINGS = {
+    'computation': {
+        'window': {'type': 'Hann', 'size': .005},
+        'hopSize': 50,
+        'referencePower': 1e-10
+    },
+    'display': {
+        'powerRange': [10, 100]
+    }
+}
+
+
+class _ClipManager:
+
+    """Clip manager that generates clip samples and counts requests."""
+
+    def __init__(self):
+        self.num_requests = 0
+
+    def get_samples(self, clip):
+        self.num_requests += 1
+        phases = 2 * np.pi * 1000 * np.arange(clip.length) / clip.sample_rate
+        return np.round(10000 * np.sin(phases)).astype('<i2')
+
+
+class ClipSpectrogramManagerTests(TestCase):
+
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._clip_manager = _ClipManager()
+        self._manager = ClipSpectrogramManager(
+            self._clip_manager, Path(self._temp_dir.name))
+
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+
+    def test_compute_spectrogram(self):
+
+        sample_rate = 22050
+        clip = Bunch(id=1, length=2205, sample_rate=sample_rate)
+        samples = self._clip_manager.get_samples(clip)
+        settings = clip_spectrogram_manager._get_computation_settings(
+            _SETTINGS)
+
+        spectrogram = clip_spectrogram_manager.compute_spectrogram(
+            samples, sample_rate, settings)
+
+        # Window size is 110 samples, hop size is 55 samples, and DFT
+        # size is 128.
+        self.assertEqual(spectrogram.shape, (39, 65))
+
+        # Peak is in bin nearest 1000 Hz.
+        peak_bins = np.argmax(spectrogram, axis=1)
+        expected_bin = round(1000 / (sample_rate / 128))
+        self.assertTrue(np.all(peak_bins == expected_bin))
+
+
+    def test_encode_and_decode_spectrogram(self):
+
+        spectrogram = np.array([[0, 10, 55], [100, 110, 32.5]])
+
+        data = clip_spectrogram_manager.encode_spectrogram(
+            spectrogram, 'uint8', (10, 100))
+        self.assertEqual(len(data), 8 + 6)
+        decoded = clip_spectrogram_manager.decode_spectrogram(data, 'uint8')
+        expected = np.array([[0, 0, 128], [255, 255, 64]], dtype=np.uint8)
+        self.assertTrue(np.array_equal(decoded, expected))
+
+        data = clip_spectrogram_manager.encode_spectrogram(
+            spectrogram, 'float16')
+        self.assertEqual(len(data), 8 + 12)
+        decoded = clip_spectrogram_manager.decode_spectrogram(
+            data, 'float16')
+        self.assertTrue(np.array_equal(decoded, spectrogram))
+
+
+    def test_get_spectrograms(self):
+
+        clips = [
+            Bunch(id=i, length=2205, sample_rate=22050) for i in (1, 2)]
+
+        spectrograms = self._manager.get_spectrograms(clips, _SETTINGS)
+        self.assertEqual(len(spectrograms), 2)
+        self.assertEqual(self._clip_manager.num_requests, 2)
+
+        decoded = clip_spectrogram_manager.decode_spectrogram(
+            spectrograms[0], 'uint8')
+        self.assertEqual(decoded.shape, (39, 65))
+
+        # Second request should be served from cache.
+        cached_spectrograms = \
+            self._manager.get_spectrograms(clips, _SETTINGS)
+        self.assertEqual(cached_spectrograms, spectrograms)
+        self.assertEqual(self._clip_manager.num_requests, 2)
+
+        # Different encoding should not be served from cache.
+        self._manager.get_spectrograms(clips, _SETTINGS, 'float16')
+        self.assertEqual(self._clip_manager.num_requests, 4)
+
+
+    def test_get_spectrograms_errors(self):
+
+        clips = [Bunch(id=1, length=2205, sample_rate=22050)]
+
+        self.assert_raises(
+            ClipSpectrogramManagerError, self._manager.get_spectrograms,
+            clips, _SETTINGS, 'png')
+
+        self.assert_raises(
+            ClipSpectrogramManagerError, self._manager.get_spectrograms,
+            clips, {'computation': {}})
+
+        settings = dict(_SETTINGS, display={'powerRange': [100, 10]})
+        self.assert_raises(
+            ClipSpectrogramManagerError, self._manager.get_spectrograms,
+            clips, settings)
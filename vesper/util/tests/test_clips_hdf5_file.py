@@ -0,0 +1,113 @@
+from pathlib import Path
+import tempfile
+
+import h5py
+import numpy as np
+
+from vesper.tests.test_case import TestCase
+from vesper.util.clips_hdf5_file import ClipHdf5File, ColumnarClipWriter
+
+
+class ClipHdf5FileTests(TestCase):
+
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._file_path = Path(self._temp_dir.name) / 'Clips.h5'
+
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+
+    def test_columnar_layout(self):
+
+        clips = [_create_clip(i, 3 + i) for i in range(5)]
+
+        # Give some clips classifications.
+        clips[1]['classification'] = 'Call'
+        clips[3]['classification'] = 'Noise'
+        clips[4]['classification'] = 'Call'
+
+        with h5py.File(self._file_path, 'w') as f:
+            writer = ColumnarClipWriter(f.create_group('clips'))
+            writer.append(clips[:2])
+            writer.append([])
+
+            # The clips of the second batch are longer than those of
+            # the first, and only they have a "call_start_index" column.
+            for clip in clips[2:]:
+                clip['call_start_index'] = clip['clip_id'] * 10
+            writer.append(clips[2:])
+
+            writer.close()
+            self.assertEqual(writer.clip_count, 5)
+
+        file_ = ClipHdf5File(self._file_path)
+        self.assertEqual(file_.get_num_clips(), 5)
+        self.assertEqual(file_.get_sample_rate(), 24000.)
+
+        # Read all clips.
+        results = file_.read_clips()
+        self.assertEqual(len(results), 5)
+        for clip, result in zip(clips, results):
+            self._assert_clip(result, clip)
+
+        with h5py.File(self._file_path) as f:
+            group = f['clips']
+            self.assertEqual(group['samples'].shape, (5, 7))
+            self.assertEqual(
+                list(group['call_start_index']), [0, 0, 20, 30, 40])
+
+        # Read a subset of clips.
+        results = file_.read_clips(max_num_clips=3)
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self._assert_clip(result, clips[result.id])
+
+
+    def _assert_clip(self, result, clip):
+        self.assertEqual(result.id, clip['clip_id'])
+        self.assertTrue(np.array_equal(result.waveform, clip['samples']))
+        self.assertEqual(result.station, clip['station'])
+        self.assertEqual(result.microphone, clip['mic_output'])
+        self.assertEqual(result.detector, clip['detector'])
+        self.assertEqual(result.night, clip['date'])
+        self.assertEqual(result.start_time, clip['clip_start_time'])
+        self.assertEqual(result.original_sample_rate, clip['sample_rate'])
+        self.assertEqual(result.classification, clip.get('classification'))
+
+
+    def test_clip_datasets_layout(self):
+
+        clip = _create_clip(7, 4)
+        clip['classification'] = 'Call'
+
+        with h5py.File(self._file_path, 'w') as f:
+            dataset = f.create_dataset('/clips/00000007', data=clip['samples'])
+            for name, value in clip.items():
+                if name != 'samples':
+                    dataset.attrs[name] = value
+
+        file_ = ClipHdf5File(self._file_path)
+        self.assertEqual(file_.get_num_clips(), 1)
+        self.assertEqual(file_.get_sample_rate(), 24000.)
+
+        results = file_.read_clips()
+        self.assertEqual(len(results), 1)
+        self._assert_clip(results[0], clip)
+
+
+def _create_clip(clip_id, length):
+    return {
+        'samples': np.arange(length, dtype='int16') + clip_id,
+        'clip_id': clip_id,
+        'station': f'Station {clip_id % 2}',
+        'mic_output': '21c',
+        'detector': 'Tseep',
+        'date': '2050-05-01',
+        'sample_rate': 24000.,
+        'clip_start_time': f'2050-05-02T02:00:{clip_id:02d}.000000Z',
+        'clip_start_index': clip_id * 1000,
+        'clip_length': length,
+    }
@@ -0,0 +1,72 @@
+from vesper.tests.test_case import TestCase
+from vesper.util.latency_histogram import LatencyHistogram
+
+
+class LatencyHistogramTests(TestCase):
+
+
+    def test_initializer(self):
+
+        h = LatencyHistogram((.1, .2, .5))
+        self.assertEqual(h.bin_edges, (.1, .2, .5))
+        self.assertEqual(h.counts, (0, 0, 0, 0))
+        self.assertEqual(h.count, 0)
+        self.assertIsNone(h.mean)
+        self.assertIsNone(h.max)
+        self.assertIsNone(h.get_percentile(50))
+
+
+    def test_initializer_errors(self):
+        self.assert_raises(ValueError, LatencyHistogram, ())
+        self.assert_raises(ValueError, LatencyHistogram, (.2, .1))
+        self.assert_raises(ValueError, LatencyHistogram, (.1, .1))
+
+
+    def test_record(self):
+
+        h = LatencyHistogram((.1, .2, .5))
+
+        for latency in (.05, .1, .15, .15, .3, 1):
+            h.record(latency)
+
+        self.assertEqual(h.counts, (1, 3, 1, 1))
+        self.assertEqual(h.count, 6)
+        self.assertAlmostEqual(h.mean, 1.75 / 6)
+        self.assertEqual(h.max, 1)
+
+
+    def test_get_percentile(self):
+
+        h = LatencyHistogram((.1, .2, .5))
+
+        for latency in (.05, .15, .15, .3):
+            h.record(latency)
+
+        self.assertEqual(h.get_percentile(25), .1)
+        self.assertEqual(h.get_percentile(50), .2)
+        self.assertEqual(h.get_percentile(75), .2)
+        self.assertEqual(h.get_percentile(100), .3)
+
+        h.record(2)
+        self.assertEqual(h.get_percentile(100), 2)
+
+
+    def test_get_stats(self):
+
+        h = LatencyHistogram((.1, .2))
+        h.record(.15)
+
+        stats = h.get_stats()
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(stats['counts'], [0, 1, 0])
+        self.assertEqual(stats['p50'], .15)
+        self.assertEqual(stats['max'], .15)
+
+
+    def test_clear(self):
+        h = LatencyHistogram((.1, .2))
+        h.record(.15)
+        h.clear()
+        self.assertEqual(h.counts, (0, 0, 0))
+        self.assertEqual(h.count, 0)
+        self.assertIsNone(h.max)
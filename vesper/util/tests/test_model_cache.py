@@ -0,0 +1,29 @@
+from vesper.tests.test_case import TestCase
+import vesper.util.model_cache as model_cache
+
+
+class ModelCacheTests(TestCase):
+
+
+    def test_get_model(self):
+
+        load_count = 0
+
+        def load():
+            nonlocal load_count
+            load_count += 1
+            return object()
+
+        key = ('test_get_model', 'one')
+        model = model_cache.get_model(key, load)
+        self.assertEqual(load_count, 1)
+
+        # Getting the model again should not reload it.
+        self.assertIs(model_cache.get_model(key, load), model)
+        self.assertEqual(load_count, 1)
+
+        # Getting a model with a different key should load it.
+        other_key = ('test_get_model', 'two')
+        other_model = model_cache.get_model(other_key, load)
+        self.assertIsNot(other_model, model)
+        self.assertEqual(load_count, 2)
@@ -0,0 +1,151 @@
+"""
+Unit tests for class `S3ObjectReader`.
+
+These tests read objects from a local moto S3 server rather than from
+AWS S3. They are skipped if moto is not installed.
+"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import unittest
+import warnings
+
+import boto3
+
+from vesper.tests.test_case import TestCase
+from vesper.util.s3_object_reader import S3ObjectReader, S3ObjectReaderError
+
+try:
+    from moto.server import ThreadedMotoServer
+except ImportError:
+    ThreadedMotoServer = None
+
+
+_REGION_NAME = 'us-east-1'
+_BUCKET_NAME = 'vesper-test'
+_OBJECT_COUNT = 20
+_CREDENTIALS = {
+    'aws_access_key_id': 'test',
+    'aws_secret_access_key': 'test',
+}
+
+
+def _get_object_key(i):
+    return f'Clips/Clip {i:03d}.wav'
+
+
+def _get_object_data(i):
+    return bytes([i % 256]) * (100 + i)
+
+
+@unittest.skipIf(ThreadedMotoServer is None, 'moto is not installed')
+class S3ObjectReaderTests(TestCase):
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        # Keep server from logging every request.
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+        cls._server = ThreadedMotoServer(port=0, verbose=False)
+        cls._server.start()
+        host, port = cls._server.get_host_and_port()
+        cls._endpoint_url = f'http://{host}:{port}'
+
+        s3 = boto3.client(
+            's3', region_name=_REGION_NAME, endpoint_url=cls._endpoint_url,
+            **_CREDENTIALS)
+        s3.create_bucket(Bucket=_BUCKET_NAME)
+        for i in range(_OBJECT_COUNT):
+            s3.put_object(
+                Bucket=_BUCKET_NAME, Key=_get_object_key(i),
+                Body=_get_object_data(i))
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._server.stop()
+
+
+    def setUp(self):
+        warnings.filterwarnings(
+            action='ignore', message='unclosed', category=ResourceWarning)
+        self._reader = self._create_reader()
+
+
+    def tearDown(self):
+        self._reader.close()
+
+
+    def _create_reader(self, **kwargs):
+        return S3ObjectReader(
+            region_name=_REGION_NAME, endpoint_url=self._endpoint_url,
+            **_CREDENTIALS, **kwargs)
+
+
+    def test_read_objects(self):
+
+        keys = [_get_object_key(i) for i in range(_OBJECT_COUNT)]
+
+        # Read twice to exercise client reuse.
+        for _ in range(2):
+            data = self._reader.read_objects(_BUCKET_NAME, keys)
+            expected = [_get_object_data(i) for i in range(_OBJECT_COUNT)]
+            self.assertEqual(data, expected)
+
+        self.assertEqual(self._reader.batch_latencies.count, 2)
+        self.assertEqual(
+            self._reader.object_latencies.count, 2 * _OBJECT_COUNT)
+
+
+    def test_read_no_objects(self):
+        self.assertEqual(self._reader.read_objects(_BUCKET_NAME, []), [])
+
+
+    def test_concurrent_callers(self):
+
+        reader = self._create_reader(
+            max_pool_connections=2, max_concurrent_requests=2)
+
+        def read(i):
+            keys = [_get_object_key(j) for j in range(i, _OBJECT_COUNT)]
+            return reader.read_objects(_BUCKET_NAME, keys)
+
+        try:
+
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(read, range(_OBJECT_COUNT)))
+
+            for i, data in enumerate(results):
+                expected = [
+                    _get_object_data(j) for j in range(i, _OBJECT_COUNT)]
+                self.assertEqual(data, expected)
+
+        finally:
+            reader.close()
+
+
+    def test_missing_object(self):
+        self.assert_raises(
+            Exception, self._reader.read_objects, _BUCKET_NAME,
+            ['Nonexistent.wav'])
+
+
+    def test_initializer_errors(self):
+        self.assert_raises(
+            ValueError, S3ObjectReader, max_pool_connections=0)
+        self.assert_raises(
+            ValueError, S3ObjectReader, max_concurrent_requests=0)
+
+
+    def test_closed_reader(self):
+        self._reader.close()
+        self.assert_raises(
+            S3ObjectReaderError, self._reader.read_objects, _BUCKET_NAME,
+            [_get_object_key(0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import numpy as np
+
+from vesper.tests.test_case import TestCase
+import vesper.util.sampling_utils as sampling_utils
+
+
+class SamplingUtilsTests(TestCase):
+
+
+    def test_allocate_sample(self):
+
+        allocate = sampling_utils.allocate_sample
+
+        cases = [
+            ([], 0, []),
+            ([], 5, []),
+            ([0, 3, 0, 2], 0, [0, 0, 0, 0]),
+            ([0, 3, 0, 2], 5, [0, 3, 0, 2]),
+            ([0, 3, 0, 2], 10, [0, 3, 0, 2]),
+        ]
+
+        for population_sizes, sample_size, expected in cases:
+            sample_sizes = allocate(population_sizes, sample_size)
+            self.assertEqual(sample_sizes, expected)
+
+        rng = np.random.default_rng(0)
+        population_sizes = [10, 0, 5, 20, 1]
+
+        for sample_size in range(37):
+            sample_sizes = allocate(population_sizes, sample_size, rng)
+            self.assertEqual(sum(sample_sizes), min(sample_size, 36))
+            for size, part_sample_size in \
+                    zip(population_sizes, sample_sizes):
+                self.assertTrue(0 <= part_sample_size <= size)
+
+
+    def test_allocate_sample_distribution(self):
+
+        # Each item should be sampled with probability equal to the
+        # sample size divided by the population size, so the expected
+        # size of the sample of each part is proportional to the size
+        # of the part.
+
+        rng = np.random.default_rng(0)
+        population_sizes = [10, 30, 60]
+        trial_count = 2000
+
+        totals = np.zeros(len(population_sizes))
+        for _ in range(trial_count):
+            totals += sampling_utils.allocate_sample(
+                population_sizes, 20, rng)
+
+        means = totals / trial_count
+        expected = np.array([2, 6, 12])
+        self.assertTrue(np.all(np.abs(means - expected) < .2))
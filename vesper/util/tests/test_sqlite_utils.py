@@ -0,0 +1,59 @@
+import sqlite3
+
+from vesper.tests.test_case import TestCase
+import vesper.util.sqlite_utils as sqlite_utils
+
+
+class SqliteUtilsTests(TestCase):
+
+
+    def test_get_pragmas(self):
+
+        pragmas = sqlite_utils.get_pragmas()
+        self.assertEqual(pragmas, {})
+
+        pragmas = sqlite_utils.get_pragmas('Default')
+        self.assertEqual(pragmas, {})
+
+        pragmas = sqlite_utils.get_pragmas('Performance')
+        self.assertEqual(pragmas['journal_mode'], 'WAL')
+        self.assertEqual(pragmas['synchronous'], 'NORMAL')
+
+        pragmas = sqlite_utils.get_pragmas(
+            'Performance', {'synchronous': 'FULL', 'foreign_keys': 'ON'})
+        self.assertEqual(pragmas['journal_mode'], 'WAL')
+        self.assertEqual(pragmas['synchronous'], 'FULL')
+        self.assertEqual(pragmas['foreign_keys'], 'ON')
+
+        # read-only database
+        pragmas = sqlite_utils.get_pragmas('Performance', read_only=True)
+        self.assertNotIn('journal_mode', pragmas)
+        self.assertEqual(pragmas['synchronous'], 'NORMAL')
+
+
+    def test_get_pragmas_errors(self):
+        self.assertRaises(ValueError, sqlite_utils.get_pragmas, 'Bobo')
+
+
+    def test_get_init_command(self):
+
+        pragmas = sqlite_utils.get_pragmas('Performance')
+        command = sqlite_utils.get_init_command(pragmas)
+
+        connection = sqlite3.connect(':memory:')
+
+        try:
+
+            for statement in command.split(';'):
+                connection.execute(statement)
+
+            def get(name):
+                return connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+            self.assertEqual(get('synchronous'), 1)
+            self.assertEqual(get('cache_size'), -65536)
+            self.assertEqual(get('temp_store'), 2)
+            self.assertEqual(get('busy_timeout'), 30000)
+
+        finally:
+            connection.close()